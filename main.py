@@ -46,6 +46,7 @@ def runModel(arg_list: list[str] | None = None) -> TemoaModel | None:
         output_path=options.output_path,
         mode_override=mode,
         silent=options.silent,
+        resume=options.resume,
     )
     result = ts.start()
     return result
@@ -74,6 +75,12 @@ def parse_args(arg_list: list[str] | None) -> argparse.Namespace:
     parser.add_argument(
         '-s', '--silent', help='Silent run.  No prompts.', action='store_true', dest='silent'
     )
+    parser.add_argument(
+        '--resume',
+        help='Resume a myopic run from the last window it completed.',
+        action='store_true',
+        dest='resume',
+    )
     parser.add_argument(
         '-d',
         '--debug',
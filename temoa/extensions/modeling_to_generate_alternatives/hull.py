@@ -24,7 +24,10 @@ jeff@westernspark.us
 https://westernspark.us
 Created on:  4/17/24
 
-A thin wrapper on Scipy's ConvexHull to make it more manageable
+A thin wrapper on Scipy's ConvexHull to make it more manageable.  The facets of each build are
+compared with those of the last build by their vertices, so only the normals of new facets are
+screened, and they are screened in blocks against a preallocated buffer of the directions seen so
+far with matrix products.
 """
 from logging import getLogger
 
@@ -35,7 +38,37 @@ from scipy.spatial import ConvexHull
 logger = getLogger(__name__)
 
 
+class VectorBuffer:
+    """A preallocated stack of row vectors which grows by doubling"""
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self._data = np.empty((capacity, dim))
+        self.size = 0
+
+    @property
+    def rows(self) -> np.ndarray:
+        """a view of the rows in the buffer"""
+        return self._data[: self.size]
+
+    def extend(self, rows: np.ndarray) -> None:
+        rows = np.atleast_2d(rows)
+        needed = self.size + len(rows)
+        if needed > len(self._data):
+            grown = np.empty((max(needed, 2 * len(self._data)), self._data.shape[1]))
+            grown[: self.size] = self.rows
+            self._data = grown
+        self._data[self.size : needed] = rows
+        self.size = needed
+
+    def __len__(self) -> int:
+        return self.size
+
+
 class Hull:
+    # the maximum number of elements of the similarity matrix of a block of candidate normals
+    # against the seen directions.  Sets the block size of the screening
+    screen_elements = 2**22
+
     def __init__(self, points: np.ndarray, **kwargs):
         """
         Build the initial hull from array of points
@@ -55,30 +88,35 @@ class Hull:
         self.volume = 0.0
 
         # containers to manage new and explored directions
-        self.seen_norms = None
-        self._valid_norms = None
+        self._seen_norms = VectorBuffer(self.dim)
+        self._valid_norms = VectorBuffer(self.dim)
+        # the facets (sorted vertex indices) of the last build, to pick out the new facets
+        self._facet_keys: np.ndarray | None = None
 
         self.tolerance = 5e-3  # minimum cosine dissimilarity
 
         # for tracking
         self.norms_checked = 0
         self.norms_rejected = 0
+        self.new_facets = 0  # the number of new facets in the last build
 
         self.good_points = None  # safe keeping in case we crash later
         self.all_points = points.copy()
         self.norm_index = 0  # pointer to the next new vector from the stack
         self.update()
 
+    @property
+    def seen_norms(self) -> np.ndarray:
+        """the directions seen so far"""
+        return self._seen_norms.rows
+
     @property
     def norms_available(self) -> int:
-        if self._valid_norms is None:
-            return 0
-        else:
-            return len(self._valid_norms) - self.norm_index
+        return len(self._valid_norms) - self.norm_index
 
     @property
     def norm_rejection_proportion(self) -> float:
-        return self.norms_rejected / self.norms_checked
+        return self.norms_rejected / self.norms_checked if self.norms_checked else 0.0
 
     def update(self):
         """
@@ -107,15 +145,22 @@ class Hull:
             logger.error(e)
             raise RuntimeError('Hull construction from vectors failed.  See log file')
 
-        # update the available norms from the new hull
-        equations = self.cv_hull.equations[:, 0:-1]
-        for norm in equations:
-            norm = norm / np.linalg.norm(norm)  # ensure it is a unit vector
-            if self.is_new_direction(norm):
-                if self._valid_norms is None:
-                    self._valid_norms = np.atleast_2d(norm)
-                else:
-                    self._valid_norms = np.vstack((self._valid_norms, norm))
+        # the point indices are stable as points are only added, so a facet that survives the
+        # rebuild has the same vertices.  Only the new facets can have new directions
+        simplices = np.ascontiguousarray(np.sort(self.cv_hull.simplices, axis=1))
+        facet_keys = simplices.view(np.dtype((np.void, simplices.itemsize * self.dim))).ravel()
+        if self._facet_keys is None:
+            new = np.ones(len(facet_keys), dtype=bool)
+        else:
+            new = ~np.isin(facet_keys, self._facet_keys)
+        self._facet_keys = facet_keys
+        self.new_facets = int(np.count_nonzero(new))
+        logger.debug('Hull has %d facets, %d new', len(facet_keys), self.new_facets)
+
+        # update the available norms from the new facets
+        norms = self.cv_hull.equations[new, 0:-1]
+        norms = norms / np.linalg.norm(norms, axis=1, keepdims=True)  # ensure unit vectors
+        self._valid_norms.extend(norms[self.screen_directions(norms)])
 
     def add_point(self, point: np.ndarray):
         if len(point) != self.dim:
@@ -125,10 +170,18 @@ class Hull:
                 len(point),
                 point,
             )
+        self.add_points(np.atleast_2d(point))
+
+    def add_points(self, points: np.ndarray):
+        """
+        add several points to the hull.  The hull is not rebuilt until update()
+        :param points: an array of points [points, hull dimension]
+        :return: None
+        """
         if self.all_points is None:
-            self.all_points = np.atleast_2d(point)
+            self.all_points = np.array(points)
         else:
-            self.all_points = np.vstack((self.all_points, point))
+            self.all_points = np.vstack((self.all_points, points))
 
     def get_norm(self) -> np.ndarray | None:
         """
@@ -136,10 +189,7 @@ class Hull:
         :return: a new norm vector
         """
         if self.norm_index < len(self._valid_norms):
-            if np.ndim(self._valid_norms) == 1:  # only one on the stack
-                res = self._valid_norms
-            else:
-                res = self._valid_norms[self.norm_index, :]
+            res = self._valid_norms.rows[self.norm_index, :]
             self.norm_index += 1
             return res
         return None
@@ -147,7 +197,7 @@ class Hull:
     def get_all_norms(self) -> np.ndarray:
         """Get a matrix of all unused new vectors"""
         if self.norms_available > 0:
-            res = np.atleast_2d(self._valid_norms)[self.norm_index :, :]
+            res = self._valid_norms.rows[self.norm_index :, :].copy()
             self.norm_index = len(self._valid_norms)
             return res
         return np.array([])
@@ -157,14 +207,32 @@ class Hull:
         compare vector to all directions already processed
         :param vec: the new vector to consider
         :return: True if the new vector is a valid direction, False otherwise"""
-        self.norms_checked += 1
-        if self.seen_norms is None:
-            self.seen_norms = np.atleast_2d(vec)
-            return True
-        max_similarity = np.max(self.seen_norms.dot(vec))
-        if 1 - max_similarity < self.tolerance:
-            self.norms_rejected += 1
-            return False
-        else:
-            self.seen_norms = np.vstack((self.seen_norms, vec))
-            return True
+        return bool(self.screen_directions(np.atleast_2d(vec))[0])
+
+    def screen_directions(self, norms: np.ndarray) -> np.ndarray:
+        """
+        compare a batch of unit vectors to all directions already processed and to each other.  The
+        new directions are added to those processed.  The result is the same as checking the
+        vectors one at a time, in order
+        :param norms: the vectors to consider [vectors, hull dimension]
+        :return: a boolean array, True where the vector is a new direction
+        """
+        novel = np.ones(len(norms), dtype=bool)
+        block_size = min(256, self.screen_elements // max(len(self._seen_norms), 1))
+        block_size = max(16, block_size)
+        for start in range(0, len(norms), block_size):
+            block = norms[start : start + block_size]
+            block_novel = novel[start : start + len(block)]  # a view
+            if len(self._seen_norms):
+                max_similarity = np.max(block @ self._seen_norms.rows.T, axis=1)
+                block_novel &= 1 - max_similarity >= self.tolerance
+            # an earlier new direction in the block is seen by the later ones.  Only the vectors
+            # with a later one too similar to them need to be visited, in order
+            similar = np.triu(1 - block @ block.T < self.tolerance, k=1)
+            for i in np.flatnonzero(similar.any(axis=1)):
+                if block_novel[i]:
+                    block_novel[similar[i]] = False
+            self._seen_norms.extend(block[block_novel])
+        self.norms_checked += len(norms)
+        self.norms_rejected += len(norms) - int(np.count_nonzero(novel))
+        return novel
@@ -35,6 +35,7 @@ from logging import getLogger
 from multiprocessing import Queue
 from queue import Empty
 
+import numpy as np
 import pyomo.contrib.appsi as pyomo_appsi
 import pyomo.environ as pyo
 from pyomo.contrib.appsi.base import Results
@@ -44,9 +45,20 @@ from pyomo.dataportal import DataPortal
 # from temoa.extensions.modeling_to_generate_alternatives.worker import Worker
 from temoa.extensions.modeling_to_generate_alternatives.manager_factory import get_manager
 from temoa.extensions.modeling_to_generate_alternatives.mga_constants import MgaAxis, MgaWeighting
+from temoa.extensions.modeling_to_generate_alternatives.solve_engines import (
+    PERSISTENT_SOLVERS,
+    WarmStart,
+)
 from temoa.extensions.modeling_to_generate_alternatives.vector_manager import VectorManager
-from temoa.extensions.modeling_to_generate_alternatives.worker import Worker
+from temoa.extensions.modeling_to_generate_alternatives.worker import MgaJob, MgaResult, Worker
+from temoa.extensions.modeling_to_generate_alternatives.worker_pool import (
+    THREAD_OPTIONS,
+    PoolMonitor,
+    PoolSizingPolicy,
+    resident_memory,
+)
 from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.result_snapshot import CapacitySnapshot
 from temoa.temoa_model.run_actions import build_instance
 from temoa.temoa_model.table_writer import TableWriter
 from temoa.temoa_model.temoa_config import TemoaConfig
@@ -55,6 +67,9 @@ from temoa.temoa_model.temoa_rules import TotalCost_rule
 
 logger = getLogger(__name__)
 
+# the interval (seconds) at which the workers are checked while waiting on a result
+RESULT_WAIT_SECONDS = 5
+
 
 class MgaSequencer:
     def __init__(self, config: TemoaConfig):
@@ -82,6 +97,7 @@ class MgaSequencer:
 
         # get handle on solver instance
         # TODO:  Check that solver is a persistent solver
+        self.options = {}
         if self.config.solver_name == 'appsi_highs':
             self.opt = pyomo_appsi.solvers.highs.Highs()
             self.std_opt = pyo.SolverFactory('appsi_highs')
@@ -122,11 +138,37 @@ class MgaSequencer:
         self.iteration_limit = config.mga_inputs.get('iteration_limit', 20)
         self.time_limit_hrs = config.mga_inputs.get('time_limit_hrs', 12)
         self.cost_epsilon = config.mga_inputs.get('cost_epsilon', 0.05)
+        self.pool_policy = PoolSizingPolicy.from_options(config.mga_inputs)
+
+        # the workers may hold the model in a persistent solver and only swap the objective
+        self.persistent = config.mga_inputs.get('persistent_solver', False)
+        warm_start = config.mga_inputs.get('warm_start', WarmStart.DUAL.value)
+        try:
+            self.warm_start = WarmStart(warm_start)
+        except ValueError:
+            raise ValueError(
+                f'Unknown warm start {warm_start}.  Options are {[w.value for w in WarmStart]}'
+            )
+        if self.persistent and self.config.solver_name not in PERSISTENT_SOLVERS:
+            raise ValueError(
+                f'The persistent MGA solver requires one of {sorted(PERSISTENT_SOLVERS)}, '
+                f'not {self.config.solver_name}'
+            )
+        if (
+            self.persistent
+            and self.config.solver_name == 'gurobi'
+            and not pyo.SolverFactory('gurobi_persistent').available(exception_flag=False)
+        ):
+            logger.warning('gurobi_persistent is not available.  MGA will rebuild each solve')
+            self.persistent = False
 
         # internal records
         self.solve_records: list[tuple[Expression, Sequence[float]]] = []
         """(solve vector, resulting axis vector)"""
         self.solve_count = 0
+        self.job_count = 0
+        self.instance: TemoaModel | None = None
+        self.capacity_template: CapacitySnapshot | None = None
         self.orig_label = self.config.scenario
 
         # output handling
@@ -149,10 +191,23 @@ class MgaSequencer:
         # 5. Start the re-solve loop
 
         # 1. Load data
+        memory_at_start = resident_memory()
         hybrid_loader = HybridLoader(db_connection=self.con, config=self.config)
-        data_portal: DataPortal = hybrid_loader.load_data_portal(myopic_index=None)
+        data_portal: DataPortal | dict = hybrid_loader.load_data(myopic_index=None)
         instance: TemoaModel = build_instance(
-            loaded_portal=data_portal, model_name=self.config.scenario, silent=self.config.silent
+            loaded_portal=data_portal,
+            model_name=self.config.scenario,
+            silent=self.config.silent,
+            profile=self.config.profile_build,
+            profile_path=self.config.output_path / 'build_profile.csv',
+        )
+        self.instance = instance
+        # the footprint of the instance, which each worker will hold a copy of
+        memory_at_build = resident_memory()
+        instance_bytes = (
+            max(memory_at_build - memory_at_start, 0)
+            if memory_at_start and memory_at_build
+            else None
         )
 
         # 2. Base solve
@@ -165,7 +220,10 @@ class MgaSequencer:
         elapsed = toc - tic
         self.solve_count += 1
         logger.info(f'Initial solve time: {elapsed.total_seconds():.4f}')
-        status = res.solver.termination_condition
+        if isinstance(res, Results):
+            status = res.termination_condition
+        else:
+            status = res.solver.termination_condition
 
         logger.debug('Termination condition: %s', status.name)
         # if status != pyomo_appsi.base.TerminationCondition.optimal:
@@ -201,105 +259,79 @@ class MgaSequencer:
             cost_relaxation=self.cost_epsilon,
         )
 
-        # 5.  Set up the Workers
-
-        work_queue = Queue(5)  # restrict the queue to hold just 2 models in it max
-        result_queue = Queue(5)
-        log_queue = Queue(50)
-        # start the logging listener
-        # listener = Process(target=listener_process, args=(log_queue,))
-        # listener.start()
-        # make workers
+        # 5.  Set up the Workers.  Each gets a copy of the cost-capped instance when it starts and
+        #     is then sent only the objective coefficients for each solve
+        pool_size = self.pool_policy.size(self.config.solver_name, instance_bytes)
+        worker_options = dict(self.options)
+        if self.config.solver_name in THREAD_OPTIONS:
+            worker_options[THREAD_OPTIONS[self.config.solver_name]] = pool_size.solver_threads
+        work_queue = Queue(pool_size.queue_size)
+        result_queue = Queue()  # results are small and are taken as soon as they arrive
+        variable_keys = vector_manager.variable_keys()
+        aggregation = vector_manager.aggregation_matrix()
+        # the capacity keys of the instance, which are shared by the workers' copies
+        self.capacity_template = CapacitySnapshot.take(instance)
         workers = []
-        kwargs = {'solver_name': self.config.solver_name, 'solver_options': self.options}
-        num_workers = 6
-        for i in range(num_workers):
+        for _ in range(pool_size.workers):
             w = Worker(
-                model_queue=work_queue,
+                model=instance,
+                variable_keys=variable_keys,
+                aggregation=aggregation,
+                job_queue=work_queue,
                 results_queue=result_queue,
-                configurer=None,  # worker.worker_configurer,
-                log_root_name=__name__,
-                log_queue=log_queue,
-                log_level=logging.INFO,
-                **kwargs,
+                solver_name=self.config.solver_name,
+                solver_options=worker_options,
+                persistent=self.persistent,
+                warm_start=self.warm_start,
             )
             w.start()
             workers.append(w)
+        monitor = PoolMonitor()
         # workers now running and waiting for jobs...
 
         # 6.  Start the iterative solve process and let the manager run the show
-        instance_generator = vector_manager.instance_generator(self.config)
-        instance = next(instance_generator)
-        while not vector_manager.stop_resolving() and not self.internal_stop:
-            # print(
-            #     f'iter {self.solve_count}:',
-            #     f'vecs_avail: {vector_manager.input_vectors_available()}',
-            # )
-            logger.info('Putting an instance in the work queue')
-            try:
-                if instance != 'waiting':  # sentinel for waiting for more solves to be done
-                    # print('trying to load work queue')
-                    work_queue.put(instance, block=False)  # put a log on the fire, if room
-                    instance = next(instance_generator)
-            except queue.Full:
-                print('work queue is full')
-                pass
-            try:
-                next_result = result_queue.get()
-            except Empty:
-                next_result = None
-            if next_result is not None:
-                vector_manager.process_results(M=next_result)
-                self.process_solve_results(next_result)
-
-                self.solve_count += 1
-                print(self.solve_count)
-                if self.solve_count >= self.iteration_limit:
-                    self.internal_stop = True
-
-        # 7. Shut down the workers and then the logging queue
-        print('shutting it down')
-        for w in workers:
-            work_queue.put(None)
-        # print(f'work queue: {work_queue.qsize()}')
-        # print(f'result queue size: {result_queue.qsize()}')
-        # try flushing queues
-        # try:
-        #     while True:
-        #         work_queue.get_nowait()
-        #         print('popped work queue')
-        # except queue.Empty:
-        #     pass
-        # try:
-        #     while True:
-        #         result_queue.get_nowait()
-        #         print('popped result queue')
-        # except queue.Empty:
-        #     pass
-        # try:
-        #     while True:
-        #         log_queue.get_nowait()
-        # except queue.Empty:
-        #     log_queue.close()
-
-        for w in workers:
-            print(w.worker_number, w.is_alive())
-        for w in workers:
-            w.join()
-            print('worker wrapped up...')
-        for w in workers:
-            print(w.worker_number, w.is_alive())
-        # log_queue.put_nowait(None)  # sentinel to shut down the log listener
-        log_queue.close()
-        # log_queue.join_thread()
-        print('log queue closed')
-        work_queue.close()
-        # work_queue.join_thread()
-        print('work queue joined')
-        result_queue.close()
-        # result_queue.join_thread()
-        print('result queue joined')
-        # listener.join()
+        try:
+            vector_generator = vector_manager.coefficient_generator()
+            vector = next(vector_generator)
+            jobs_out = 0
+            while not vector_manager.stop_resolving() and not self.internal_stop:
+                # put a log on the fire while there is room
+                while isinstance(vector, np.ndarray):
+                    try:
+                        work_queue.put(
+                            MgaJob(job_id=self.job_count, coefficients=vector), block=False
+                        )
+                    except queue.Full:
+                        break
+                    self.job_count += 1
+                    jobs_out += 1
+                    monitor.record_depth(jobs_out)
+                    vector = next(vector_generator)
+                if not jobs_out:
+                    if vector is None:
+                        logger.info('The vector manager has no more vectors to solve')
+                    else:
+                        logger.info('No solves in progress to produce more vectors.  Stopping')
+                    break
+                next_result = self._next_result(result_queue, workers)
+                jobs_out -= 1
+                monitor.record_depth(jobs_out)
+                monitor.record_result(next_result)
+                if next_result.optimal:
+                    vector_manager.process_point(next_result.hull_point)
+                    self.process_solve_results(next_result)
+                    self.solve_count += 1
+                    if self.solve_count >= self.iteration_limit:
+                        self.internal_stop = True
+                else:
+                    logger.warning('MGA job %d did not solve to optimality', next_result.job_id)
+                if isinstance(vector, str):  # waiting on results, which may have made more vectors
+                    vector = next(vector_generator)
+        finally:
+            # 7. Shut down the workers
+            self._shut_down(workers, work_queue, result_queue)
+            monitor.report([w.worker_number for w in workers])
+            monitor.write_depth(self.config.output_path / 'mga_pool_depth.csv')
 
         # 8. Wrap it up
         vector_manager.finalize_tracker()
@@ -345,9 +377,54 @@ class MgaSequencer:
             self.opt.load_vars()
         return res.termination_condition == pyomo_appsi.base.TerminationCondition.optimal
 
-    def process_solve_results(self, instance):
+    def process_solve_results(self, result: MgaResult):
         # cheap label...
-        self.writer.write_capacity_tables(M=instance, iteration=self.solve_count)
+        snapshot = self.capacity_template.with_values(result.capacity)
+        self.writer.write_capacity_tables(
+            M=self.instance, iteration=self.solve_count, snapshot=snapshot
+        )
+
+    @staticmethod
+    def _next_result(result_queue: Queue, workers: list[Worker]) -> MgaResult:
+        """
+        Wait for the next result.  A worker that dies (e.g. is killed for memory) never answers
+        its job, so the workers are checked while waiting
+        :param result_queue: the queue of MgaResults
+        :param workers: the workers
+        :return: the result
+        """
+        while True:
+            try:
+                return result_queue.get(timeout=RESULT_WAIT_SECONDS)
+            except Empty:
+                dead = [w for w in workers if not w.is_alive()]
+                if dead:
+                    raise RuntimeError(
+                        'MGA worker(s) stopped while jobs were outstanding: '
+                        + ', '.join(f'{w.worker_number} (exit code {w.exitcode})' for w in dead)
+                    )
+
+    @staticmethod
+    def _shut_down(workers: list[Worker], work_queue: Queue, result_queue: Queue) -> None:
+        """Stop the workers, discarding the jobs not yet started and the results not yet taken"""
+        try:
+            while True:
+                work_queue.get_nowait()
+        except Empty:
+            pass
+        for _ in workers:
+            work_queue.put(None)
+        # a worker can't exit while its results are stuck in the queue
+        while any(w.is_alive() for w in workers):
+            try:
+                result_queue.get(timeout=0.1)
+            except Empty:
+                pass
+        for w in workers:
+            w.join()
+        work_queue.close()
+        result_queue.close()
+        logger.info('Shut down %d MGA workers', len(workers))
 
     def __del__(self):
         self.con.close()
@@ -0,0 +1,242 @@
+"""
+The engines that solve the resident model of an MGA worker with the objective of each job.  The
+rebuild engine makes a new pyomo objective for each job and passes the whole model to the solver.
+The persistent engines load the cost-capped model into the solver once and then change only the
+objective coefficients, so the solver warm-starts each solve from the basis of the last:
+- HiGHS (appsi_highs):  the model is compiled to matrix form and held by highspy, and the costs of
+  the axis variables are set directly from the coefficient vector
+- Gurobi (gurobi_persistent):  the model is held by pyomo's persistent interface and only the
+  objective is replaced
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from abc import ABC, abstractmethod
+from enum import Enum, unique
+from logging import getLogger
+
+import numpy as np
+from pyomo.core import Objective, quicksum
+from pyomo.core.base.var import VarData
+from pyomo.opt import SolverFactory, check_optimal_termination
+
+from temoa.temoa_model.highs_backend import CostUpdateHighs
+from temoa.temoa_model.matrix_model import MatrixModel
+from temoa.temoa_model.result_snapshot import CapacitySnapshot
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+# the solvers with a persistent engine
+PERSISTENT_SOLVERS = {'appsi_highs', 'gurobi'}
+
+
+@unique
+class WarmStart(Enum):
+    DUAL = 'dual'
+    """dual simplex from the last basis"""
+    PRIMAL = 'primal'
+    """primal simplex from the last basis, which stays primal feasible when only the costs change"""
+    NONE = 'none'
+    """discard the last basis before each solve"""
+
+
+# the solver options for each warm start
+_HIGHS_OPTIONS = {
+    WarmStart.DUAL: {'solver': 'simplex', 'simplex_strategy': 1},
+    WarmStart.PRIMAL: {'solver': 'simplex', 'simplex_strategy': 4},
+    WarmStart.NONE: {},
+}
+_GUROBI_OPTIONS = {
+    WarmStart.DUAL: {'Method': 1},
+    WarmStart.PRIMAL: {'Method': 0},
+    WarmStart.NONE: {},
+}
+
+
+class SolveEngine(ABC):
+    """
+    Solves a model with a sequence of objectives over a fixed list of its variables
+    """
+
+    def __init__(self, model: TemoaModel, variables: list[VarData]):
+        """
+        :param model: the cost-capped model, without an objective
+        :param variables: the variables of the objectives
+        """
+        self.model = model
+        self.variables = variables
+
+    @abstractmethod
+    def solve(self, coefficients: np.ndarray) -> bool:
+        """
+        Solve with an objective
+        :param coefficients: the objective coefficients, in the order of the variables
+        :return: True if the solve was optimal
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def variable_values(self) -> np.ndarray:
+        """the values of the objective variables in the last solution"""
+        raise NotImplementedError
+
+    @abstractmethod
+    def capacity_values(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """the capacity values of the last solution, see CapacitySnapshot.values()"""
+        raise NotImplementedError
+
+    def _replace_objective(self, coefficients: np.ndarray) -> None:
+        if self.model.component('obj') is not None:
+            self.model.del_component('obj')
+        self.model.obj = Objective(
+            expr=quicksum(c * v for c, v in zip(coefficients.tolist(), self.variables) if c)
+        )
+
+
+class RebuildEngine(SolveEngine):
+    """
+    Makes a new objective for each solve and passes the whole model to the solver
+    """
+
+    def __init__(
+        self,
+        model: TemoaModel,
+        variables: list[VarData],
+        solver_name: str,
+        solver_options: dict | None = None,
+    ):
+        super().__init__(model, variables)
+        self.opt = SolverFactory(solver_name)
+        if solver_options:
+            self.opt.options.update(solver_options)
+
+    def solve(self, coefficients: np.ndarray) -> bool:
+        self._replace_objective(coefficients)
+        return check_optimal_termination(self.opt.solve(self.model))
+
+    def variable_values(self) -> np.ndarray:
+        values = np.array([v.value for v in self.variables], dtype=float)
+        np.nan_to_num(values, copy=False, nan=0.0)
+        return values
+
+    def capacity_values(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return CapacitySnapshot.take(self.model).values()
+
+
+class GurobiPersistentEngine(RebuildEngine):
+    """
+    Holds the model in Gurobi and replaces only the objective between solves
+    """
+
+    def __init__(
+        self,
+        model: TemoaModel,
+        variables: list[VarData],
+        solver_options: dict | None = None,
+        warm_start: WarmStart = WarmStart.DUAL,
+    ):
+        options = _GUROBI_OPTIONS[warm_start] | (solver_options or {})
+        super().__init__(model, variables, 'gurobi_persistent', options)
+        self.warm_start = warm_start
+        self._replace_objective(np.ones(len(variables)))
+        self.opt.set_instance(self.model)
+
+    def solve(self, coefficients: np.ndarray) -> bool:
+        self._replace_objective(coefficients)
+        self.opt.set_objective(self.model.obj)
+        if self.warm_start == WarmStart.NONE:
+            # the persistent interface has no public reset of the basis
+            self.opt._solver_model.reset()
+        return check_optimal_termination(self.opt.solve(load_solutions=True))
+
+
+class HighsEngine(SolveEngine):
+    """
+    Holds the matrix form of the model in HiGHS and changes only the objective costs between solves
+    """
+
+    def __init__(
+        self,
+        model: TemoaModel,
+        variables: list[VarData],
+        solver_options: dict | None = None,
+        warm_start: WarmStart = WarmStart.DUAL,
+    ):
+        super().__init__(model, variables)
+        self.warm_start = warm_start
+        # an objective over all of the objective variables makes columns of them all
+        self._replace_objective(np.ones(len(variables)))
+        matrix = MatrixModel.from_instance(model)
+        model.del_component('obj')
+        column = {id(v): j for j, v in enumerate(matrix.variables)}
+        self.cols = np.array([column[id(v)] for v in variables], dtype=np.int32)
+        # the column of each capacity variable, -1 for those not in the matrix
+        self.capacity_cols = tuple(
+            np.array([column.get(id(vd), -1) for vd in var.values()], dtype=np.int64)
+            for var in (model.V_NewCapacity, model.V_Capacity, model.V_RetiredCapacity)
+        )
+        self.highs = CostUpdateHighs(
+            matrix, silent=True, options=_HIGHS_OPTIONS[warm_start] | (solver_options or {})
+        )
+        self._x: np.ndarray | None = None
+
+    def solve(self, coefficients: np.ndarray) -> bool:
+        if self.warm_start == WarmStart.NONE:
+            self.highs.highs.clearSolver()
+        solution = self.highs.solve(self.cols, coefficients)
+        self._x = np.nan_to_num(solution.x, nan=0.0)
+        return solution.optimal
+
+    def variable_values(self) -> np.ndarray:
+        return self._x[self.cols]
+
+    def capacity_values(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return tuple(np.where(cols >= 0, self._x[cols], 0.0) for cols in self.capacity_cols)
+
+
+def make_engine(
+    model: TemoaModel,
+    variables: list[VarData],
+    solver_name: str,
+    solver_options: dict | None = None,
+    persistent: bool = False,
+    warm_start: WarmStart = WarmStart.DUAL,
+) -> SolveEngine:
+    """
+    Make the engine for a worker
+    :param model: the cost-capped model, without an objective
+    :param variables: the variables of the objectives
+    :param solver_name: the solver name from the config
+    :param solver_options: options passed to the solver
+    :param persistent: use the persistent engine for the solver
+    :param warm_start: the warm start of the persistent engines
+    :return: the engine
+    """
+    if not persistent:
+        return RebuildEngine(model, variables, solver_name, solver_options)
+    match solver_name:
+        case 'appsi_highs':
+            return HighsEngine(model, variables, solver_options, warm_start)
+        case 'gurobi':
+            return GurobiPersistentEngine(model, variables, solver_options, warm_start)
+        case _:
+            raise ValueError(f'No persistent MGA engine for solver {solver_name}')
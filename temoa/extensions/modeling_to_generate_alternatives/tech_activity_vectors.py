@@ -31,11 +31,12 @@ from collections import defaultdict
 from logging import getLogger
 from pathlib import Path
 from queue import Queue
-from typing import Iterable
+from typing import Iterable, Iterator
 
 import numpy as np
 from matplotlib import pyplot as plt
 from pyomo.core import Expression, Var, value, Objective, quicksum
+from scipy.sparse import csr_matrix
 
 from definitions import PROJECT_ROOT
 from temoa.extensions.modeling_to_generate_alternatives.hull import Hull
@@ -84,6 +85,12 @@ class TechActivityVectors(VectorManager):
         # of the variable and indices in order...
         # {tech : {var_name : [indices, ...]}, ...}
         self.variable_index_mapping: dict[str, dict[str, list]] = {}
+        # the same, flattened in coefficient order:  the (var_name, index) of each variable
+        self._variable_keys: list[tuple[str, tuple]] = []
+        # sparse (axes x variables) matrix with a 1 where a variable belongs to an axis (category).
+        # Reduces a vector of variable values to a hull point and (transposed) spreads a hull
+        # direction over the variables as objective coefficients
+        self._aggregation: csr_matrix | None = None
 
         self.coefficient_vector_queue: Queue[np.ndarray] = Queue()
 
@@ -131,6 +138,23 @@ class TechActivityVectors(VectorManager):
             self.technology_size[tech] += 1
             self.variable_index_mapping[tech][self.base_model.V_FlowOutAnnual.name].append(idx)
         logger.debug('Catalogued %d Technology Variables', sum(self.technology_size.values()))
+        axes = []
+        for axis, cat in enumerate(self.category_mapping):
+            for tech in self.category_mapping[cat]:
+                for var_name, indices in self.variable_index_mapping[tech].items():
+                    self._variable_keys.extend((var_name, idx) for idx in indices)
+                    axes.extend([axis] * len(indices))
+        num_vars = len(axes)
+        self._aggregation = csr_matrix(
+            (np.ones(num_vars), (np.array(axes, dtype=np.int64), np.arange(num_vars))),
+            shape=(len(self.category_mapping), num_vars),
+        )
+
+    def variable_keys(self) -> list[tuple[str, tuple]]:
+        return self._variable_keys
+
+    def aggregation_matrix(self) -> csr_matrix:
+        return self._aggregation
 
     def random_model(self):
         new_model = self.base_model.clone()
@@ -146,18 +170,28 @@ class TechActivityVectors(VectorManager):
         Generate instances to solve.  Start with the basis vectors, then ...
         :return: a TemoaModel instance
         """
-        # traverse the basis vectors first
-        new_model = self.base_model.clone()
-        obj_vector = self._make_basis_objective_vector(new_model)
-        while obj_vector is not None:
-            new_model.obj = Objective(expr=obj_vector)
-            yield new_model
+        for coeffs in self.coefficient_generator():
+            if not isinstance(coeffs, np.ndarray):
+                yield coeffs  # the sentinels
+                continue
             new_model = self.base_model.clone()
-            obj_vector = self._make_basis_objective_vector(new_model)
+            new_model.obj = Objective(expr=self._objective_expression(new_model, coeffs))
+            yield new_model
+
+    def coefficient_generator(self) -> Iterator[np.ndarray | str | None]:
+        """
+        Generate the objective coefficients to solve with.  Start with the basis vectors, then ...
+        :return: coefficients in the order of variable_keys()
+        """
+        # traverse the basis vectors first
+        coeffs = self._next_basis_coefficients()
+        while coeffs is not None:
+            yield coeffs
+            coeffs = self._next_basis_coefficients()
         # if asking for more, we *should* have enough data to create a good hull now...
 
         while self.comleted_solves <= 2 * len(self.category_mapping) * 0.9:
-            yield 'waiting'  # sentinel that there are no currently available instances
+            yield 'waiting'  # sentinel that there are no currently available vectors
 
         if len(self.hull_points) < 1.5 * len(self.category_mapping):
             # we are at risk of not having enough solves to make a hull.  We should have 2x category_mapping
@@ -173,14 +207,11 @@ class TechActivityVectors(VectorManager):
 
         logger.info('Generating hull points')
         self.regenerate_hull()
-        # now we can run until told to quit or fail to make a new vector
+        # now we can run until told to quit.  When all the directions of the hull have been used,
+        # wait for more results, which may add new facets
         while True:
-            new_model = self.base_model.clone()
-            v = self._next_objective_vector(M=new_model)
-            if v is None:
-                yield None
-            new_model.obj = Objective(expr=v)
-            yield new_model
+            coeffs = self._next_coefficients()
+            yield 'waiting' if coeffs is None else coeffs
 
     def process_results(self, M: TemoaModel):
         """
@@ -188,29 +219,26 @@ class TechActivityVectors(VectorManager):
         :param M:
         :return: None
         """
-        self.comleted_solves += 1
-        res = []
-        for cat in self.category_mapping:
-            element = 0
-            for tech in self.category_mapping[cat]:
-                for var_name in self.variable_index_mapping[tech]:
-                    model_var = M.find_component(var_name)
-                    if not isinstance(model_var, Var):
-                        raise RuntimeError('hooked a bad fish')
-                    element += sum(
-                        value(model_var[idx]) for idx in self.variable_index_mapping[tech][var_name]
-                    )
-            res.append(element)
+        values = np.fromiter((value(v) for v in self.var_vector(M)), dtype=float)
+        hull_point = self._aggregation @ values
+        self.process_point(hull_point)
+        return hull_point.tolist()
 
+    def process_point(self, point: np.ndarray):
+        """
+        add the axis totals of a solve to the hull points
+        :param point: the totals by category
+        :return: None
+        """
+        self.comleted_solves += 1
         # add it to the points
-        hull_point = np.array(res)
+        hull_point = np.asarray(point, dtype=float)
         if self.hull_points is None:
             self.hull_points = np.atleast_2d(hull_point)
         else:
             self.hull_points = np.vstack((self.hull_points, hull_point))
         if self.hull_monitor:
             self.tracker()
-        return res
 
     def stop_resolving(self) -> bool:
         pass
@@ -222,9 +250,8 @@ class TechActivityVectors(VectorManager):
     def group_members(self, group) -> list[str]:
         return self.category_mapping.get(group, [])
 
-    # noinspection PyTypeChecker
-    def _make_basis_objective_vector(self, M: TemoaModel) -> Iterable[Expression] | None:
-        """generator for basis vectors which will be the coefficients in the obj expression in the basis solves"""
+    def _next_basis_coefficients(self) -> np.ndarray | None:
+        """the next of the basis vectors, which are the coefficients in the basis solves"""
         if self.basis_coefficients.empty():
             return None
         try:
@@ -232,61 +259,54 @@ class TechActivityVectors(VectorManager):
         except queue.Empty:
             return None
 
-        # now we need to roll out a vector of the variables and pair them with coefficients...
-        vars = self.var_vector(M)
-
         # verify a unit vector
         err = abs(abs(sum(coeffs)) - 1)
 
         assert err < 1e-6, 'some problem with unit vector'
-        expr = sum(c * v for v, c in zip(vars, coeffs) if c != 0)
-        return expr
+        return coeffs
 
-    def _next_objective_vector(self, M: TemoaModel) -> Expression | None:
+    def _next_coefficients(self) -> np.ndarray | None:
         if self.coefficient_vector_queue.qsize() <= 3:
-            print('running low...refreshing the vectors')
             logger.info('running low...refreshing the vectors')
             self.regenerate_hull()
         if not self.coefficient_vector_queue or self.input_vectors_available() == 0:
             return None
         vector = self.coefficient_vector_queue.get()
-        # print(vector)
         # translate the norm vector into coefficients
-        coeffs = []
-        for idx, cat in enumerate(self.category_mapping):
-            for tech in self.category_mapping[cat]:
-                reps = self.technology_size[tech]
-                element = [
-                    vector[idx],
-                ] * reps
-                coeffs.extend(element)
-        coeffs = np.array(coeffs)
+        coeffs = self._aggregation.T @ vector
         coeffs /= np.sum(coeffs)  # normalize
+        return coeffs
 
+    def _objective_expression(self, M: TemoaModel, coeffs: np.ndarray) -> Expression:
+        """the objective expression of the coefficients over the variables of a model"""
         obj_vars = self.var_vector(M)
-
         assert len(obj_vars) == len(coeffs)
-        return sum(c * v for v, c in zip(obj_vars, coeffs))
+        return quicksum(c * v for v, c in zip(obj_vars, coeffs) if c != 0)
 
     def var_vector(self, M: TemoaModel) -> list[Var]:
         """Produce a properly sequenced array of variables from the current model for use in obj vector"""
-        res = []
-        for cat in self.category_mapping:
-            for tech in self.category_mapping[cat]:
-                for var_name in self.variable_index_mapping[tech]:
-                    var = M.find_component(var_name)
-                    if not isinstance(var, Var):
-                        raise RuntimeError(
-                            'Failed to retrieve a named variable from the model: %s', var_name
-                        )
-                    for idx in self.variable_index_mapping[tech][var_name]:
-                        res.append(var[idx])
-        return res
+        model_vars = {}
+        for var_name in {var_name for var_name, _ in self._variable_keys}:
+            var = M.find_component(var_name)
+            if not isinstance(var, Var):
+                raise RuntimeError(
+                    'Failed to retrieve a named variable from the model: %s', var_name
+                )
+            model_vars[var_name] = var
+        return [model_vars[var_name][idx] for var_name, idx in self._variable_keys]
 
     def regenerate_hull(self):
-        """make the hull..."""
-        logger.debug('Generating the cvx hull from %d points', len(self.hull_points))
-        self.hull = Hull(self.hull_points)
+        """make the hull, or update it with the new points, and queue the new directions"""
+        if self.hull is None:
+            logger.debug('Generating the cvx hull from %d points', len(self.hull_points))
+            self.hull = Hull(self.hull_points)
+        else:
+            num_points = len(self.hull.all_points)
+            if num_points == len(self.hull_points):
+                return  # no new points, so no new directions
+            logger.debug('Updating the cvx hull with %d points', len(self.hull_points) - num_points)
+            self.hull.add_points(self.hull_points[num_points:])
+            self.hull.update()
         fresh_vecs = self.hull.get_all_norms()
         np.random.shuffle(fresh_vecs)
         print(f'   made {len(fresh_vecs)} fresh vectors')
@@ -332,7 +352,8 @@ class TechActivityVectors(VectorManager):
         return q
 
     def tracker(self):
-        if len(self.hull_points) > 10:
+        # a hull needs at least one more point than its dimensions
+        if len(self.hull_points) > max(10, self.hull_points.shape[1]):
             hull = Hull(self.hull_points)
             volume = hull.volume
             logger.info(f'Tracking hull at {volume}')
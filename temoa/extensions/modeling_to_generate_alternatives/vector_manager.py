@@ -31,6 +31,7 @@ from collections.abc import Iterator, Iterable
 
 import numpy as np
 from pyomo.environ import Expression, Var, quicksum
+from scipy.sparse import csr_matrix
 
 from temoa.temoa_model.temoa_model import TemoaModel
 
@@ -90,3 +91,29 @@ class VectorManager(ABC):
     @abstractmethod
     def process_results(self, M: TemoaModel):
         raise NotImplementedError('the manager subclass must implement process_results')
+
+    @abstractmethod
+    def variable_keys(self) -> list[tuple[str, tuple]]:
+        """The (variable name, index) of the variables in the objective, in coefficient order"""
+        raise NotImplementedError('the manager subclass must implement variable_keys')
+
+    @abstractmethod
+    def aggregation_matrix(self) -> csr_matrix:
+        """
+        The sparse (hull axes x variables) matrix that reduces the values of the variables in
+        variable_keys() to a hull point
+        """
+        raise NotImplementedError('the manager subclass must implement aggregation_matrix')
+
+    @abstractmethod
+    def coefficient_generator(self) -> Iterator[np.ndarray | str | None]:
+        """
+        generator for the objective coefficients of the solves, in the order of variable_keys().
+        Yields 'waiting' while more results are needed to make new vectors and None when done
+        """
+        raise NotImplementedError('the manager subclass must implement coefficient_generator')
+
+    @abstractmethod
+    def process_point(self, point: np.ndarray):
+        """Take in the hull point (axis totals) of a solve"""
+        raise NotImplementedError('the manager subclass must implement process_point')
@@ -121,9 +121,13 @@ class WarmStarter:
 
         # 1. Load data
         hybrid_loader = HybridLoader(db_connection=self.con, config=self.config)
-        data_portal: DataPortal = hybrid_loader.load_data_portal(myopic_index=None)
+        data_portal: DataPortal | dict = hybrid_loader.load_data(myopic_index=None)
         instance: TemoaModel = build_instance(
-            loaded_portal=data_portal, model_name=self.config.scenario, silent=self.config.silent
+            loaded_portal=data_portal,
+            model_name=self.config.scenario,
+            silent=self.config.silent,
+            profile=self.config.profile_build,
+            profile_path=self.config.output_path / 'build_profile.csv',
         )
 
         # 2.  Instantiate the vector manager
@@ -24,27 +24,59 @@ jeff@westernspark.us
 https://westernspark.us
 Created on:  5/5/24
 
-Class to contain Workers that execute solves in separate processes
+Class to contain Workers that execute solves in separate processes.  Each worker holds its own copy
+of the cost-capped model for the life of the run.  Jobs carry only the coefficients of the
+objective over the axis variables, and results carry only the hull point and the capacity values,
+so no models are passed between processes after the workers start.  The solves are made by a
+SolveEngine, which may hold the model in a persistent solver.
 
 """
-from datetime import datetime
+
+from dataclasses import dataclass
+from logging import getLogger
 from multiprocessing import Process, Queue
+from time import perf_counter
 
-from pyomo.opt import SolverFactory, SolverResults, check_optimal_termination
+import numpy as np
+from pyomo.core import Var
+from scipy.sparse import csr_matrix
 
+from temoa.extensions.modeling_to_generate_alternatives.solve_engines import (
+    SolveEngine,
+    WarmStart,
+    make_engine,
+)
 from temoa.temoa_model.temoa_model import TemoaModel
 
+logger = getLogger(__name__)
+
+
+@dataclass
+class MgaJob:
+    """A solve of the resident model with an objective over the axis variables"""
+
+    job_id: int
+    coefficients: np.ndarray
+    """the objective coefficients, in the order of the worker's variable keys"""
+
 
-# logger = getLogger(__name__)
+@dataclass
+class MgaResult:
+    """The outcome of an MgaJob"""
 
+    job_id: int
+    worker_number: int
+    solve_seconds: float
+    busy_seconds: float = 0.0
+    """the time spent on the job, including setting the objective and reading the results"""
+    hull_point: np.ndarray | None = None
+    """the axis totals of the solution, None if the solve was not optimal"""
+    capacity: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
+    """the capacity values of the solution, see CapacitySnapshot.values()"""
 
-# def worker_configurer(log_root_name, log_queue, log_level):
-#     logger = logging.getLogger('.'.join((log_root_name, 'worker')))
-#     h = handlers.QueueHandler(log_queue)
-#     logger.addHandler(h)
-#     logger.setLevel(log_level)
-#     print(logger.name)
-#     return logger
+    @property
+    def optimal(self) -> bool:
+        return self.hull_point is not None
 
 
 class Worker(Process):
@@ -52,48 +84,108 @@ class Worker(Process):
 
     def __init__(
         self,
-        model_queue: Queue,
+        model: TemoaModel,
+        variable_keys: list[tuple[str, tuple]],
+        aggregation: csr_matrix,
+        job_queue: Queue,
         results_queue: Queue,
-        configurer,
-        log_root_name,
-        log_queue,
-        log_level,
-        **kwargs,
+        solver_name: str,
+        solver_options: dict | None = None,
+        persistent: bool = False,
+        warm_start: WarmStart = WarmStart.DUAL,
     ):
-        super(Worker, self).__init__()
-        # self.logger = configurer(log_root_name, log_queue, log_level)
+        """
+        Make a worker.  The model is passed to the worker process once, when it starts
+        :param model: the cost-capped model, without an objective
+        :param variable_keys: the (variable name, index) of the objective variables, in order
+        :param aggregation: the (hull axes x variables) matrix that sums variables into axes
+        :param job_queue: the source of MgaJobs.  None is the signal to stop
+        :param results_queue: the destination of the MgaResults
+        :param solver_name: the solver to use
+        :param solver_options: options passed to the solver
+        :param persistent: hold the model in the solver and change only the objective per job
+        :param warm_start: the warm start of the persistent solver
+        """
+        super().__init__()
         self.worker_number = Worker.worker_idx
         Worker.worker_idx += 1
-        self.model_queue: Queue = model_queue
+        self.model = model
+        self.variable_keys = variable_keys
+        self.aggregation = aggregation
+        self.job_queue: Queue = job_queue
         self.results_queue: Queue = results_queue
-        self.solver_name = kwargs['solver_name']
-        # self.solver_options = kwargs["solver_options"]
-        self.opt = SolverFactory(self.solver_name)  # , options=self.solver_options)
+        self.solver_name = solver_name
+        self.solver_options = solver_options or {}
+        self.persistent = persistent
+        self.warm_start = warm_start
+        self._variables: list | None = None
+        self._engine: SolveEngine | None = None
 
     def run(self):
-        # self.logger.info('Worker %d spun up', self.worker_number)
+        logger.debug('Worker %d spun up', self.worker_number)
         while True:
-            model: TemoaModel = self.model_queue.get()
-            if model is None:
-                print('received shutdown signal')
+            job: MgaJob | None = self.job_queue.get()
+            if job is None:
                 break
-            tic = datetime.now()
-            try:
-                # sleep(model)
-                res: SolverResults = self.opt.solve(model)
-            except Exception as e:
-                # self.logger.warning('Failed to solve model: %s... skipping', model.name)
-                # self.logger.warning('Exception: %s', e)
-                pass
-            toc = datetime.now()
-
-            good_solve = check_optimal_termination(res)
+            self.results_queue.put(self.solve(job))
+        logger.debug('Worker %d shut down', self.worker_number)
+
+    def _objective_variables(self) -> list:
+        if self._variables is None:
+            model_vars: dict[str, Var] = {}
+            res = []
+            for var_name, idx in self.variable_keys:
+                var = model_vars.get(var_name)
+                if var is None:
+                    var = model_vars[var_name] = self.model.find_component(var_name)
+                    if not isinstance(var, Var):
+                        raise RuntimeError(
+                            f'Failed to retrieve a named variable from the model: {var_name}'
+                        )
+                res.append(var[idx])
+            self._variables = res
+        return self._variables
+
+    def solve(self, job: MgaJob) -> MgaResult:
+        """
+        Solve the resident model with the objective of a job
+        :param job: the job
+        :return: the result
+        """
+        start = perf_counter()
+        tic = start
+        result = MgaResult(job.job_id, self.worker_number, 0.0)
+        # any failure is reported in the result, so the sequencer always gets an answer to a job
+        try:
+            if self._engine is None:
+                self._engine = make_engine(
+                    self.model,
+                    self._objective_variables(),
+                    self.solver_name,
+                    self.solver_options,
+                    persistent=self.persistent,
+                    warm_start=self.warm_start,
+                )
+            tic = perf_counter()
+            good_solve = self._engine.solve(job.coefficients)
+            result.solve_seconds = perf_counter() - tic
             if good_solve:
-                self.results_queue.put(model)
-                # self.logger.info('Worker %d solved a model in %0.2f minutes', self.worker_number, (toc - tic).total_seconds() / 60)
-                print(f'victory for worker {self.worker_number}')
-            # else:
-            #     status = res['Solver'].termination_condition
-            #     # self.logger.info('Worker %d did not solve.  Results status: %s', self.worker_number, status)
-
-        print('should be dying now...')
+                values = self._engine.variable_values()
+                hull_point = self.aggregation @ values
+                result.capacity = self._engine.capacity_values()
+                result.hull_point = hull_point
+        except Exception as e:  # noqa: BLE001  a failed job is reported, not fatal
+            logger.warning(
+                'Worker %d failed to solve job %d: %s', self.worker_number, job.job_id, e
+            )
+            if not result.solve_seconds:
+                result.solve_seconds = perf_counter() - tic
+        result.busy_seconds = perf_counter() - start
+        if result.optimal:
+            logger.debug(
+                'Worker %d solved job %d in %0.2f seconds',
+                self.worker_number,
+                job.job_id,
+                result.solve_seconds,
+            )
+        return result
@@ -0,0 +1,290 @@
+"""
+Sizing and monitoring of the MGA worker pool.  The number of workers is the smaller of what the
+CPUs can run (given the threads each solver uses) and what the available memory can hold (given
+the measured footprint of the model instance), subject to overrides in the MGA section of the
+config.  The monitor records the busy time of each worker and the number of jobs in flight (sent to
+the pool, but with results not yet processed) over the run and reports them at the end.  Idle
+workers with many jobs in flight point to the processing of the results as the bottleneck.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import csv
+import os
+from collections import defaultdict
+from dataclasses import dataclass
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+
+from temoa.extensions.modeling_to_generate_alternatives.worker import MgaResult
+
+logger = getLogger(__name__)
+
+# the threads used by one solve, unless set in the config
+SOLVER_THREADS = {'gurobi': 4, 'appsi_highs': 1, 'cbc': 1}
+# the solver option that sets the threads
+THREAD_OPTIONS = {'gurobi': 'Threads', 'appsi_highs': 'threads', 'cbc': 'threads'}
+# a worker holds its copy of the instance and the solver's copy of the problem, which is taken to
+# be of similar size
+MEMORY_PER_INSTANCE = 2.0
+
+_GB = 1024**3
+
+
+def available_cpus() -> int:
+    """the number of CPUs this process may run on"""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on all platforms
+        return os.cpu_count() or 1
+
+
+def available_memory() -> int | None:
+    """the physical memory available in bytes, None if it can't be determined"""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def resident_memory() -> int | None:
+    """the resident memory of this process in bytes, None if it can't be determined"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, IndexError, OSError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class PoolSize:
+    """The shape of the worker pool"""
+
+    workers: int
+    solver_threads: int
+    queue_size: int
+    """the number of jobs that may wait in the work queue"""
+    limited_by: str
+    """what set the number of workers:  cpu, memory or config"""
+
+
+class PoolSizingPolicy:
+    """
+    Decides the number of workers, the threads per solve and the size of the work queue
+    """
+
+    def __init__(
+        self,
+        num_workers: int | None = None,
+        max_workers: int | None = None,
+        solver_threads: int | None = None,
+        queue_size: int | None = None,
+        memory_per_worker: int | None = None,
+        memory_fraction: float = 0.8,
+    ):
+        """
+        Make a policy.  The optional settings are decided automatically when None
+        :param num_workers: a fixed number of workers
+        :param max_workers: an upper limit on the number of workers
+        :param solver_threads: the threads used by each solve
+        :param queue_size: the number of jobs that may wait in the work queue
+        :param memory_per_worker: the memory used by a worker in bytes.  The default is estimated
+        from the footprint of the instance
+        :param memory_fraction: the fraction of the available memory the workers may use
+        """
+        for name, setting in (
+            ('num_workers', num_workers),
+            ('max_workers', max_workers),
+            ('solver_threads', solver_threads),
+            ('queue_size', queue_size),
+        ):
+            if setting is not None and (not isinstance(setting, int) or setting < 1):
+                raise ValueError(f'{name} must be a positive integer: {setting}')
+        if not 0.0 < memory_fraction <= 1.0:
+            raise ValueError(f'memory_fraction must be in (0, 1]: {memory_fraction}')
+        self.num_workers = num_workers
+        self.max_workers = max_workers
+        self.solver_threads = solver_threads
+        self.queue_size = queue_size
+        self.memory_per_worker = memory_per_worker
+        self.memory_fraction = memory_fraction
+
+    @staticmethod
+    def from_options(mga_options: dict) -> 'PoolSizingPolicy':
+        """
+        Make the policy from the MGA section of the config
+        :param mga_options: the MGA options
+        :return: the policy
+        """
+        memory_per_worker = mga_options.get('memory_per_worker_gb')
+        return PoolSizingPolicy(
+            num_workers=mga_options.get('num_workers'),
+            max_workers=mga_options.get('max_workers'),
+            solver_threads=mga_options.get('solver_threads'),
+            queue_size=mga_options.get('queue_size'),
+            memory_per_worker=int(memory_per_worker * _GB) if memory_per_worker else None,
+            memory_fraction=float(mga_options.get('memory_fraction', 0.8)),
+        )
+
+    def size(
+        self,
+        solver_name: str,
+        instance_bytes: int | None,
+        cpus: int | None = None,
+        memory: int | None = None,
+    ) -> PoolSize:
+        """
+        Size the pool
+        :param solver_name: the solver the workers use
+        :param instance_bytes: the measured footprint of the model instance, if known
+        :param cpus: the CPUs available, default from the system
+        :param memory: the memory available in bytes, default from the system
+        :return: the size
+        """
+        cpus = available_cpus() if cpus is None else cpus
+        memory = available_memory() if memory is None else memory
+        threads = self.solver_threads or SOLVER_THREADS.get(solver_name, 1)
+
+        if self.num_workers:
+            workers, limited_by = self.num_workers, 'config'
+        else:
+            workers, limited_by = max(1, cpus // threads), 'cpu'
+            per_worker = self.memory_per_worker
+            if per_worker is None and instance_bytes:
+                per_worker = int(instance_bytes * MEMORY_PER_INSTANCE)
+            if per_worker and memory:
+                by_memory = max(1, int(memory * self.memory_fraction) // per_worker)
+                if by_memory < workers:
+                    workers, limited_by = by_memory, 'memory'
+            else:
+                logger.info('Memory available or per worker unknown.  Sizing MGA pool by CPU')
+            if self.max_workers and self.max_workers < workers:
+                workers, limited_by = self.max_workers, 'config'
+
+        size = PoolSize(
+            workers=workers,
+            solver_threads=threads,
+            # one job waiting for each worker keeps them busy without holding many vectors
+            queue_size=self.queue_size or workers,
+            limited_by=limited_by,
+        )
+        logger.info(
+            'MGA pool of %d workers (limited by %s) with %d solver threads each and queue size %d.'
+            '  CPUs: %d, memory available: %s, instance footprint: %s',
+            size.workers,
+            size.limited_by,
+            size.solver_threads,
+            size.queue_size,
+            cpus,
+            f'{memory / _GB:0.1f} GB' if memory else 'unknown',
+            f'{instance_bytes / _GB:0.2f} GB' if instance_bytes else 'unknown',
+        )
+        return size
+
+
+class PoolMonitor:
+    """
+    Records the work of the pool for a report on its utilization
+    """
+
+    def __init__(self):
+        self._start = perf_counter()
+        self.depth_samples: list[tuple[float, int]] = [(0.0, 0)]
+        """(seconds since start, jobs in flight) at each change"""
+        self.busy_seconds: dict[int, float] = defaultdict(float)
+        self.jobs: dict[int, int] = defaultdict(int)
+        self.failed_jobs = 0
+
+    @property
+    def elapsed(self) -> float:
+        return perf_counter() - self._start
+
+    def record_depth(self, in_flight: int) -> None:
+        """
+        Record the number of jobs queued, in progress or with results waiting to be processed
+        :param in_flight: the number of jobs
+        :return: None
+        """
+        if in_flight != self.depth_samples[-1][1]:
+            self.depth_samples.append((self.elapsed, in_flight))
+
+    def record_result(self, result: MgaResult) -> None:
+        self.busy_seconds[result.worker_number] += result.busy_seconds
+        self.jobs[result.worker_number] += 1
+        if not result.optimal:
+            self.failed_jobs += 1
+
+    def mean_depth(self, until: float | None = None) -> float:
+        """the time-weighted mean of the jobs in flight"""
+        until = self.elapsed if until is None else until
+        if until <= 0:
+            return 0.0
+        total = 0.0
+        ends = [t for t, _ in self.depth_samples[1:]] + [until]
+        for (t, depth), end in zip(self.depth_samples, ends):
+            total += depth * (min(end, until) - t)
+        return total / until
+
+    def report(self, workers: list[int]) -> None:
+        """
+        Log the utilization of the workers and the depth of the work
+        :param workers: the numbers of the workers in the pool
+        :return: None
+        """
+        elapsed = self.elapsed
+        logger.info(
+            'MGA pool: %d jobs (%d not optimal) in %0.1f seconds.  Jobs in flight: mean %0.1f, '
+            'max %d',
+            sum(self.jobs.values()),
+            self.failed_jobs,
+            elapsed,
+            self.mean_depth(elapsed),
+            max(depth for _, depth in self.depth_samples),
+        )
+        for worker in workers:
+            busy = self.busy_seconds.get(worker, 0.0)
+            logger.info(
+                '  worker %3d: %5d jobs, busy %8.1f s, idle %8.1f s (%3.0f%% utilized)',
+                worker,
+                self.jobs.get(worker, 0),
+                busy,
+                max(elapsed - busy, 0.0),
+                100 * busy / elapsed if elapsed else 0.0,
+            )
+
+    def write_depth(self, path: Path) -> None:
+        """
+        Write the jobs in flight over time to a csv file
+        :param path: the file
+        :return: None
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['seconds', 'jobs_in_flight'])
+            writer.writerows((f'{t:0.3f}', depth) for t, depth in self.depth_samples)
@@ -17,5 +17,28 @@ CREATE TABLE IF NOT EXISTS MyopicEfficiency
 -- for efficient searching by rtv:
 CREATE INDEX IF NOT EXISTS region_tech_vintage ON MyopicEfficiency (region, tech, vintage);
 
+-- the state of a myopic run after its last completed window, to resume the run from
+CREATE TABLE IF NOT EXISTS MyopicRunState
+(
+    scenario    text PRIMARY KEY,
+    fingerprint text,
+    state       text
+);
+-- the MyopicEfficiency table as of the last completed window of a run
+CREATE TABLE IF NOT EXISTS MyopicEfficiencyCheckpoint
+(
+    scenario    text,
+    base_year   integer,
+    region      text,
+    input_comm  text,
+    tech        text,
+    vintage     integer,
+    output_comm text,
+    efficiency  real,
+    lifetime    integer,
+
+    PRIMARY KEY (scenario, region, input_comm, tech, vintage, output_comm)
+);
+
 
 COMMIT;
\ No newline at end of file
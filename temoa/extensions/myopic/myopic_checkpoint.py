@@ -0,0 +1,161 @@
+"""
+The checkpoint of a myopic run, from which a failed or killed run can be resumed.  After each
+optimal window, the state of the sequencer (the last window solved and the windows remaining) and
+a copy of the MyopicEfficiency table are saved to the database, along with a fingerprint of the
+settings that determine the sequence of windows.  A resumed run checks the fingerprint and the
+remaining windows against its own, restores MyopicEfficiency and continues with the next window.
+
+The checkpoint is written in the same database (and transaction) as the results of the window, so
+it is never ahead of the results:  with pipelined writes it is saved by the background writer
+after the window's results and with an in-memory working database it is included in each backup.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import hashlib
+import json
+import sqlite3
+from dataclasses import asdict, dataclass
+from logging import getLogger
+
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+
+logger = getLogger(__name__)
+
+
+class ResumeError(RuntimeError):
+    """The myopic run cannot be resumed from the checkpoint in the database"""
+
+
+def run_fingerprint(scenario: str, view_depth: int, step_size: int, periods: list[int]) -> str:
+    """
+    A fingerprint of the settings that determine the windows of a myopic run
+    :param scenario: the scenario name
+    :param view_depth: the number of periods in view
+    :param step_size: the number of periods stepped
+    :param periods: the future periods of the database
+    :return: hex digest
+    """
+    settings = {
+        'scenario': scenario,
+        'view_depth': view_depth,
+        'step_size': step_size,
+        'periods': list(periods),
+    }
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class MyopicRunState:
+    """The progress of a myopic run after an optimal window"""
+
+    last_index: MyopicIndex
+    """the window just solved"""
+    remaining: list[MyopicIndex]
+    """the windows still to run, in order"""
+    windows: int
+    """the number of windows solved, including any repeated by a roll back"""
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                'last_index': asdict(self.last_index),
+                'remaining': [asdict(idx) for idx in self.remaining],
+                'windows': self.windows,
+            }
+        )
+
+    @staticmethod
+    def from_json(text: str) -> 'MyopicRunState':
+        data = json.loads(text)
+        return MyopicRunState(
+            last_index=MyopicIndex(**data['last_index']),
+            remaining=[MyopicIndex(**idx) for idx in data['remaining']],
+            windows=data['windows'],
+        )
+
+
+class MyopicCheckpoint:
+    """
+    Saves and loads the checkpoint of the myopic run of one scenario
+    """
+
+    def __init__(self, scenario: str, fingerprint: str):
+        """
+        :param scenario: the scenario name
+        :param fingerprint: the fingerprint of the run, see run_fingerprint()
+        """
+        self.scenario = scenario
+        self.fingerprint = fingerprint
+
+    def save(self, con: sqlite3.Connection, state: MyopicRunState, efficiency: list[tuple]) -> None:
+        """
+        Save the checkpoint.  The caller commits
+        :param con: the connection to the database
+        :param state: the state of the run
+        :param efficiency: the rows of the MyopicEfficiency table after the window
+        :return: None
+        """
+        con.execute('DELETE FROM MyopicEfficiencyCheckpoint WHERE scenario = ?', (self.scenario,))
+        con.executemany(
+            'INSERT INTO MyopicEfficiencyCheckpoint VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            ((self.scenario, *row) for row in efficiency),
+        )
+        con.execute(
+            'REPLACE INTO MyopicRunState VALUES (?, ?, ?)',
+            (self.scenario, self.fingerprint, state.to_json()),
+        )
+        logger.debug('Saved myopic checkpoint after window %s', state.last_index)
+
+    def load(self, con: sqlite3.Connection) -> MyopicRunState:
+        """
+        Load the state of the run
+        :param con: the connection to the database
+        :return: the state
+        :raises ResumeError: if there is no checkpoint for the scenario or it is from a run with
+        different settings
+        """
+        row = con.execute(
+            'SELECT fingerprint, state FROM MyopicRunState WHERE scenario = ?', (self.scenario,)
+        ).fetchone()
+        if row is None:
+            raise ResumeError(f'No myopic checkpoint for scenario {self.scenario} to resume from')
+        fingerprint, state = row
+        if fingerprint != self.fingerprint:
+            raise ResumeError(
+                f'The myopic checkpoint for scenario {self.scenario} is from a run with different '
+                'settings (view depth, step size or periods)'
+            )
+        return MyopicRunState.from_json(state)
+
+    def restore_efficiency(self, con: sqlite3.Connection) -> int:
+        """
+        Replace the MyopicEfficiency table with the copy in the checkpoint.  The caller commits
+        :param con: the connection to the database
+        :return: the number of rows restored
+        """
+        con.execute('DELETE FROM MyopicEfficiency')
+        cur = con.execute(
+            'INSERT INTO MyopicEfficiency SELECT base_year, region, input_comm, tech, vintage, '
+            'output_comm, efficiency, lifetime FROM MyopicEfficiencyCheckpoint WHERE scenario = ?',
+            (self.scenario,),
+        )
+        return cur.rowcount
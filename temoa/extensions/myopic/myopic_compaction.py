@@ -0,0 +1,222 @@
+"""
+The compaction policy for the output database of a myopic run.  Each myopic window deletes and
+re-writes the results of the periods it revisits, which leaves free pages in the database.  Rather
+than rewriting the whole file with a VACUUM after every window, the policy compacts every N windows
+and/or on completion, only when enough of the file is free, either with a full VACUUM or with an
+incremental vacuum that just truncates the free pages.  It is configured in the [myopic] section:
+
+    compaction = "full"             # full | incremental | none
+    compaction_interval = 1         # windows between compactions, 0 for on completion only
+    compaction_free_fraction = 0.0  # the minimum fraction of free pages that triggers compaction
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+from dataclasses import dataclass
+from enum import Enum, unique
+from logging import getLogger
+from time import perf_counter
+
+logger = getLogger(__name__)
+
+# the value of PRAGMA auto_vacuum for incremental mode
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+@unique
+class CompactionMode(Enum):
+    FULL = 'full'
+    """rebuild the database file with VACUUM"""
+    INCREMENTAL = 'incremental'
+    """truncate the free pages with an incremental vacuum (requires auto_vacuum = INCREMENTAL)"""
+    NONE = 'none'
+    """never compact"""
+
+
+@dataclass(frozen=True)
+class PageStats:
+    """The size and free space of a database"""
+
+    page_size: int
+    page_count: int
+    free_pages: int
+
+    @staticmethod
+    def read(con: sqlite3.Connection) -> 'PageStats':
+        return PageStats(
+            page_size=con.execute('PRAGMA page_size').fetchone()[0],
+            page_count=con.execute('PRAGMA page_count').fetchone()[0],
+            free_pages=con.execute('PRAGMA freelist_count').fetchone()[0],
+        )
+
+    @property
+    def size(self) -> int:
+        """the size of the database in bytes"""
+        return self.page_size * self.page_count
+
+    @property
+    def free_fraction(self) -> float:
+        return self.free_pages / self.page_count if self.page_count else 0.0
+
+
+class CompactionPolicy:
+    """
+    Decides when to compact the output database and does so
+    """
+
+    def __init__(
+        self,
+        mode: CompactionMode = CompactionMode.FULL,
+        interval: int = 1,
+        free_fraction: float = 0.0,
+    ):
+        """
+        Make a policy
+        :param mode: how to compact
+        :param interval: the number of windows between compactions, 0 for on completion only
+        :param free_fraction: the minimum fraction of free pages for a compaction to proceed
+        """
+        if not isinstance(interval, int) or interval < 0:
+            raise ValueError(f'compaction_interval must be a non-negative integer: {interval}')
+        if not 0.0 <= free_fraction <= 1.0:
+            raise ValueError(f'compaction_free_fraction must be in [0, 1]: {free_fraction}')
+        self.mode = mode
+        self.interval = interval
+        self.free_fraction = free_fraction
+        self.windows = 0
+        self.compactions = 0
+        self.bytes_reclaimed = 0
+        self.seconds = 0.0
+
+    @staticmethod
+    def from_options(myopic_options: dict) -> 'CompactionPolicy':
+        """
+        Make the policy from the myopic section of the config
+        :param myopic_options: the myopic options
+        :return: the policy
+        """
+        mode = myopic_options.get('compaction', CompactionMode.FULL.value)
+        try:
+            mode = CompactionMode(mode)
+        except ValueError:
+            raise ValueError(
+                f'Unknown compaction mode {mode}.  Options are {[m.value for m in CompactionMode]}'
+            )
+        return CompactionPolicy(
+            mode=mode,
+            interval=myopic_options.get('compaction_interval', 1),
+            free_fraction=float(myopic_options.get('compaction_free_fraction', 0.0)),
+        )
+
+    def __repr__(self) -> str:
+        when = f'every {self.interval} windows' if self.interval else 'on completion'
+        if self.mode == CompactionMode.NONE:
+            return self.mode.value
+        return f'{self.mode.value}, {when}, at {self.free_fraction:.0%} free'
+
+    def prepare(self, con: sqlite3.Connection) -> None:
+        """
+        Set up the database for the policy.  An incremental vacuum needs the database in
+        auto_vacuum = INCREMENTAL mode, which only takes effect with a full VACUUM, so an existing
+        database is converted (once) here.
+        :param con: a connection to the database, with no open transaction
+        :return: None
+        """
+        if self.mode != CompactionMode.INCREMENTAL:
+            return
+        if con.execute('PRAGMA auto_vacuum').fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+            return
+        if con.in_transaction:
+            con.commit()
+        tic = perf_counter()
+        con.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        con.execute('VACUUM')
+        logger.info(
+            'Converted the output database to incremental auto-vacuum in %0.2f seconds',
+            perf_counter() - tic,
+        )
+
+    def window_done(self, con: sqlite3.Connection) -> bool:
+        """
+        Record the completion of a window and compact if it is due
+        :param con: a connection to the database, with no open transaction
+        :return: True if the database was compacted
+        """
+        self.windows += 1
+        if self.interval and self.windows % self.interval == 0:
+            return self.compact(con)
+        return False
+
+    def finish(self, con: sqlite3.Connection) -> bool:
+        """
+        Compact at the completion of the run
+        :param con: a connection to the database, with no open transaction
+        :return: True if the database was compacted
+        """
+        compacted = self.compact(con)
+        if self.compactions:
+            logger.info(
+                'Compacted the output database %d times, reclaiming %d bytes in %0.2f seconds',
+                self.compactions,
+                self.bytes_reclaimed,
+                self.seconds,
+            )
+        return compacted
+
+    def compact(self, con: sqlite3.Connection) -> bool:
+        """
+        Compact the database if there is enough free space
+        :param con: a connection to the database, with no open transaction
+        :return: True if the database was compacted
+        """
+        if self.mode == CompactionMode.NONE:
+            return False
+        before = PageStats.read(con)
+        if not before.free_pages or before.free_fraction < self.free_fraction:
+            logger.debug(
+                'Skipped compaction with %d of %d pages free',
+                before.free_pages,
+                before.page_count,
+            )
+            return False
+        if con.in_transaction:
+            con.commit()
+        tic = perf_counter()
+        if self.mode == CompactionMode.INCREMENTAL:
+            # the pragma frees one page per step.  execute() only steps once, executescript() runs
+            # it to completion
+            con.executescript('PRAGMA incremental_vacuum;')
+        else:
+            con.execute('VACUUM')
+        toc = perf_counter() - tic
+        reclaimed = before.size - PageStats.read(con).size
+        self.compactions += 1
+        self.bytes_reclaimed += reclaimed
+        self.seconds += toc
+        logger.info(
+            'Compaction (%s) reclaimed %d of %d bytes in %0.2f seconds',
+            self.mode.value,
+            reclaimed,
+            before.size,
+            toc,
+        )
+        return True
@@ -30,15 +30,28 @@ import logging
 import sqlite3
 import sys
 from collections import deque
+from collections.abc import Iterable
+from functools import partial
 from pathlib import Path
-from sqlite3 import Connection
+from sqlite3 import Connection, Cursor
 from sys import stderr as SE
 
 import definitions
+from temoa.extensions.myopic.myopic_checkpoint import (
+    MyopicCheckpoint,
+    MyopicRunState,
+    ResumeError,
+    run_fingerprint,
+)
+from temoa.extensions.myopic.myopic_compaction import CompactionPolicy
 from temoa.extensions.myopic.myopic_index import MyopicIndex
 from temoa.extensions.myopic.myopic_progress_mapper import MyopicProgressMapper
+from temoa.extensions.myopic.persistent_engine import PersistentMyopicEngine
+from temoa.extensions.myopic.working_database import WorkingDatabase
 from temoa.temoa_model import run_actions
-from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.background_writer import BUSY_TIMEOUT, BackgroundWriter
+from temoa.temoa_model.hybrid_loader import HybridLoader, LoaderSnapshot
+from temoa.temoa_model.loader_manifest import SchemaSnapshot
 from temoa.temoa_model.model_checking.pricing_check import price_checker
 from temoa.temoa_model.table_writer import TableWriter
 from temoa.temoa_model.temoa_config import TemoaConfig
@@ -68,6 +81,8 @@ class MyopicSequencer:
         'OutputNetCapacity',
         'OutputObjective',
         'OutputRetiredCapacity',
+        'MyopicRunState',
+        'MyopicEfficiencyCheckpoint',
     ]
     tables_without_scenario_reference = [
         'MyopicEfficiency',
@@ -86,7 +101,11 @@ class MyopicSequencer:
         'OutputRetiredCapacity',
     ]
 
-    def __init__(self, config: TemoaConfig | None):
+    def __init__(self, config: TemoaConfig | None, resume: bool = False):
+        """
+        :param config: the config
+        :param resume: resume the run from its checkpoint, rather than starting over
+        """
         self.capacity_epsilon = 1e-5
         self.debugging = False
         self.optimization_periods: list[int] | None = None
@@ -119,6 +138,45 @@ class MyopicSequencer:
                     f'is larger than the view depth ({self.view_depth}).  '
                     f'Check config'
                 )
+            # re-use the window-invariant data between loads
+            self.incremental_load: bool = myopic_options.get('incremental_load', True)
+            # write the results other than net capacity in the background during the next window
+            self.pipelined_writes: bool = myopic_options.get('pipelined_writes', False)
+            # compaction of the output database replaces the vacuum after each write
+            self.compaction = CompactionPolicy.from_options(myopic_options)
+            self.table_writer.vacuum_after_write = False
+            # run against an in-memory copy of the database that is checkpointed to disk
+            self.working_db: WorkingDatabase | None = None
+            if myopic_options.get('in_memory', False):
+                if self.pipelined_writes:
+                    raise ValueError(
+                        'pipelined_writes writes on a second connection to the database file, so '
+                        'it cannot be combined with in_memory'
+                    )
+                self.working_db = WorkingDatabase(
+                    config.output_database,
+                    checkpoint_interval=myopic_options.get('checkpoint_interval', 1),
+                )
+            # solve the windows on one instance of the whole horizon (see persistent_engine)
+            self.persistent_instance: bool = myopic_options.get('persistent_instance', False)
+            if self.persistent_instance:
+                if config.solver_name != 'appsi_highs':
+                    raise ValueError(
+                        'persistent_instance requires the appsi_highs solver, '
+                        f'not {config.solver_name}'
+                    )
+                if config.matrix_build:
+                    raise ValueError('persistent_instance cannot be combined with matrix_build')
+                if resume:
+                    raise ValueError(
+                        'a run with persistent_instance cannot be resumed, as the solved values '
+                        'of the earlier windows are not in the checkpoint'
+                    )
+        self.engine: PersistentMyopicEngine | None = None
+        self.background: BackgroundWriter | None = None
+        self.resume = resume
+        self.checkpoint: MyopicCheckpoint | None = None
+        self.windows_done = 0
 
     def get_connection(self) -> Connection:
         """
@@ -155,18 +213,107 @@ class MyopicSequencer:
         return con
 
     def start(self):
+        if self.working_db is None:
+            self._start()
+            return
+        self._open_working_db()
+        completed = False
+        try:
+            self._start()
+            completed = True
+        finally:
+            self._close_working_db(checkpoint=completed)
+
+    def _open_working_db(self):
+        """move the connections of the run to the in-memory copy of the database"""
+        # the file is replaced at each checkpoint, so no connections to it may be held
+        self.output_con.close()
+        self.table_writer.con.close()
+        self.output_con = self.working_db.open()
+        self.cursor = self.output_con.cursor()
+        self.table_writer.con = self.output_con
+
+    def _close_working_db(self, checkpoint: bool):
+        """save (or abandon) the in-memory copy and reconnect to the database file"""
+        self.working_db.close(checkpoint=checkpoint)
+        self.output_con = self.get_connection()
+        self.cursor = self.output_con.cursor()
+        self.table_writer.con = sqlite3.connect(self.config.output_database)
+
+    def _start(self):
         # load up the instance queue
         self.characterize_run()
 
         # create the Myopic Output tables, if they don't already exist.
         self.execute_script(table_script_file)
 
-        # clear out the old riff-raff
-        self.clear_old_results()
-
-        # start building the MyopicEfficiency table.
-        self.initialize_myopic_efficiency_table()
-
+        self.checkpoint = MyopicCheckpoint(
+            self.config.scenario,
+            run_fingerprint(
+                self.config.scenario, self.view_depth, self.step_size, self.optimization_periods
+            ),
+        )
+        if self.resume:
+            resume_state = self.resume_from_checkpoint()
+        else:
+            resume_state = None
+            # clear out the old riff-raff
+            self.clear_old_results()
+
+            # start building the MyopicEfficiency table.
+            self.initialize_myopic_efficiency_table()
+
+        # the schema is fixed from here on, so it is captured once and shared by the data loaders
+        schema = SchemaSnapshot(self.output_con)
+        snapshot = LoaderSnapshot() if self.incremental_load else None
+        self.compaction.prepare(self.output_con)
+        if self.persistent_instance:
+            self.engine = self.build_persistent_engine(schema)
+
+        if self.pipelined_writes:
+            self._run_pipelined(schema, snapshot, resume_state)
+        else:
+            self._run_windows(schema, snapshot, resume_state)
+
+    def _run_pipelined(
+        self,
+        schema: SchemaSnapshot,
+        snapshot: LoaderSnapshot | None,
+        resume_state: MyopicRunState | None,
+    ):
+        """
+        Run the windows with a background writer.  The next window only needs the net capacity of
+        the last, so that is written and committed with each window while the remaining results
+        are written on the background writer's connection during the next window's load, build
+        and solve.
+        """
+        journal_mode = self.output_con.execute('PRAGMA journal_mode').fetchone()[0]
+        # in WAL mode, the reads of the next window are not blocked by the background writes
+        self.output_con.execute('PRAGMA journal_mode = WAL')
+        for con in (self.output_con, self.table_writer.con):
+            con.execute(f'PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}')
+        try:
+            with BackgroundWriter(self.config.output_database) as background:
+                self.background = background
+                self.table_writer.defer_writes(background, immediate=['OutputNetCapacity'])
+                self._run_windows(schema, snapshot, resume_state)
+                # the barrier:  all of the results are in the db when the run completes
+                background.flush()
+        finally:
+            self.background = None
+            self.table_writer.background = None
+            try:
+                self.output_con.execute(f'PRAGMA journal_mode = {journal_mode}')
+            except sqlite3.OperationalError:
+                # leaving WAL requires that no other connection has the db open
+                logger.info('Output database left in WAL mode (was %s)', journal_mode)
+
+    def _run_windows(
+        self,
+        schema: SchemaSnapshot,
+        snapshot: LoaderSnapshot | None,
+        resume_state: MyopicRunState | None = None,
+    ):
         # start the fundamental control loop
         # 1.  get feedback from previous instance execution (optimal/infeasible/...)
         # 2.  decide what to do about it
@@ -179,10 +326,17 @@ class MyopicSequencer:
         # 9.  commit or back out any data as necessary
         # 10.  report findings
         # 11.  compact the db
+        # 12.  save the checkpoint
 
         last_instance_status = None  # solve status
         last_base_year = None
         idx: MyopicIndex | None = None  # just a type-hint
+        if resume_state:
+            # pick up as if the last window of the checkpoint was just solved
+            last_instance_status = 'optimal'
+            idx = resume_state.last_index
+            last_base_year = idx.base_year
+            self.windows_done = resume_state.windows
         logger.info('Starting Myopic Sequence')
         # 1, 2, 3...
         while len(self.instance_queue) > 0:
@@ -217,35 +371,59 @@ class MyopicSequencer:
             # 4. update the MyopicEfficiency table so it is ready for the upcoming data pull.
             self.update_myopic_efficiency_table(myopic_index=idx, prev_base=last_base_year)
 
-            # 5. pull the data
-            # make a data loader
-            data_loader = HybridLoader(self.output_con, self.config)
-            data_portal = data_loader.load_data_portal(myopic_index=idx)
-
-            # 6. build
-            instance = run_actions.build_instance(
-                loaded_portal=data_portal,
-                model_name=self.config.scenario,
-                silent=True,  # override this, we do our own reporting...
-                keep_lp_file=self.config.save_lp_file,
-                lp_path=self.config.output_path
-                / ''.join(('LP', str(idx.base_year))),  # base year folder
-            )
+            lp_path = self.config.output_path / ''.join(('LP', str(idx.base_year)))
+            if self.engine:
+                # 5, 6.  the persistent instance is brought to the window in place of the build
+                self.engine.set_window(idx)
+                instance = self.engine.model
+                if self.config.save_lp_file:
+                    lp_path.mkdir(exist_ok=True)
+                    instance.write(
+                        lp_path / 'model.lp',
+                        format='lp',
+                        io_options={'symbolic_solver_labels': True},
+                    )
+            else:
+                # 5. pull the data
+                # make a data loader
+                data_loader = HybridLoader(
+                    self.output_con, self.config, schema=schema, snapshot=snapshot
+                )
+                data_portal = data_loader.load_data(myopic_index=idx)
+
+                # 6. build
+                instance = run_actions.build_instance(
+                    loaded_portal=data_portal,
+                    model_name=self.config.scenario,
+                    silent=True,  # override this, we do our own reporting...
+                    keep_lp_file=self.config.save_lp_file,
+                    lp_path=lp_path,  # base year folder
+                    matrix=self.config.matrix_build,
+                    profile=self.config.profile_build,
+                    profile_path=self.config.output_path / f'build_profile_{idx.base_year}.csv',
+                )
 
-            # 7.  Run checks...
+            # 7.  Run checks...  (the persistent instance is checked once, when it is built)
             if not self.config.silent:
                 self.progress_mapper.report(idx, 'check')
-            if self.config.price_check:
+            if self.config.price_check and not self.engine:
                 price_checker(instance)
 
             # 8.  Run the model and assess solve status
             if not self.config.silent:
                 self.progress_mapper.report(idx, 'solve')
-            model, results = run_actions.solve_instance(
-                instance=instance, solver_name=self.config.solver_name, silent=True
-            )
-
-            optimal, status = run_actions.check_solve_status(results)
+            if self.engine:
+                model, solution = instance, None
+                optimal, status = self.engine.solve()
+            else:
+                model, results = run_actions.solve_instance(
+                    instance=instance,
+                    solver_name=self.config.solver_name,
+                    silent=True,
+                    options=self.config.solver_options,
+                )
+                solution = run_actions.matrix_solution(results)
+                optimal, status = run_actions.check_solve_status(results)
             if not optimal:
                 logger.warning('FAILED myopic iteration on %s', idx)
                 logger.warning('Status: %s', status)
@@ -258,23 +436,147 @@ class MyopicSequencer:
             logger.info('Completed myopic iteration on %s', idx)
 
             # 9, 10.  Update the output tables...
-            # first, clear any possible previous results that overlap, we might have been backtracking...
-            self.clear_results_after(idx.base_year)
-            # add the new results...
             if not self.config.silent:
                 self.progress_mapper.report(idx, 'report')
-            # write results by appending.  We have already cleared necessary items
-            self.table_writer.write_results(M=model, append=True)
+            # the persistent instance holds the whole horizon, of which only the window is written
+            window = idx if self.engine else None
+            if self.background:
+                # the net capacity is replaced now, the rest is replaced in the background, in
+                # order after the writes of the previous window
+                self.clear_results_after(idx.base_year, tables=['OutputNetCapacity'])
+                deferred = set(self.tables_with_period) - {'OutputNetCapacity'}
+                deferred.add('OutputBuiltCapacity')
+                self.background.submit(
+                    partial(self._delete_periods, period=idx.base_year, tables=deferred)
+                )
+                self.table_writer.write_results(
+                    M=model, append=True, solution=solution, window=window
+                )
+            elif self.config.bulk_write:
+                # replace the overlapping results of the window in one transaction
+                with self.table_writer.transaction():
+                    self.clear_results_after(idx.base_year, con=self.table_writer.con)
+                    self.table_writer.write_results(
+                        M=model, append=True, solution=solution, window=window
+                    )
+            else:
+                # first, clear any possible previous results that overlap, we might have been
+                # backtracking...
+                self.clear_results_after(idx.base_year)
+                # write results by appending.  We have already cleared necessary items
+                self.table_writer.write_results(
+                    M=model, append=True, solution=solution, window=window
+                )
 
             # prep next loop
             last_base_year = idx.base_year  # update
 
             # delete anything in the OutputObjective table, it is nonsensical...
-            self.output_con.execute('DELETE FROM OutputObjective WHERE 1')
-            self.output_con.commit()
+            if self.background:
+                self.background.submit(lambda con: con.execute('DELETE FROM OutputObjective'))
+            else:
+                self.output_con.execute('DELETE FROM OutputObjective WHERE 1')
+                self.output_con.commit()
+            for sink in self.table_writer.sinks:
+                sink.clear_table('OutputObjective')
 
             # 11.  Compact the db...  lots of writes/deletes leads to bloat
-            self.output_con.execute('VACUUM;')
+            if self.background:
+                self.background.submit(self.compaction.window_done)
+            else:
+                self.compaction.window_done(self.output_con)
+
+            # 12.  Save the checkpoint, after the results of the window
+            self.save_checkpoint(idx)
+            if self.working_db:
+                self.working_db.window_done()
+
+        if self.background:
+            self.background.submit(self.compaction.finish)
+        else:
+            self.compaction.finish(self.output_con)
+
+    def build_persistent_engine(self, schema: SchemaSnapshot) -> PersistentMyopicEngine:
+        """
+        Build the instance of the whole horizon, which the windows are then solved on
+        :param schema: the schema of the database
+        :return: the engine holding the instance
+        """
+        periods = self.optimization_periods
+        horizon = MyopicIndex(
+            base_year=periods[0],
+            step_year=periods[1],
+            last_demand_year=periods[-2],
+            last_year=periods[-1],
+        )
+        # every vintage of the horizon is loaded.  The table is trimmed back for the first window
+        self.update_myopic_efficiency_table(myopic_index=horizon, prev_base=periods[0])
+        data_loader = HybridLoader(self.output_con, self.config, schema=schema)
+        instance = run_actions.build_instance(
+            loaded_portal=data_loader.load_data(myopic_index=horizon),
+            model_name=self.config.scenario,
+            silent=True,
+            profile=self.config.profile_build,
+            profile_path=self.config.output_path / 'build_profile.csv',
+        )
+        if self.config.price_check:
+            price_checker(instance)
+        return PersistentMyopicEngine(instance, solver_options=self.config.solver_options)
+
+    def save_checkpoint(self, idx: MyopicIndex):
+        """
+        save the state of the run after an optimal window
+        :param idx: the window just solved
+        :return:
+        """
+        self.windows_done += 1
+        state = MyopicRunState(
+            last_index=idx, remaining=list(reversed(self.instance_queue)), windows=self.windows_done
+        )
+        # the efficiency rows are read now, the next window changes the table
+        efficiency = self.output_con.execute('SELECT * FROM MyopicEfficiency').fetchall()
+        if self.background:
+            self.background.submit(
+                partial(self.checkpoint.save, state=state, efficiency=efficiency)
+            )
+        else:
+            self.checkpoint.save(self.output_con, state=state, efficiency=efficiency)
+            self.output_con.commit()
+
+    def resume_from_checkpoint(self) -> MyopicRunState:
+        """
+        Load the checkpoint of the run, check it against this run and restore the database to it
+        :return: the state of the run at the checkpoint
+        """
+        try:
+            state = self.checkpoint.load(self.output_con)
+        except ResumeError as e:
+            logger.error('Cannot resume the myopic run: %s', e)
+            raise
+        # the remaining windows are the tail of the windows of this run (the queue pops right)
+        windows = list(reversed(self.instance_queue))
+        if state.remaining and state.remaining != windows[-len(state.remaining) :]:
+            logger.error(
+                'The windows remaining in the checkpoint %s are not those of this run %s',
+                state.remaining,
+                windows,
+            )
+            raise ResumeError('The myopic checkpoint does not match this run.  See log file.')
+        self.instance_queue = deque(reversed(state.remaining))
+        restored = self.checkpoint.restore_efficiency(self.output_con)
+        self.output_con.commit()
+        # clear anything a failed window wrote past the checkpoint
+        if state.remaining:
+            self.clear_results_after(state.remaining[0].base_year)
+        logger.info(
+            'Resuming myopic run after window %s (%d solved) with %d windows remaining.  '
+            'Restored %d rows of MyopicEfficiency',
+            state.last_index,
+            state.windows,
+            len(state.remaining),
+            restored,
+        )
+        return state
 
     def initialize_myopic_efficiency_table(self):
         """
@@ -501,10 +803,16 @@ class MyopicSequencer:
                 raise sqlite3.OperationalError
         self.output_con.commit()
 
-    def clear_results_after(self, period):
+    def clear_results_after(
+        self, period, con: Connection | None = None, tables: Iterable[str] | None = None
+    ):
         """
         clear the results tables for the periods on/after the period specified
         :param period: the starting period to clear
+        :param con: a connection with an open transaction to clear within.  If None (default),
+        the clearing is done and committed on the sequencer's connection
+        :param tables: the output tables to clear.  If None (default), all of the tables with
+        results by period.  The sinks are cleared of all tables in either case
         :return:
         """
         if period not in self.optimization_periods:
@@ -515,10 +823,23 @@ class MyopicSequencer:
             )
             raise ValueError(f'Trying to clear a year {period} that is not in the optimize periods')
         logger.debug('Clearing periods %s+ from output tables', period)
-
+        cursor = self.cursor if con is None else con.cursor()
+        self._delete_periods(cursor, period, tables)
+        if con is None:
+            self.output_con.commit()
+        for sink in self.table_writer.sinks:
+            sink.clear_periods_after(self.config.scenario, period)
+
+    def _delete_periods(
+        self, cursor: Cursor | Connection, period, tables: Iterable[str] | None = None
+    ):
+        """delete the results on/after the period from the tables (default: all with periods)"""
+        tables = None if tables is None else set(tables)
         for table in self.tables_with_period:
+            if tables is not None and table not in tables:
+                continue
             try:
-                self.cursor.execute(
+                cursor.execute(
                     f'DELETE FROM {table} WHERE period >= (?) and scenario = (?)',
                     (period, self.config.scenario),
                 )
@@ -527,11 +848,11 @@ class MyopicSequencer:
                 raise sqlite3.OperationalError
 
         # special case... new capacity has vintage only...
-        self.cursor.execute(
-            'DELETE FROM main.OutputBuiltCapacity WHERE main.OutputBuiltCapacity.vintage >= (?) AND scenario = (?)',
-            (period, self.config.scenario),
-        )
-        self.output_con.commit()
+        if tables is None or 'OutputBuiltCapacity' in tables:
+            cursor.execute(
+                'DELETE FROM main.OutputBuiltCapacity WHERE main.OutputBuiltCapacity.vintage >= (?) AND scenario = (?)',
+                (period, self.config.scenario),
+            )
 
     def __del__(self):
         """ensure the connection is closed when destructor is called."""
@@ -0,0 +1,200 @@
+"""
+The engine that solves the windows of a myopic run on one instance of the whole horizon, held by
+pyomo's persistent interface to HiGHS (appsi).  The instance is built once.  For each window, the
+variables of the periods before it are fixed at their solved values and those of the periods after
+it at 0, and only the constraints of the periods entering or leaving the window are added to or
+removed from the solver, which keeps the basis of the last solve to warm-start the next.
+
+The capacity built in the earlier windows is held by the fixed capacity variables rather than
+loaded as ExistingCapacity, so no params of the instance change between windows.  The objective is
+replaced for each window, as its costs are discounted over the window alone.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from enum import Enum, unique
+from logging import getLogger
+
+from pyomo.contrib.appsi.base import TerminationCondition
+from pyomo.contrib.appsi.solvers import Highs
+from pyomo.core import Constraint, Objective, Var, minimize
+from pyomo.core.base.component import Component
+
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.temoa_rules import PeriodCost_rule
+
+logger = getLogger(__name__)
+
+# the position of the period in the indices of the variables and constraints where it is not
+# second.  The vintage stands in for the period of the new capacity and the initial storage, and
+# the members of the families without a period (None) are left as built
+PERIOD_POSITION = {
+    'V_NewCapacity': 2,
+    'V_StorageInit': 2,
+    'StorageInitConstraint': 2,
+    'RegionalExchangeCapacityConstraint': 2,
+    'GrowthRateConstraint': 0,
+    'MaxResourceConstraint': None,
+}
+
+
+@unique
+class PeriodState(Enum):
+    PAST = 'past'
+    """solved in an earlier window, the variables are fixed at their values"""
+    WINDOW = 'window'
+    """solved in the current window"""
+    FUTURE = 'future'
+    """not yet in view, the variables are fixed at 0"""
+
+
+class PersistentMyopicEngine:
+    """
+    Solves the windows of a myopic run on one instance of the whole horizon
+    """
+
+    def __init__(self, model: TemoaModel, solver_options: dict | None = None):
+        """
+        :param model: the instance of the whole horizon.  Its objective is replaced for each window
+        :param solver_options: options passed to HiGHS
+        """
+        self.model = model
+        self.periods: list[int] = sorted(model.time_optimize)
+        self.variables = self._by_period(model.component_objects(Var))
+        self.constraints = self._by_period(model.component_objects(Constraint, active=True))
+        model.del_component(model.TotalCost)
+        # every period starts out of view, so the solver starts without the constraints of any
+        self.state = {p: PeriodState.FUTURE for p in self.periods}
+        for p in self.periods:
+            self._fix(p)
+            for con in self.constraints[p]:
+                con.deactivate()
+
+        self.opt = Highs()
+        self.opt.config.load_solution = False
+        self.opt.highs_options.update(solver_options or {})
+        # the constraints and objective are passed to the solver as they change, so the solver
+        # only needs to look for the variables that are fixed or freed
+        update_config = self.opt.update_config
+        update_config.check_for_new_or_removed_constraints = False
+        update_config.check_for_new_or_removed_vars = False
+        update_config.check_for_new_or_removed_params = False
+        update_config.check_for_new_objective = False
+        update_config.update_constraints = False
+        update_config.update_params = False
+        update_config.update_named_expressions = False
+        update_config.update_objective = False
+        update_config.update_vars = True
+        update_config.treat_fixed_vars_as_params = False
+        self.opt.set_instance(model)
+
+    def _by_period(self, components: Iterable[Component]) -> dict[int, list]:
+        """the members of the variables or constraints, by the period of their index"""
+        optimize = set(self.periods)
+        res = defaultdict(list)
+        for component in components:
+            position = PERIOD_POSITION.get(component.local_name, 1)
+            if position is None or not component.is_indexed():
+                continue
+            for index, member in component.items():
+                if component.ctype is Constraint and not member.active:
+                    continue
+                period = index[position]
+                if period not in optimize:
+                    if period < self.periods[0]:
+                        # an existing vintage, which is in every window
+                        continue
+                    raise ValueError(
+                        f'{component.local_name} has no optimization period at position '
+                        f'{position} of index {index}.  Update PERIOD_POSITION'
+                    )
+                res[period].append(member)
+        return res
+
+    def _fix(self, period: int) -> None:
+        """fix or free the variables of a period per its state"""
+        match self.state[period]:
+            case PeriodState.PAST:
+                for var in self.variables[period]:
+                    if var.value is None:
+                        var.set_value(0)
+                    var.fix()
+            case PeriodState.WINDOW:
+                for var in self.variables[period]:
+                    var.unfix()
+            case PeriodState.FUTURE:
+                for var in self.variables[period]:
+                    var.fix(0)
+
+    def set_window(self, idx: MyopicIndex) -> None:
+        """
+        Bring the instance and the solver to a window
+        :param idx: the window
+        :return: None
+        """
+        removed, added = [], []
+        for p in self.periods:
+            if p < idx.base_year:
+                state = PeriodState.PAST
+            elif p <= idx.last_demand_year:
+                state = PeriodState.WINDOW
+            else:
+                state = PeriodState.FUTURE
+            if state == self.state[p]:
+                continue
+            if self.state[p] == PeriodState.WINDOW:
+                removed.extend(self.constraints[p])
+            elif state == PeriodState.WINDOW:
+                added.extend(self.constraints[p])
+            self.state[p] = state
+            self._fix(p)
+
+        self.opt.remove_constraints(removed)
+        for con in removed:
+            con.deactivate()
+        for con in added:
+            con.activate()
+        self.opt.add_constraints(added)
+        logger.info('Window %s: added %d and removed %d constraints', idx, len(added), len(removed))
+
+        if self.model.component('TotalCost') is not None:
+            self.model.del_component('TotalCost')
+        window = (p for p in self.periods if self.state[p] == PeriodState.WINDOW)
+        self.model.TotalCost = Objective(
+            expr=sum(PeriodCost_rule(self.model, p, P_e=idx.last_year) for p in window),
+            sense=minimize,
+        )
+        self.opt.set_objective(self.model.TotalCost)
+
+    def solve(self) -> tuple[bool, str]:
+        """
+        Solve the window, loading the solution into the instance if it is optimal
+        :return: tuple of status boolean (True='optimal', others False), and string message if
+        not optimal
+        """
+        results = self.opt.solve(self.model)
+        if results.termination_condition != TerminationCondition.optimal:
+            return False, f'{results.termination_condition} was returned from solve'
+        results.solution_loader.load_vars()
+        return True, ''
@@ -0,0 +1,173 @@
+"""
+An in-memory working copy of the database of a myopic run.  The database is copied into memory
+with the SQLite backup API when the run starts, the myopic loop does all of its reads and writes
+against the copy, and the copy is backed up to disk (checkpointed) every N windows and when the run
+completes.  The churn of the myopic tables and output tables from window to window then never
+touches the disk between checkpoints.
+
+A checkpoint is written to a file beside the database and moved over the database once complete,
+so the database on disk always holds either the last complete checkpoint or the original data.  If
+the run fails (or the process is killed), the results since the last checkpoint are lost, but the
+database is intact at that checkpoint.  A partial checkpoint left behind by a killed process is
+discarded when the next run opens the database.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import sqlite3
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+
+logger = getLogger(__name__)
+
+
+class WorkingDatabase:
+    """
+    An in-memory copy of a database that is checkpointed back to the file
+    """
+
+    def __init__(self, path: Path, checkpoint_interval: int = 1):
+        """
+        Make a working database.  Nothing is read until open()
+        :param path: the database file
+        :param checkpoint_interval: the number of windows between checkpoints, 0 for on completion
+        only
+        """
+        if not isinstance(checkpoint_interval, int) or checkpoint_interval < 0:
+            raise ValueError(
+                f'checkpoint_interval must be a non-negative integer: {checkpoint_interval}'
+            )
+        self.path = Path(path)
+        self.checkpoint_interval = checkpoint_interval
+        self.con: sqlite3.Connection | None = None
+        self.windows = 0
+        self.checkpointed_windows = 0
+        self.checkpoints = 0
+        self.checkpoint_seconds = 0.0
+        # the connection's count of row changes at the last checkpoint
+        self._changes_at_checkpoint = 0
+
+    @property
+    def checkpoint_path(self) -> Path:
+        """the file a checkpoint is written to before it replaces the database"""
+        return self.path.with_name(self.path.name + '.checkpoint')
+
+    def open(self) -> sqlite3.Connection:
+        """
+        Copy the database into memory
+        :return: the connection to the in-memory copy
+        """
+        if self.checkpoint_path.exists():
+            logger.warning(
+                'Discarding an incomplete checkpoint of %s.  The database is at its last complete '
+                'checkpoint',
+                self.path,
+            )
+            self.checkpoint_path.unlink()
+        tic = perf_counter()
+        disk = sqlite3.connect(self.path)
+        self.con = sqlite3.connect(':memory:')
+        try:
+            disk.backup(self.con)
+        finally:
+            disk.close()
+        size = self._size()
+        logger.info(
+            'Loaded %s (%d bytes) into memory in %0.2f seconds',
+            self.path,
+            size,
+            perf_counter() - tic,
+        )
+        return self.con
+
+    def _size(self) -> int:
+        page_size = self.con.execute('PRAGMA page_size').fetchone()[0]
+        return page_size * self.con.execute('PRAGMA page_count').fetchone()[0]
+
+    def window_done(self) -> bool:
+        """
+        Record the completion of a window and checkpoint if it is due
+        :return: True if a checkpoint was made
+        """
+        self.windows += 1
+        if self.checkpoint_interval and self.windows % self.checkpoint_interval == 0:
+            self.checkpoint()
+            return True
+        return False
+
+    def checkpoint(self) -> None:
+        """
+        Write the in-memory database over the database file
+        :return: None
+        """
+        if self.con.in_transaction:
+            self.con.commit()
+        tic = perf_counter()
+        target = self.checkpoint_path
+        if target.exists():
+            target.unlink()
+        dest = sqlite3.connect(target)
+        try:
+            self.con.backup(dest)
+            # the copy carries the journal mode of the original.  The file is about to be moved, so
+            # it must not depend on a write-ahead log beside it
+            dest.execute('PRAGMA journal_mode = DELETE')
+        finally:
+            dest.close()
+        os.replace(target, self.path)
+        toc = perf_counter() - tic
+        self.checkpoints += 1
+        self.checkpoint_seconds += toc
+        self.checkpointed_windows = self.windows
+        self._changes_at_checkpoint = self.con.total_changes
+        logger.info(
+            'Checkpointed %d bytes to %s after window %d in %0.2f seconds',
+            self._size(),
+            self.path,
+            self.windows,
+            toc,
+        )
+
+    def close(self, checkpoint: bool = True) -> None:
+        """
+        Close the in-memory database
+        :param checkpoint: checkpoint first.  If False, the database file is left at the last
+        checkpoint
+        :return: None
+        """
+        if self.con is None:
+            return
+        if checkpoint:
+            if not self.checkpoints or self.con.total_changes != self._changes_at_checkpoint:
+                self.checkpoint()
+            logger.info(
+                'Made %d checkpoints in %0.2f seconds', self.checkpoints, self.checkpoint_seconds
+            )
+        elif self.windows > self.checkpointed_windows:
+            logger.warning(
+                'The results of the %d windows after the last checkpoint were not saved to %s',
+                self.windows - self.checkpointed_windows,
+                self.path,
+            )
+        self.con.close()
+        self.con = None
@@ -0,0 +1,144 @@
+"""
+A background thread for database writes.  Write tasks are queued by the main thread and executed
+in order on the thread's own connection, each in its own transaction, so the main thread can move
+on (e.g. to loading, building and solving the next myopic window) while results are written.  The
+queue is bounded, so the main thread waits rather than piling up results in memory if the writes
+fall behind.  The first failure of a task is re-raised in the main thread at the next submit or
+flush, and tasks queued after a failure are discarded.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import queue
+import sqlite3
+import threading
+from collections.abc import Callable
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+from typing import Self
+
+logger = getLogger(__name__)
+
+WriteTask = Callable[[sqlite3.Connection], None]
+
+# seconds a connection waits for the write lock held by another connection to the database
+BUSY_TIMEOUT = 600.0
+
+
+class BackgroundWriteError(RuntimeError):
+    """A write task failed in the background writer"""
+
+
+class BackgroundWriter:
+    """
+    Executes write tasks on a connection owned by a background thread
+    """
+
+    _STOP = object()
+
+    def __init__(self, database: Path, max_pending: int = 2):
+        """
+        Start a writer
+        :param database: the database to write to
+        :param max_pending: the maximum number of queued tasks before submit() blocks
+        """
+        self.database = database
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: BaseException | None = None
+        self.tasks_done = 0
+        self.busy_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name='temoa-background-writer')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # on an error in the main thread, don't mask it with a background error
+        self.close(raise_errors=exc_type is None)
+
+    def _run(self) -> None:
+        con = sqlite3.connect(self.database, timeout=BUSY_TIMEOUT)
+        try:
+            while True:
+                task = self._queue.get()
+                try:
+                    if task is self._STOP:
+                        return
+                    if self._error is None:
+                        tic = perf_counter()
+                        try:
+                            task(con)
+                            con.commit()
+                        except BaseException as e:  # noqa: BLE001  the error is passed on
+                            con.rollback()
+                            self._error = e
+                            logger.error('Background write failed: %s', e)
+                        self.busy_seconds += perf_counter() - tic
+                        self.tasks_done += 1
+                finally:
+                    self._queue.task_done()
+        finally:
+            con.close()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise BackgroundWriteError('A background database write failed') from self._error
+
+    def submit(self, task: WriteTask) -> None:
+        """
+        Queue a task.  Blocks while the queue is full
+        :param task: a function of the writer's connection.  The writer commits after it returns
+        :return: None
+        """
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise BackgroundWriteError('The background writer is closed')
+        self._queue.put(task)
+
+    def flush(self) -> None:
+        """
+        Wait for all queued tasks to finish and raise the error of any failed task
+        :return: None
+        """
+        tic = perf_counter()
+        self._queue.join()
+        logger.debug('Background writer flushed after waiting %0.2f seconds', perf_counter() - tic)
+        self._raise_error()
+
+    def close(self, raise_errors: bool = True) -> None:
+        """
+        Finish the queued tasks and stop the thread
+        :param raise_errors: raise the error of any failed task
+        :return: None
+        """
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+            logger.info(
+                'Background writer completed %d tasks in %0.2f seconds',
+                self.tasks_done,
+                self.busy_seconds,
+            )
+        if raise_errors:
+            self._raise_error()
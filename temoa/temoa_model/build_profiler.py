@@ -0,0 +1,190 @@
+"""
+A profiler for the construction of a model instance.  Pyomo reports the construction of each
+component (Set, Param, Var, BuildAction, Constraint...) to a timing logger.  The profiler listens
+to that logger during the build and records the time, memory and number of members of each
+component so that slow or bloated components can be located and tracked run over run.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import csv
+import logging
+import tracemalloc
+from dataclasses import astuple, dataclass, fields
+from logging import getLogger
+from pathlib import Path
+from time import perf_counter
+from typing import Self
+
+from pyomo.common.timing import ConstructionTimer
+
+logger = getLogger(__name__)
+
+# the logger that pyomo reports component construction to
+_CONSTRUCTION_LOGGER = 'pyomo.common.timing.construction'
+
+
+@dataclass
+class ComponentBuildRecord:
+    """
+    The construction statistics of one model component
+    """
+
+    component: str
+    ctype: str
+    seconds: float
+    """the construction time of the component, including any components constructed within it"""
+    interval: float
+    """the time since the previous component finished construction"""
+    members: int | None
+    """the number of indices (or set members) of the component, if it has any"""
+    memory: int | None = None
+    """the change in traced memory (bytes) since the previous component finished construction"""
+    peak: int | None = None
+    """the peak traced memory (bytes) during the interval"""
+
+
+class _ConstructionHandler(logging.Handler):
+    """
+    A log handler that passes the construction timers on to the profiler
+    """
+
+    def __init__(self, profiler: 'BuildProfiler'):
+        super().__init__(level=logging.INFO)
+        self.profiler = profiler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if isinstance(record.msg, ConstructionTimer):
+            self.profiler.record(record.msg)
+
+
+class BuildProfiler:
+    """
+    A context manager that records the construction of each component built within it
+    """
+
+    def __init__(self, trace_memory: bool = True):
+        """
+        Make a profiler
+        :param trace_memory: if True, memory allocations are traced during the build.  This slows
+        the build, but is the only way to attribute memory to the components
+        """
+        self.trace_memory = trace_memory
+        self.records: list[ComponentBuildRecord] = []
+        self._handler = _ConstructionHandler(self)
+        self._logger = logging.getLogger(_CONSTRUCTION_LOGGER)
+        self._old_level = self._logger.level
+        self._started_tracing = False
+        self._last_time = 0.0
+        self._last_memory = 0
+
+    def __enter__(self) -> Self:
+        self._logger.addHandler(self._handler)
+        self._logger.setLevel(logging.INFO)
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if tracemalloc.is_tracing():
+            self._last_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._last_time = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._logger.removeHandler(self._handler)
+        self._logger.setLevel(self._old_level)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def record(self, timer: ConstructionTimer) -> None:
+        """
+        Record the construction of a component
+        :param timer: the completed timer from pyomo
+        :return: None
+        """
+        now = perf_counter()
+        try:
+            members = len(timer.obj)
+        except TypeError:
+            members = None
+        rec = ComponentBuildRecord(
+            component=timer.name,
+            ctype=getattr(timer.obj.ctype, '__name__', type(timer.obj).__name__),
+            seconds=timer.timer,
+            interval=now - self._last_time,
+            members=members,
+        )
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            rec.memory = current - self._last_memory
+            rec.peak = peak - self._last_memory
+            self._last_memory = current
+            tracemalloc.reset_peak()
+        self.records.append(rec)
+        # the timer is excluded from the next interval
+        self._last_time = perf_counter()
+
+    def sorted_records(self) -> list[ComponentBuildRecord]:
+        """
+        The records, slowest first
+        :return: list of ComponentBuildRecord
+        """
+        return sorted(self.records, key=lambda rec: rec.seconds, reverse=True)
+
+    def report(self, top: int = 20) -> None:
+        """
+        Log a summary of the slowest components (INFO) and the full listing (DEBUG)
+        :param top: the number of components to summarize
+        :return: None
+        """
+        records = self.sorted_records()
+        logger.info(
+            'Build profile:  %d components constructed in %0.2f seconds',
+            len(records),
+            sum(rec.interval for rec in records),
+        )
+        for i, rec in enumerate(records):
+            level = logging.INFO if i < top else logging.DEBUG
+            if not logger.isEnabledFor(level):
+                break
+            memory = f'{rec.memory / 1024**2:+0.2f} MB' if rec.memory is not None else 'n/a'
+            logger.log(
+                level,
+                '  %-45s %-12s %8.3f s  members: %8s  memory: %s',
+                rec.component,
+                rec.ctype,
+                rec.seconds,
+                rec.members if rec.members is not None else '-',
+                memory,
+            )
+
+    def write(self, path: Path) -> None:
+        """
+        Write the records, slowest first, to a csv file
+        :param path: the file to write
+        :return: None
+        """
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(field.name for field in fields(ComponentBuildRecord))
+            writer.writerows(astuple(rec) for rec in self.sorted_records())
+        logger.info('Wrote build profile to %s', path)
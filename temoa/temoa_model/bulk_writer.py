@@ -0,0 +1,203 @@
+"""
+A high-throughput writer for the output tables.  All of the writes made through the writer are
+grouped into one transaction, the connection is switched to write-tuned pragmas for the duration,
+the secondary indexes on the target tables are dropped and rebuilt once at the end, and rows are
+streamed to the database in bounded chunks so that large flow tables need not be held in memory
+as a whole.  The number of rows and time spent on each table are recorded and reported.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from itertools import chain, islice
+from logging import getLogger
+from time import perf_counter
+from typing import Self
+
+logger = getLogger(__name__)
+
+# pragmas used for the duration of a bulk write.  WAL with synchronous=NORMAL is safe against
+# application crashes, and the large page cache (negative values are KiB) keeps the primary key
+# b-trees of the output tables in memory while they are filled
+WRITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -262144,
+    'temp_store': 'MEMORY',
+}
+
+
+@dataclass
+class TableWriteStats:
+    """The volume and time of the writes to one table"""
+
+    table: str
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """rows per second"""
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class BulkWriter:
+    """
+    A context manager for a bulk write session on a connection.  The session is committed on a
+    clean exit and rolled back if an exception is raised within it.
+    """
+
+    def __init__(
+        self,
+        con: sqlite3.Connection,
+        tables: Iterable[str],
+        chunk_size: int = 100_000,
+        pragmas: dict[str, str | int] | None = None,
+    ):
+        """
+        Make a writer
+        :param con: the connection to write on
+        :param tables: the tables that will be written.  Their secondary indexes are deferred
+        :param chunk_size: the maximum number of rows passed to the database at once
+        :param pragmas: the pragmas to use during the session, default WRITE_PRAGMAS
+        """
+        self.con = con
+        self.tables = list(tables)
+        self.chunk_size = chunk_size
+        self.pragmas = WRITE_PRAGMAS if pragmas is None else pragmas
+        self.stats: dict[str, TableWriteStats] = {}
+        self._saved_pragmas: dict[str, str | int] = {}
+        self._deferred_indexes: list[tuple[str, str]] = []
+        self._start = 0.0
+
+    def __enter__(self) -> Self:
+        # pragmas cannot change the journal mode within a transaction, and the session must not
+        # take over (and later commit or roll back) writes that the caller has not committed
+        if self.con.in_transaction:
+            raise RuntimeError(
+                'A bulk write session cannot start while the connection has an open transaction.  '
+                'Commit or roll back first.'
+            )
+        self._start = perf_counter()
+        for pragma, setting in self.pragmas.items():
+            self._saved_pragmas[pragma] = self.con.execute(f'PRAGMA {pragma}').fetchone()[0]
+            self.con.execute(f'PRAGMA {pragma} = {setting}')
+        self.con.execute('BEGIN IMMEDIATE')
+        self._defer_indexes()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            if exc_type is None:
+                self._rebuild_indexes()
+                self.con.commit()
+            else:
+                # the dropped indexes come back with the rollback
+                self.con.rollback()
+                logger.warning('Bulk write rolled back after error: %s', exc_val)
+        finally:
+            for pragma, setting in self._saved_pragmas.items():
+                try:
+                    self.con.execute(f'PRAGMA {pragma} = {setting}')
+                except sqlite3.Error as e:
+                    # e.g. the journal mode cannot change while another connection is reading
+                    logger.warning('Failed to restore PRAGMA %s = %s: %s', pragma, setting, e)
+            self._saved_pragmas.clear()
+
+    def _defer_indexes(self) -> None:
+        """drop the secondary indexes of the tables, retaining their definitions"""
+        if not self.tables:
+            return
+        qry = (
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL "
+            f'AND tbl_name IN ({",".join("?" for _ in self.tables)})'
+        )
+        # indexes created for primary key / unique constraints have no sql and can't be dropped
+        self._deferred_indexes = self.con.execute(qry, self.tables).fetchall()
+        for name, _ in self._deferred_indexes:
+            self.con.execute(f'DROP INDEX "{name}"')
+        if self._deferred_indexes:
+            logger.debug('Deferred %d indexes during bulk write', len(self._deferred_indexes))
+
+    def _rebuild_indexes(self) -> None:
+        tic = perf_counter()
+        for _, sql in self._deferred_indexes:
+            self.con.execute(sql)
+        if self._deferred_indexes:
+            logger.debug(
+                'Rebuilt %d indexes in %0.2f seconds',
+                len(self._deferred_indexes),
+                perf_counter() - tic,
+            )
+        self._deferred_indexes = []
+
+    def execute(self, sql: str, params: Sequence = ()) -> sqlite3.Cursor:
+        """
+        Execute a statement within the session, e.g. to clear rows that will be replaced
+        :param sql: the statement
+        :param params: the parameters of the statement
+        :return: the cursor
+        """
+        return self.con.execute(sql, params)
+
+    def insert(self, table: str, rows: Iterable[Sequence]) -> int:
+        """
+        Insert rows into a table, passing them to the database in chunks
+        :param table: the table name
+        :param rows: the rows, which may be a generator
+        :return: the number of rows inserted
+        """
+        stats = self.stats.setdefault(table, TableWriteStats(table))
+        tic = perf_counter()
+        it = iter(rows)
+        first = next(it, None)
+        if first is None:
+            return 0
+        qry = f'INSERT INTO {table} VALUES ({",".join("?" for _ in first)})'
+        cur = self.con.cursor()
+        count = 0
+        it = chain((first,), it)
+        while chunk := list(islice(it, self.chunk_size)):
+            cur.executemany(qry, chunk)
+            count += len(chunk)
+        stats.rows += count
+        stats.seconds += perf_counter() - tic
+        return count
+
+    def report(self) -> None:
+        """
+        Log the rows written and the throughput by table
+        :return: None
+        """
+        total = sum(s.rows for s in self.stats.values())
+        logger.info(
+            'Bulk write of %d rows to %d tables in %0.2f seconds',
+            total,
+            len(self.stats),
+            perf_counter() - self._start,
+        )
+        for s in sorted(self.stats.values(), key=lambda s: s.rows, reverse=True):
+            if s.rows:
+                logger.info(
+                    '  %-25s %12d rows %8.2f s %12.0f rows/s', s.table, s.rows, s.seconds, s.rate
+                )
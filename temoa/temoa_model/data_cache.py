@@ -0,0 +1,204 @@
+"""
+An on-disk cache of the filtered model data produced by the HybridLoader.  Entries are keyed by a
+fingerprint of the input tables in the database and the config options that affect the loaded
+data, so a repeat run against an unchanged database can skip the source trace and data pull.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import hashlib
+import os
+import pickle
+import time
+from logging import getLogger
+from pathlib import Path
+from sqlite3 import Connection
+
+from definitions import PROJECT_ROOT
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+logger = getLogger(__name__)
+
+# bump this if the structure of the loaded data changes in a way not captured by the
+# loader source files below
+CACHE_FORMAT_VERSION = 1
+
+# changes to any of these files may change the loaded data, so they are part of the fingerprint
+_LOADER_SOURCES = (
+    'temoa/temoa_model/hybrid_loader.py',
+    'temoa/temoa_model/loader_manifest.py',
+    'temoa/temoa_model/model_checking/element_checker.py',
+    'temoa/temoa_model/model_checking/viable_tables.py',
+    'temoa/temoa_model/model_checking/network_model_data.py',
+    'temoa/temoa_model/model_checking/commodity_network.py',
+    'temoa/temoa_model/model_checking/commodity_network_manager.py',
+)
+
+# output tables are excluded from the fingerprint, except for those read by the loader
+_OUTPUT_TABLES_READ = {'OutputNetCapacity'}
+
+_FETCH_SIZE = 10_000
+_SUFFIX = '.pkl'
+
+
+class DataCache:
+    """
+    A content-addressed store of loaded model data
+    """
+
+    default_location = Path(PROJECT_ROOT, 'output_files', 'data_cache')
+
+    def __init__(
+        self,
+        cache_dir: Path | str | None = None,
+        max_size_mb: float = 2000.0,
+        max_age_days: float = 30.0,
+    ):
+        """
+        Make a cache
+        :param cache_dir: the directory to hold the cache entries, created if needed
+        :param max_size_mb: the total size of entries (in MB) retained after a store
+        :param max_age_days: entries not used within this many days are removed
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else self.default_location
+        self.max_size = max_size_mb * 1024**2
+        self.max_age = max_age_days * 24 * 3600
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def from_config(config: TemoaConfig) -> 'DataCache':
+        """
+        Make a cache from the options in the [data_cache] section of the config
+        :param config: the TemoaConfig
+        :return: a DataCache
+        """
+        opts = config.data_cache if config.data_cache is not None else {}
+        unknown = opts.keys() - {'path', 'max_size_mb', 'max_age_days'}
+        if unknown:
+            logger.warning('Unrecognized options in data_cache config section: %s', unknown)
+        return DataCache(
+            cache_dir=opts.get('path'),
+            max_size_mb=opts.get('max_size_mb', 2000.0),
+            max_age_days=opts.get('max_age_days', 30.0),
+        )
+
+    @staticmethod
+    def fingerprint(
+        con: Connection, config: TemoaConfig, myopic_index: MyopicIndex | None = None
+    ) -> str:
+        """
+        Make the key for a load from the contents of the input tables and the relevant config
+        options.  Every input row is hashed, which is much cheaper than loading and filtering it.
+        :param con: connection to the database being loaded
+        :param config: the TemoaConfig
+        :param myopic_index: the MyopicIndex of the load, if any
+        :return: a hex digest
+        """
+        h = hashlib.sha256()
+        h.update(f'format: {CACHE_FORMAT_VERSION}'.encode())
+        for source in _LOADER_SOURCES:
+            h.update(Path(PROJECT_ROOT, source).read_bytes())
+        h.update(f'mode: {config.scenario_mode.name}'.encode())
+        # the myopic loads read the prior results of the scenario from OutputNetCapacity
+        h.update(f'scenario: {config.scenario}'.encode())
+        h.update(f'source trace: {config.source_trace}'.encode())
+        h.update(f'myopic index: {myopic_index}'.encode())
+
+        cur = con.cursor()
+        tables = cur.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' "
+            'ORDER BY name'
+        ).fetchall()
+        for name, sql in tables:
+            if name.startswith('Output') and name not in _OUTPUT_TABLES_READ:
+                continue
+            h.update(sql.encode())
+            cur.execute(f'SELECT * FROM main.{name}')
+            while rows := cur.fetchmany(_FETCH_SIZE):
+                h.update(repr(rows).encode())
+        return h.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.cache_dir / (key + _SUFFIX)
+
+    def fetch(self, key: str) -> dict | None:
+        """
+        Get the data for a key
+        :param key: the fingerprint of the load
+        :return: the loaded data or None if there is no (readable) entry
+        """
+        entry = self._entry(key)
+        if not entry.is_file():
+            logger.info('Data cache miss for key: %s', key)
+            return None
+        tic = time.time()
+        try:
+            with open(entry, 'rb') as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError) as e:
+            logger.warning('Unable to read data cache entry %s, it will be discarded: %s', entry, e)
+            entry.unlink(missing_ok=True)
+            return None
+        # touch the entry so that eviction is by time of last use
+        os.utime(entry)
+        logger.info('Data cache hit for key: %s.  Read in %0.2f seconds', key, time.time() - tic)
+        return data
+
+    def store(self, key: str, data: dict) -> None:
+        """
+        Store the data for a key and then evict old entries
+        :param key: the fingerprint of the load
+        :param data: the loaded data
+        :return: None
+        """
+        entry = self._entry(key)
+        # write to a temp file and swap it in so a partial write is never read as an entry
+        temp = entry.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp, entry)
+        logger.info('Stored data cache entry %s (%0.1f MB)', entry, entry.stat().st_size / 1024**2)
+        self.evict()
+
+    def evict(self) -> None:
+        """
+        Remove entries older than the max age and then the least recently used entries until
+        the cache is within the max size
+        :return: None
+        """
+        now = time.time()
+        entries = []
+        for entry in self.cache_dir.glob('*' + _SUFFIX):
+            stat = entry.stat()
+            if now - stat.st_mtime > self.max_age:
+                logger.info('Removing expired data cache entry: %s', entry)
+                entry.unlink(missing_ok=True)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= self.max_size:
+                break
+            logger.info('Removing data cache entry to reduce cache size: %s', entry)
+            entry.unlink(missing_ok=True)
+            total -= size
@@ -0,0 +1,304 @@
+"""
+An in-process HiGHS solve of the matrix form of a model.  The coefficient arrays of a MatrixModel
+are handed straight to HiGHS through highspy and the primal and dual solution comes back as NumPy
+arrays, which are keyed to the Temoa index tuples through the variables and row keys of the
+MatrixModel.  This skips the expression-by-expression translation of the pyomo solver interfaces,
+and the arrays go on to results processing (see TableWriter) without being loaded into the model.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import time
+from collections import defaultdict
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from logging import getLogger
+from typing import Any
+
+import highspy
+import numpy as np
+from pyomo.environ import Objective, maximize
+from pyomo.opt import (
+    Solution,
+    SolutionStatus,
+    SolverResults,
+    SolverStatus,
+    TerminationCondition,
+)
+
+from temoa.temoa_model.matrix_model import MatrixModel
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+# the name used in the config to select this backend
+SOLVER_NAME = 'highspy'
+
+_termination = {
+    highspy.HighsModelStatus.kOptimal: TerminationCondition.optimal,
+    highspy.HighsModelStatus.kInfeasible: TerminationCondition.infeasible,
+    highspy.HighsModelStatus.kUnbounded: TerminationCondition.unbounded,
+    highspy.HighsModelStatus.kUnboundedOrInfeasible: TerminationCondition.infeasibleOrUnbounded,
+    highspy.HighsModelStatus.kTimeLimit: TerminationCondition.maxTimeLimit,
+    highspy.HighsModelStatus.kIterationLimit: TerminationCondition.maxIterations,
+}
+
+
+@dataclass
+class MatrixSolution:
+    """
+    The solution of a MatrixModel.  The arrays are in the column (x, reduced_costs) and row
+    (duals) order of the model
+    """
+
+    matrix: MatrixModel
+    status: highspy.HighsModelStatus
+    objective: float | None
+    x: np.ndarray
+    duals: np.ndarray
+    reduced_costs: np.ndarray
+    solve_time: float = 0.0
+    _col_index: dict = field(default=None, repr=False)
+    _row_index: dict = field(default=None, repr=False)
+
+    @property
+    def optimal(self) -> bool:
+        return self.status == highspy.HighsModelStatus.kOptimal
+
+    @staticmethod
+    def _group(keys: Iterable[tuple[str, Any]]) -> dict[str, tuple[list, np.ndarray]]:
+        """the indices and positions of the members of each component, from (name, index) keys"""
+        indices = defaultdict(list)
+        positions = defaultdict(list)
+        for i, (name, index) in enumerate(keys):
+            indices[name].append(index)
+            positions[name].append(i)
+        return {name: (indices[name], np.array(positions[name])) for name in indices}
+
+    def columns(self, var_name: str) -> tuple[list, np.ndarray]:
+        """
+        The primal values of the columns of a variable
+        :param var_name: the name of the variable, e.g. 'V_FlowOut'
+        :return: tuple of the indices and the values of the columns.  Empty if the variable has no
+        columns
+        """
+        if self._col_index is None:
+            self._col_index = self._group(
+                (var.parent_component().local_name, var.index()) for var in self.matrix.variables
+            )
+        keys, positions = self._col_index.get(var_name, ([], np.array([], dtype=int)))
+        return keys, self.x[positions]
+
+    def values(self, var_name: str) -> dict[tuple, float]:
+        """
+        The primal values of a variable
+        :param var_name: the name of the variable, e.g. 'V_FlowOut'
+        :return: dictionary of index -> value.  Empty if the variable has no columns
+        """
+        keys, values = self.columns(var_name)
+        return dict(zip(keys, values.tolist()))
+
+    def dual_values(self, constraint_name: str) -> dict[tuple, float]:
+        """
+        The duals of a constraint family
+        :param constraint_name: the name of the constraint, e.g. 'CommodityBalanceConstraint'
+        :return: dictionary of index -> dual
+        """
+        if self._row_index is None:
+            self._row_index = self._group(self.matrix.row_keys)
+        keys, positions = self._row_index.get(constraint_name, ([], np.array([], dtype=int)))
+        return dict(zip(keys, self.duals[positions].tolist()))
+
+
+def _make_lp(matrix: MatrixModel) -> highspy.HighsLp:
+    """the HiGHS form of a MatrixModel"""
+    lp = highspy.HighsLp()
+    lp.num_col_ = matrix.num_cols
+    lp.num_row_ = matrix.num_rows
+    lp.col_cost_ = matrix.c
+    lp.col_lower_ = matrix.col_lb
+    lp.col_upper_ = matrix.col_ub
+    lp.row_lower_ = matrix.row_lb
+    lp.row_upper_ = matrix.row_ub
+    lp.offset_ = matrix.offset
+    lp.sense_ = _sense(matrix)
+    lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+    lp.a_matrix_.num_col_ = matrix.num_cols
+    lp.a_matrix_.num_row_ = matrix.num_rows
+    lp.a_matrix_.start_ = matrix.A.indptr
+    lp.a_matrix_.index_ = matrix.A.indices
+    lp.a_matrix_.value_ = matrix.A.data
+    return lp
+
+
+def _sense(matrix: MatrixModel) -> highspy.ObjSense:
+    return highspy.ObjSense.kMaximize if matrix.sense == maximize else highspy.ObjSense.kMinimize
+
+
+def _make_highs(silent: bool, options: dict | None) -> highspy.Highs:
+    h = highspy.Highs()
+    h.setOptionValue('output_flag', not silent)
+    for option, value in (options or {}).items():
+        if h.setOptionValue(option, value) != highspy.HighsStatus.kOk:
+            logger.warning('Unable to set HiGHS option %s to %s', option, value)
+    return h
+
+
+def _run(h: highspy.Highs, matrix: MatrixModel) -> MatrixSolution:
+    """
+    Run HiGHS on the model it holds and collect the solution
+    :param h: the HiGHS instance
+    :param matrix: the MatrixModel that the instance holds
+    :return: the solution
+    """
+    tic = time.time()
+    h.run()
+    solve_time = time.time() - tic
+    status = h.getModelStatus()
+    info = h.getInfo()
+    logger.info(
+        'HiGHS solve finished with status %s in %0.2f seconds and %d simplex iterations',
+        h.modelStatusToString(status),
+        solve_time,
+        info.simplex_iteration_count,
+    )
+    solution = h.getSolution()
+
+    if info.primal_solution_status == highspy.kSolutionStatusFeasible:
+        objective = info.objective_function_value
+        x = np.array(solution.col_value)
+    else:
+        objective = None
+        x = np.full(matrix.num_cols, np.nan)
+    if solution.dual_valid:
+        duals = np.array(solution.row_dual)
+        reduced_costs = np.array(solution.col_dual)
+    else:
+        duals = np.full(matrix.num_rows, np.nan)
+        reduced_costs = np.full(matrix.num_cols, np.nan)
+    return MatrixSolution(
+        matrix=matrix,
+        status=status,
+        objective=objective,
+        x=x,
+        duals=duals,
+        reduced_costs=reduced_costs,
+        solve_time=solve_time,
+    )
+
+
+def solve_matrix(
+    matrix: MatrixModel, silent: bool = False, options: dict | None = None
+) -> MatrixSolution:
+    """
+    Solve a MatrixModel with HiGHS
+    :param matrix: the model
+    :param silent: suppress the HiGHS log
+    :param options: HiGHS options by name, e.g. {'solver': 'ipm', 'time_limit': 3600}
+    :return: a MatrixSolution
+    """
+    h = _make_highs(silent, options)
+    if h.passModel(_make_lp(matrix)) == highspy.HighsStatus.kError:
+        raise RuntimeError('HiGHS rejected the model matrix')
+    return _run(h, matrix)
+
+
+class CostUpdateHighs:
+    """
+    A HiGHS instance that holds one model and solves it with a sequence of objectives, as in the
+    iterations of MGA.  Only the costs of the objective columns are passed to HiGHS between
+    solves.  HiGHS keeps its basis through cost changes, so each solve is warm-started from the
+    optimal basis of the last.
+    """
+
+    def __init__(self, matrix: MatrixModel, silent: bool = True, options: dict | None = None):
+        """
+        Load the model into HiGHS
+        :param matrix: the model.  Its objective is replaced by the costs passed to solve()
+        :param silent: suppress the HiGHS log
+        :param options: HiGHS options by name
+        """
+        self.matrix = matrix
+        self.highs = _make_highs(silent, options)
+        if self.highs.passModel(_make_lp(matrix)) == highspy.HighsStatus.kError:
+            raise RuntimeError('HiGHS rejected the model matrix')
+        self.solves = 0
+
+    def solve(self, cols: np.ndarray, costs: np.ndarray) -> MatrixSolution:
+        """
+        Set the costs of some columns and solve.  The costs of the other columns are unchanged
+        :param cols: the columns (in matrix order)
+        :param costs: the costs
+        :return: the solution
+        """
+        cols = np.asarray(cols, dtype=np.int32)
+        self.highs.changeColsCost(len(cols), cols, np.asarray(costs, dtype=float))
+        solution = _run(self.highs, self.matrix)
+        self.solves += 1
+        return solution
+
+
+class MatrixResults(SolverResults):
+    """
+    The SolverResults of a solve in matrix form, which also carry the solution arrays for results
+    processing.  The model variables are not loaded.
+    """
+
+    def __init__(self, solution: MatrixSolution):
+        super().__init__()
+        self._matrix_solution = solution
+
+    @property
+    def matrix_solution(self) -> MatrixSolution:
+        return self._matrix_solution
+
+
+def make_results(instance: TemoaModel, solution: MatrixSolution) -> MatrixResults:
+    """
+    Make the SolverResults of a solution for the status checks and results processing downstream.
+    The values stay in the solution arrays:  neither the model variables nor the dual suffix are
+    loaded
+    :param instance: the model that was compiled into the solution's MatrixModel
+    :param solution: the solution
+    :return: the results
+    """
+    matrix = solution.matrix
+    results = MatrixResults(solution)
+    results.solver.name = SOLVER_NAME
+    results.solver.wallclock_time = solution.solve_time
+    results.solver.termination_condition = _termination.get(
+        solution.status, TerminationCondition.other
+    )
+    results.solver.status = SolverStatus.ok if solution.optimal else SolverStatus.warning
+    results.problem.number_of_constraints = matrix.num_rows
+    results.problem.number_of_variables = matrix.num_cols
+    results.problem.number_of_nonzeros = matrix.A.nnz
+
+    soln = Solution()
+    soln.status = SolutionStatus.optimal if solution.optimal else SolutionStatus.other
+    if solution.objective is not None:
+        objective = next(instance.component_data_objects(Objective, active=True), None)
+        # a model with the direct components omitted has no objective component
+        objective_name = objective.name if objective is not None else 'TotalCost'
+        soln.objective[objective_name] = {'Value': solution.objective}
+        results.problem.lower_bound = results.problem.upper_bound = solution.objective
+    results.solution.insert(soln)
+    return results
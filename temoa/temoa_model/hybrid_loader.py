@@ -3,19 +3,34 @@ A module to build/load a Data Portal for myopic run using both SQL to pull data
 and python to filter results
 """
 
+import sqlite3
+import threading
 import time
 from collections import defaultdict
+from copy import copy
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import cache
 from logging import getLogger
-from sqlite3 import Connection, OperationalError
+from pathlib import Path
+from sqlite3 import Connection
 from typing import Sequence
 
 from pyomo.core import Param, Set
 from pyomo.dataportal import DataPortal
 
 from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.data_cache import DataCache
+from temoa.temoa_model.loader_manifest import (
+    ManifestItem,
+    SchemaSnapshot,
+    manifest,
+    param_index_sets,
+)
 from temoa.temoa_model.model_checking import network_model_data, element_checker
 from temoa.temoa_model.model_checking.commodity_network_manager import CommodityNetworkManager
 from temoa.temoa_model.model_checking.element_checker import ViableSet
+from temoa.temoa_model.model_checking.viable_tables import ViableTables
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_mode import TemoaMode
 from temoa.temoa_model.temoa_model import TemoaModel
@@ -65,20 +80,106 @@ tables_with_regional_groups = {
 }
 
 
+@cache
+def _reference_model() -> TemoaModel:
+    """
+    A model used to look up components by name (for typing purposes only).  It is never
+    instanced, so one copy is shared by all loads
+    """
+    return TemoaModel()
+
+
+class LoaderSnapshot:
+    """
+    The data from the window-invariant manifest items, retained between the loads of a myopic run
+    so that each window only reads the tables that depend on the window.  The raw rows are read
+    once, and the loaded values are re-used as long as the filter used to screen them is
+    unchanged, so the data loaded is identical to a full reload.
+
+    The tables written during a myopic run (MyopicEfficiency and the Output tables) are never
+    window-invariant (see ManifestItem.window_invariant), so the snapshot stays valid while the
+    run writes its results, on any connection.  As with the data of the windows already solved,
+    changes made to the input tables by another process during the run are not seen.
+    """
+
+    def __init__(self):
+        self.raw: dict[ManifestItem, list[tuple]] = {}
+        # item: (the validation set used, the loaded value or None if nothing was loaded)
+        self.loaded: dict[ManifestItem, tuple[ViableSet | None, list | dict | None]] = {}
+
+    def fetch(self, item: ManifestItem, validation: ViableSet | None) -> list | dict | None:
+        """
+        Get a copy of the loaded value for an item, if it was loaded with the same filter
+        :param item: the manifest item
+        :param validation: the current validation set for the item
+        :return: the value, or None if there is no usable value
+        """
+        if item not in self.loaded:
+            return None
+        prev_validation, value = self.loaded[item]
+        if value is None or not self.same_filter(prev_validation, validation):
+            return None
+        # shallow copy, the values are consumed by the model build
+        return copy(value)
+
+    @staticmethod
+    def same_filter(a: ViableSet | None, b: ViableSet | None) -> bool:
+        if a is None or b is None:
+            return a is b
+        return (
+            a.member_tuples == b.member_tuples
+            and a.exception_loc == b.exception_loc
+            and list(a.val_exceptions or []) == list(b.val_exceptions or [])
+        )
+
+
+@dataclass
+class TableLoadStats:
+    """
+    The results of loading one manifest item
+    """
+
+    component: str
+    table: str
+    rows_read: int
+    rows_loaded: int
+    read_time: float
+    filter_time: float
+    screened_in_db: bool
+    from_snapshot: bool = False
+
+    @property
+    def rows_filtered(self) -> int:
+        """rows removed by filtering in python.  Rows screened in the database are not counted"""
+        return self.rows_read - self.rows_loaded
+
+
 class HybridLoader:
     """
     An instance of the HybridLoader
     """
 
-    def __init__(self, db_connection: Connection, config: TemoaConfig):
+    def __init__(
+        self,
+        db_connection: Connection,
+        config: TemoaConfig,
+        schema: SchemaSnapshot | None = None,
+        snapshot: LoaderSnapshot | None = None,
+    ):
         """
         build a loader for an instance.
         :param db_connection: a Connection to the database
         :param config: the config, which controls some options during execution
+        :param schema: a snapshot of the database schema, which may be shared by loaders of the
+        same database (such as in myopic runs).  If None, one is taken
+        :param snapshot: a snapshot of the window-invariant data shared by the loaders of a myopic
+        run.  If None, all data is read in each load
         """
         self.debugging = False  # for T/S, will print to screen the data load values
         self.con = db_connection
         self.config = config
+        self.schema = schema if schema else SchemaSnapshot(db_connection)
+        self.snapshot = snapshot
 
         self.manager: CommodityNetworkManager | None = None
 
@@ -93,6 +194,10 @@ class HybridLoader:
         self.viable_rt: ViableSet | None = None
         self.viable_rtt: ViableSet | None = None  # to support scanning LinkedTech
         self.efficiency_values: list[tuple] = []
+        # database copies of the filters, used if filtering is done in SQL
+        self.viable_tables: ViableTables | None = None
+        # the results of loading the manifest items in the last load
+        self.load_stats: list[TableLoadStats] = []
 
     def source_trace_only(self, make_plots: bool = False, myopic_index: MyopicIndex | None = None):
         if myopic_index and not isinstance(myopic_index, MyopicIndex):
@@ -189,16 +294,138 @@ class HybridLoader:
         :param table_name: the table name to check
         :return: True if it exists in the schema
         """
-        table_name_check = (
-            self.con.cursor()
-            .execute("SELECT name FROM sqlite_master WHERE type='table' AND name= ?", (table_name,))
-            .fetchone()
-        )
-        if table_name_check:
+        if self.schema.has_table(table_name):
             return True
         logger.info('Did not find existing table for (optional) table:  %s', table_name)
         return False
 
+    def _make_viable_tables(self, items: Sequence[ManifestItem]) -> ViableTables | None:
+        """
+        Write the filters used by the manifest items into database tables so that the rows can be
+        screened in the queries
+        :param items: the manifest items to be loaded
+        :return: the ViableTables or None if they cannot be made
+        """
+        if self.con.in_transaction:
+            logger.warning('Connection has an open transaction.  Filtering will be done in python.')
+            return None
+        tic = time.time()
+        try:
+            tables = ViableTables(self.con)
+        except RuntimeError as e:
+            logger.warning('%s.  Filtering will be done in python.', e)
+            return None
+        for item in items:
+            if item.validator:
+                tables.write(item.validator, getattr(self, item.validator))
+                tables.screen_exceptions(item.validator, item.table, item.validation_columns)
+        logger.debug('Wrote the viable set tables in %0.3f seconds', time.time() - tic)
+        return tables
+
+    def _fetch_all(
+        self, queries: list[tuple[str, tuple]]
+    ) -> tuple[list[list[tuple]], list[float]]:
+        """
+        Execute a batch of independent read queries.  If parallel loading is selected in the config
+        and the database is a file, the queries are spread across a pool of read-only connections,
+        otherwise they are run in order on the loader's connection
+        :param queries: list of (SQL, parameters)
+        :return: tuple of the list of query results and the list of the query times, in the same
+        order as the queries
+        """
+        tic = time.time()
+        workers = self.config.parallel_load
+        db_file = self.con.execute('PRAGMA database_list').fetchone()[2]
+        if workers > 1 and self.con.in_transaction:
+            # other connections would not see the uncommitted changes
+            logger.warning('Connection has an open transaction.  Parallel load not possible.')
+            workers = 0
+        if workers > 1 and not db_file:
+            logger.info('Parallel load is not possible with an in-memory database.')
+            workers = 0
+
+        if workers > 1:
+            uri = Path(db_file).as_uri() + '?mode=ro'
+            local = threading.local()
+            connections: list[Connection] = []
+
+            def fetch(query: tuple[str, tuple]) -> tuple[list[tuple], float]:
+                # each thread gets its own connection, which the sqlite3 module releases the GIL on
+                con = getattr(local, 'con', None)
+                if con is None:
+                    con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+                    if self.viable_tables:
+                        self.viable_tables.attach(con)
+                    local.con = con
+                    connections.append(con)
+                return self._timed_fetch(con, query)
+
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    fetched = list(pool.map(fetch, queries))
+            finally:
+                for con in connections:
+                    con.close()
+        else:
+            fetched = [self._timed_fetch(self.con, query) for query in queries]
+        results = [res for res, _ in fetched]
+        logger.info(
+            'Read %d tables (%d rows) in %0.3f seconds using %d connection(s)',
+            len(queries),
+            sum(len(res) for res in results),
+            time.time() - tic,
+            max(workers, 1),
+        )
+        return results, [elapsed for _, elapsed in fetched]
+
+    @staticmethod
+    def _timed_fetch(con: Connection, query: tuple[str, tuple]) -> tuple[list[tuple], float]:
+        tic = time.time()
+        res = con.execute(*query).fetchall()
+        return res, time.time() - tic
+
+    def _report_load_stats(self) -> None:
+        """
+        Log the results of loading the manifest items, slowest first
+        :return: None
+        """
+        stats = self.load_stats
+        logger.info(
+            'Loaded %d manifest tables (%d from snapshot):  %d rows read, %d rows filtered, '
+            '%d rows loaded',
+            len(stats),
+            sum(s.from_snapshot for s in stats),
+            sum(s.rows_read for s in stats),
+            sum(s.rows_filtered for s in stats),
+            sum(s.rows_loaded for s in stats),
+        )
+        for s in sorted(stats, key=lambda s: s.read_time + s.filter_time, reverse=True):
+            logger.debug(
+                '  %-40s from %-28s read: %8d  filtered: %8d  loaded: %8d  '
+                'read time: %0.4f  filter time: %0.4f%s%s',
+                s.component,
+                s.table,
+                s.rows_read,
+                s.rows_filtered,
+                s.rows_loaded,
+                s.read_time,
+                s.filter_time,
+                '  (screened in db)' if s.screened_in_db else '',
+                '  (from snapshot)' if s.from_snapshot else '',
+            )
+
+    def load_data(self, myopic_index: MyopicIndex | None = None) -> DataPortal | dict:
+        """
+        Load the model data in the form selected by the config.  If direct loading is selected, the
+        data dictionary is returned (build_instance releases its entries during the build),
+        otherwise a DataPortal
+        :param myopic_index: the MyopicIndex for myopic run.  None for other modes
+        :return: a dictionary of component name: data or a DataPortal
+        """
+        if self.config.direct_load:
+            return self.create_data_dict(myopic_index=myopic_index)
+        return self.load_data_portal(myopic_index=myopic_index)
+
     def load_data_portal(self, myopic_index: MyopicIndex | None = None) -> DataPortal:
         """
         Create and Load a Data Portal.  If source tracing is enabled in the config, the source trace will
@@ -206,6 +433,62 @@ class HybridLoader:
         :param myopic_index: the MyopicIndex for myopic run.  None for other modes
         :return:
         """
+        data = self.create_data_dict(myopic_index=myopic_index)
+        # pyomo namespace format has data[namespace][idx]=value
+        # the default namespace is None, thus...
+        namespace = {None: data}
+        if self.debugging:
+            for item in namespace[None].items():
+                print(item[0], item[1])
+        return DataPortal(data_dict=namespace)
+
+    def create_data_dict(self, myopic_index: MyopicIndex | None = None) -> dict[str, list | dict]:
+        """
+        Pull the data for all model elements from the database into a dictionary keyed by the
+        component name.  If source tracing is enabled in the config, the source trace will be
+        executed and filtered data will be used.  Without source-trace, raw (unfiltered) data will
+        be loaded.  If the data cache is enabled in the config, a cached copy of the data is used
+        when the database and config are unchanged from a previous load.
+        :param myopic_index: the MyopicIndex for myopic run.  None for other modes
+        :return: dictionary of component name: list of set members or dict of param values
+        """
+        if self.config.data_cache is None:
+            return self._load_data_dict(myopic_index=myopic_index)
+
+        cache = DataCache.from_config(self.config)
+        key = DataCache.fingerprint(self.con, self.config, myopic_index=myopic_index)
+        data = cache.fetch(key)
+        if data is None:
+            data = self._load_data_dict(myopic_index=myopic_index)
+            cache.store(key, data)
+        else:
+            # the source trace is still run so that the manager (and its outputs, such as the
+            # commodity network plots) and the filters are the same as for a full load
+            self._prepare_filters(myopic_index=myopic_index)
+        return data
+
+    def _prepare_filters(self, myopic_index: MyopicIndex | None = None) -> bool:
+        """
+        Run the source trace (if needed) and build the efficiency dataset and the filters
+        :param myopic_index: the MyopicIndex for myopic run.  None for other modes
+        :return: True if the raw (unfiltered) data is to be used
+        """
+        if self.config.source_trace or self.config.scenario_mode == TemoaMode.MYOPIC:
+            use_raw_data = False
+            self._source_trace(myopic_index=myopic_index)
+        else:
+            use_raw_data = True
+
+        # build the Efficiency Dataset
+        self._build_efficiency_dataset(use_raw_data=use_raw_data, myopic_index=myopic_index)
+        return use_raw_data
+
+    def _load_data_dict(self, myopic_index: MyopicIndex | None = None) -> dict[str, list | dict]:
+        """
+        Load the data dictionary from the database (see create_data_dict)
+        :param myopic_index: the MyopicIndex for myopic run.  None for other modes
+        :return: dictionary of component name: list of set members or dict of param values
+        """
         # the general plan:
         # 0. determine if source trace needs to be done, and do it
         # 1. build the efficiency table
@@ -213,7 +496,7 @@ class HybridLoader:
         # 3. use SQL query to get the full table
         # 4. (OPTIONALLY) filter it, as needed for myopic
         # 5. load it into the data dictionary
-        logger.info('Loading data portal')
+        logger.info('Loading model data')
 
         # some logic checking...
         if myopic_index is not None:
@@ -230,18 +513,11 @@ class HybridLoader:
                 'error.'
             )
 
-        if self.config.source_trace or self.config.scenario_mode == TemoaMode.MYOPIC:
-            use_raw_data = False
-            self._source_trace(myopic_index=myopic_index)
-        else:
-            use_raw_data = True
-
-        # build the Efficiency Dataset
-        self._build_efficiency_dataset(use_raw_data=use_raw_data, myopic_index=myopic_index)
+        use_raw_data = self._prepare_filters(myopic_index=myopic_index)
 
         mi = myopic_index  # convenience
 
-        # time the creation of the data portal
+        # time the creation of the data
         tic = time.time()
         # housekeeping
         data: dict[str, list | dict] = dict()
@@ -261,16 +537,17 @@ class HybridLoader:
             get deterministic results)
             :param validation: the set to validate the keys/set value against
             :param val_loc: tuple of the positions of r, t, v in the key for validation
-            :return: None
+            :return: the number of values loaded
             """
             if len(values) == 0:
                 logger.info('table, but no (usable) values for param or set: %s', c.name)
-                return
+                return 0
             if not isinstance(values[0], tuple):
                 raise ValueError('values must be an iterable of tuples')
 
             if use_raw_data or validation is None:
-                screened = list(values)
+                # query results are already lists, so avoid making a copy of large tables
+                screened = values if isinstance(values, list) else list(values)
             else:
                 try:
                     screened = element_checker.filter_elements(
@@ -291,6 +568,7 @@ class HybridLoader:
                         data[c.name] = screened
                 case Param():
                     data[c.name] = {t[:-1]: t[-1] for t in screened}
+            return len(screened)
 
         def load_indexed_set(indexed_set: Set, index_value, element, element_validator):
             """
@@ -307,7 +585,7 @@ class HybridLoader:
             data_store[index_value].append(element)
             data[indexed_set.name] = data_store
 
-        M: TemoaModel = TemoaModel()  # for typing purposes only
+        M: TemoaModel = _reference_model()  # for typing purposes only
         cur = self.con.cursor()
 
         #   === TIME SETS ===
@@ -337,14 +615,6 @@ class HybridLoader:
             ).fetchall()
         load_element(M.time_future, raw)
 
-        # time_of_day
-        raw = cur.execute('SELECT tod FROM main.TimeOfDay ORDER BY sequence').fetchall()
-        load_element(M.time_of_day, raw)
-
-        # time_season
-        raw = cur.execute('SELECT season FROM main.TimeSeason ORDER BY sequence').fetchall()
-        load_element(M.time_season, raw)
-
         # myopic_base_year
         if mi:
             raw = cur.execute(
@@ -357,10 +627,6 @@ class HybridLoader:
 
         #  === REGION SETS ===
 
-        # regions
-        raw = cur.execute('SELECT region FROM main.Region').fetchall()
-        load_element(M.regions, raw)
-
         # region-groups  (these are the R1+R2, R1+R4+R6 type region labels)
         regions_and_groups = set()
         for table, field_name in tables_with_regional_groups.items():
@@ -379,35 +645,15 @@ class HybridLoader:
 
         #  === TECH SETS ===
 
-        # tech_resource
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'r'").fetchall()
-        load_element(M.tech_resource, raw, self.viable_techs)
-
-        # tech_production
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag LIKE 'p%'").fetchall()
-        load_element(M.tech_production, raw, self.viable_techs)
-
         # tech_uncap
-        try:
+        if self.schema.has_column('Technology', 'unlim_cap'):
             raw = cur.execute('SELECT tech FROM main.Technology WHERE unlim_cap > 0').fetchall()
             load_element(M.tech_uncap, raw, self.viable_techs)
-        except OperationalError:
+        else:
             logger.info(
                 'The current database does not support non-capacity techs and should be upgraded.'
             )
 
-        # tech_baseload
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'pb'").fetchall()
-        load_element(M.tech_baseload, raw, self.viable_techs)
-
-        # tech_storage
-        raw = cur.execute("SELECT tech FROM main.Technology WHERE flag = 'ps'").fetchall()
-        load_element(M.tech_storage, raw, self.viable_techs)
-
-        # tech_reserve
-        raw = cur.execute('SELECT tech FROM Technology WHERE reserve > 0').fetchall()
-        load_element(M.tech_reserve, raw, self.viable_techs)
-
         # tech_ramping
         techs = set()
         if self.table_exists('RampUp'):
@@ -419,23 +665,7 @@ class HybridLoader:
         load_element(M.tech_ramping, sorted((t,) for t in techs), self.viable_techs)  # sort for
         # deterministic behavior
 
-        # tech_curtailment
-        raw = cur.execute('SELECT tech FROM Technology WHERE curtail > 0').fetchall()
-        load_element(M.tech_curtailment, raw, self.viable_techs)
-
-        # tech_flex
-        raw = cur.execute('SELECT tech FROM Technology WHERE flex > 0').fetchall()
-        load_element(M.tech_flex, raw, self.viable_techs)
-
-        # tech_exchange
-        raw = cur.execute('SELECT tech FROM Technology WHERE exchange > 0').fetchall()
-        load_element(M.tech_exchange, raw, self.viable_techs)
-
-        # groups & tech_groups (supports RPS and general tech grouping)
-        if self.table_exists('TechGroup'):
-            raw = cur.execute('SELECT group_name FROM main.TechGroup').fetchall()
-            load_element(M.tech_group_names, raw)
-
+        # tech_groups (supports RPS and general tech grouping)
         if self.table_exists('TechGroupMember'):
             raw = cur.execute('SELECT group_name, tech FROM main.TechGroupMember').fetchall()
             validator = self.viable_techs.members if self.viable_techs else None
@@ -447,37 +677,6 @@ class HybridLoader:
                     element_validator=validator,
                 )
 
-        # tech_annual
-        raw = cur.execute('SELECT tech FROM Technology WHERE annual > 0').fetchall()
-        load_element(M.tech_annual, raw, self.viable_techs)
-
-        # tech_retirement
-        raw = cur.execute('SELECT tech FROM Technology WHERE retire > 0').fetchall()
-        load_element(M.tech_retirement, raw, self.viable_techs)
-
-        #  === COMMODITIES ===
-
-        # commodity_demand
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 'd'").fetchall()
-        load_element(M.commodity_demand, raw, self.viable_comms)
-
-        # commodity_emissions
-        # currently NOT validated against anything... shouldn't be a problem ?
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 'e'").fetchall()
-        load_element(M.commodity_emissions, raw)
-
-        # commodity_physical
-        raw = cur.execute(
-            "SELECT name FROM main.Commodity WHERE flag = 'p' OR flag = 's'"
-        ).fetchall()
-        # The model enforces 0 symmetric difference between the physical commodities
-        # and the input commodities, so we need to include only the viable INPUTS
-        load_element(M.commodity_physical, raw, self.viable_input_comms)
-
-        # commodity_source
-        raw = cur.execute("SELECT name FROM main.Commodity WHERE flag = 's'").fetchall()
-        load_element(M.commodity_source, raw, self.viable_input_comms)
-
         #  === PARAMS ===
 
         # Efficiency
@@ -527,200 +726,6 @@ class HybridLoader:
         # do this separately as it is non-indexed, so we need to make a mapping with None
         data[M.GlobalDiscountRate.name] = {None: raw[0][0]}
 
-        # SegFrac
-        raw = cur.execute('SELECT season, tod, segfrac FROM main.TimeSegmentFraction').fetchall()
-        load_element(M.SegFrac, raw)
-
-        # DemandSpecificDistribution
-        raw = cur.execute(
-            'SELECT region, season, tod, demand_name, dsd FROM main.DemandSpecificDistribution'
-        ).fetchall()
-        load_element(M.DemandSpecificDistribution, raw)
-
-        # Demand
-        if mi:
-            raw = cur.execute(
-                'SELECT region, period, commodity, demand FROM main.Demand '
-                'WHERE period >= ? AND period <= ?',
-                (mi.base_year, mi.last_demand_year),
-            ).fetchall()
-        else:
-            raw = cur.execute(
-                'SELECT region, period, commodity, demand FROM main.Demand '
-            ).fetchall()
-        load_element(M.Demand, raw)
-
-        # RescourceBound
-        # TODO:  later, it isn't used RN anyhow.
-
-        # CapacityToActivity
-        raw = cur.execute('SELECT region, tech, c2a FROM main.CapacityToActivity ').fetchall()
-        load_element(M.CapacityToActivity, raw, self.viable_rt, (0, 1))
-
-        # CapacityFactorTech
-        raw = cur.execute(
-            'SELECT region, season, tod, tech, factor ' 'FROM main.CapacityFactorTech'
-        ).fetchall()
-        load_element(M.CapacityFactorTech, raw, self.viable_rt, (0, 3))
-
-        # CapacityFactorProcess
-        raw = cur.execute(
-            'SELECT region, season, tod, tech, vintage, factor ' ' FROM main.CapacityFactorProcess'
-        ).fetchall()
-        load_element(M.CapacityFactorProcess, raw, self.viable_rtv, (0, 3, 4))
-
-        # LifetimeTech
-        raw = cur.execute('SELECT region, tech, lifetime FROM main.LifetimeTech').fetchall()
-        load_element(M.LifetimeTech, raw, self.viable_rt, val_loc=(0, 1))
-
-        # LifetimeProcess
-        raw = cur.execute(
-            'SELECT region, tech, vintage, lifetime FROM main.LifetimeProcess'
-        ).fetchall()
-        load_element(M.LifetimeProcess, raw, self.viable_rtv, val_loc=(0, 1, 2))
-
-        # LoanLifetimeTech
-        raw = cur.execute('SELECT region, tech, lifetime FROM main.LoanLifetimeTech').fetchall()
-        load_element(M.LoanLifetimeTech, raw, self.viable_rt, (0, 1))
-
-        # TechInputSplit
-        if mi:
-            raw = cur.execute(
-                'SELECT region, period, input_comm, tech, min_proportion FROM main.TechInputSplit '
-                'WHERE period >= ? AND period <= ?',
-                (mi.base_year, mi.last_demand_year),
-            ).fetchall()
-        else:
-            raw = cur.execute(
-                'SELECT region, period, input_comm, tech, min_proportion FROM main.TechInputSplit '
-            ).fetchall()
-        load_element(M.TechInputSplit, raw, self.viable_rt, (0, 3))
-
-        # TechInputSplitAverage
-        if self.table_exists('TechInputSplitAverage'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, input_comm, tech, min_proportion '
-                    'FROM main.TechInputSplitAverage '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, input_comm, tech, min_proportion '
-                    'FROM main.TechInputSplitAverage '
-                ).fetchall()
-            load_element(M.TechInputSplitAverage, raw, self.viable_rt, (0, 3))
-
-        # TechOutputSplit
-        if self.table_exists('TechOutputSplit'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, output_comm, min_proportion FROM main.TechOutputSplit '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, output_comm, min_proportion FROM main.TechOutputSplit '
-                ).fetchall()
-            load_element(M.TechOutputSplit, raw, self.viable_rt, (0, 2))
-
-        # TechOutputSplitAverage
-        if self.table_exists('TechOutputSplitAverage'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, output_comm, min_proportion '
-                    'FROM main.TechOutputSplitAverage '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, output_comm, min_proportion '
-                    'FROM main.TechOutputSplitAverage '
-                ).fetchall()
-            load_element(M.TechOutputSplitAverage, raw, self.viable_rt, (0, 2))
-
-        # RenewablePortfolioStandard
-        if self.table_exists('RPSRequirement'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech_group, requirement FROM main.RPSRequirement '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech_group, requirement FROM main.RPSRequirement '
-                ).fetchall()
-            load_element(M.RenewablePortfolioStandard, raw)
-
-        # CostFixed
-        if mi:
-            raw = cur.execute(
-                'SELECT region, period, tech, vintage, cost FROM main.CostFixed '
-                'WHERE period >= ? AND period <= ?',
-                (mi.base_year, mi.last_demand_year),
-            ).fetchall()
-        else:
-            raw = cur.execute(
-                'SELECT region, period, tech, vintage, cost FROM main.CostFixed '
-            ).fetchall()
-        load_element(M.CostFixed, raw, self.viable_rtv, val_loc=(0, 2, 3))
-
-        # CostInvest
-        # exclude "existing" vintages by screening for base year and beyond.
-        # the "viable_rtv" will filter anything beyond view
-        if mi:
-            raw = cur.execute(
-                'SELECT region, tech, vintage, cost FROM main.CostInvest ' 'WHERE vintage >= ?',
-                (mi.base_year,),
-            ).fetchall()
-        else:
-            raw = cur.execute('SELECT region, tech, vintage, cost FROM main.CostInvest ').fetchall()
-        load_element(M.CostInvest, raw, self.viable_rtv, (0, 1, 2))
-
-        # CostVariable
-        if mi:
-            raw = cur.execute(
-                'SELECT region, period, tech, vintage, cost FROM main.CostVariable '
-                'WHERE period >= ? AND period <= ?',
-                (mi.base_year, mi.last_demand_year),
-            ).fetchall()
-        else:
-            raw = cur.execute(
-                'SELECT region, period, tech, vintage, cost FROM main.CostVariable '
-            ).fetchall()
-        load_element(M.CostVariable, raw, self.viable_rtv, (0, 2, 3))
-
-        # CostEmissions (and supporting index set)
-        if self.table_exists('CostEmission'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm from main.CostEmission '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-                load_element(M.CostEmission_rpe, raw)
-
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm, cost from main.CostEmission '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-                load_element(M.CostEmission, raw)
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm from main.CostEmission '
-                ).fetchall()
-                load_element(M.CostEmission_rpe, raw)
-
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm, cost from main.CostEmission '
-                ).fetchall()
-                load_element(M.CostEmission, raw)
-
         # DefaultLoanRate
         raw = cur.execute(
             "SELECT value FROM main.MetaDataReal WHERE element = 'default_loan_rate'"
@@ -728,357 +733,72 @@ class HybridLoader:
         # do this separately as it is non-indexed, so we need to make a mapping with None
         data[M.DefaultLoanRate.name] = {None: raw[0][0]}
 
-        # LoanRate
-        if mi:
-            raw = cur.execute(
-                'SELECT region, tech, vintage, rate FROM main.LoanRate ' 'WHERE vintage >= ?',
-                (mi.base_year,),
-            ).fetchall()
+        # the regular elements listed in the manifest.  The reads may be done in parallel, but
+        # the results are loaded in manifest order for deterministic results
+        items = [item for item in manifest if not item.optional or self.table_exists(item.table)]
+        # with a snapshot, the window-invariant items are read (unscreened) only once and then
+        # re-used or re-filtered in later loads
+        snapshot = self.snapshot
+        if snapshot:
+            kept = {item for item in items if item.window_invariant}
         else:
-            raw = cur.execute('SELECT region, tech, vintage, rate FROM main.LoanRate ').fetchall()
-
-        load_element(M.LoanRate, raw, self.viable_rtv, (0, 1, 2))
-
-        # MinCapacity
-        if self.table_exists('MinCapacity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_cap FROM main.MinCapacity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_cap FROM main.MinCapacity '
-                ).fetchall()
-            load_element(M.MinCapacity, raw, self.viable_rt, (0, 2))
-
-        # MaxCapacity
-        if self.table_exists('MaxCapacity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_cap FROM main.MaxCapacity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_cap FROM main.MaxCapacity '
-                ).fetchall()
-            load_element(M.MaxCapacity, raw, self.viable_rt, (0, 2))
-
-        # MinNewCap
-        if self.table_exists('MinNewCapacity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_cap FROM main.MinNewCapacity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_cap FROM main.MinNewCapacity '
-                ).fetchall()
-            load_element(M.MinNewCapacity, raw, self.viable_rt, (0, 2))
-
-        # MaxNewCap
-        if self.table_exists('MaxNewCapacity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_cap FROM main.MaxNewCapacity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_cap FROM main.MaxNewCapacity '
-                ).fetchall()
-            load_element(M.MaxNewCapacity, raw, self.viable_rt, (0, 2))
-
-        # MaxCapacityGroup
-        if self.table_exists('MaxCapacityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_cap FROM main.MaxCapacityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_cap FROM main.MaxCapacityGroup '
-                ).fetchall()
-            load_element(M.MaxCapacityGroup, raw)
-
-        # MinCapacityGroup
-        if self.table_exists('MinCapacityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_cap FROM main.MinCapacityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_cap FROM main.MinCapacityGroup '
-                ).fetchall()
-            load_element(M.MinCapacityGroup, raw)
-
-        # MinNewCapacityGroup
-        if self.table_exists('MinNewCapacityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_new_cap FROM main.MinNewCapacityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_new_cap FROM main.MinNewCapacityGroup '
-                ).fetchall()
-            load_element(M.MinNewCapacityGroup, raw)
-
-        # MaxNewCapacityGroup
-        if self.table_exists('MaxNewCapacityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_new_cap FROM main.MaxNewCapacityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_new_cap FROM main.MaxNewCapacityGroup '
-                ).fetchall()
-            load_element(M.MaxNewCapacityGroup, raw)
-
-        # MinCapacityShare
-        if self.table_exists('MinCapacityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, min_proportion FROM main.MinCapacityShare'
-            ).fetchall()
-            load_element(M.MinCapacityShare, raw, self.viable_rt, (0, 2))
-
-        # MaxCapacityShare
-        if self.table_exists('MaxCapacityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, max_proportion FROM main.MaxCapacityShare'
-            ).fetchall()
-            load_element(M.MaxCapacityShare, raw, self.viable_rt, (0, 2))
-
-        # MinNewCapacityShare
-        if self.table_exists('MinNewCapacityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, max_proportion FROM main.MinNewCapacityShare'
-            ).fetchall()
-            load_element(M.MinCapacityShare, raw, self.viable_rt, (0, 2))
-
-        # MaxNewCapacityShare
-        if self.table_exists('MaxNewCapacityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, max_proportion FROM main.MaxNewCapacityShare'
-            ).fetchall()
-            load_element(M.MaxCapacityShare, raw, self.viable_rt, (0, 2))
-
-        # MinActivityGroup
-        if self.table_exists('MinActivityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_act FROM main.MinActivityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, min_act FROM main.MinActivityGroup '
-                ).fetchall()
-            load_element(M.MinActivityGroup, raw)
-
-        # MaxActivityGroup
-        if self.table_exists('MaxActivityGroup'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_act FROM main.MaxActivityGroup '
-                    ' WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, group_name, max_act FROM main.MaxActivityGroup '
-                ).fetchall()
-            load_element(M.MaxActivityGroup, raw)
-
-        # MinActivityShare
-        if self.table_exists('MinActivityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, min_proportion FROM main.MinActivityShare'
-            ).fetchall()
-            load_element(M.MinActivityShare, raw, self.viable_rt, (0, 2))
-
-        # MaxActivityShare
-        if self.table_exists('MaxActivityShare'):
-            raw = cur.execute(
-                'SELECT region, period, tech, group_name, max_proportion FROM main.MaxActivityShare'
-            ).fetchall()
-            load_element(M.MaxActivityShare, raw, self.viable_rt, (0, 2))
-
-        # MaxResource
-        if self.table_exists('MaxResource'):
-            raw = cur.execute('SELECT region, tech, max_res FROM main.MaxResource').fetchall()
-            load_element(M.MaxResource, raw, self.viable_rt, (0, 1))
-
-        # MaxActivity
-        if self.table_exists('MaxActivity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_act FROM main.MaxActivity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, max_act FROM main.MaxActivity '
-                ).fetchall()
-            load_element(M.MaxActivity, raw, self.viable_rt, (0, 2))
-
-        # MinActivity
-        if self.table_exists('MinActivity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_act FROM main.MinActivity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, min_act FROM main.MinActivity '
-                ).fetchall()
-            load_element(M.MinActivity, raw, self.viable_rt, (0, 2))
-
-        # MaxSeasonalActivity
-        if self.table_exists('MaxSeasonalActivity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, season, tech, max_act FROM main.MaxSeasonalActivity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, season, tech, max_act FROM main.MaxSeasonalActivity '
-                ).fetchall()
-            load_element(M.MaxSeasonalActivity, raw, self.viable_rt, (0, 3))
-
-        # MinSeasonalActivity
-        if self.table_exists('MinSeasonalActivity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, season, tech, min_act FROM main.MinSeasonalActivity '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+            kept = set()
+        to_read = [item for item in items if item not in kept or item not in snapshot.raw]
+        if self.config.sql_filter and not use_raw_data:
+            self.viable_tables = self._make_viable_tables(
+                [item for item in to_read if item not in kept]
+            )
+        try:
+            queries = []
+            for item in to_read:
+                screen = None
+                if self.viable_tables and item.validator and item not in kept:
+                    screen = self.viable_tables.clause(item.validator, item.validation_columns)
+                queries.append(item.query(mi, screen=screen))
+            results, read_times = self._fetch_all(queries)
+        finally:
+            screened_in_db = self.viable_tables is not None
+            if self.viable_tables:
+                self.viable_tables.close()
+                self.viable_tables = None
+        fetched = dict(zip(to_read, zip(results, read_times)))
+        self.load_stats = []
+        for item in items:
+            if item in fetched:
+                raw, read_time = fetched[item]
+                if item in kept:
+                    snapshot.raw[item] = raw
             else:
-                raw = cur.execute(
-                    'SELECT region, period, season, tech, min_act FROM main.MinSeasonalActivity '
-                ).fetchall()
-            load_element(M.MinSeasonalActivity, raw, self.viable_rt, (0, 3))
-
-        # MinAnnualCapacityFactor
-        if self.table_exists('MinAnnualCapacityFactor'):
-            raw = cur.execute(
-                'SELECT region, period, tech, output_comm, factor FROM main.MinAnnualCapacityFactor'
-            ).fetchall()
-            load_element(M.MinAnnualCapacityFactor, raw, self.viable_rt, (0, 2))
-
-        # MaxAnnualCapacityFactor
-        if self.table_exists('MaxAnnualCapacityFactor'):
-            raw = cur.execute(
-                'SELECT region, period, tech, output_comm, factor FROM main.MaxAnnualCapacityFactor'
-            ).fetchall()
-            load_element(M.MaxAnnualCapacityFactor, raw, self.viable_rt, (0, 2))
-
-        # GrowthRateMax
-        if self.table_exists('GrowthRateMax'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.GrowthRateMax').fetchall()
-            load_element(M.GrowthRateMax, raw, self.viable_rt, (0, 1))
-
-        # GrowthRateSeed
-        if self.table_exists('GrowthRateSeed'):
-            raw = cur.execute('SELECT region, tech, seed FROM main.GrowthRateSeed').fetchall()
-            load_element(M.GrowthRateSeed, raw, self.viable_rt, (0, 1))
-
-        # EmissionLimit
-        if self.table_exists('EmissionLimit'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm, value FROM main.EmissionLimit '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
+                raw, read_time = snapshot.raw[item], 0.0
+            in_db = screened_in_db and item.validator is not None and item not in kept
+            if item.validator and not in_db:
+                validation = getattr(self, item.validator)
             else:
-                raw = cur.execute(
-                    'SELECT region, period, emis_comm, value FROM main.EmissionLimit '
-                ).fetchall()
-
-            load_element(M.EmissionLimit, raw)
-
-        # EmissionActivity
-        # The current emission constraint screens by valid inputs, so if it is NOT
-        # built in a particular region, this should still be OK
-        if self.table_exists('EmissionActivity'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, emis_comm, input_comm, tech, vintage, output_comm, activity '
-                    'FROM main.EmissionActivity '
-                ).fetchall()
+                validation = None
+            filter_tic = time.time()
+            value = snapshot.fetch(item, validation) if item in kept else None
+            if value is not None:
+                data[item.component] = value
+                loaded = len(value)
             else:
-                raw = cur.execute(
-                    'SELECT region, emis_comm, input_comm, tech, vintage, output_comm, activity '
-                    'FROM main.EmissionActivity '
-                ).fetchall()
-            load_element(M.EmissionActivity, raw, self.viable_ritvo, (0, 2, 3, 4, 5))
-
-        # LinkedTechs
-        # Note:  Both of the linked techs must be viable.  As this is non period/vintage
-        #        specific, it should be true that if one is built, the other is also
-        if self.table_exists('LinkedTech'):
-            raw = cur.execute(
-                'SELECT primary_region, primary_tech, emis_comm, driven_tech FROM main.LinkedTech'
-            ).fetchall()
-            load_element(M.LinkedTechs, raw, self.viable_rtt, (0, 1, 3))
-
-        # RampUp
-        if self.table_exists('RampUp'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.RampUp').fetchall()
-            load_element(M.RampUp, raw, self.viable_rt, (0, 1))
-
-        # RampDown
-        if self.table_exists('RampDown'):
-            raw = cur.execute('SELECT region, tech, rate FROM main.RampDown').fetchall()
-            load_element(M.RampDown, raw, self.viable_rt, (0, 1))
-
-        # CapacityCredit
-        if self.table_exists('CapacityCredit'):
-            if mi:
-                raw = cur.execute(
-                    'SELECT region, period, tech, vintage, credit FROM main.CapacityCredit '
-                    'WHERE period >= ? AND period <= ?',
-                    (mi.base_year, mi.last_demand_year),
-                ).fetchall()
-            else:
-                raw = cur.execute(
-                    'SELECT region, period, tech, vintage, credit FROM main.CapacityCredit '
-                ).fetchall()
-            load_element(M.CapacityCredit, raw, self.viable_rtv, (0, 2, 3))
-
-        # PlanningReserveMargin
-        if self.table_exists('PlanningReserveMargin'):
-            raw = cur.execute('SELECT region, margin FROM main.PlanningReserveMargin').fetchall()
-            load_element(M.PlanningReserveMargin, raw)
-
-        # StorageDuration
-        if self.table_exists('StorageDuration'):
-            raw = cur.execute('SELECT region, tech, duration FROM main.StorageDuration').fetchall()
-            load_element(M.StorageDuration, raw, self.viable_rt, (0, 1))
+                loaded = load_element(M.component(item.component), raw, validation, item.val_loc)
+                if item in kept:
+                    # nothing is loaded for an empty table, so there is nothing to re-use
+                    value = copy(data[item.component]) if raw else None
+                    snapshot.loaded[item] = (validation, value)
+            self.load_stats.append(
+                TableLoadStats(
+                    component=item.component,
+                    table=item.table,
+                    rows_read=len(raw),
+                    rows_loaded=loaded,
+                    read_time=read_time,
+                    filter_time=time.time() - filter_tic,
+                    screened_in_db=in_db,
+                    from_snapshot=item not in fetched,
+                )
+            )
+        self._report_load_stats()
 
         # StorageInit
         # TODO:  DB table is busted / removed now... defer!
@@ -1091,16 +811,9 @@ class HybridLoader:
         set_data = self.load_param_idx_sets(data=data)
         data.update(set_data)
 
-        # pyomo namespace format has data[namespace][idx]=value
-        # the default namespace is None, thus...
-        namespace = {None: data}
-        if self.debugging:
-            for item in namespace[None].items():
-                print(item[0], item[1])
-        dp = DataPortal(data_dict=namespace)
         toc = time.time()
-        logger.debug('Data Portal Load time: %0.5f seconds', (toc - tic))
-        return dp
+        logger.debug('Data load time: %0.5f seconds', (toc - tic))
+        return data
 
     def load_param_idx_sets(self, data: dict) -> dict:
         """
@@ -1115,39 +828,8 @@ class HybridLoader:
         Having these sets allows quicker constraint builds becuase they are the basis of many constraints
         """
 
-        M: TemoaModel = TemoaModel()  # for typing
-        param_idx_sets = {
-            M.CostInvest.name: M.CostInvest_rtv.name,
-            M.EmissionLimit.name: M.EmissionLimitConstraint_rpe.name,
-            M.MaxActivity.name: M.MaxActivityConstraint_rpt.name,
-            M.MaxSeasonalActivity.name: M.MaxSeasonalActivityConstraint_rpst.name,
-            M.MaxActivityGroup.name: M.MaxActivityGroup_rpg.name,
-            M.MaxActivityShare.name: M.MaxActivityShareConstraint_rptg.name,
-            M.MaxAnnualCapacityFactor.name: M.MaxAnnualCapacityFactorConstraint_rpto.name,
-            M.MaxCapacity.name: M.MaxCapacityConstraint_rpt.name,
-            M.MaxCapacityGroup.name: M.MaxCapacityGroupConstraint_rpg.name,
-            M.MaxCapacityShare.name: M.MaxCapacityShareConstraint_rptg.name,
-            M.MaxNewCapacity.name: M.MaxNewCapacityConstraint_rpt.name,
-            M.MaxNewCapacityGroup.name: M.MaxNewCapacityGroupConstraint_rpg.name,
-            M.MaxNewCapacityShare.name: M.MaxNewCapacityShareConstraint_rptg.name,
-            M.MaxResource.name: M.MaxResourceConstraint_rt.name,
-            M.MinActivity.name: M.MinActivityConstraint_rpt.name,
-            M.MinSeasonalActivity.name: M.MinSeasonalActivityConstraint_rpst.name,
-            M.MinActivityGroup.name: M.MinActivityGroup_rpg.name,
-            M.MinActivityShare.name: M.MinActivityShareConstraint_rptg.name,
-            M.MinAnnualCapacityFactor.name: M.MinAnnualCapacityFactorConstraint_rpto.name,
-            M.MinCapacity.name: M.MinCapacityConstraint_rpt.name,
-            M.MinCapacityGroup.name: M.MinCapacityGroupConstraint_rpg.name,
-            M.MinCapacityShare.name: M.MinCapacityShareConstraint_rptg.name,
-            M.MinNewCapacity.name: M.MinNewCapacityConstraint_rpt.name,
-            M.MinNewCapacityGroup.name: M.MinNewCapacityGroupConstraint_rpg.name,
-            M.MinNewCapacityShare.name: M.MinNewCapacityShareConstraint_rptg.name,
-            M.RenewablePortfolioStandard.name: M.RenewablePortfolioStandardConstraint_rpg.name,
-            M.ResourceBound.name: M.ResourceConstraint_rpr.name,
-        }
-
         res = {}
-        for p, s in param_idx_sets.items():
+        for p, s in param_index_sets.items():
             param_data = data.get(p)
             if param_data is None:
                 # no data for this param... nothing to capture for idx set
@@ -0,0 +1,607 @@
+"""
+A declarative listing of the "regular" model elements loaded by the HybridLoader.  Each item maps
+a database table (and the columns to pull) to a model component and the viable set used to screen
+its rows.  Elements that need custom logic to load are handled directly in the HybridLoader.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass
+from enum import Enum, unique
+from sqlite3 import Connection
+
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+
+
+@unique
+class MyopicFilter(Enum):
+    """
+    How the rows of a table are screened to the myopic window
+    """
+
+    NONE = 0
+    PERIOD = 1  # base year <= period <= last demand year
+    VINTAGE = 2  # vintage >= base year
+
+
+class SchemaSnapshot:
+    """
+    The tables and columns of a database, captured in one query so that the loader does not need
+    to query the database metadata for each optional table or column
+    """
+
+    def __init__(self, con: Connection):
+        """
+        Take the snapshot.  Note:  the snapshot is not updated, so it should be taken after any
+        tables the loader reads have been created
+        :param con: connection to the database
+        """
+        self.tables: dict[str, set[str]] = defaultdict(set)
+        rows = con.execute(
+            'SELECT m.name, p.name FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p '
+            "WHERE m.type = 'table'"
+        ).fetchall()
+        for table, column in rows:
+            self.tables[table].add(column)
+        self.tables = dict(self.tables)
+
+    def has_table(self, table: str) -> bool:
+        return table in self.tables
+
+    def has_column(self, table: str, column: str) -> bool:
+        return column in self.tables.get(table, ())
+
+
+@dataclass(frozen=True)
+class ManifestItem:
+    """
+    A model element that is loaded directly from a table
+    """
+
+    component: str
+    """name of the model component to load"""
+    table: str
+    columns: tuple[str, ...]
+    """the columns to pull.  For params, the last column is the value"""
+    validator: str | None = None
+    """name of the HybridLoader ViableSet used to screen the rows"""
+    val_loc: tuple[int, ...] = (0,)
+    """positions in the row of the elements to validate"""
+    where: str | None = None
+    order_by: str | None = None
+    myopic_filter: MyopicFilter = MyopicFilter.NONE
+    optional: bool = False
+    """if True, the table is only read if it exists in the database"""
+
+    @property
+    def validation_columns(self) -> tuple[str, ...]:
+        """the columns that correspond to the elements of the validator"""
+        return tuple(self.columns[i] for i in self.val_loc)
+
+    @property
+    def window_invariant(self) -> bool:
+        """
+        True if the rows read are the same in every myopic window.  The tables written during a
+        myopic run (MyopicEfficiency and the Output tables) are excluded
+        """
+        return (
+            self.myopic_filter is MyopicFilter.NONE
+            and self.table != 'MyopicEfficiency'
+            and not self.table.startswith('Output')
+        )
+
+    def query(
+        self, myopic_index: MyopicIndex | None = None, screen: str | None = None
+    ) -> tuple[str, tuple]:
+        """
+        Make the query for this item
+        :param myopic_index: the MyopicIndex of the load, if any
+        :param screen: an additional SQL clause to screen the rows (such as a viable set filter)
+        :return: tuple of the SQL and its parameters
+        """
+        sql = f'SELECT {", ".join(self.columns)} FROM main.{self.table}'
+        clauses = [self.where] if self.where else []
+        params = ()
+        if myopic_index:
+            match self.myopic_filter:
+                case MyopicFilter.PERIOD:
+                    clauses.append('period >= ? AND period <= ?')
+                    params = (myopic_index.base_year, myopic_index.last_demand_year)
+                case MyopicFilter.VINTAGE:
+                    clauses.append('vintage >= ?')
+                    params = (myopic_index.base_year,)
+        if screen:
+            clauses.append(screen)
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(f'({clause})' for clause in clauses)
+        if self.order_by:
+            sql += f' ORDER BY {self.order_by}'
+        return sql, params
+
+
+# the group of items below is loaded in order, so for components that appear more than once, the
+# last table with usable data wins
+manifest: tuple[ManifestItem, ...] = (
+    #  === TIME SETS ===
+    ManifestItem('time_of_day', 'TimeOfDay', ('tod',), order_by='sequence'),
+    ManifestItem('time_season', 'TimeSeason', ('season',), order_by='sequence'),
+    #  === REGION SETS ===
+    ManifestItem('regions', 'Region', ('region',)),
+    #  === TECH SETS ===
+    ManifestItem('tech_resource', 'Technology', ('tech',), 'viable_techs', where="flag = 'r'"),
+    ManifestItem(
+        'tech_production', 'Technology', ('tech',), 'viable_techs', where="flag LIKE 'p%'"
+    ),
+    ManifestItem('tech_baseload', 'Technology', ('tech',), 'viable_techs', where="flag = 'pb'"),
+    ManifestItem('tech_storage', 'Technology', ('tech',), 'viable_techs', where="flag = 'ps'"),
+    ManifestItem('tech_reserve', 'Technology', ('tech',), 'viable_techs', where='reserve > 0'),
+    ManifestItem('tech_curtailment', 'Technology', ('tech',), 'viable_techs', where='curtail > 0'),
+    ManifestItem('tech_flex', 'Technology', ('tech',), 'viable_techs', where='flex > 0'),
+    ManifestItem('tech_exchange', 'Technology', ('tech',), 'viable_techs', where='exchange > 0'),
+    ManifestItem('tech_group_names', 'TechGroup', ('group_name',), optional=True),
+    ManifestItem('tech_annual', 'Technology', ('tech',), 'viable_techs', where='annual > 0'),
+    ManifestItem('tech_retirement', 'Technology', ('tech',), 'viable_techs', where='retire > 0'),
+    #  === COMMODITIES ===
+    ManifestItem('commodity_demand', 'Commodity', ('name',), 'viable_comms', where="flag = 'd'"),
+    # currently NOT validated against anything... shouldn't be a problem ?
+    ManifestItem('commodity_emissions', 'Commodity', ('name',), where="flag = 'e'"),
+    # The model enforces 0 symmetric difference between the physical commodities
+    # and the input commodities, so we need to include only the viable INPUTS
+    ManifestItem(
+        'commodity_physical',
+        'Commodity',
+        ('name',),
+        'viable_input_comms',
+        where="flag = 'p' OR flag = 's'",
+    ),
+    ManifestItem(
+        'commodity_source', 'Commodity', ('name',), 'viable_input_comms', where="flag = 's'"
+    ),
+    #  === PARAMS ===
+    ManifestItem('SegFrac', 'TimeSegmentFraction', ('season', 'tod', 'segfrac')),
+    ManifestItem(
+        'DemandSpecificDistribution',
+        'DemandSpecificDistribution',
+        ('region', 'season', 'tod', 'demand_name', 'dsd'),
+    ),
+    ManifestItem(
+        'Demand',
+        'Demand',
+        ('region', 'period', 'commodity', 'demand'),
+        myopic_filter=MyopicFilter.PERIOD,
+    ),
+    ManifestItem(
+        'CapacityToActivity', 'CapacityToActivity', ('region', 'tech', 'c2a'), 'viable_rt', (0, 1)
+    ),
+    ManifestItem(
+        'CapacityFactorTech',
+        'CapacityFactorTech',
+        ('region', 'season', 'tod', 'tech', 'factor'),
+        'viable_rt',
+        (0, 3),
+    ),
+    ManifestItem(
+        'CapacityFactorProcess',
+        'CapacityFactorProcess',
+        ('region', 'season', 'tod', 'tech', 'vintage', 'factor'),
+        'viable_rtv',
+        (0, 3, 4),
+    ),
+    ManifestItem(
+        'LifetimeTech', 'LifetimeTech', ('region', 'tech', 'lifetime'), 'viable_rt', (0, 1)
+    ),
+    ManifestItem(
+        'LifetimeProcess',
+        'LifetimeProcess',
+        ('region', 'tech', 'vintage', 'lifetime'),
+        'viable_rtv',
+        (0, 1, 2),
+    ),
+    ManifestItem(
+        'LoanLifetimeTech', 'LoanLifetimeTech', ('region', 'tech', 'lifetime'), 'viable_rt', (0, 1)
+    ),
+    ManifestItem(
+        'TechInputSplit',
+        'TechInputSplit',
+        ('region', 'period', 'input_comm', 'tech', 'min_proportion'),
+        'viable_rt',
+        (0, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+    ),
+    ManifestItem(
+        'TechInputSplitAverage',
+        'TechInputSplitAverage',
+        ('region', 'period', 'input_comm', 'tech', 'min_proportion'),
+        'viable_rt',
+        (0, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'TechOutputSplit',
+        'TechOutputSplit',
+        ('region', 'period', 'tech', 'output_comm', 'min_proportion'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'TechOutputSplitAverage',
+        'TechOutputSplitAverage',
+        ('region', 'period', 'tech', 'output_comm', 'min_proportion'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'RenewablePortfolioStandard',
+        'RPSRequirement',
+        ('region', 'period', 'tech_group', 'requirement'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'CostFixed',
+        'CostFixed',
+        ('region', 'period', 'tech', 'vintage', 'cost'),
+        'viable_rtv',
+        (0, 2, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+    ),
+    # exclude "existing" vintages by screening for base year and beyond.
+    # the "viable_rtv" will filter anything beyond view
+    ManifestItem(
+        'CostInvest',
+        'CostInvest',
+        ('region', 'tech', 'vintage', 'cost'),
+        'viable_rtv',
+        (0, 1, 2),
+        myopic_filter=MyopicFilter.VINTAGE,
+    ),
+    ManifestItem(
+        'CostVariable',
+        'CostVariable',
+        ('region', 'period', 'tech', 'vintage', 'cost'),
+        'viable_rtv',
+        (0, 2, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+    ),
+    ManifestItem(
+        'CostEmission_rpe',
+        'CostEmission',
+        ('region', 'period', 'emis_comm'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'CostEmission',
+        'CostEmission',
+        ('region', 'period', 'emis_comm', 'cost'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'LoanRate',
+        'LoanRate',
+        ('region', 'tech', 'vintage', 'rate'),
+        'viable_rtv',
+        (0, 1, 2),
+        myopic_filter=MyopicFilter.VINTAGE,
+    ),
+    ManifestItem(
+        'MinCapacity',
+        'MinCapacity',
+        ('region', 'period', 'tech', 'min_cap'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxCapacity',
+        'MaxCapacity',
+        ('region', 'period', 'tech', 'max_cap'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinNewCapacity',
+        'MinNewCapacity',
+        ('region', 'period', 'tech', 'min_cap'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxNewCapacity',
+        'MaxNewCapacity',
+        ('region', 'period', 'tech', 'max_cap'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxCapacityGroup',
+        'MaxCapacityGroup',
+        ('region', 'period', 'group_name', 'max_cap'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinCapacityGroup',
+        'MinCapacityGroup',
+        ('region', 'period', 'group_name', 'min_cap'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinNewCapacityGroup',
+        'MinNewCapacityGroup',
+        ('region', 'period', 'group_name', 'min_new_cap'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxNewCapacityGroup',
+        'MaxNewCapacityGroup',
+        ('region', 'period', 'group_name', 'max_new_cap'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinCapacityShare',
+        'MinCapacityShare',
+        ('region', 'period', 'tech', 'group_name', 'min_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxCapacityShare',
+        'MaxCapacityShare',
+        ('region', 'period', 'tech', 'group_name', 'max_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    # TODO:  the new capacity share tables are currently loaded into the (non-new) capacity share
+    #        params, as they were before the manifest was introduced
+    ManifestItem(
+        'MinCapacityShare',
+        'MinNewCapacityShare',
+        ('region', 'period', 'tech', 'group_name', 'max_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxCapacityShare',
+        'MaxNewCapacityShare',
+        ('region', 'period', 'tech', 'group_name', 'max_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MinActivityGroup',
+        'MinActivityGroup',
+        ('region', 'period', 'group_name', 'min_act'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxActivityGroup',
+        'MaxActivityGroup',
+        ('region', 'period', 'group_name', 'max_act'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinActivityShare',
+        'MinActivityShare',
+        ('region', 'period', 'tech', 'group_name', 'min_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxActivityShare',
+        'MaxActivityShare',
+        ('region', 'period', 'tech', 'group_name', 'max_proportion'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxResource',
+        'MaxResource',
+        ('region', 'tech', 'max_res'),
+        'viable_rt',
+        (0, 1),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxActivity',
+        'MaxActivity',
+        ('region', 'period', 'tech', 'max_act'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinActivity',
+        'MinActivity',
+        ('region', 'period', 'tech', 'min_act'),
+        'viable_rt',
+        (0, 2),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxSeasonalActivity',
+        'MaxSeasonalActivity',
+        ('region', 'period', 'season', 'tech', 'max_act'),
+        'viable_rt',
+        (0, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinSeasonalActivity',
+        'MinSeasonalActivity',
+        ('region', 'period', 'season', 'tech', 'min_act'),
+        'viable_rt',
+        (0, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'MinAnnualCapacityFactor',
+        'MinAnnualCapacityFactor',
+        ('region', 'period', 'tech', 'output_comm', 'factor'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'MaxAnnualCapacityFactor',
+        'MaxAnnualCapacityFactor',
+        ('region', 'period', 'tech', 'output_comm', 'factor'),
+        'viable_rt',
+        (0, 2),
+        optional=True,
+    ),
+    ManifestItem(
+        'GrowthRateMax',
+        'GrowthRateMax',
+        ('region', 'tech', 'rate'),
+        'viable_rt',
+        (0, 1),
+        optional=True,
+    ),
+    ManifestItem(
+        'GrowthRateSeed',
+        'GrowthRateSeed',
+        ('region', 'tech', 'seed'),
+        'viable_rt',
+        (0, 1),
+        optional=True,
+    ),
+    ManifestItem(
+        'EmissionLimit',
+        'EmissionLimit',
+        ('region', 'period', 'emis_comm', 'value'),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    # The current emission constraint screens by valid inputs, so if it is NOT
+    # built in a particular region, this should still be OK
+    ManifestItem(
+        'EmissionActivity',
+        'EmissionActivity',
+        ('region', 'emis_comm', 'input_comm', 'tech', 'vintage', 'output_comm', 'activity'),
+        'viable_ritvo',
+        (0, 2, 3, 4, 5),
+        optional=True,
+    ),
+    # Note:  Both of the linked techs must be viable.  As this is non period/vintage
+    #        specific, it should be true that if one is built, the other is also
+    ManifestItem(
+        'LinkedTechs',
+        'LinkedTech',
+        ('primary_region', 'primary_tech', 'emis_comm', 'driven_tech'),
+        'viable_rtt',
+        (0, 1, 3),
+        optional=True,
+    ),
+    ManifestItem(
+        'RampUp', 'RampUp', ('region', 'tech', 'rate'), 'viable_rt', (0, 1), optional=True
+    ),
+    ManifestItem(
+        'RampDown', 'RampDown', ('region', 'tech', 'rate'), 'viable_rt', (0, 1), optional=True
+    ),
+    ManifestItem(
+        'CapacityCredit',
+        'CapacityCredit',
+        ('region', 'period', 'tech', 'vintage', 'credit'),
+        'viable_rtv',
+        (0, 2, 3),
+        myopic_filter=MyopicFilter.PERIOD,
+        optional=True,
+    ),
+    ManifestItem(
+        'PlanningReserveMargin', 'PlanningReserveMargin', ('region', 'margin'), optional=True
+    ),
+    ManifestItem(
+        'StorageDuration',
+        'StorageDuration',
+        ('region', 'tech', 'duration'),
+        'viable_rt',
+        (0, 1),
+        optional=True,
+    ),
+)
+
+# the params with indexing sets that are made from the keys of the loaded param data
+param_index_sets: dict[str, str] = {
+    'Efficiency': 'Efficiency_ritvo',
+    'CapacityFactorProcess': 'CapacityFactorProcess_rsdtv',
+    'TechInputSplit': 'TechInputSplit_rpit',
+    'TechInputSplitAverage': 'TechInputSplitAverage_rpit',
+    'TechOutputSplit': 'TechOutputSplit_rpto',
+    'TechOutputSplitAverage': 'TechOutputSplitAverage_rpto',
+    'CapacityCredit': 'CapacityCredit_rptv',
+    'CostInvest': 'CostInvest_rtv',
+    'EmissionLimit': 'EmissionLimitConstraint_rpe',
+    'MaxActivity': 'MaxActivityConstraint_rpt',
+    'MaxSeasonalActivity': 'MaxSeasonalActivityConstraint_rpst',
+    'MaxActivityGroup': 'MaxActivityGroup_rpg',
+    'MaxActivityShare': 'MaxActivityShareConstraint_rptg',
+    'MaxAnnualCapacityFactor': 'MaxAnnualCapacityFactorConstraint_rpto',
+    'MaxCapacity': 'MaxCapacityConstraint_rpt',
+    'MaxCapacityGroup': 'MaxCapacityGroupConstraint_rpg',
+    'MaxCapacityShare': 'MaxCapacityShareConstraint_rptg',
+    'MaxNewCapacity': 'MaxNewCapacityConstraint_rpt',
+    'MaxNewCapacityGroup': 'MaxNewCapacityGroupConstraint_rpg',
+    'MaxNewCapacityShare': 'MaxNewCapacityShareConstraint_rptg',
+    'MaxResource': 'MaxResourceConstraint_rt',
+    'MinActivity': 'MinActivityConstraint_rpt',
+    'MinSeasonalActivity': 'MinSeasonalActivityConstraint_rpst',
+    'MinActivityGroup': 'MinActivityGroup_rpg',
+    'MinActivityShare': 'MinActivityShareConstraint_rptg',
+    'MinAnnualCapacityFactor': 'MinAnnualCapacityFactorConstraint_rpto',
+    'MinCapacity': 'MinCapacityConstraint_rpt',
+    'MinCapacityGroup': 'MinCapacityGroupConstraint_rpg',
+    'MinCapacityShare': 'MinCapacityShareConstraint_rptg',
+    'MinNewCapacity': 'MinNewCapacityConstraint_rpt',
+    'MinNewCapacityGroup': 'MinNewCapacityGroupConstraint_rpg',
+    'MinNewCapacityShare': 'MinNewCapacityShareConstraint_rptg',
+    'RenewablePortfolioStandard': 'RenewablePortfolioStandardConstraint_rpg',
+    'ResourceBound': 'ResourceConstraint_rpr',
+}
@@ -0,0 +1,662 @@
+"""
+A matrix form of a built Temoa instance, as sparse (CSR) coefficient blocks with one contiguous
+block of rows per constraint family.  The matrix can be handed to a solver in memory (see
+highs_backend) or written as a solver-ready MPS or LP file straight from the arrays.
+
+The objective and the core constraint families (Capacity, Demand and CommodityBalance) hold most
+of the terms of the model.  A model built with those components omitted (see
+omit_direct_components) has them assembled here as COO triplets directly from the sparse index
+dictionaries made in temoa_initialize, so their pyomo expressions are never built.  The rest of
+the model is compiled with pyomo's standard form compiler.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import re
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import scipy.sparse
+from pyomo.core.base.component_namer import index_repr
+from pyomo.core.base.var import VarData
+from pyomo.environ import maximize, minimize, value
+from pyomo.repn.plugins.standard_form import LinearStandardFormCompiler
+
+from temoa.temoa_model.temoa_initialize import DemandConstraintErrorCheck
+from temoa.temoa_model.temoa_model import TemoaModel
+from temoa.temoa_model.temoa_rules import fixed_or_variable_cost, loan_cost
+
+logger = getLogger(__name__)
+
+DIRECT_COMPONENTS = (
+    'TotalCost',
+    'CapacityConstraint',
+    'DemandConstraint',
+    'CommodityBalanceConstraint',
+)
+"""the components that are assembled directly in matrix form, rather than built by pyomo"""
+
+_ILLEGAL_NAME_CHARS = re.compile(r'[^\w().,]')
+
+
+def _num(x: float) -> str:
+    """the shortest string that round-trips the value"""
+    return repr(float(x))
+
+
+def _signed(x: float) -> str:
+    return _num(x) if x < 0 else '+' + _num(x)
+
+
+def component_name(name: str, index: Any) -> str:
+    """
+    The pyomo name of a component member, e.g. DemandConstraint[R1,2020,winter,day,RH]
+    :param name: the name of the component
+    :param index: the index of the member, or None for a scalar component
+    :return: the name
+    """
+    return name if index is None else name + index_repr(index)
+
+
+def omit_direct_components(model: TemoaModel) -> None:
+    """
+    Remove the components that are assembled directly in matrix form from an (abstract) model, so
+    that an instance made from it never builds their expressions.  Such an instance can only be
+    solved through its matrix form (see MatrixModel.from_instance)
+    :param model: the model, before the instance is created
+    :return: None
+    """
+    for name in DIRECT_COMPONENTS:
+        model.del_component(name)
+
+
+class _Columns:
+    """
+    The columns of a matrix, in order.  Variables are added as they are first seen
+    """
+
+    def __init__(self, variables: Iterable[VarData]):
+        self.variables = list(variables)
+        self.position = {id(var): j for j, var in enumerate(self.variables)}
+
+    def __call__(self, var: VarData) -> int:
+        j = self.position.get(id(var))
+        if j is None:
+            j = self.position[id(var)] = len(self.variables)
+            self.variables.append(var)
+        return j
+
+
+class _Rows:
+    """
+    Rows of a matrix in COO form, collected one row at a time.  Fixed variables are moved to the
+    row bounds, and zero coefficients are dropped, as pyomo's standard form compiler does.
+    """
+
+    def __init__(self, columns: _Columns):
+        self.columns = columns
+        self.keys: list[tuple[str, Any]] = []
+        self.lb: list[float] = []
+        self.ub: list[float] = []
+        self.row: list[int] = []
+        self.col: list[int] = []
+        self.val: list[float] = []
+
+    def add(
+        self, family: str, index: tuple, terms: Iterable[tuple[VarData, float]], lb, ub
+    ) -> None:
+        """
+        Add a row lb <= sum(coef * var) <= ub
+        :param family: the name of the constraint family
+        :param index: the index of the row in the family
+        :param terms: the (variable, coefficient) terms of the row body
+        :param lb: the lower bound (-inf if none)
+        :param ub: the upper bound (inf if none)
+        :return: None
+        """
+        i = len(self.keys)
+        shift = 0.0
+        for var, coef in terms:
+            if not coef:
+                continue
+            if var.fixed:
+                shift += coef * var.value
+                continue
+            self.row.append(i)
+            self.col.append(self.columns(var))
+            self.val.append(coef)
+        self.keys.append((family, index))
+        self.lb.append(lb - shift)
+        self.ub.append(ub - shift)
+
+    def matrix(self, num_cols: int) -> scipy.sparse.csr_array:
+        """the collected rows, with any repeated terms of a row summed"""
+        A = scipy.sparse.coo_array(
+            (self.val, (self.row, self.col)), shape=(len(self.keys), num_cols)
+        ).tocsr()
+        A.sum_duplicates()
+        return A
+
+
+def _capacity_rows(M: TemoaModel, rows: _Rows) -> None:
+    """the rows of temoa_rules.Capacity_Constraint"""
+    for r, p, s, d, t, v in M.CapacityConstraint_rpsdtv:
+        if t in M.tech_storage:
+            continue
+        if (r, s, d, t, v) in M.CapacityFactorProcess:
+            capacity = value(M.CapacityFactorProcess[r, s, d, t, v])
+        else:
+            capacity = value(M.CapacityFactorTech[r, s, d, t])
+        coef = (
+            capacity
+            * value(M.CapacityToActivity[r, t])
+            * value(M.SegFrac[s, d])
+            * value(M.ProcessLifeFrac[r, p, t, v])
+        )
+        outputs = [
+            (i, o)
+            for i in M.processInputs[r, p, t, v]
+            for o in M.ProcessOutputsByInput[r, p, t, v, i]
+        ]
+        if t in M.tech_curtailment:
+            # capacity == activity + curtailment
+            terms = [(M.V_Capacity[r, p, t, v], coef)]
+            terms.extend((M.V_FlowOut[r, p, s, d, i, t, v, o], -1.0) for i, o in outputs)
+            terms.extend((M.V_Curtailment[r, p, s, d, i, t, v, o], -1.0) for i, o in outputs)
+            rows.add('CapacityConstraint', (r, p, s, d, t, v), terms, 0.0, 0.0)
+        else:
+            # activity - capacity <= 0
+            terms = [(M.V_FlowOut[r, p, s, d, i, t, v, o], 1.0) for i, o in outputs]
+            terms.append((M.V_Capacity[r, p, t, v], -coef))
+            rows.add('CapacityConstraint', (r, p, s, d, t, v), terms, -np.inf, 0.0)
+
+
+def _demand_rows(M: TemoaModel, rows: _Rows) -> None:
+    """the rows of temoa_rules.Demand_Constraint"""
+    for r, p, s, d, dem in M.DemandConstraint_rpsdc:
+        seg = value(M.SegFrac[s, d])
+        terms = []
+        for t, v in M.commodityUStreamProcess[r, p, dem]:
+            for i in M.ProcessInputsByOutput[r, p, t, v, dem]:
+                if t in M.tech_annual:
+                    terms.append((M.V_FlowOutAnnual[r, p, i, t, v, dem], seg))
+                else:
+                    terms.append((M.V_FlowOut[r, p, s, d, i, t, v, dem], 1.0))
+        if not terms:
+            # an empty supply
+            DemandConstraintErrorCheck(0, r, p, s, d, dem)
+        demand = value(M.Demand[r, p, dem]) * value(M.DemandSpecificDistribution[r, s, d, dem])
+        rows.add('DemandConstraint', (r, p, s, d, dem), terms, demand, demand)
+
+
+def _commodity_balance_rows(M: TemoaModel, rows: _Rows) -> None:
+    """
+    the rows of temoa_rules.CommodityBalance_Constraint, as production + imports - consumption -
+    exports - excess == 0
+    """
+    for r, p, s, d, c in M.CommodityBalanceConstraint_rpsdc:
+        if c in M.commodity_demand:
+            continue
+        seg = value(M.SegFrac[s, d])
+        consumed = []
+        for t, v in M.commodityDStreamProcess[r, p, c]:
+            for o in M.ProcessOutputsByInput[r, p, t, v, c]:
+                if t in M.tech_storage:
+                    consumed.append((M.V_FlowIn[r, p, s, d, c, t, v, o], -1.0))
+                elif t in M.tech_annual:
+                    eff = value(M.Efficiency[r, c, t, v, o])
+                    consumed.append((M.V_FlowOutAnnual[r, p, c, t, v, o], -seg / eff))
+                else:
+                    eff = value(M.Efficiency[r, c, t, v, o])
+                    consumed.append((M.V_FlowOut[r, p, s, d, c, t, v, o], -1.0 / eff))
+        try:
+            produced = [
+                (M.V_FlowOut[r, p, s, d, i, t, v, c], 1.0)
+                for t, v in M.commodityUStreamProcess[r, p, c]
+                for i in M.ProcessInputsByOutput[r, p, t, v, c]
+            ]
+            for reg, t, v, o in M.exportRegions.get((r, p, c), ()):
+                eff = value(M.Efficiency[r + '-' + reg, c, t, v, o])
+                consumed.append((M.V_FlowOut[r + '-' + reg, p, s, d, c, t, v, o], -1.0 / eff))
+            produced.extend(
+                (M.V_FlowOut[reg + '-' + r, p, s, d, i, t, v, c], 1.0)
+                for reg, t, v, i in M.importRegions.get((r, p, c), ())
+            )
+            if c in M.flex_commodities:
+                consumed.extend(
+                    (M.V_Flex[r, p, s, d, i, t, v, c], -1.0)
+                    for t, v in M.commodityUStreamProcess[r, p, c]
+                    if t not in M.tech_storage and t not in M.tech_annual and t in M.tech_flex
+                    for i in M.ProcessInputsByOutput[r, p, t, v, c]
+                )
+        except KeyError:
+            raise KeyError(
+                f'The commodity "{c}" can be produced by at least one technology in the '
+                'tech_annual set and one technology not in the tech_annual set. All the producers '
+                'of the commodity must either be in tech_annual or not in tech_annual'
+            )
+        if not produced:
+            msg = (
+                f"Unable to meet an interprocess '{c}' transfer in ({r}, {p}, {s}, {d}).  "
+                'No flow out.\nPossible reasons:\n'
+                " - Is there a missing period in set 'time_future'?\n"
+                " - Is there a missing tech in set 'tech_resource'?\n"
+                " - Is there a missing tech in set 'tech_production'?\n"
+                " - Is there a missing commodity in set 'commodity_physical'?\n"
+                ' - Are there missing entries in the Efficiency parameter?\n'
+                ' - Does a process need a longer LifetimeProcess parameter setting?'
+            )
+            logger.error(msg)
+            raise ValueError(msg)
+        rows.add('CommodityBalanceConstraint', (r, p, s, d, c), produced + consumed, 0.0, 0.0)
+
+
+def _cost_terms(M: TemoaModel) -> Iterable[tuple[VarData, float]]:
+    """the (variable, coefficient) terms of temoa_rules.TotalCost_rule"""
+    P_0 = min(M.time_optimize)
+    P_e = M.time_future.last()  # End point of modeled horizon
+    GDR = value(M.GlobalDiscountRate)
+    if value(M.MyopicBaseyear) != 0:
+        P_0 = value(M.MyopicBaseyear)
+    periods = set(M.time_optimize)
+
+    for r, t, v in M.CostInvest.sparse_keys():
+        if v in periods:
+            coef = loan_cost(
+                1.0,
+                value(M.CostInvest[r, t, v]),
+                value(M.LoanAnnualize[r, t, v]),
+                value(M.LoanLifetimeProcess[r, t, v]),
+                value(M.LifetimeProcess[r, t, v]),
+                P_0,
+                P_e,
+                GDR,
+                vintage=v,
+            )
+            yield M.V_NewCapacity[r, t, v], coef
+
+    for r, p, t, v in M.CostFixed.sparse_keys():
+        if p in periods:
+            coef = fixed_or_variable_cost(
+                1.0,
+                value(M.CostFixed[r, p, t, v]),
+                value(M.ModelProcessLife[r, p, t, v]),
+                GDR,
+                P_0,
+                p=p,
+            )
+            yield M.V_Capacity[r, p, t, v], coef
+
+    for r, p, t, v in M.CostVariable.sparse_keys():
+        if p not in periods:
+            continue
+        coef = fixed_or_variable_cost(
+            1.0, value(M.CostVariable[r, p, t, v]), value(M.PeriodLength[p]), GDR, P_0, p
+        )
+        for i in M.processInputs[r, p, t, v]:
+            for o in M.ProcessOutputsByInput[r, p, t, v, i]:
+                if t in M.tech_annual:
+                    yield M.V_FlowOutAnnual[r, p, i, t, v, o], coef
+                else:
+                    for s in M.time_season:
+                        for d in M.time_of_day:
+                            yield M.V_FlowOut[r, p, s, d, i, t, v, o], coef
+
+    # emission costs of the regular and (non-flex) annual flows
+    for r, e, i, t, v, o in M.EmissionActivity:
+        for p in M.time_optimize:
+            if (r, p, e) not in M.CostEmission or (r, p, t, v) not in M.processInputs:
+                continue
+            if t in M.tech_annual and t in M.tech_flex:
+                continue
+            coef = fixed_or_variable_cost(
+                value(M.EmissionActivity[r, e, i, t, v, o]),
+                value(M.CostEmission[r, p, e]),
+                value(M.PeriodLength[p]),
+                GDR,
+                P_0,
+                p,
+            )
+            if t in M.tech_annual:
+                yield M.V_FlowOutAnnual[r, p, i, t, v, o], coef
+            else:
+                for s in M.time_season:
+                    for d in M.time_of_day:
+                        yield M.V_FlowOut[r, p, s, d, i, t, v, o], coef
+
+
+@dataclass
+class MatrixModel:
+    """
+    A linear program in matrix form:
+
+        min (or max)  c @ x + offset
+        s.t.          row_lb <= A @ x <= row_ub
+                      col_lb <= x <= col_ub
+
+    Rows are ordered by constraint family, so each family is a contiguous block of rows of A.
+    Each row is keyed by the name of its constraint family and its index, and the pyomo variable
+    of each column is retained, so that a solution can be mapped back to the model.
+    """
+
+    A: scipy.sparse.csr_array
+    c: np.ndarray
+    offset: float
+    row_lb: np.ndarray
+    row_ub: np.ndarray
+    col_lb: np.ndarray
+    col_ub: np.ndarray
+    row_keys: list[tuple[str, Any]]
+    """the (constraint family, index) of each row"""
+    variables: list[VarData]
+    sense: int = minimize
+    blocks: dict[str, slice] = field(default_factory=dict)
+    """the rows of each constraint family"""
+
+    @property
+    def num_rows(self) -> int:
+        return self.A.shape[0]
+
+    @property
+    def num_cols(self) -> int:
+        return self.A.shape[1]
+
+    @staticmethod
+    def from_instance(instance: TemoaModel) -> 'MatrixModel':
+        """
+        Make the matrix form of a built instance.  The components of the instance are compiled.
+        If the instance was built without the components in DIRECT_COMPONENTS, those are
+        assembled from the model data and their rows follow the compiled rows.
+        :param instance: the built (concrete) model with a single active objective, or no
+        objective if the direct components were omitted
+        :return: the MatrixModel
+        """
+        tic = time.time()
+        # a Temoa instance (which is a plain ConcreteModel once built) without the components
+        direct = instance.component('CapacityConstraint_rpsdtv') is not None and all(
+            instance.component(name) is None for name in DIRECT_COMPONENTS
+        )
+        info = LinearStandardFormCompiler().write(instance, set_sense=None)
+        if len(info.objectives) != (0 if direct else 1):
+            raise ValueError(
+                f'The matrix form requires one active objective, found {len(info.objectives)}'
+            )
+
+        # the compiled form is A @ x <= rhs, where lower bounds are written as negated rows.
+        # restore the lower bound rows and then merge the rows of each constraint into one
+        multipliers = np.fromiter((row[1] for row in info.rows), float, len(info.rows))
+        rhs = np.asarray(info.rhs, dtype=float)
+        A = scipy.sparse.csr_array(scipy.sparse.diags_array(multipliers) @ info.A.tocsr())
+        lb = np.where(multipliers < 0, -rhs, -np.inf)
+        ub = np.where(multipliers > 0, rhs, np.inf)
+
+        con_ids = np.fromiter((id(row[0]) for row in info.rows), np.int64, len(info.rows))
+        _, first, inverse = np.unique(con_ids, return_index=True, return_inverse=True)
+        keep = np.sort(first)
+        position = np.empty(len(con_ids), dtype=np.int64)
+        position[keep] = np.arange(len(keep))
+        target = position[first[inverse]]
+        row_lb = np.full(len(keep), -np.inf)
+        row_ub = np.full(len(keep), np.inf)
+        np.maximum.at(row_lb, target, lb)
+        np.minimum.at(row_ub, target, ub)
+        A = A[keep]
+        row_keys = [
+            (con.parent_component().local_name, con.index())
+            for con in (info.rows[i][0] for i in keep)
+        ]
+
+        columns = _Columns(info.columns)
+        if direct:
+            rows = _Rows(columns)
+            _capacity_rows(instance, rows)
+            _demand_rows(instance, rows)
+            _commodity_balance_rows(instance, rows)
+            cost_cols, cost_vals = [], []
+            offset = 0.0
+            for var, coef in _cost_terms(instance):
+                if var.fixed:
+                    offset += coef * var.value
+                else:
+                    cost_cols.append(columns(var))
+                    cost_vals.append(coef)
+            num_cols = len(columns.variables)
+            c = np.zeros(num_cols)
+            np.add.at(c, cost_cols, cost_vals)
+            A = scipy.sparse.vstack(
+                [
+                    scipy.sparse.csr_array(
+                        (A.data, A.indices, A.indptr), shape=(A.shape[0], num_cols)
+                    ),
+                    rows.matrix(num_cols),
+                ],
+                format='csr',
+            )
+            row_lb = np.concatenate((row_lb, rows.lb))
+            row_ub = np.concatenate((row_ub, rows.ub))
+            row_keys.extend(rows.keys)
+            sense = minimize
+        else:
+            c = info.c.toarray().ravel()
+            offset = float(info.c_offset[0])
+            sense = info.objectives[0].sense
+        A.sort_indices()
+
+        blocks = {}
+        start = 0
+        for i in range(1, len(row_keys) + 1):
+            if i == len(row_keys) or row_keys[i][0] != row_keys[start][0]:
+                blocks[row_keys[start][0]] = slice(start, i)
+                start = i
+
+        variables = columns.variables
+        bounds = [v.bounds for v in variables]
+        col_lb = np.fromiter(
+            (-np.inf if b[0] is None else b[0] for b in bounds), float, len(bounds)
+        )
+        col_ub = np.fromiter((np.inf if b[1] is None else b[1] for b in bounds), float, len(bounds))
+
+        mm = MatrixModel(
+            A=A,
+            c=c,
+            offset=offset,
+            row_lb=row_lb,
+            row_ub=row_ub,
+            col_lb=col_lb,
+            col_ub=col_ub,
+            row_keys=row_keys,
+            variables=variables,
+            sense=sense,
+            blocks=blocks,
+        )
+        logger.info(
+            'Made the matrix form with %d rows, %d columns and %d nonzeros in %0.2f seconds',
+            mm.num_rows,
+            mm.num_cols,
+            mm.A.nnz,
+            time.time() - tic,
+        )
+        return mm
+
+    def block(self, family: str) -> scipy.sparse.csr_array:
+        """
+        The coefficients of a constraint family
+        :param family: the name of the constraint, e.g. 'DemandConstraint'
+        :return: the rows of A for the family
+        """
+        return self.A[self.blocks[family]]
+
+    def objective_value(self, x: np.ndarray) -> float:
+        """
+        Evaluate the objective
+        :param x: the column values
+        :return: the objective value
+        """
+        return float(self.c @ x + self.offset)
+
+    def row_names(self, symbolic: bool = False) -> list[str]:
+        """
+        Names for the rows
+        :param symbolic: if True, names are made from the constraint name and index, otherwise
+        they are generic (r0, r1, ...)
+        :return: list of names in row order
+        """
+        if not symbolic:
+            return [f'r{i}' for i in range(self.num_rows)]
+        return [
+            _ILLEGAL_NAME_CHARS.sub('_', component_name(family, index))
+            for family, index in self.row_keys
+        ]
+
+    def col_names(self, symbolic: bool = False) -> list[str]:
+        """
+        Names for the columns
+        :param symbolic: if True, names are made from the variable name and index, otherwise
+        they are generic (x0, x1, ...)
+        :return: list of names in column order
+        """
+        if not symbolic:
+            return [f'x{j}' for j in range(self.num_cols)]
+        return [_ILLEGAL_NAME_CHARS.sub('_', var.name) for var in self.variables]
+
+    def write_mps(self, path: Path, symbolic: bool = False) -> None:
+        """
+        Write the model as a free-format MPS file
+        :param path: the file to write
+        :param symbolic: use symbolic row and column names
+        :return: None
+        """
+        tic = time.time()
+        rows = self.row_names(symbolic)
+        cols = self.col_names(symbolic)
+        eq = self.row_lb == self.row_ub
+        has_lb = np.isfinite(self.row_lb)
+        has_ub = np.isfinite(self.row_ub)
+        row_type = np.where(eq, 'E', np.where(has_ub, 'L', 'G'))
+        row_rhs = np.where(has_ub, self.row_ub, self.row_lb)
+        ranged = has_lb & has_ub & ~eq
+
+        lines = ['NAME temoa', 'OBJSENSE', '    MAX' if self.sense == maximize else '    MIN']
+        lines.append('ROWS')
+        lines.append(' N obj')
+        lines.extend(f' {t} {name}' for t, name in zip(row_type, rows))
+
+        lines.append('COLUMNS')
+        A = self.A.tocsc()
+        A.sort_indices()
+        for j, col in enumerate(cols):
+            if self.c[j]:
+                lines.append(f'    {col} obj {_num(self.c[j])}')
+            for k in range(A.indptr[j], A.indptr[j + 1]):
+                lines.append(f'    {col} {rows[A.indices[k]]} {_num(A.data[k])}')
+
+        lines.append('RHS')
+        if self.offset:
+            # by convention, the objective constant is the negated rhs of the objective row
+            lines.append(f'    rhs obj {_num(-self.offset)}')
+        lines.extend(f'    rhs {rows[i]} {_num(row_rhs[i])}' for i in np.flatnonzero(row_rhs))
+        if ranged.any():
+            lines.append('RANGES')
+            spans = self.row_ub - self.row_lb
+            lines.extend(f'    rng {rows[i]} {_num(spans[i])}' for i in np.flatnonzero(ranged))
+
+        lines.append('BOUNDS')
+        for j, col in enumerate(cols):
+            lb, ub = self.col_lb[j], self.col_ub[j]
+            if lb == ub:
+                lines.append(f' FX bnd {col} {_num(lb)}')
+            elif lb == -np.inf and ub == np.inf:
+                lines.append(f' FR bnd {col}')
+            else:
+                if lb == -np.inf:
+                    lines.append(f' MI bnd {col}')
+                elif lb != 0 or ub < 0:
+                    lines.append(f' LO bnd {col} {_num(lb)}')
+                if ub != np.inf:
+                    lines.append(f' UP bnd {col} {_num(ub)}')
+        lines.append('ENDATA\n')
+
+        Path(path).write_text('\n'.join(lines))
+        logger.info('Wrote MPS file %s in %0.2f seconds', path, time.time() - tic)
+
+    def write_lp(self, path: Path, symbolic: bool = False) -> None:
+        """
+        Write the model as a CPLEX-format LP file
+        :param path: the file to write
+        :param symbolic: use symbolic row and column names
+        :return: None
+        """
+        tic = time.time()
+        rows = self.row_names(symbolic)
+        cols = self.col_names(symbolic)
+
+        def terms(indices, coefs) -> list[str]:
+            return [f'{_signed(coef)} {cols[j]}' for j, coef in zip(indices, coefs)]
+
+        lines = ['\\ temoa', 'maximize' if self.sense == maximize else 'minimize', 'obj:']
+        nz = np.flatnonzero(self.c)
+        lines.extend(terms(nz, self.c[nz]))
+        if self.offset:
+            # a constant in the objective is carried by a variable fixed to 1
+            lines.append(f'{_signed(self.offset)} ONE_VAR_CONSTANT')
+        elif not len(nz):
+            lines.append('+0 ONE_VAR_CONSTANT')
+
+        lines.append('')
+        lines.append('s.t.')
+        A = self.A
+        for i, name in enumerate(rows):
+            lb, ub = self.row_lb[i], self.row_ub[i]
+            body = terms(
+                A.indices[A.indptr[i] : A.indptr[i + 1]], A.data[A.indptr[i] : A.indptr[i + 1]]
+            )
+            if lb == ub:
+                bounds = [(name, '=', ub)]
+            elif lb == -np.inf:
+                bounds = [(name, '<=', ub)]
+            elif ub == np.inf:
+                bounds = [(name, '>=', lb)]
+            else:
+                bounds = [(f'{name}_lo', '>=', lb), (f'{name}_up', '<=', ub)]
+            for label, op, rhs in bounds:
+                lines.append(f'{label}:')
+                lines.extend(body)
+                lines.append(f'{op} {_num(rhs)}')
+                lines.append('')
+
+        lines.append('bounds')
+        lines.append('   1 <= ONE_VAR_CONSTANT <= 1')
+        for j, col in enumerate(cols):
+            lb, ub = self.col_lb[j], self.col_ub[j]
+            if lb == 0 and ub == np.inf:
+                continue
+            lo = '-inf' if lb == -np.inf else _num(lb)
+            up = '+inf' if ub == np.inf else _num(ub)
+            lines.append(f'   {lo} <= {col} <= {up}')
+        lines.append('end\n')
+
+        Path(path).write_text('\n'.join(lines))
+        logger.info('Wrote LP file %s in %0.2f seconds', path, time.time() - tic)
@@ -31,8 +31,11 @@ any extra validation information in one instance.
 """
 import re
 from collections.abc import Iterable, Sequence
+from itertools import compress
 from operator import itemgetter
 
+import numpy as np
+
 
 class ViableSet:
     # automatic approvals for regions.  Stored here for reference
@@ -65,6 +68,7 @@ class ViableSet:
             raise ValueError('cannot have exception_vals without a location')
         self._exception_loc = exception_loc
         self._exceptions = exception_vals
+        self._compile_exceptions()
         self.non_excepted_items = set()
 
         self.calc_dim()
@@ -81,6 +85,56 @@ class ViableSet:
         else:
             self.dim = 0
 
+    def _compile_exceptions(self):
+        """compile the exception regexes and reset the cache of values that have been screened"""
+        self._patterns = [re.compile(val) for val in self._exceptions] if self._exceptions else []
+        self._excepted_values: dict = {}
+
+    def is_excepted(self, value) -> bool:
+        """
+        Test a value against the exceptions.  The result for each distinct value is cached, so the
+        regexes are only run once per value (typically a region name)
+        :param value: the value to test
+        :return: True if the value matches any of the exceptions
+        """
+        res = self._excepted_values.get(value)
+        if res is None:
+            text = str(value)
+            res = any(pattern.search(text) for pattern in self._patterns)
+            self._excepted_values[value] = res
+        return res
+
+    def mask(self, columns: Sequence[Sequence]) -> np.ndarray:
+        """
+        Screen a column-oriented set of values in one pass.
+        :param columns: a sequence of columns (of equal length), one for each element of the set,
+        in the same order as the set elements
+        :return: a boolean array, True for the positions that pass
+        """
+        if len(columns) != max(self.dim, 1) and self.dim:
+            raise ValueError('the number of columns must match the dimensionality of the set')
+        size = len(columns[0]) if columns else 0
+        rows = zip(*columns) if len(columns) > 1 else ((v,) for v in columns[0])
+        # membership tests are done by mapping the builtin set method, which avoids the python
+        # interpreter overhead of a loop for each row
+        res = np.fromiter(map(self._elements.__contains__, rows), dtype=bool, count=size)
+        if not self._exceptions or res.all():
+            return res
+
+        # the exceptions are expanded once for each distinct value in the exception location
+        excepted_col = columns[self._exception_loc]
+        excepted = {value: self.is_excepted(value) for value in set(excepted_col)}
+        candidates = np.fromiter(map(excepted.__getitem__, excepted_col), dtype=bool, count=size)
+        candidates &= ~res
+        if self.non_excepted_items and candidates.any():
+            others = [col for i, col in enumerate(columns) if i != self._exception_loc]
+            keys = zip(*others) if len(others) > 1 else iter(others[0])
+            matched = np.fromiter(
+                map(self.non_excepted_items.__contains__, keys), dtype=bool, count=size
+            )
+            candidates &= matched
+        return res | candidates
+
     def _update(self):
         """construct the set of non-excepted items in tuple format"""
         # we need to remove the item at the "excepted" location
@@ -104,6 +158,7 @@ class ViableSet:
             raise ValueError('cannot have exception_vals without a location')
         self._exception_loc = exception_loc
         self._exceptions = exception_vals
+        self._compile_exceptions()
         self._update()
 
     @property
@@ -156,30 +211,8 @@ def filter_elements(
         raise ValueError("'validation' must be an instance of ViableSet")
     if len(value_locations) != validation.dim:
         raise ValueError('the value locations must have same dimensionality as the validation set')
-    # determine the location of the exempted items for comparison by removing the exempted location
-    locs = None
-    if validation.val_exceptions:
-        locs = list(value_locations)
-        locs.remove(validation.exception_loc)
-
-    res = []
-
-    for item in values:
-        # check the "base case" first:  it's in the fundamental elements
-        element = itemgetter(*value_locations)(item)
-        if not isinstance(element, tuple):
-            element = (element,)
-        if element in validation.member_tuples:
-            res.append(item)
-        elif validation.val_exceptions:  # check each of the exceptions
-            if (
-                validation.non_excepted_items
-                and itemgetter(*locs)(item) not in validation.non_excepted_items
-            ):
-                continue
-            for val_exception in validation.val_exceptions:
-                if re.search(val_exception, str(item[validation.exception_loc])):
-                    res.append(item)
-                    break
-
-    return res
+    if not values:
+        return []
+    # pull the columns to be checked and screen them all at once
+    columns = [list(map(itemgetter(loc), values)) for loc in value_locations]
+    return list(compress(values, validation.mask(columns)))
@@ -274,7 +274,7 @@ def validate_CapacityFactorProcess(M: 'TemoaModel', val, r, s, d, t, v) -> bool:
             r in M.regions,
             s in M.time_season,
             d in M.time_of_day,
-            t in M.tech_all,
+            t in M.tech_with_capacity,
             v in M.vintage_all,
             0 <= val <= 1.0,
         )
@@ -296,12 +296,16 @@ def validate_Efficiency(M: 'TemoaModel', val, r, si, t, v, so) -> bool:
         )
     ):
         return True
-    print('Element Validations:')
-    print('region', r in M.RegionalIndices)
-    print('input_commodity', si in M.commodity_physical)
-    print('tech', t in M.tech_all)
-    print('vintage', v in M.vintage_all)
-    print('output_commodity', so in M.commodity_carrier)
+    logger.debug(
+        'Element validations for efficiency index %s:  region: %s, input commodity: %s, '
+        'tech: %s, vintage: %s, output commodity: %s',
+        (r, si, t, v, so),
+        r in M.RegionalIndices,
+        si in M.commodity_physical,
+        t in M.tech_all,
+        v in M.vintage_all,
+        so in M.commodity_carrier,
+    )
     return False
 
 
@@ -316,7 +320,6 @@ def check_flex_curtail(M: 'TemoaModel'):
     return True
 
 
-# M.TechInputSplit = Param(M.regions, M.time_optimize, M.commodity_physical, M.tech_all)
 def validate_tech_input_split(M: 'TemoaModel', val, r, p, c, t):
     if all(
         (
@@ -327,8 +330,56 @@ def validate_tech_input_split(M: 'TemoaModel', val, r, p, c, t):
         )
     ):
         return True
-    print('r', r in M.regions)
-    print('p', p in M.time_optimize)
-    print('c', c in M.commodity_physical)
-    print('t', t in M.tech_all)
+    logger.debug(
+        'Element validations for tech input split index %s:  region: %s, optimization period: %s, '
+        'physical commodity: %s, tech: %s',
+        (r, p, c, t),
+        r in M.regions,
+        p in M.time_optimize,
+        c in M.commodity_physical,
+        t in M.tech_all,
+    )
     return False
+
+
+def validate_tech_output_split(M: 'TemoaModel', val, r, p, t, c):
+    if all(
+        (
+            r in M.regions,
+            p in M.time_optimize,
+            t in M.tech_all,
+            c in M.commodity_carrier,
+        )
+    ):
+        return True
+    logger.error(
+        'Invalid tech output split index %s.  In regions: %s, in optimization periods: %s, '
+        'in techs: %s, in carrier commodities: %s',
+        (r, p, t, c),
+        r in M.regions,
+        p in M.time_optimize,
+        t in M.tech_all,
+        c in M.commodity_carrier,
+    )
+    return False
+
+
+def validate_CapacityCredit(M: 'TemoaModel', val, r, p, t, v) -> bool:
+    """
+    validate the rptv index
+    :param M: the model
+    :param val: the parameter value
+    :param r: region
+    :param p: period
+    :param t: tech
+    :param v: vintage
+    :return: True if all OK
+    """
+    return all(
+        (
+            r in M.RegionalIndices,
+            p in M.time_optimize,
+            t in M.tech_all,
+            v in M.vintage_all,
+        )
+    )
@@ -0,0 +1,164 @@
+"""
+Database-side copies of the ViableSets produced by the source trace.  The sets are written into
+indexed tables in a shared in-memory database that is attached to the loader's connection(s), so
+that queries can screen rows in SQL and only the surviving rows are passed back to python.
+
+The SQL filter reproduces element_checker.filter_elements:  a row passes if its elements are
+members of the ViableSet OR if the value at the exception location matches one of the exception
+regexes and the remaining elements match the non-excepted items of the set.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import itertools
+import os
+import re
+from logging import getLogger
+from sqlite3 import Connection
+from typing import Sequence
+
+from temoa.temoa_model.model_checking.element_checker import ViableSet
+
+logger = getLogger(__name__)
+
+SCHEMA = 'viable'
+_db_counter = itertools.count()
+
+
+class ViableTables:
+    """
+    A set of indexed tables holding ViableSets in a shared in-memory database
+    """
+
+    def __init__(self, con: Connection):
+        """
+        Create the in-memory database and attach it to the connection.  Note:  writes to the
+        tables are committed on the connection, so it should not have an open transaction
+        :param con: the connection to the database being loaded
+        """
+        self.con = con
+        self.uri = f'file:temoa_viable_{os.getpid()}_{next(_db_counter)}?mode=memory&cache=shared'
+        self.attach(con)
+        # if URI filenames are not enabled, sqlite will attach a regular file named by the uri.
+        # this would work, but defeats the purpose, so we screen for it
+        attached = {name: file for _, name, file in con.execute('PRAGMA database_list')}
+        if attached[SCHEMA]:
+            self.close()
+            os.remove(attached[SCHEMA])
+            raise RuntimeError('This sqlite build cannot attach shared in-memory databases')
+        self.viable_sets: dict[str, ViableSet] = {}
+        self._screened_columns: set[tuple[str, str, str]] = set()
+
+    def attach(self, con: Connection) -> None:
+        """
+        Attach the tables to another connection in this process (such as a reader in a pool)
+        :param con: the connection
+        :return: None
+        """
+        con.execute(f'ATTACH DATABASE ? AS {SCHEMA}', (self.uri,))
+
+    def close(self) -> None:
+        """
+        Detach from the loader connection.  The memory is released after all connections using
+        the tables are closed or detached
+        :return: None
+        """
+        self.con.execute(f'DETACH DATABASE {SCHEMA}')
+
+    def write(self, name: str, viable_set: ViableSet) -> None:
+        """
+        Write a ViableSet into an indexed table.  If the set has exceptions, tables are also made
+        for the non-excepted items and for the values that match the exceptions
+        :param name: the name for the table
+        :param viable_set: the set to write
+        :return: None
+        """
+        if name in self.viable_sets:
+            return
+        self.viable_sets[name] = viable_set
+        dim = max(viable_set.dim, 1)
+        self._make_table(name, dim, viable_set.member_tuples)
+        if viable_set.val_exceptions:
+            self._make_table(f'{name}_ex', 1, [])
+            if viable_set.non_excepted_items:
+                non_excepted = [ViableSet.tupleize(t) for t in viable_set.non_excepted_items]
+                self._make_table(f'{name}_nx', dim - 1, non_excepted)
+
+    def _make_table(self, name: str, dim: int, rows) -> None:
+        cols = ', '.join(f'c{i}' for i in range(dim))
+        self.con.execute(f'CREATE TABLE {SCHEMA}.{name} ({cols}, PRIMARY KEY ({cols}))')
+        self.con.executemany(f'INSERT INTO {SCHEMA}.{name} VALUES ({", ".join("?" * dim)})', rows)
+        # commit so the table is visible to other connections
+        self.con.commit()
+
+    def screen_exceptions(self, name: str, table: str, columns: Sequence[str]) -> None:
+        """
+        Test the distinct values in the exception column of a table against the exception regexes
+        of a set and record those that match.  This keeps the regex matching out of the
+        row-by-row filtering
+        :param name: the name of the viable set
+        :param table: the table to screen
+        :param columns: the columns of the table that correspond to the elements of the set
+        :return: None
+        """
+        viable_set = self.viable_sets[name]
+        if not viable_set.val_exceptions:
+            return
+        column = columns[viable_set.exception_loc]
+        if (name, table, column) in self._screened_columns:
+            return
+        self._screened_columns.add((name, table, column))
+        values = self.con.execute(f'SELECT DISTINCT {column} FROM main.{table}').fetchall()
+        matches = [
+            (value,)
+            for (value,) in values
+            if any(re.search(pattern, str(value)) for pattern in viable_set.val_exceptions)
+        ]
+        self.con.executemany(f'INSERT OR IGNORE INTO {SCHEMA}.{name}_ex VALUES (?)', matches)
+        self.con.commit()
+
+    def clause(self, name: str, columns: Sequence[str]) -> str:
+        """
+        Make a WHERE clause that screens rows against a set.  Note:  the unary "+" on the columns
+        prevents the query planner from reordering the scan of the table being read, so the rows
+        are returned in the same order as the unfiltered query
+        :param name: the name of the viable set
+        :param columns: the columns of the table that correspond to the elements of the set
+        :return: the SQL clause
+        """
+        viable_set = self.viable_sets[name]
+        if viable_set.dim and len(columns) != viable_set.dim:
+            raise ValueError('the columns must have same dimensionality as the validation set')
+        if viable_set.dim == 0:  # empty set, nothing is a member
+            clause = '0'
+        else:
+            cols = ', '.join(f'+{col}' for col in columns)
+            set_cols = ', '.join(f'c{i}' for i in range(len(columns)))
+            clause = f'({cols}) IN (SELECT {set_cols} FROM {SCHEMA}.{name})'
+        if viable_set.val_exceptions:
+            loc = viable_set.exception_loc
+            excepted = f'+{columns[loc]} IN (SELECT c0 FROM {SCHEMA}.{name}_ex)'
+            if viable_set.non_excepted_items:
+                others = ', '.join(f'+{col}' for i, col in enumerate(columns) if i != loc)
+                nx_cols = ', '.join(f'c{i}' for i in range(len(columns) - 1))
+                excepted += f' AND ({others}) IN (SELECT {nx_cols} FROM {SCHEMA}.{name}_nx)'
+            clause = f'{clause} OR ({excepted})'
+        return clause
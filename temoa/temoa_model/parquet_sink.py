@@ -0,0 +1,156 @@
+"""
+A ResultSink that writes the output tables as Parquet datasets, one dataset per table, partitioned
+by scenario, region and period (hive-style directories).  Dimension (text) columns are written
+dictionary-encoded, so they are compact on disk and read back by pandas as categoricals.  Each
+write adds files to the partitions, so runs that append (myopic, MGA) accumulate naturally, and
+clearing results removes whole partition directories.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import shutil
+import uuid
+from logging import getLogger
+from pathlib import Path
+from urllib.parse import unquote
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from temoa.temoa_model.result_sinks import ResultFrame, ResultSink
+
+logger = getLogger(__name__)
+
+# the dimension columns.  All other columns are values
+_TEXT_COLUMNS = {
+    'scenario',
+    'region',
+    'sector',
+    'season',
+    'tod',
+    'input_comm',
+    'tech',
+    'output_comm',
+    'emis_comm',
+    'objective_name',
+    'constraint_name',
+}
+_INTEGER_COLUMNS = {'period', 'vintage'}
+# the column used as the "period" partition of a table.  Built capacity only has a vintage
+_PERIOD_COLUMN = {'OutputBuiltCapacity': 'vintage'}
+
+
+class ParquetSink(ResultSink):
+    """
+    Writes each output table to a partitioned Parquet dataset under a root directory
+    """
+
+    def __init__(self, root: Path):
+        """
+        Make a sink
+        :param root: the directory to hold the datasets, which are named by table
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def partition_columns(self, frame: ResultFrame) -> list[str]:
+        """the partition columns of the frame's table, outermost first"""
+        period = _PERIOD_COLUMN.get(frame.table, 'period')
+        return [col for col in ('scenario', 'region', period) if col in frame.columns]
+
+    @staticmethod
+    def _type(column: str) -> pa.DataType:
+        if column in _TEXT_COLUMNS:
+            return pa.string()
+        if column in _INTEGER_COLUMNS:
+            return pa.int64()
+        return pa.float64()
+
+    def to_arrow(self, frame: ResultFrame) -> pa.Table:
+        """
+        Convert a frame to an arrow table with the text dimensions dictionary-encoded
+        :param frame: the frame
+        :return: the table
+        """
+        rows = frame.rows if isinstance(frame.rows, list) else list(frame.rows)
+        columns = list(zip(*rows)) if rows else [() for _ in frame.columns]
+        partitions = set(self.partition_columns(frame))
+        arrays = []
+        for name, values in zip(frame.columns, columns):
+            arr = pa.array(values, type=self._type(name))
+            if name in _TEXT_COLUMNS and name not in partitions:
+                arr = arr.dictionary_encode()
+            arrays.append(arr)
+        return pa.Table.from_arrays(arrays, names=list(frame.columns))
+
+    def write(self, frame: ResultFrame) -> None:
+        table = self.to_arrow(frame)
+        if not table.num_rows:
+            return
+        partitions = self.partition_columns(frame)
+        ds.write_dataset(
+            table,
+            self.root / frame.table,
+            format='parquet',
+            partitioning=ds.partitioning(
+                pa.schema([table.schema.field(col) for col in partitions]), flavor='hive'
+            ),
+            # unique names so that repeated writes add to (rather than replace) a partition
+            basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        logger.debug('Wrote %d rows of %s to parquet', table.num_rows, frame.table)
+
+    @staticmethod
+    def _partitions(directory: Path, column: str) -> list[tuple[str, Path]]:
+        """the (decoded value, path) of the partition directories for a column"""
+        if not directory.is_dir():
+            return []
+        prefix = column + '='
+        return [
+            (unquote(d.name[len(prefix) :]), d)
+            for d in directory.iterdir()
+            if d.is_dir() and d.name.startswith(prefix)
+        ]
+
+    def clear_scenario(self, scenario: str) -> None:
+        for table_dir in self._table_dirs():
+            for name, path in self._partitions(table_dir, 'scenario'):
+                if name == scenario or name.startswith(scenario + '-'):
+                    shutil.rmtree(path)
+
+    def clear_table(self, table: str) -> None:
+        if (self.root / table).is_dir():
+            shutil.rmtree(self.root / table)
+
+    def clear_periods_after(self, scenario: str, period: int) -> None:
+        for table_dir in self._table_dirs():
+            period_column = _PERIOD_COLUMN.get(table_dir.name, 'period')
+            for name, scenario_dir in self._partitions(table_dir, 'scenario'):
+                if name != scenario:
+                    continue
+                for _, region_dir in self._partitions(scenario_dir, 'region'):
+                    for value, path in self._partitions(region_dir, period_column):
+                        if int(value) >= period:
+                            shutil.rmtree(path)
+
+    def _table_dirs(self) -> list[Path]:
+        return [d for d in self.root.iterdir() if d.is_dir()]
@@ -0,0 +1,200 @@
+"""
+Destinations for the results of a run other than the output database.  The table writer assembles
+the rows of each output table into a ResultFrame and hands the same frame to the output database
+and to each configured ResultSink, so all destinations receive identical results.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from dataclasses import dataclass
+from logging import getLogger
+
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+logger = getLogger(__name__)
+
+# the sink names accepted in the config.  'sqlite' is the output database itself
+SQLITE = 'sqlite'
+PARQUET = 'parquet'
+SINK_NAMES = (SQLITE, PARQUET)
+
+# the columns of the logical output tables, in the order of the output database tables
+OUTPUT_COLUMNS: dict[str, tuple[str, ...]] = {
+    'OutputBuiltCapacity': ('scenario', 'region', 'sector', 'tech', 'vintage', 'capacity'),
+    'OutputCost': (
+        'scenario',
+        'region',
+        'period',
+        'tech',
+        'vintage',
+        'd_invest',
+        'd_fixed',
+        'd_var',
+        'd_emiss',
+        'invest',
+        'fixed',
+        'var',
+        'emiss',
+    ),
+    'OutputCurtailment': (
+        'scenario',
+        'region',
+        'sector',
+        'period',
+        'season',
+        'tod',
+        'input_comm',
+        'tech',
+        'vintage',
+        'output_comm',
+        'curtailment',
+    ),
+    'OutputDualVariable': ('scenario', 'constraint_name', 'dual'),
+    'OutputEmission': (
+        'scenario',
+        'region',
+        'sector',
+        'period',
+        'emis_comm',
+        'tech',
+        'vintage',
+        'emission',
+    ),
+    'OutputFlowIn': (
+        'scenario',
+        'region',
+        'sector',
+        'period',
+        'season',
+        'tod',
+        'input_comm',
+        'tech',
+        'vintage',
+        'output_comm',
+        'flow',
+    ),
+    'OutputFlowOut': (
+        'scenario',
+        'region',
+        'sector',
+        'period',
+        'season',
+        'tod',
+        'input_comm',
+        'tech',
+        'vintage',
+        'output_comm',
+        'flow',
+    ),
+    'OutputNetCapacity': ('scenario', 'region', 'sector', 'period', 'tech', 'vintage', 'capacity'),
+    'OutputObjective': ('scenario', 'objective_name', 'total_system_cost'),
+    'OutputRetiredCapacity': (
+        'scenario',
+        'region',
+        'sector',
+        'period',
+        'tech',
+        'vintage',
+        'capacity',
+    ),
+}
+
+
+@dataclass
+class ResultFrame:
+    """
+    The rows for one output table.  The rows may be a generator if the frame has one consumer
+    """
+
+    table: str
+    rows: Iterable[tuple]
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return OUTPUT_COLUMNS[self.table]
+
+
+class ResultSink(ABC):
+    """
+    A destination for the output tables
+    """
+
+    @abstractmethod
+    def write(self, frame: ResultFrame) -> None:
+        """
+        Append the rows of a frame to the table
+        :param frame: the frame
+        :return: None
+        """
+
+    @abstractmethod
+    def clear_scenario(self, scenario: str) -> None:
+        """
+        Remove the results of a scenario and of its iterative extensions (scenario-1, ...)
+        :param scenario: the scenario name
+        :return: None
+        """
+
+    @abstractmethod
+    def clear_table(self, table: str) -> None:
+        """
+        Remove all results from a table
+        :param table: the table name
+        :return: None
+        """
+
+    @abstractmethod
+    def clear_periods_after(self, scenario: str, period: int) -> None:
+        """
+        Remove the results of a scenario for the period and later, as the myopic sequencer does
+        for the output database when it revisits a period
+        :param scenario: the scenario name
+        :param period: the first period to remove
+        :return: None
+        """
+
+    def close(self) -> None:
+        """finish any pending writes"""
+
+
+def make_sinks(config: TemoaConfig) -> list[ResultSink]:
+    """
+    Make the sinks named in the config, other than the output database
+    :param config: the config
+    :return: list of sinks
+    """
+    sinks = []
+    for name in config.output_sinks:
+        if name == PARQUET:
+            # pyarrow is only required if parquet output is selected
+            try:
+                from temoa.temoa_model.parquet_sink import ParquetSink
+            except ImportError as e:
+                raise ImportError(
+                    'The parquet output sink requires the pyarrow package, which is not installed'
+                ) from e
+
+            sinks.append(ParquetSink(config.output_path / 'parquet'))
+        elif name != SQLITE:
+            raise ValueError(f'Unknown output sink {name}.  Options are {SINK_NAMES}')
+    return sinks
@@ -0,0 +1,268 @@
+"""
+A snapshot of the solved values of the model variables used in results processing.  Each variable
+family is read once into a list of index tuples and a parallel NumPy array of values so that the
+flow, capacity and cost calculations of the table writer can be done with array operations and
+epsilon masks instead of repeated per-index lookups on the model.
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from collections import defaultdict
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from logging import getLogger
+
+import numpy as np
+from pyomo.core import Param, Var, value
+
+from temoa.temoa_model.temoa_model import TemoaModel
+
+logger = getLogger(__name__)
+
+
+@dataclass
+class VarSnapshot:
+    """
+    The values of one variable family.  values[k] is the value of the variable at keys[k]
+    """
+
+    keys: list[tuple]
+    values: np.ndarray
+
+    @staticmethod
+    def take(var: Var) -> 'VarSnapshot':
+        """
+        Read the current values of a variable
+        :param var: the (indexed) variable
+        :return: the snapshot.  Variables without a value are recorded as 0
+        """
+        keys = list(var.keys())
+        values = np.array([vd.value for vd in var.values()], dtype=float)
+        np.nan_to_num(values, copy=False, nan=0.0)
+        return VarSnapshot(keys=keys, values=values)
+
+    @staticmethod
+    def from_columns(var: Var, indices: list[tuple], values: np.ndarray) -> 'VarSnapshot':
+        """
+        Place the values of some members of a variable, e.g. the columns of a solve in matrix form,
+        in a snapshot of the whole variable, without reading the variable values
+        :param var: the (indexed) variable
+        :param indices: the indices of the members with values
+        :param values: their values.  The other members are recorded as 0
+        :return: the snapshot
+        """
+        keys = list(var.keys())
+        position = {key: k for k, key in enumerate(keys)}
+        res = np.zeros(len(keys))
+        res[[position[idx] for idx in indices]] = values
+        np.nan_to_num(res, copy=False, nan=0.0)
+        return VarSnapshot(keys=keys, values=res)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def significant(self, epsilon: float) -> np.ndarray:
+        """
+        A mask of the values that are at least epsilon in magnitude
+        :param epsilon: the threshold
+        :return: boolean array
+        """
+        return np.abs(self.values) >= epsilon
+
+    def select(self, mask: np.ndarray) -> tuple[list[tuple], np.ndarray]:
+        """
+        The keys and values where the mask is True
+        :param mask: boolean array
+        :return: tuple of (keys, values)
+        """
+        positions = np.flatnonzero(mask).tolist()
+        return [self.keys[k] for k in positions], self.values[mask]
+
+    def key_mask(self, test: Callable[[tuple], bool]) -> np.ndarray:
+        """
+        A mask from a test of the keys
+        :param test: function of the index tuple
+        :return: boolean array
+        """
+        return np.fromiter((test(key) for key in self.keys), dtype=bool, count=len(self.keys))
+
+    def masked(self, mask: np.ndarray) -> 'VarSnapshot':
+        """
+        A snapshot with the same keys and the values where the mask is False set to 0
+        :param mask: boolean array
+        :return: the new snapshot
+        """
+        return VarSnapshot(keys=self.keys, values=np.where(mask, self.values, 0.0))
+
+    def as_dict(self) -> dict[tuple, float]:
+        return dict(zip(self.keys, self.values.tolist()))
+
+    def totals(self, positions: Iterable[int]) -> dict[tuple, float]:
+        """
+        The sum of the values grouped by a subset of the index positions
+        :param positions: the positions in the index tuple to group by, e.g. (0, 1, 5, 6) to
+        total flows (r, p, s, d, i, t, v, o) by (r, p, t, v)
+        :return: dictionary of group -> total
+        """
+        positions = tuple(positions)
+        res = defaultdict(float)
+        for key, val in zip(self.keys, self.values.tolist()):
+            res[tuple(key[k] for k in positions)] += val
+        return res
+
+
+def param_array(param: Param, indices: Iterable[tuple]) -> np.ndarray:
+    """
+    The values of a parameter at each of a sequence of indices.  Each distinct index is only
+    looked up once, which pays off when the indices repeat, as they do over the time slices.
+    :param param: the parameter
+    :param indices: the indices
+    :return: array of values in the order of the indices
+    """
+    cache = {}
+    res = []
+    for idx in indices:
+        val = cache.get(idx)
+        if val is None:
+            val = cache[idx] = value(param[idx])
+        res.append(val)
+    return np.array(res, dtype=float)
+
+
+@dataclass
+class ResultSnapshot:
+    """
+    The variable families used in results processing, taken after a solve
+    """
+
+    flow_in: VarSnapshot
+    flow_out: VarSnapshot
+    flow_out_annual: VarSnapshot
+    curtailment: VarSnapshot
+    flex: VarSnapshot
+    flex_annual: VarSnapshot
+    new_capacity: VarSnapshot
+    capacity: VarSnapshot
+    retired_capacity: VarSnapshot
+
+    @staticmethod
+    def _make(M: TemoaModel, take: Callable[[Var], VarSnapshot]) -> 'ResultSnapshot':
+        return ResultSnapshot(
+            flow_in=take(M.V_FlowIn),
+            flow_out=take(M.V_FlowOut),
+            flow_out_annual=take(M.V_FlowOutAnnual),
+            curtailment=take(M.V_Curtailment),
+            flex=take(M.V_Flex),
+            flex_annual=take(M.V_FlexAnnual),
+            new_capacity=take(M.V_NewCapacity),
+            capacity=take(M.V_Capacity),
+            retired_capacity=take(M.V_RetiredCapacity),
+        )
+
+    @staticmethod
+    def take(M: TemoaModel) -> 'ResultSnapshot':
+        """
+        Read the variable values of a solved model
+        :param M: the model
+        :return: the snapshot
+        """
+        return ResultSnapshot._make(M, VarSnapshot.take)
+
+    @staticmethod
+    def from_columns(
+        M: TemoaModel, columns: Callable[[str], tuple[list[tuple], np.ndarray]]
+    ) -> 'ResultSnapshot':
+        """
+        Make the snapshot from the column values of a solve in matrix form, which are not loaded
+        into the model
+        :param M: the model, for the indices of the variables
+        :param columns: the indices and values of the columns of a variable, by variable name (see
+        highs_backend.MatrixSolution.columns)
+        :return: the snapshot
+        """
+        return ResultSnapshot._make(
+            M, lambda var: VarSnapshot.from_columns(var, *columns(var.local_name))
+        )
+
+    def for_periods(self, first: int, last: int) -> 'ResultSnapshot':
+        """
+        The snapshot with the values outside of the periods [first, last] set to 0, e.g. to write
+        one myopic window of a model of the whole horizon.  The new capacity is screened by vintage
+        :param first: the first period
+        :param last: the last period
+        :return: the new snapshot
+        """
+
+        def in_periods(var: VarSnapshot, position: int = 1) -> VarSnapshot:
+            return var.masked(var.key_mask(lambda k: first <= k[position] <= last))
+
+        return ResultSnapshot(
+            flow_in=in_periods(self.flow_in),
+            flow_out=in_periods(self.flow_out),
+            flow_out_annual=in_periods(self.flow_out_annual),
+            curtailment=in_periods(self.curtailment),
+            flex=in_periods(self.flex),
+            flex_annual=in_periods(self.flex_annual),
+            new_capacity=in_periods(self.new_capacity, position=2),
+            capacity=in_periods(self.capacity),
+            retired_capacity=in_periods(self.retired_capacity),
+        )
+
+
+@dataclass
+class CapacitySnapshot:
+    """
+    The capacity variable families, which are all that is written for an MGA iteration
+    """
+
+    new_capacity: VarSnapshot
+    capacity: VarSnapshot
+    retired_capacity: VarSnapshot
+
+    @staticmethod
+    def take(M: TemoaModel) -> 'CapacitySnapshot':
+        """
+        Read the capacity values of a solved model
+        :param M: the model
+        :return: the snapshot
+        """
+        return CapacitySnapshot(
+            new_capacity=VarSnapshot.take(M.V_NewCapacity),
+            capacity=VarSnapshot.take(M.V_Capacity),
+            retired_capacity=VarSnapshot.take(M.V_RetiredCapacity),
+        )
+
+    def values(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """the value arrays alone, which are cheap to pass between processes"""
+        return self.new_capacity.values, self.capacity.values, self.retired_capacity.values
+
+    def with_values(self, values: tuple[np.ndarray, np.ndarray, np.ndarray]) -> 'CapacitySnapshot':
+        """
+        A snapshot with the keys of this one and other values, e.g. from a copy of the same model
+        :param values: the value arrays, as from values()
+        :return: the new snapshot
+        """
+        new_capacity, capacity, retired_capacity = values
+        return CapacitySnapshot(
+            new_capacity=VarSnapshot(self.new_capacity.keys, new_capacity),
+            capacity=VarSnapshot(self.capacity.keys, capacity),
+            retired_capacity=VarSnapshot(self.retired_capacity.keys, retired_capacity),
+        )
@@ -28,6 +28,7 @@ received this license file.  If not, see <http://www.gnu.org/licenses/>.
 
 import sqlite3
 import sys
+from contextlib import nullcontext
 from logging import getLogger
 from pathlib import Path
 from sys import stderr as SE, version_info
@@ -48,6 +49,9 @@ from pyomo.environ import (
 from pyomo.opt import SolverResults
 
 from temoa.data_processing.DB_to_Excel import make_excel
+from temoa.temoa_model import highs_backend
+from temoa.temoa_model.build_profiler import BuildProfiler
+from temoa.temoa_model.matrix_model import MatrixModel, omit_direct_components
 from temoa.temoa_model.table_writer import TableWriter
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_model import TemoaModel
@@ -55,6 +59,18 @@ from temoa.temoa_model.temoa_model import TemoaModel
 logger = getLogger(__name__)
 
 
+class _ConsumableData(dict):
+    """
+    A dictionary of model data that releases each entry as it is read.  Pyomo reads the data
+    for each component exactly once (in declaration order) during instance construction, so
+    handing it one of these allows the raw data for a component to be garbage collected as soon
+    as that component is constructed instead of holding the full data set until the build ends.
+    """
+
+    def __getitem__(self, key):
+        return self.pop(key)
+
+
 @deprecated.deprecated('dat files are no longer supported...for removal')
 def load_portal_from_dat(dat_file: Path, silent: bool = False) -> DataPortal:
     loaded_portal = DataPortal(model=TemoaModel())
@@ -148,20 +164,31 @@ def check_database_version(config: TemoaConfig, db_major_reqd: int, min_db_minor
 
 
 def build_instance(
-    loaded_portal: DataPortal,
+    loaded_portal: DataPortal | dict,
     model_name=None,
     silent=False,
     keep_lp_file=False,
     lp_path: Path = None,
+    matrix: bool = False,
+    profile: bool = False,
+    profile_path: Path = None,
 ) -> TemoaModel:
     """
     Build a Temoa Instance from data
-    :param loaded_portal: a DataPortal instance
+    :param loaded_portal: a DataPortal instance or a dictionary of component name: data (as
+    produced by the HybridLoader).  A dictionary is not modified, so it may be built again
     :param silent: Run silently
     :param model_name: Optional name for this instance
+    :param matrix: omit the objective and the core constraint families, which are then assembled
+    directly in matrix form (see matrix_model).  The instance can only be solved with highspy, and
+    the LP file is written (with an MPS file) from the matrix form
+    :param profile: time and memory-sample the construction of each model component
+    :param profile_path: the csv file for the profile report, if profiling
     :return: a built TemoaModel
     """
     model = TemoaModel()
+    if matrix:
+        omit_direct_components(model)
 
     model.dual = Suffix(direction=Suffix.IMPORT)
     # self.model.rc = Suffix(direction=Suffix.IMPORT)
@@ -172,11 +199,29 @@ def build_instance(
         SE.write('[        ] Creating model instance.')
         SE.flush()
     logger.info('Started creating model instance from data')
-    instance = model.create_instance(loaded_portal, name=model_name)
+    with BuildProfiler() if profile else nullcontext() as profiler:
+        if isinstance(loaded_portal, DataPortal):
+            instance = model.create_instance(loaded_portal, name=model_name)
+        else:
+            # direct load:  build from the data dictionary.  Pyomo still wraps it in a DataPortal,
+            # but without copying it, and the (shallow) copy releases each component's data once
+            # it is constructed, which frees the data during the build if the caller holds no
+            # other reference to it
+            data = _ConsumableData(loaded_portal)
+            instance = model.create_instance(data={None: data}, name=model_name)
+            if data:
+                logger.debug('Data not used in instance build: %s', sorted(data.keys()))
     if not silent:
         SE.write('\r[%8.2f] Instance created.\n' % (time() - hack))
         SE.flush()
     logger.info('Finished creating model instance from data')
+    if profiler:
+        profiler.report()
+        if not profile_path:
+            logger.warning('Requested build profile, but no path is provided...report skipped')
+        else:
+            profile_path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.write(profile_path)
 
     # save LP if requested
     if keep_lp_file:
@@ -186,7 +231,12 @@ def build_instance(
             if not Path.is_dir(lp_path):
                 Path.mkdir(lp_path)
             filename = lp_path / 'model.lp'
-            instance.write(filename, format='lp', io_options={'symbolic_solver_labels': True})
+            if matrix:
+                matrix_model = MatrixModel.from_instance(instance)
+                matrix_model.write_lp(filename, symbolic=True)
+                matrix_model.write_mps(filename.with_suffix('.mps'), symbolic=True)
+            else:
+                instance.write(filename, format='lp', io_options={'symbolic_solver_labels': True})
 
     # gather some stats...
     c_count = 0
@@ -200,12 +250,17 @@ def build_instance(
 
 
 def solve_instance(
-    instance: TemoaModel, solver_name, silent: bool = False, solver_suffixes=None
+    instance: TemoaModel,
+    solver_name,
+    silent: bool = False,
+    solver_suffixes=None,
+    options: dict | None = None,
 ) -> Tuple[TemoaModel, SolverResults]:
     """
     Solve the instance and return a loaded instance
     :param solver_suffixes: iterable of string names for suffixes.  See pyomo dox.  right now, only
     'duals' is supported in the Temoa Framework.  Some solvers may not support duals.
+    :param options: solver options by name, which override the defaults set here
     :param silent: Run silently
     :param solver_name: The name of the solver to request from the SolverFactory
     :param instance: the instance to solve
@@ -217,6 +272,8 @@ def solve_instance(
     if not solver_name:
         logger.error('No solver specified in solve sequence')
         raise TypeError('Error occurred during solve, see log')
+    if solver_name == highs_backend.SOLVER_NAME:
+        return solve_matrix_instance(instance, silent=silent, options=options)
     optimizer = SolverFactory(solver_name)
     if isinstance(optimizer, UnknownSolver):
         logger.error(
@@ -267,7 +324,9 @@ def solve_instance(
         elif solver_name == 'appsi_highs':
             pass
 
-        # TODO: still need to add gurobi parameters?  (and move them all to .toml...?)
+        # options from the config win over the defaults above
+        if options:
+            optimizer.options.update(options)
 
         # dev note:  The handling of suffixes is pretty weak.  As of today 4/4/2024, highspy crashes if
         #            the keyword suffixes is passed in (regardless if there are any requested).  CBC only
@@ -319,6 +378,45 @@ def solve_instance(
     return instance, result
 
 
+def solve_matrix_instance(
+    instance: TemoaModel, silent: bool = False, options: dict | None = None
+) -> tuple[TemoaModel, SolverResults]:
+    """
+    Solve the instance in-process with HiGHS by handing it the matrix form of the model.  The
+    solution is not loaded into the instance:  the primal and dual arrays ride along in the
+    results (see highs_backend.MatrixResults) and are written from there
+    :param instance: the instance to solve
+    :param silent: Run silently
+    :param options: HiGHS options by name
+    :return: the (unloaded) instance and results
+    """
+    hack = time()
+    if not silent:
+        SE.write('[        ] Solving.')
+        SE.flush()
+    logger.info('Starting the solve process using in-process HiGHS on model %s', instance.name)
+    matrix = MatrixModel.from_instance(instance)
+    solution = highs_backend.solve_matrix(matrix, silent=silent, options=options)
+    result = highs_backend.make_results(instance, solution)
+    logger.info('Solve process complete')
+    logger.debug('Solver results: \n %s', result.solver)
+    if not silent:
+        SE.write('\r[%8.2f] Model solved.\n' % (time() - hack))
+        SE.flush()
+    return instance, result
+
+
+def matrix_solution(results: SolverResults | None) -> 'highs_backend.MatrixSolution | None':
+    """
+    The solution arrays of a solve in matrix form
+    :param results: the results of the solve
+    :return: the solution, or None if the solve loaded the instance instead
+    """
+    if isinstance(results, highs_backend.MatrixResults):
+        return results.matrix_solution
+    return None
+
+
 def check_solve_status(result: SolverResults) -> tuple[bool, str]:
     """
     Check the status of the solve.
@@ -345,10 +443,12 @@ def handle_results(instance: TemoaModel, results, options: TemoaConfig):
 
     # output_stream = pformat_results(instance, results, options)
     table_writer = TableWriter(config=options)
+    # a solve in matrix form leaves the model unloaded, and its values come in the results
+    solution = matrix_solution(results)
     if options.save_duals:
-        table_writer.write_results(M=instance, results=results)
+        table_writer.write_results(M=instance, results=results, solution=solution)
     else:
-        table_writer.write_results(M=instance)
+        table_writer.write_results(M=instance, solution=solution)
 
     if options.save_excel:
         temp_scenario = set()
@@ -364,7 +464,9 @@ def handle_results(instance: TemoaModel, results, options: TemoaConfig):
     # if options.stream_output:
     #     print(output_stream.getvalue())
     # normal (non-MGA) run will have a TotalCost as the OBJ:
-    if hasattr(instance, 'TotalCost'):
+    if solution is not None:
+        logger.info('TotalCost value: %0.2f', solution.objective)
+    elif hasattr(instance, 'TotalCost'):
         logger.info('TotalCost value: %0.2f', value(instance.TotalCost))
     # MGA runs should have either a FirstObj or SecondObj
     if hasattr(instance, 'FirstObj'):
@@ -4,21 +4,35 @@ tool for writing outputs to database tables
 import sqlite3
 import sys
 from collections import defaultdict, namedtuple
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
 from enum import Enum, unique
 from logging import getLogger
 from typing import TYPE_CHECKING
 
+import numpy as np
 from pyomo.core import value, Objective
 from pyomo.opt import SolverResults
 
+from temoa.extensions.myopic.myopic_index import MyopicIndex
 from temoa.temoa_model import temoa_rules
+from temoa.temoa_model.background_writer import BackgroundWriter
+from temoa.temoa_model.bulk_writer import BulkWriter
 from temoa.temoa_model.exchange_tech_cost_ledger import CostType, ExchangeTechCostLedger
+from temoa.temoa_model.matrix_model import component_name
+from temoa.temoa_model.result_sinks import SQLITE, ResultFrame, make_sinks
+from temoa.temoa_model.result_snapshot import (
+    CapacitySnapshot,
+    ResultSnapshot,
+    VarSnapshot,
+    param_array,
+)
 from temoa.temoa_model.temoa_config import TemoaConfig
 from temoa.temoa_model.temoa_mode import TemoaMode
 from temoa.temoa_model.temoa_model import TemoaModel
 
 if TYPE_CHECKING:
-    pass
+    from temoa.temoa_model.highs_backend import MatrixSolution
 
 """
 Tools for Energy Model Optimization and Analysis (Temoa):
@@ -110,6 +124,17 @@ class TableWriter:
         self.tech_sectors: dict[str, str] | None = None
         self.flow_register: dict[FI, dict[FlowType, float]] = {}
         self.emission_register: dict[EI, float] | None = None
+        # the open bulk write session, if any
+        self._bulk: BulkWriter | None = None
+        # the output database is one of the destinations for the results, the others are sinks
+        self.write_db = SQLITE in config.output_sinks
+        self.sinks = make_sinks(config)
+        # the writer for the output database tables that are deferred to the background, if any
+        self.background: BackgroundWriter | None = None
+        self._immediate_tables: set[str] = set()
+        self._deferred: list[tuple[str, list[tuple]]] = []
+        # vacuum the output database after each write.  The myopic sequencer compacts by policy
+        self.vacuum_after_write = True
         try:
             self.con = sqlite3.connect(config.output_database)
         except sqlite3.OperationalError as e:
@@ -118,34 +143,149 @@ class TableWriter:
             sys.exit(-1)
 
     def write_results(
-        self, M: TemoaModel, results: SolverResults | None = None, append=False
+        self,
+        M: TemoaModel,
+        results: SolverResults | None = None,
+        append=False,
+        solution: 'MatrixSolution | None' = None,
+        window: MyopicIndex | None = None,
     ) -> None:
         """
         Write results to output database
         :param results: if provided, this will trigger the writing of dual variables, pulled from the SolverResults
         :param M: the model
         :param append: append whatever is already in the tables.  If False (default), clear existing tables by scenario name
+        :param solution: the solution arrays of a solve in matrix form, which are used in place of
+        the (unloaded) model variables, objective and duals
+        :param window: the myopic window solved on a model of the whole horizon.  Only the results
+        of its periods are written and the loan costs end at its last year
         :return:
         """
+        if self.config.bulk_write and self.write_db:
+            with self.transaction():
+                self._write_results(
+                    M, results=results, append=append, solution=solution, window=window
+                )
+        else:
+            self._write_results(M, results=results, append=append, solution=solution, window=window)
+        for sink in self.sinks:
+            sink.close()
+        # catch-all
+        self._commit()
+        if not self._bulk:
+            self._submit_deferred()
+        if self.write_db and self.vacuum_after_write and not self._bulk and not self.background:
+            # can't vacuum within an enclosing session or while writing in the background
+            self.con.execute('VACUUM')
+
+    def defer_writes(self, writer: BackgroundWriter, immediate: Iterable[str] = ()) -> None:
+        """
+        Hand the writes of the output database tables to a background writer.  The rows of each
+        call to write_results are passed on as one task once the immediate tables are committed.
+        :param writer: the background writer
+        :param immediate: the tables that are still written (and committed) before write_results
+        returns, e.g. those needed by the next myopic window
+        :return: None
+        """
+        self.background = writer
+        self._immediate_tables = set(immediate)
+
+    def _submit_deferred(self) -> None:
+        """pass the held rows to the background writer"""
+        if not self._deferred:
+            return
+        frames, self._deferred = self._deferred, []
+
+        def write(con: sqlite3.Connection) -> None:
+            for table, rows in frames:
+                qry = f'INSERT INTO {table} VALUES {_marks(len(rows[0]))}'
+                con.executemany(qry, rows)
+
+        self.background.submit(write)
+
+    def _write_results(
+        self,
+        M: TemoaModel,
+        results: SolverResults | None,
+        append: bool,
+        solution: 'MatrixSolution | None',
+        window: MyopicIndex | None = None,
+    ) -> None:
         if not append:
             self.clear_scenario()
         if not self.tech_sectors:
             self._get_tech_sectors()
-        self.write_objective(M)
-        self.write_capacity_tables(M)
+        # read the variable values once for all the tables
+        if solution is not None:
+            snapshot = ResultSnapshot.from_columns(M, solution.columns)
+            self.write_objective(M, objective=solution.objective)
+        else:
+            snapshot = ResultSnapshot.take(M)
+            self.write_objective(M)
+        p_e = None
+        if window is not None:
+            snapshot = snapshot.for_periods(window.base_year, window.last_demand_year)
+            p_e = window.last_year
+        self.write_capacity_tables(M, snapshot=snapshot)
         # analyze the emissions to get the costs and flows
-        e_costs, e_flows = self._gather_emission_costs_and_flows(M)
+        e_costs, e_flows = self._gather_emission_costs_and_flows(M, snapshot=snapshot)
         self.emission_register = e_flows
         self.write_emissions()
-        self.write_costs(M, emission_entries=e_costs)
-        self.flow_register = self.calculate_flows(M)
+        self.write_costs(M, emission_entries=e_costs, snapshot=snapshot, p_e=p_e)
+        self.flow_register = self.calculate_flows(M, snapshot=snapshot)
         self.check_flow_balance(M)
         self.write_flow_tables()
         if results:  # write the duals
-            self.write_dual_variables(results)
-        # catch-all
-        self.con.commit()
-        self.con.execute('VACUUM')
+            if solution is not None:
+                self.write_dual_values(solution)
+            else:
+                self.write_dual_variables(results)
+
+    @contextmanager
+    def transaction(self) -> Iterator[BulkWriter]:
+        """
+        A bulk write session.  All writes to the output tables within the session are made in one
+        transaction (see BulkWriter).  Sessions do not nest:  an inner call joins the open session.
+        :return: the BulkWriter of the session
+        """
+        if self._bulk:
+            yield self._bulk
+            return
+        with BulkWriter(self.con, all_output_tables) as bulk:
+            self._bulk = bulk
+            try:
+                yield bulk
+            finally:
+                self._bulk = None
+        bulk.report()
+        self._submit_deferred()
+
+    def _insert(self, table: str, rows: Iterable[tuple]) -> None:
+        """
+        write rows of an output table to the output database (through the bulk writer if a session
+        is open) and to each of the sinks
+        """
+        frame = ResultFrame(table, rows)
+        if self.write_db + len(self.sinks) > 1:
+            # the frame is shared, so the rows must be held
+            frame.rows = list(frame.rows)
+        if self.write_db:
+            if self.background and table not in self._immediate_tables:
+                rows = frame.rows if isinstance(frame.rows, list) else list(frame.rows)
+                if rows:
+                    self._deferred.append((table, rows))
+            elif self._bulk:
+                self._bulk.insert(table, frame.rows)
+            else:
+                qry = f'INSERT INTO {table} VALUES {_marks(len(frame.columns))}'
+                self.con.executemany(qry, frame.rows)
+        for sink in self.sinks:
+            sink.write(frame)
+
+    def _commit(self) -> None:
+        """commit, unless the writes are being grouped in a bulk session"""
+        if not self._bulk:
+            self.con.commit()
 
     def _get_tech_sectors(self):
         """pull the sector info and fill the mapping"""
@@ -154,19 +294,28 @@ class TableWriter:
         self.tech_sectors = dict(data)
 
     def clear_scenario(self):
+        for sink in self.sinks:
+            sink.clear_scenario(self.config.scenario)
+        if not self.write_db:
+            return
         cur = self.con.cursor()
         for table in all_output_tables:
             cur.execute(f'DELETE FROM {table} WHERE scenario = ?', (self.config.scenario,))
-        self.con.commit()
+        self._commit()
         self.clear_iterative_runs()
 
     def clear_indexed_scenarios(self):
+        for sink in self.sinks:
+            for table in all_output_tables:
+                sink.clear_table(table)
+        if not self.write_db:
+            return
         cur = self.con.cursor()
         for table in all_output_tables:
             cur.execute(
                 f'DELETE FROM {table} WHERE 1',
             )
-        self.con.commit()
+        self._commit()
 
     def clear_iterative_runs(self):
         """
@@ -178,10 +327,19 @@ class TableWriter:
         cur = self.con.cursor()
         for table in all_output_tables:
             cur.execute(f'DELETE FROM {table} WHERE scenario like ?', (target,))
-        self.con.commit()
+        self._commit()
 
-    def write_objective(self, M: TemoaModel) -> None:
-        """Write the value of all ACTIVE objectives to the DB"""
+    def write_objective(self, M: TemoaModel, objective: float | None = None) -> None:
+        """
+        Write the value of all ACTIVE objectives to the DB
+        :param M: the model
+        :param objective: the value of the total cost from a solve in matrix form, which is not
+        loaded into the model (which may have no objective component)
+        """
+        if objective is not None:
+            self._insert('OutputObjective', [(self.config.scenario, 'TotalCost', objective)])
+            self._commit()
+            return
         objs: list[Objective] = list(M.component_data_objects(Objective))
         active_objs = [obj for obj in objs if obj.active]
         if len(active_objs) > 1:
@@ -191,10 +349,9 @@ class TableWriter:
             )
         for obj in active_objs:
             obj_name, obj_value = obj.getname(fully_qualified=True), value(obj)
-            qry = 'INSERT INTO OutputObjective VALUES (?, ?, ?)'
             data = (self.config.scenario, obj_name, obj_value)
-            self.con.execute(qry, data)
-            self.con.commit()
+            self._insert('OutputObjective', [data])
+            self._commit()
 
     def write_emissions(self):
         """Write the emission table to the DB"""
@@ -210,55 +367,52 @@ class TableWriter:
                 continue
             entry = (scenario, ei.r, sector, ei.p, ei.e, ei.t, ei.v, val)
             data.append(entry)
-        qry = f'INSERT INTO OutputEmission VALUES {_marks(8)}'
-        self.con.executemany(qry, data)
-        self.con.commit()
-
-    def write_capacity_tables(self, M: TemoaModel, iteration: int | None = None) -> None:
+        self._insert('OutputEmission', data)
+        self._commit()
+
+    def write_capacity_tables(
+        self,
+        M: TemoaModel,
+        iteration: int | None = None,
+        snapshot: ResultSnapshot | CapacitySnapshot | None = None,
+    ) -> None:
         """Write the capacity tables to the DB"""
         if not self.tech_sectors:
             raise RuntimeError('tech sectors not available... code error')
+        if snapshot is None:
+            snapshot = ResultSnapshot.take(M)
         scenario = self.config.scenario
         if iteration:
             scenario = scenario + f'-{iteration}'
         # Built Capacity
-        data = []
-        for r, t, v in M.V_NewCapacity:
-            if v in M.time_optimize:
-                val = value(M.V_NewCapacity[r, t, v])
-                s = self.tech_sectors.get(t)
-                if abs(val) < self.epsilon:
-                    continue
-                new_cap = (scenario, r, s, t, v, val)
-                data.append(new_cap)
-        qry = 'INSERT INTO OutputBuiltCapacity VALUES (?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        new_cap = snapshot.new_capacity
+        optimize = set(M.time_optimize)
+        mask = new_cap.significant(self.epsilon) & new_cap.key_mask(lambda k: k[2] in optimize)
+        keys, vals = new_cap.select(mask)
+        data = [
+            (scenario, r, self.tech_sectors.get(t), t, v, val)
+            for (r, t, v), val in zip(keys, vals.tolist())
+        ]
+        self._insert('OutputBuiltCapacity', data)
 
         # NetCapacity
-        data = []
-        for r, p, t, v in M.V_Capacity:
-            val = value(M.V_Capacity[r, p, t, v])
-            if abs(val) < self.epsilon:
-                continue
-            s = self.tech_sectors.get(t)
-            new_net_cap = (scenario, r, s, p, t, v, val)
-            data.append(new_net_cap)
-        qry = 'INSERT INTO OutputNetCapacity VALUES (?, ?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        keys, vals = snapshot.capacity.select(snapshot.capacity.significant(self.epsilon))
+        data = [
+            (scenario, r, self.tech_sectors.get(t), p, t, v, val)
+            for (r, p, t, v), val in zip(keys, vals.tolist())
+        ]
+        self._insert('OutputNetCapacity', data)
 
         # Retired Capacity
-        data = []
-        for r, p, t, v in M.V_RetiredCapacity:
-            val = value(M.V_RetiredCapacity[r, p, t, v])
-            if abs(val) < self.epsilon:
-                continue
-            s = self.tech_sectors.get(t)
-            new_retired_cap = (scenario, r, s, p, t, v, val)
-            data.append(new_retired_cap)
-        qry = 'INSERT INTO OutputRetiredCapacity VALUES (?, ?, ?, ?, ?, ?, ?)'
-        self.con.executemany(qry, data)
+        retired = snapshot.retired_capacity
+        keys, vals = retired.select(retired.significant(self.epsilon))
+        data = [
+            (scenario, r, self.tech_sectors.get(t), p, t, v, val)
+            for (r, p, t, v), val in zip(keys, vals.tolist())
+        ]
+        self._insert('OutputRetiredCapacity', data)
 
-        self.con.commit()
+        self._commit()
 
     def write_flow_tables(self, iteration: int | None = None) -> None:
         """Write the flow tables"""
@@ -266,19 +420,18 @@ class TableWriter:
             raise RuntimeError('tech sectors not available... code error')
         if not self.flow_register:
             raise RuntimeError('flow_register not available... code error')
-        # sort the flows
-        flows_by_type: dict[FlowType, list[tuple]] = defaultdict(list)
         scenario = self.config.scenario
         if iteration:
             scenario = scenario + f'-{iteration}'
-        for fi in self.flow_register:
-            sector = self.tech_sectors.get(fi.t)
-            for flow_type in self.flow_register[fi]:
-                val = self.flow_register[fi][flow_type]
+
+        def rows(flow_type: FlowType) -> Iterator[tuple]:
+            """the rows of one flow type, generated as they are written"""
+            for fi, flows in self.flow_register.items():
+                val = flows.get(flow_type, 0.0)
                 if abs(val) < self.epsilon:
                     continue
-                entry = (scenario, fi.r, sector, fi.p, fi.s, fi.d, fi.i, fi.t, fi.v, fi.o, val)
-                flows_by_type[flow_type].append(entry)
+                sector = self.tech_sectors.get(fi.t)
+                yield scenario, fi.r, sector, fi.p, fi.s, fi.d, fi.i, fi.t, fi.v, fi.o, val
 
         table_associations = {
             FlowType.OUT: 'OutputFlowOut',
@@ -288,10 +441,9 @@ class TableWriter:
         }
 
         for flow_type, table_name in table_associations.items():
-            qry = f'INSERT INTO {table_name} VALUES {_marks(11)}'
-            self.con.executemany(qry, flows_by_type[flow_type])
+            self._insert(table_name, rows(flow_type))
 
-        self.con.commit()
+        self._commit()
 
     def check_flow_balance(self, M: TemoaModel) -> bool:
         """An easy sanity check to ensure that the flow tables are balanced, except for storage"""
@@ -348,78 +500,105 @@ class TableWriter:
                 )
         return all_good
 
-    def calculate_flows(self, M: TemoaModel) -> dict[FI, dict[FlowType, float]]:
-        """Gather all flows by Flow Index and Type"""
+    def calculate_flows(
+        self, M: TemoaModel, snapshot: ResultSnapshot | None = None
+    ) -> dict[FI, dict[FlowType, float]]:
+        """
+        Gather all flows by Flow Index and Type
 
+        The flows, losses and annual-to-time slice expansions are calculated on the arrays of the
+        snapshot and screened by epsilon before any entries are made
+        :param M: the model
+        :param snapshot: the variable values, taken from M if not provided
+        :return: dictionary of FI -> {FlowType: value}
+        """
+        if snapshot is None:
+            snapshot = ResultSnapshot.take(M)
         res: dict[FI, dict[FlowType, float]] = defaultdict(lambda: defaultdict(float))
 
+        def efficiency(keys: list[tuple], r, i, t, v, o) -> np.ndarray:
+            """the efficiency of each key, located by the positions of r, i, t, v, o"""
+            return param_array(M.Efficiency, ((k[r], k[i], k[t], k[v], k[o]) for k in keys))
+
+        def significant(var: VarSnapshot) -> tuple[list[tuple], np.ndarray]:
+            return var.select(var.significant(self.epsilon))
+
         # ---- NON-annual ----
 
         # Storage, which has a unique v_flow_in (non-storage techs do not have this variable)
-        for key in M.V_FlowIn:
-            fi = FI(*key)
-            flow = value(M.V_FlowIn[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.IN] = flow
-            res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * flow
-
-        # regular flows
-        for key in M.V_FlowOut:
-            fi = FI(*key)
-            flow = value(M.V_FlowOut[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.OUT] = flow
-
-            if fi.t not in M.tech_storage:  # we can get the flow in by out/eff...
-                flow = value(M.V_FlowOut[fi]) / value(M.Efficiency[ritvo(fi)])
-                res[fi][FlowType.IN] = flow
-                res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * flow
+        keys, flows = significant(snapshot.flow_in)
+        losses = (1 - efficiency(keys, 0, 4, 5, 6, 7)) * flows
+        for key, flow, loss in zip(keys, flows.tolist(), losses.tolist()):
+            entry = res[FI(*key)]
+            entry[FlowType.IN] = flow
+            entry[FlowType.LOST] = loss
+
+        # regular flows.  For all but storage, we can get the flow in by out/eff...
+        keys, flows = significant(snapshot.flow_out)
+        storage = set(M.tech_storage)
+        not_storage = np.fromiter((k[5] not in storage for k in keys), dtype=bool, count=len(keys))
+        eff = efficiency(keys, 0, 4, 5, 6, 7)
+        flows_in = np.divide(flows, eff, where=not_storage, out=np.zeros_like(flows))
+        losses = (1 - eff) * flows_in
+        for key, flow, flow_in, loss, calc_in in zip(
+            keys, flows.tolist(), flows_in.tolist(), losses.tolist(), not_storage.tolist()
+        ):
+            entry = res[FI(*key)]
+            entry[FlowType.OUT] = flow
+            if calc_in:
+                entry[FlowType.IN] = flow_in
+                entry[FlowType.LOST] = loss
 
         # curtailment flows
-        for key in M.V_Curtailment:
-            fi = FI(*key)
-            val = value(M.V_Curtailment[fi])
-            if abs(val) < self.epsilon:
-                continue
-            res[fi][FlowType.CURTAIL] = val
+        keys, flows = significant(snapshot.curtailment)
+        for key, flow in zip(keys, flows.tolist()):
+            res[FI(*key)][FlowType.CURTAIL] = flow
 
         # flex techs.  This will subtract the flex from their output flow IOT make OUT the "net"
-        for key in M.V_Flex:
-            fi = FI(*key)
-            flow = value(M.V_Flex[fi])
-            if abs(flow) < self.epsilon:
-                continue
-            res[fi][FlowType.FLEX] = flow
-            res[fi][FlowType.OUT] -= flow
+        keys, flows = significant(snapshot.flex)
+        for key, flow in zip(keys, flows.tolist()):
+            entry = res[FI(*key)]
+            entry[FlowType.FLEX] = flow
+            entry[FlowType.OUT] -= flow
 
         # ---- annual ----
 
+        # the annual flows are spread over the time slices by the segment fractions
+        time_slices = [(s, d) for s in M.time_season for d in M.time_of_day]
+        seg_frac = param_array(M.SegFrac, time_slices)
+
+        def expand(var: VarSnapshot) -> tuple[list[FI], np.ndarray, np.ndarray]:
+            """the significant (annual key, time slice) flows and their annual key positions"""
+            flows = np.outer(var.values, seg_frac)
+            rows, cols = np.nonzero(np.abs(flows) >= self.epsilon)
+            fis = [
+                FI(r, p, *time_slices[col], i, t, v, o)
+                for (r, p, i, t, v, o), col in zip(
+                    (var.keys[row] for row in rows.tolist()), cols.tolist()
+                )
+            ]
+            return fis, flows[rows, cols], rows
+
         # basic annual flows
-        for r, p, i, t, v, o in M.V_FlowOutAnnual:
-            for s in M.time_season:
-                for d in M.time_of_day:
-                    fi = FI(r, p, s, d, i, t, v, o)
-                    flow = value(M.V_FlowOutAnnual[r, p, i, t, v, o]) * value(M.SegFrac[s, d])
-                    if abs(flow) < self.epsilon:
-                        continue
-                    res[fi][FlowType.OUT] = flow
-                    res[fi][FlowType.IN] = flow / value(M.Efficiency[ritvo(fi)])
-                    res[fi][FlowType.LOST] = (1 - value(M.Efficiency[ritvo(fi)])) * res[fi][
-                        FlowType.IN
-                    ]
+        annual = snapshot.flow_out_annual
+        fis, flows, rows = expand(annual)
+        eff = efficiency(annual.keys, 0, 2, 3, 4, 5)[rows]
+        flows_in = flows / eff
+        losses = (1 - eff) * flows_in
+        for fi, flow, flow_in, loss in zip(
+            fis, flows.tolist(), flows_in.tolist(), losses.tolist()
+        ):
+            entry = res[fi]
+            entry[FlowType.OUT] = flow
+            entry[FlowType.IN] = flow_in
+            entry[FlowType.LOST] = loss
 
         # flex annual
-        for r, p, i, t, v, o in M.V_FlexAnnual:
-            for s in M.time_season:
-                for d in M.time_of_day:
-                    fi = FI(r, p, s, d, i, t, v, o)
-                    flow = value(M.V_FlexAnnual[fi]) * value(M.SegFrac[s, d])
-                    if abs(flow) < self.epsilon:
-                        continue
-                    res[fi][FlowType.FLEX] = flow
-                    res[fi][FlowType.OUT] -= flow
+        fis, flows, _ = expand(snapshot.flex_annual)
+        for fi, flow in zip(fis, flows.tolist()):
+            entry = res[fi]
+            entry[FlowType.FLEX] = flow
+            entry[FlowType.OUT] -= flow
 
         return res
 
@@ -469,13 +648,24 @@ class TableWriter:
         )
         return model_ic, undiscounted_cost
 
-    def write_costs(self, M: TemoaModel, emission_entries=None):
+    def write_costs(
+        self,
+        M: TemoaModel,
+        emission_entries=None,
+        snapshot: ResultSnapshot | None = None,
+        p_e: int | None = None,
+    ):
         """
         Gather the cost data vars
         :param emission_entries: cost dictionary for emissions
         :param M: the Temoa Model
+        :param snapshot: the variable values, taken from M if not provided
+        :param p_e: the end of the horizon of the loan costs, the last period of time_future if not
+        provided
         :return: dictionary of results of format variable name -> {idx: value}
         """
+        if snapshot is None:
+            snapshot = ResultSnapshot.take(M)
 
         # P_0 is usually the first optimization year, but if running myopic, we could assign it via
         # table entry.  Perhaps in future it is just always the first optimization year of the 1st iter.
@@ -484,19 +674,26 @@ class TableWriter:
         else:
             p_0 = min(M.time_optimize)
         # NOTE:  The end period in myopic mode is specific to the window / MyopicIndex
-        #        the time_future set is specific to the window
-        p_e = M.time_future.last()
+        #        the time_future set is specific to the window, unless the model is of the whole
+        #        horizon, when it is passed in
+        if p_e is None:
+            p_e = M.time_future.last()
 
         # conveniences...
         GDR = value(M.GlobalDiscountRate)
         MPL = M.ModelProcessLife
         LLN = M.LoanLifetimeProcess
+        new_capacity = snapshot.new_capacity.as_dict()
+        capacity = snapshot.capacity.as_dict()
+        # activity by (r, p, t, v).  Annual techs only have annual flows and vice versa
+        activity_by_process = snapshot.flow_out.totals((0, 1, 5, 6))
+        activity_by_process.update(snapshot.flow_out_annual.totals((0, 1, 3, 4)))
 
         exchange_costs = ExchangeTechCostLedger(M)
         entries = defaultdict(dict)
         for r, t, v in M.CostInvest.sparse_iterkeys():  # Returns only non-zero values
             # gather details...
-            cap = value(M.V_NewCapacity[r, t, v])
+            cap = new_capacity[r, t, v]
             if abs(cap) < self.epsilon:
                 continue
             loan_life = value(LLN[r, t, v])
@@ -538,7 +735,7 @@ class TableWriter:
                 )
 
         for r, p, t, v in M.CostFixed.sparse_iterkeys():
-            cap = value(M.V_Capacity[r, p, t, v])
+            cap = capacity[r, p, t, v]
             if abs(cap) < self.epsilon:
                 continue
 
@@ -571,20 +768,7 @@ class TableWriter:
                 )
 
         for r, p, t, v in M.CostVariable.sparse_iterkeys():
-            if t not in M.tech_annual:
-                activity = sum(
-                    value(M.V_FlowOut[r, p, S_s, S_d, S_i, t, v, S_o])
-                    for S_i in M.processInputs[r, p, t, v]
-                    for S_o in M.ProcessOutputsByInput[r, p, t, v, S_i]
-                    for S_s in M.time_season
-                    for S_d in M.time_of_day
-                )
-            else:
-                activity = sum(
-                    value(M.V_FlowOutAnnual[r, p, S_i, t, v, S_o])
-                    for S_i in M.processInputs[r, p, t, v]
-                    for S_o in M.ProcessOutputsByInput[r, p, t, v, S_i]
-                )
+            activity = activity_by_process.get((r, p, t, v), 0.0)
             if abs(activity) < self.epsilon:
                 continue
 
@@ -623,8 +807,12 @@ class TableWriter:
         self._write_cost_rows(entries)
         self._write_cost_rows(exchange_costs.get_entries())
 
-    def _gather_emission_costs_and_flows(self, M: 'TemoaModel'):
+    def _gather_emission_costs_and_flows(
+        self, M: 'TemoaModel', snapshot: ResultSnapshot | None = None
+    ):
         """there are 5 'flavors' of emission costs.  So, we need to gather the base and then decide on each"""
+        if snapshot is None:
+            snapshot = ResultSnapshot.take(M)
         GDR = value(M.GlobalDiscountRate)
         MPL = M.ModelProcessLife
         if self.config.scenario_mode == TemoaMode.MYOPIC:
@@ -639,25 +827,16 @@ class TableWriter:
             if (r, p, t, v) in M.processInputs
         ]
 
-        # The "base set" can be expanded now to cover normal/annual indexing sets
-        normal = [
-            (r, p, e, s, d, i, t, v, o)
-            for (r, p, e, i, t, v, o) in base
-            for s in M.time_season
-            for d in M.time_of_day
-            if t not in M.tech_annual
-        ]
-        annual = [(r, p, e, i, t, v, o) for (r, p, e, i, t, v, o) in base if t in M.tech_annual]
+        # the flows of the time-sliced techs are totalled over the time slices to match the
+        # (r, p, i, t, v, o) indexing of the annual flows
+        activity = snapshot.flow_out.totals((0, 1, 4, 5, 6, 7))
+        activity.update(snapshot.flow_out_annual.as_dict())
 
         flows: dict[EI, float] = defaultdict(float)
-        # iterate through the normal and annual and accumulate flow values
-        for r, p, e, s, d, i, t, v, o in normal:
-            flows[EI(r, p, t, v, e)] += (
-                value(M.V_FlowOut[r, p, s, d, i, t, v, o]) * M.EmissionActivity[r, e, i, t, v, o]
-            )
-        for r, p, e, i, t, v, o in annual:
-            flows[EI(r, p, t, v, e)] += (
-                value(M.V_FlowOutAnnual[r, p, i, t, v, o]) * M.EmissionActivity[r, e, i, t, v, o]
+        # accumulate the emissions from the activity of each process
+        for r, p, e, i, t, v, o in base:
+            flows[EI(r, p, t, v, e)] += activity.get((r, p, i, t, v, o), 0.0) * value(
+                M.EmissionActivity[r, e, i, t, v, o]
             )
 
         # gather costs
@@ -717,19 +896,25 @@ class TableWriter:
         # let's be kind and sort by something reasonable (r, v, t, p)
         rows.sort(key=lambda r: (r[1], r[4], r[3], r[2]))
         # TODO:  maybe extract this to a pure writing function...we shall see
-        cur = self.con.cursor()
-        qry = 'INSERT INTO OutputCost VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
-        cur.executemany(qry, rows)
-        self.con.commit()
+        self._insert('OutputCost', rows)
+        self._commit()
 
     def write_dual_variables(self, results: SolverResults):
         """Write the dual variables to the OutputCost table"""
         # collect the values
         constraint_data = results['Solution'].Constraint.items()
         dual_data = [(self.config.scenario, t[0], t[1]['Dual']) for t in constraint_data]
-        qry = 'INSERT INTO OutputDualVariable VALUES (?, ?, ?)'
-        self.con.executemany(qry, dual_data)
-        self.con.commit()
+        self._insert('OutputDualVariable', dual_data)
+        self._commit()
+
+    def write_dual_values(self, solution: 'MatrixSolution') -> None:
+        """Write the duals of a solve in matrix form to the OutputDualVariable table"""
+        names = (component_name(family, index) for family, index in solution.matrix.row_keys)
+        dual_data = [
+            (self.config.scenario, name, dual) for name, dual in zip(names, solution.duals.tolist())
+        ]
+        self._insert('OutputDualVariable', dual_data)
+        self._commit()
 
     def __del__(self):
         if self.con:
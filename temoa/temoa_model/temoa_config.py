@@ -54,6 +54,15 @@ class TemoaConfig:
         price_check: bool = True,
         source_trace: bool = False,
         plot_commodity_network: bool = False,
+        direct_load: bool = False,
+        data_cache: dict | None = None,
+        parallel_load: int = 0,
+        sql_filter: bool = False,
+        profile_build: bool = False,
+        matrix_build: bool = False,
+        solver_options: dict | None = None,
+        bulk_write: bool = False,
+        output_sinks: list[str] | None = None,
     ):
         self.scenario = scenario
         # capture the operating mode
@@ -110,6 +119,8 @@ class TemoaConfig:
         self.save_excel = save_excel
         self.save_duals = save_duals
         self.save_lp_file = save_lp_file
+        # options passed to the solver by name, e.g. {'time_limit': 3600} for highspy
+        self.solver_options = solver_options or {}
 
         self.mga_inputs = MGA
         self.myopic_inputs = myopic
@@ -123,6 +134,33 @@ class TemoaConfig:
                 'Both are required to produce plots.'
             )
         self.plot_commodity_network = plot_commodity_network and self.source_trace
+        # build from the loaded data dictionary, releasing each component's data as it is built
+        self.direct_load = direct_load
+        self.data_cache = data_cache
+        # number of connections used to read the database.  0 or 1 for a serial load
+        self.parallel_load = parallel_load
+        # screen the loaded data against the source trace results in SQL rather than python
+        self.sql_filter = sql_filter
+        # time and memory-sample the construction of each model component
+        self.profile_build = profile_build
+        # assemble the objective and the core constraints straight into matrix form rather than
+        # building their pyomo expressions.  Only the in-process HiGHS solve ('highspy') can solve
+        # such a model, and that solve always uses it
+        self.matrix_build = matrix_build or self.solver_name == 'highspy'
+        if (
+            self.matrix_build
+            and self.scenario_mode in {TemoaMode.PERFECT_FORESIGHT, TemoaMode.MYOPIC}
+            and self.solver_name != 'highspy'
+        ):
+            raise ValueError("The matrix build requires solver_name = 'highspy'")
+        # group the writes of the output tables into one tuned transaction per run (or window)
+        self.bulk_write = bulk_write
+        # destinations for the output tables:  'sqlite' (the output database) and/or 'parquet'
+        # (the parquet sink needs the optional pyarrow package)
+        self.output_sinks = output_sinks if output_sinks else ['sqlite']
+        if self.scenario_mode == TemoaMode.MYOPIC and 'sqlite' not in self.output_sinks:
+            # the myopic sequencer reads the capacity results of prior windows from the database
+            raise ValueError('Myopic mode requires the sqlite output sink')
 
         # warn if output db != input db
         if self.input_database.suffix == self.output_database.suffix:  # they are both .db/.sqlite
@@ -219,15 +257,24 @@ class TemoaConfig:
         msg += '{:>{}s}: {}\n'.format('Price check', width, self.price_check)
         msg += '{:>{}s}: {}\n'.format('Source trace', width, self.source_trace)
         msg += '{:>{}s}: {}\n'.format('Commodity network plots', width, self.plot_commodity_network)
+        msg += '{:>{}s}: {}\n'.format('Direct data load', width, self.direct_load)
+        msg += '{:>{}s}: {}\n'.format('Data cache', width, self.data_cache)
+        msg += '{:>{}s}: {}\n'.format('Parallel load connections', width, self.parallel_load)
+        msg += '{:>{}s}: {}\n'.format('Filter data in SQL', width, self.sql_filter)
+        msg += '{:>{}s}: {}\n'.format('Profile model build', width, self.profile_build)
+        msg += '{:>{}s}: {}\n'.format('Matrix build', width, self.matrix_build)
 
         msg += spacer
         msg += '{:>{}s}: {}\n'.format('Selected solver', width, self.solver_name)
         msg += '{:>{}s}: {}\n'.format('NEOS status', width, self.neos)
+        msg += '{:>{}s}: {}\n'.format('Solver options', width, self.solver_options)
 
         msg += spacer
         msg += '{:>{}s}: {}\n'.format('Spreadsheet output', width, self.save_excel)
         msg += '{:>{}s}: {}\n'.format('Pyomo LP write status', width, self.save_lp_file)
         msg += '{:>{}s}: {}\n'.format('Save duals to output db', width, self.save_duals)
+        msg += '{:>{}s}: {}\n'.format('Bulk output writes', width, self.bulk_write)
+        msg += '{:>{}s}: {}\n'.format('Output sinks', width, ', '.join(self.output_sinks))
 
         # TODO:  conditionally add in the mode options
 
@@ -239,6 +286,48 @@ class TemoaConfig:
             msg += '{:>{}s}: {}\n'.format(
                 'Myopic step size', width, self.myopic_inputs.get('step_size')
             )
+            msg += '{:>{}s}: {}\n'.format(
+                'Myopic incremental load', width, self.myopic_inputs.get('incremental_load', True)
+            )
+            msg += '{:>{}s}: {}\n'.format(
+                'Myopic pipelined writes', width, self.myopic_inputs.get('pipelined_writes', False)
+            )
+            msg += '{:>{}s}: {}\n'.format(
+                'Myopic persistent instance',
+                width,
+                self.myopic_inputs.get('persistent_instance', False),
+            )
+            msg += '{:>{}s}: {}, interval {}, free fraction {}\n'.format(
+                'Myopic compaction',
+                width,
+                self.myopic_inputs.get('compaction', 'full'),
+                self.myopic_inputs.get('compaction_interval', 1),
+                self.myopic_inputs.get('compaction_free_fraction', 0.0),
+            )
+            msg += '{:>{}s}: {}, checkpoint interval {}\n'.format(
+                'Myopic in-memory db',
+                width,
+                self.myopic_inputs.get('in_memory', False),
+                self.myopic_inputs.get('checkpoint_interval', 1),
+            )
+
+        if self.scenario_mode == TemoaMode.MGA:
+            mga_inputs = self.mga_inputs or {}
+            msg += spacer
+            msg += '{:>{}s}: {}, max {}, solver threads {}, queue size {}\n'.format(
+                'MGA workers',
+                width,
+                mga_inputs.get('num_workers', 'auto'),
+                mga_inputs.get('max_workers', 'auto'),
+                mga_inputs.get('solver_threads', 'auto'),
+                mga_inputs.get('queue_size', 'auto'),
+            )
+            msg += '{:>{}s}: {}, warm start {}\n'.format(
+                'MGA persistent solver',
+                width,
+                mga_inputs.get('persistent_solver', False),
+                mga_inputs.get('warm_start', 'dual'),
+            )
 
         # msg += '{:>{}s}: {}\n'.format('Retain myopic databases', width, self.KeepMyopicDBs)
         # msg += spacer
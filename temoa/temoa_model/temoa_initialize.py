@@ -302,25 +302,6 @@ def get_default_process_lifetime(M: 'TemoaModel', r, t, v):
     return M.LifetimeTech[r, t]
 
 
-def get_default_capacity_factor(M: 'TemoaModel', r, s, d, t, v):
-    """
-    This initializer is used to fill the CapacityFactorProcess from the CapacityFactorTech where needed.
-
-    Priority:
-        1.  As specified in data input (this function not called)
-        2.  Here
-        3.  The default from CapacityFactorTech param
-    :param M: generic model reference
-    :param r: region
-    :param s: season
-    :param d: time-of-day slice
-    :param t: tech
-    :param v: vintage
-    :return: the capacity factor
-    """
-    return M.CapacityFactorTech[r, s, d, t]
-
-
 def get_default_loan_rate(M, *_):
     """get the default loan rate from the DefaultLoanRate param"""
     return M.DefaultLoanRate()
@@ -559,21 +540,40 @@ def CreateSparseDicts(M: 'TemoaModel'):
     This function creates customized dictionaries with only the key / value pairs
     defined in the associated datafile. The dictionaries defined here are used to
     do the sparse matrix indexing for all parameters, variables, and constraints
-    in the model. The function works by looping over the sparse indices in the
-    Efficiency table. For each iteration of the loop, the appropriate key / value
-    pairs are defined as appropriate for each dictionary.
+    in the model. The function works by screening the sparse indices in the
+    Efficiency table and then filling the dictionaries in grouped passes over the
+    active (r, p, i, t, v, o) combinations.
+
+    The keys of the sparse params and the technology subsets used in the membership
+    tests are gathered into hash sets once, up front, so that each test is O(1)
+    regardless of the size of the model.
     """
     l_first_period = min(M.time_future)
-    l_exist_indices = M.ExistingCapacity.sparse_keys()
+    l_exist_indices = set(M.ExistingCapacity.sparse_keys())
     l_used_techs = set()
 
+    # hash indexes for the membership tests below
+    input_split_keys = set(M.TechInputSplit.sparse_keys())
+    input_split_average_keys = set(M.TechInputSplitAverage.sparse_keys())
+    output_split_keys = set(M.TechOutputSplit.sparse_keys())
+    output_split_average_keys = set(M.TechOutputSplitAverage.sparse_keys())
+    tech_exchange = set(M.tech_exchange)
+    tech_uncap = set(M.tech_uncap)
+    tech_flex = set(M.tech_flex)
+    tech_annual = set(M.tech_annual)
+    vintage_exist = set(M.vintage_exist)
+    periods = list(M.time_optimize)
+
     # The basis for the dictionaries are the sparse keys defined in the
     # Efficiency table.
     logger.debug(
         'Starting creation of SparseDicts with Efficiency table size: %d', len(M.Efficiency)
     )
-    for r, i, t, v, o in M.Efficiency.sparse_iterkeys():
-        if '-' in r and t not in M.tech_exchange:
+    # 1.  screen the Efficiency entries and gather the active (r, p, i, t, v, o) combinations,
+    #     in Efficiency order and then period order
+    active_flows = []
+    for r, i, t, v, o in M.Efficiency.sparse_keys():
+        if '-' in r and t not in tech_exchange:
             msg = (
                 f'Technology {t} seems to be an exchange technology '
                 f'but it is not specified in tech_exchange set'
@@ -584,15 +584,15 @@ def CreateSparseDicts(M: 'TemoaModel'):
         l_lifetime = value(M.LifetimeProcess[l_process])
         # Do some error checking for the user.
         # TODO:  Marker for the section that is culling out vintages that are in time_exist, but with no capacity...
-        if v in M.vintage_exist:
-            if l_process not in l_exist_indices and t not in M.tech_uncap:
+        if v in vintage_exist:
+            if l_process not in l_exist_indices and t not in tech_uncap:
                 msg = (
                     'Warning: %s has a specified Efficiency, but does not '
                     'have any existing install base (ExistingCapacity).\n'
                 )
                 SE.write(msg % str(l_process))
                 continue
-            if t not in M.tech_uncap and M.ExistingCapacity[l_process] == 0:
+            if t not in tech_uncap and M.ExistingCapacity[l_process] == 0:
                 msg = (
                     'Notice: Unnecessary specification of ExistingCapacity '
                     '%s.  If specifying a capacity of zero, you may simply '
@@ -626,158 +626,96 @@ def CreateSparseDicts(M: 'TemoaModel'):
 
         l_used_techs.add(t)
 
-        if t in M.tech_flex:
+        if t in tech_flex:
             M.flex_commodities.add(o)
 
         # Add in the period (p) index, since it's not included in the efficiency
-        # table.
-        for p in M.time_optimize:
-            # Can't build a vintage before it's been invented
-            if p < v:
-                continue
-
-            pindex = (r, p, t, v)
-
-            # dev note:  this gathering of processLoans appears to be unused in any meaningful way
-            #            it is just plucked later for (r, t, v) combos which aren't needed anyhow.
-            # if v in M.time_optimize:
-            #     l_loan_life = value(M.LoanLifetimeProcess[l_process])
-            #     if v + l_loan_life >= p:
-            #         M.processLoans[pindex] = True
-
-            # if tech is no longer active, don't include it
-            if v + l_lifetime <= p:
-                continue
-
-            # Here we utilize the indices in a given iteration of the loop to
-            # create the dictionary keys, and initialize the associated values
-            # to an empty set.
-            if pindex not in M.processInputs:
-                M.processInputs[pindex] = set()
-                M.processOutputs[pindex] = set()
-            if (r, p, i) not in M.commodityDStreamProcess:
-                M.commodityDStreamProcess[r, p, i] = set()
-            if (r, p, o) not in M.commodityUStreamProcess:
-                M.commodityUStreamProcess[r, p, o] = set()
-            if (r, p, t, v, i) not in M.ProcessOutputsByInput:
-                M.ProcessOutputsByInput[r, p, t, v, i] = set()
-            if (r, p, t, v, o) not in M.ProcessInputsByOutput:
-                M.ProcessInputsByOutput[r, p, t, v, o] = set()
-            if (r, t) not in M.processTechs:
-                M.processTechs[r, t] = set()
-            # While the dictionary just above identifies the vintage (v)
-            # associated with each (r,p,t) we need to do the same below for various
-            # technology subsets.
-            if (r, p, t) not in M.processVintages:
-                M.processVintages[r, p, t] = set()
-            if t in M.tech_curtailment and (r, p, t) not in M.curtailmentVintages:
-                M.curtailmentVintages[r, p, t] = set()
-            if t in M.tech_baseload and (r, p, t) not in M.baseloadVintages:
-                M.baseloadVintages[r, p, t] = set()
-            if t in M.tech_storage and (r, p, t) not in M.storageVintages:
-                M.storageVintages[r, p, t] = set()
-            if t in M.tech_ramping and (r, p, t) not in M.rampVintages:
-                M.rampVintages[r, p, t] = set()
-            if (r, p, i, t) in M.TechInputSplit.sparse_iterkeys() and (
-                r,
-                p,
-                i,
-                t,
-            ) not in M.inputsplitVintages:
-                M.inputsplitVintages[r, p, i, t] = set()
-            if (r, p, i, t) in M.TechInputSplitAverage.sparse_iterkeys() and (
-                r,
-                p,
-                i,
-                t,
-            ) not in M.inputsplitaverageVintages:
-                M.inputsplitaverageVintages[r, p, i, t] = set()
-            if (r, p, t, o) in M.TechOutputSplit.sparse_iterkeys() and (
-                r,
-                p,
-                t,
-                o,
-            ) not in M.outputsplitVintages:
-                M.outputsplitVintages[r, p, t, o] = set()
-            if (r, p, t, o) in M.TechOutputSplitAverage.sparse_iterkeys() and (
-                r,
-                p,
-                t,
-                o,
-            ) not in M.outputsplitaverageVintages:
-                M.outputsplitaverageVintages[r, p, t, o] = set()
-            if t in M.tech_resource and (r, p, o) not in M.ProcessByPeriodAndOutput:
-                M.ProcessByPeriodAndOutput[r, p, o] = set()
-            if t in M.tech_reserve and (r, p) not in M.processReservePeriods:
-                M.processReservePeriods[r, p] = set()
-            # TODO:  This construct is goofy.  Using regex to split a string.  Perhaps consider a
-            #  SQL query to a table that has exchange members by tech (future growth?)
-
-            # since t is in M.tech_exchange, r here has *-* format (e.g. 'US-Mexico').  # r[
-            # :r.find("-")] extracts the region index before the "-".
-            if t in M.tech_exchange and (r[: r.find('-')], p, i) not in M.exportRegions:
-                M.exportRegions[r[: r.find('-')], p, i] = set()
-            if t in M.tech_exchange and (r[r.find('-') + 1 :], p, o) not in M.importRegions:
-                M.importRegions[r[r.find('-') + 1 :], p, o] = set()
-
-            # Now that all of the keys have been defined, and values initialized
-            # to empty sets, we fill in the appropriate values for each
-            # dictionary.
-            M.processInputs[pindex].add(i)
-            M.processOutputs[pindex].add(o)
-            M.commodityDStreamProcess[r, p, i].add((t, v))
-            M.commodityUStreamProcess[r, p, o].add((t, v))
-            M.ProcessOutputsByInput[r, p, t, v, i].add(o)
-            M.ProcessInputsByOutput[r, p, t, v, o].add(i)
-            M.processTechs[r, t].add((p, v))
-            M.processVintages[r, p, t].add(v)
-            if t in M.tech_curtailment:
-                M.curtailmentVintages[r, p, t].add(v)
-            if t in M.tech_baseload:
-                M.baseloadVintages[r, p, t].add(v)
-            if t in M.tech_storage:
-                M.storageVintages[r, p, t].add(v)
-            if t in M.tech_ramping:
-                M.rampVintages[r, p, t].add(v)
-            if (r, p, i, t) in M.TechInputSplit.sparse_iterkeys():
-                M.inputsplitVintages[r, p, i, t].add(v)
-            if (r, p, i, t) in M.TechInputSplitAverage.sparse_iterkeys():
-                M.inputsplitaverageVintages[r, p, i, t].add(v)
-            if (r, p, t, o) in M.TechOutputSplit.sparse_iterkeys():
-                M.outputsplitVintages[r, p, t, o].add(v)
-            if (r, p, t, o) in M.TechOutputSplitAverage.sparse_iterkeys():
-                M.outputsplitaverageVintages[r, p, t, o].add(v)
-            if t in M.tech_resource:
-                M.ProcessByPeriodAndOutput[r, p, o].add((i, t, v))
-            if t in M.tech_reserve:
-                M.processReservePeriods[r, p].add((t, v))
-            if t in M.tech_exchange:
-                M.exportRegions[r[: r.find('-')], p, i].add((r[r.find('-') + 1 :], t, v, o))
-            if t in M.tech_exchange:
-                M.importRegions[r[r.find('-') + 1 :], p, o].add((r[: r.find('-')], t, v, i))
-
-    for r, i, t, v, o in M.Efficiency.sparse_iterkeys():
-        if t in M.tech_exchange:
+        # table.  Can't build a vintage before it's been invented, and if the tech is
+        # no longer active, don't include it
+        active_flows.extend((r, p, i, t, v, o) for p in periods if v <= p < v + l_lifetime)
+
+    # 2.  fill the dictionaries.  Each is filled in the order of the active flows, so the keys are
+    #     in the same order as they would be from a single nested loop
+    for r, p, i, t, v, o in active_flows:
+        M.processInputs.setdefault((r, p, t, v), set()).add(i)
+        M.processOutputs.setdefault((r, p, t, v), set()).add(o)
+        M.commodityDStreamProcess.setdefault((r, p, i), set()).add((t, v))
+        M.commodityUStreamProcess.setdefault((r, p, o), set()).add((t, v))
+        M.ProcessOutputsByInput.setdefault((r, p, t, v, i), set()).add(o)
+        M.ProcessInputsByOutput.setdefault((r, p, t, v, o), set()).add(i)
+        M.processTechs.setdefault((r, t), set()).add((p, v))
+        M.processVintages.setdefault((r, p, t), set()).add(v)
+
+    # the vintages of the technology subsets
+    for vintages, techs in (
+        (M.curtailmentVintages, M.tech_curtailment),
+        (M.baseloadVintages, M.tech_baseload),
+        (M.storageVintages, M.tech_storage),
+        (M.rampVintages, M.tech_ramping),
+    ):
+        techs = set(techs)
+        for r, p, i, t, v, o in active_flows:
+            if t in techs:
+                vintages.setdefault((r, p, t), set()).add(v)
+
+    # the vintages of the split params
+    for vintages, keys, key_getter in (
+        (M.inputsplitVintages, input_split_keys, iget(0, 1, 2, 3)),
+        (M.inputsplitaverageVintages, input_split_average_keys, iget(0, 1, 2, 3)),
+        (M.outputsplitVintages, output_split_keys, iget(0, 1, 3, 5)),
+        (M.outputsplitaverageVintages, output_split_average_keys, iget(0, 1, 3, 5)),
+    ):
+        if not keys:
+            continue
+        for flow in active_flows:
+            key = key_getter(flow)  # (r, p, i, t) or (r, p, t, o)
+            if key in keys:
+                vintages.setdefault(key, set()).add(flow[4])
+
+    tech_resource = set(M.tech_resource)
+    tech_reserve = set(M.tech_reserve)
+    for r, p, i, t, v, o in active_flows:
+        if t in tech_resource:
+            M.ProcessByPeriodAndOutput.setdefault((r, p, o), set()).add((i, t, v))
+        if t in tech_reserve:
+            M.processReservePeriods.setdefault((r, p), set()).add((t, v))
+        # TODO:  This construct is goofy.  Using regex to split a string.  Perhaps consider a
+        #  SQL query to a table that has exchange members by tech (future growth?)
+
+        # since t is in M.tech_exchange, r here has *-* format (e.g. 'US-Mexico').  # r[
+        # :r.find("-")] extracts the region index before the "-".
+        if t in tech_exchange:
+            sep = r.find('-')
+            M.exportRegions.setdefault((r[:sep], p, i), set()).add((r[sep + 1 :], t, v, o))
+            M.importRegions.setdefault((r[sep + 1 :], p, o), set()).add((r[:sep], t, v, i))
+
+    # check that the commodities delivered by exchange techs have a downstream process in the
+    # exporting region.  The efficiency entries are indexed by (region, output) to find the
+    # processes that produce the exchanged commodity
+    producers = defaultdict(list)
+    for r, i, t, v, o in M.Efficiency.sparse_keys():
+        producers[r, o].append(t)
+    for r, i, t, v, o in M.Efficiency.sparse_keys():
+        if t in tech_exchange:
             reg = r.split('-')[0]
-            for r1, i1, t1, v1, o1 in M.Efficiency.sparse_iterkeys():
-                if (r1 == reg) & (o1 == i):
-                    for p in M.time_optimize:
-                        if p >= v and (r1, p, o1) not in M.commodityDStreamProcess:
-                            msg = (
-                                'The {} process in region {} has no downstream process other '
-                                'than a transport ({}) process. This will cause the commodity '
-                                'balance constraint to fail. Add a dummy technology downstream '
-                                'of the {} process to the Efficiency table to avoid this '
-                                'issue.  The dummy technology should have the same region and '
-                                'vintage as the {} process, an efficiency of 100%, with the {} '
-                                'commodity as the input and output.'
-                                'The dummy technology may also need a corresponding row in the '
-                                'ExistingCapacity table with capacity values that equal the {} '
-                                'technology.'
-                            )
-                            f_msg = msg.format(t1, r1, t, t1, t1, o1, t1)
-                            logger.error(f_msg)
-                            raise ValueError(f_msg)
+            for t1 in producers.get((reg, i), ()):
+                for p in periods:
+                    if p >= v and (reg, p, i) not in M.commodityDStreamProcess:
+                        msg = (
+                            'The {} process in region {} has no downstream process other '
+                            'than a transport ({}) process. This will cause the commodity '
+                            'balance constraint to fail. Add a dummy technology downstream '
+                            'of the {} process to the Efficiency table to avoid this '
+                            'issue.  The dummy technology should have the same region and '
+                            'vintage as the {} process, an efficiency of 100%, with the {} '
+                            'commodity as the input and output.'
+                            'The dummy technology may also need a corresponding row in the '
+                            'ExistingCapacity table with capacity values that equal the {} '
+                            'technology.'
+                        )
+                        f_msg = msg.format(t1, reg, t, t1, t1, i, t1)
+                        logger.error(f_msg)
+                        raise ValueError(f_msg)
 
     l_unused_techs = M.tech_all - l_used_techs
     if l_unused_techs:
@@ -788,56 +726,45 @@ def CreateSparseDicts(M: 'TemoaModel'):
         for i in sorted(l_unused_techs):
             SE.write(msg.format(i))
 
-    M.activeFlow_rpsditvo = set(
-        (r, p, s, d, i, t, v, o)
-        for r, p, t in M.processVintages.keys()
-        if t not in M.tech_annual
-        for v in M.processVintages[r, p, t]
-        for i in M.processInputs[r, p, t, v]
-        for o in M.ProcessOutputsByInput[r, p, t, v, i]
-        for s in M.time_season
-        for d in M.time_of_day
-    )
-
-    M.activeFlow_rpitvo = set(
-        (r, p, i, t, v, o)
-        for r, p, t in M.processVintages.keys()
-        if t in M.tech_annual
-        for v in M.processVintages[r, p, t]
-        for i in M.processInputs[r, p, t, v]
-        for o in M.ProcessOutputsByInput[r, p, t, v, i]
-    )
-
-    M.activeFlex_rpsditvo = set(
-        (r, p, s, d, i, t, v, o)
-        for r, p, t in M.processVintages.keys()
-        if (t not in M.tech_annual) and (t in M.tech_flex)
-        for v in M.processVintages[r, p, t]
-        for i in M.processInputs[r, p, t, v]
-        for o in M.ProcessOutputsByInput[r, p, t, v, i]
-        for s in M.time_season
-        for d in M.time_of_day
-    )
-
-    M.activeFlex_rpitvo = set(
-        (r, p, i, t, v, o)
-        for r, p, t in M.processVintages.keys()
-        if (t in M.tech_annual) and (t in M.tech_flex)
-        for v in M.processVintages[r, p, t]
-        for i in M.processInputs[r, p, t, v]
-        for o in M.ProcessOutputsByInput[r, p, t, v, i]
-    )
-
-    M.activeFlowInStorage_rpsditvo = set(
-        (r, p, s, d, i, t, v, o)
-        for r, p, t in M.processVintages.keys()
-        if t in M.tech_storage
-        for v in M.processVintages[r, p, t]
-        for i in M.processInputs[r, p, t, v]
-        for o in M.ProcessOutputsByInput[r, p, t, v, i]
-        for s in M.time_season
-        for d in M.time_of_day
-    )
+    # 3.  make the active index sets in one pass over the process vintages
+    time_slices = list(cross_product(M.time_season, M.time_of_day))
+    tech_storage = set(M.tech_storage)
+    M.activeFlow_rpsditvo = set()
+    M.activeFlow_rpitvo = set()
+    M.activeFlex_rpsditvo = set()
+    M.activeFlex_rpitvo = set()
+    M.activeFlowInStorage_rpsditvo = set()
+    M.activeActivity_rptv = set()
+    M.activeCapacity_rtv = set()
+    M.activeCapacityAvailable_rpt = set()
+    M.activeCapacityAvailable_rptv = set()
+    for (r, p, t), vintages in M.processVintages.items():
+        annual = t in tech_annual
+        flex = t in tech_flex
+        storage = t in tech_storage
+        has_capacity = t not in tech_uncap
+        if vintages and has_capacity:
+            M.activeCapacityAvailable_rpt.add((r, p, t))
+        for v in vintages:
+            M.activeActivity_rptv.add((r, p, t, v))
+            if has_capacity:
+                M.activeCapacity_rtv.add((r, t, v))
+                # TODO:  Look into combining this set, it MAY be same as CapacityByPeriodAndTech index
+                M.activeCapacityAvailable_rptv.add((r, p, t, v))
+            for i in M.processInputs[r, p, t, v]:
+                for o in M.ProcessOutputsByInput[r, p, t, v, i]:
+                    if annual:
+                        M.activeFlow_rpitvo.add((r, p, i, t, v, o))
+                        if flex:
+                            M.activeFlex_rpitvo.add((r, p, i, t, v, o))
+                    if not annual or storage:
+                        flows = [(r, p, s, d, i, t, v, o) for s, d in time_slices]
+                        if not annual:
+                            M.activeFlow_rpsditvo.update(flows)
+                            if flex:
+                                M.activeFlex_rpsditvo.update(flows)
+                        if storage:
+                            M.activeFlowInStorage_rpsditvo.update(flows)
 
     M.activeCurtailment_rpsditvo = set(
         (r, p, s, d, i, t, v, o)
@@ -845,39 +772,13 @@ def CreateSparseDicts(M: 'TemoaModel'):
         for v in M.curtailmentVintages[r, p, t]
         for i in M.processInputs[r, p, t, v]
         for o in M.ProcessOutputsByInput[r, p, t, v, i]
-        for s in M.time_season
-        for d in M.time_of_day
-    )
-
-    M.activeActivity_rptv = set(
-        (r, p, t, v) for r, p, t in M.processVintages.keys() for v in M.processVintages[r, p, t]
+        for s, d in time_slices
     )
 
     M.activeRegionsForTech = defaultdict(set)
     for r, p, t, v in M.activeActivity_rptv:
         M.activeRegionsForTech[p, t].add(r)
 
-    M.activeCapacity_rtv = set(
-        (r, t, v)
-        for r, p, t in M.processVintages.keys()
-        for v in M.processVintages[r, p, t]
-        if t not in M.tech_uncap
-    )
-
-    M.activeCapacityAvailable_rpt = set(
-        (r, p, t)
-        for r, p, t in M.processVintages.keys()
-        if M.processVintages[r, p, t]
-        if t not in M.tech_uncap
-    )
-
-    # TODO:  Look into combining this set, it MAY be same as CapacityByPeriodAndTech index
-    M.activeCapacityAvailable_rptv = set(
-        (r, p, t, v)
-        for r, p, t in M.processVintages.keys()
-        for v in M.processVintages[r, p, t]
-        if t not in M.tech_uncap
-    )
     logger.debug('Completed creation of SparseDicts')
 
 
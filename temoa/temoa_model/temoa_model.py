@@ -40,6 +40,9 @@ from temoa.temoa_model.model_checking.validators import (
     region_group_check,
     validate_Efficiency,
     check_flex_curtail,
+    validate_tech_input_split,
+    validate_tech_output_split,
+    validate_CapacityCredit,
 )
 from temoa.temoa_model.temoa_initialize import *
 from temoa.temoa_model.temoa_initialize import get_loan_life
@@ -239,12 +242,13 @@ class TemoaModel(AbstractModel):
         #     Any, Any, Any, Any, Any,
         #     within=NonNegativeReals, validate=validate_Efficiency
         # )
+        # Dev note:  the large params below are indexed by sparse sets of the loaded keys rather
+        #            than by the (very large) cross products of their domains.  The sets are
+        #            declared by dimension only, as checking each key against a product set is
+        #            slow, so the domains are checked by the param validators.
+        M.Efficiency_ritvo = Set(dimen=5)
         M.Efficiency = Param(
-            M.RegionalIndices,
-            M.commodity_physical,
-            M.tech_all,
-            M.vintage_all,
-            M.commodity_carrier,
+            M.Efficiency_ritvo,
             within=NonNegativeReals,
             validate=validate_Efficiency,
         )
@@ -254,16 +258,11 @@ class TemoaModel(AbstractModel):
         M.CapacityFactor_rsdt = Set(dimen=4, initialize=CapacityFactorTechIndices)
         M.CapacityFactorTech = Param(M.CapacityFactor_rsdt, default=1)
 
-        # Dev note:  using a default function below alleviates need to make this set.
-        # M.CapacityFactor_rsdtv = Set(dimen=5, initialize=CapacityFactorProcessIndices)
+        # processes without a CapacityFactorProcess entry use the CapacityFactorTech
+        M.CapacityFactorProcess_rsdtv = Set(dimen=5)
         M.CapacityFactorProcess = Param(
-            M.regions,
-            M.time_season,
-            M.time_of_day,
-            M.tech_with_capacity,
-            M.vintage_all,
+            M.CapacityFactorProcess_rsdtv,
             validate=validate_CapacityFactorProcess,
-            default=get_default_capacity_factor,
         )
 
         # M.initialize_CapacityFactors = BuildAction(rule=CreateCapacityFactors)
@@ -284,10 +283,18 @@ class TemoaModel(AbstractModel):
 
         M.LoanLifetimeProcess = Param(M.LoanLifetimeProcess_rtv, default=get_loan_life)
 
-        M.TechInputSplit = Param(M.regions, M.time_optimize, M.commodity_physical, M.tech_all)
-        M.TechInputSplitAverage = Param(M.regions, M.time_optimize, M.commodity_physical, M.tech_all)
-        M.TechOutputSplit = Param(M.regions, M.time_optimize, M.tech_all, M.commodity_carrier)
-        M.TechOutputSplitAverage = Param(M.regions, M.time_optimize, M.tech_all, M.commodity_carrier)
+        M.TechInputSplit_rpit = Set(dimen=4)
+        M.TechInputSplit = Param(M.TechInputSplit_rpit, validate=validate_tech_input_split)
+        M.TechInputSplitAverage_rpit = Set(dimen=4)
+        M.TechInputSplitAverage = Param(
+            M.TechInputSplitAverage_rpit, validate=validate_tech_input_split
+        )
+        M.TechOutputSplit_rpto = Set(dimen=4)
+        M.TechOutputSplit = Param(M.TechOutputSplit_rpto, validate=validate_tech_output_split)
+        M.TechOutputSplitAverage_rpto = Set(dimen=4)
+        M.TechOutputSplitAverage = Param(
+            M.TechOutputSplitAverage_rpto, validate=validate_tech_output_split
+        )
 
         M.RenewablePortfolioStandardConstraint_rpg = Set(
             within=M.regions * M.time_optimize * M.tech_group_names
@@ -446,9 +453,9 @@ class TemoaModel(AbstractModel):
         # Define parameters associated with electric sector operation
         M.RampUp = Param(M.regions, M.tech_ramping)
         M.RampDown = Param(M.regions, M.tech_ramping)
-        M.CapacityCredit = Param(
-            M.RegionalIndices, M.time_optimize, M.tech_all, M.vintage_all, default=0
-        )
+        # processes without a CapacityCredit entry have no credit (see ReserveMargin_Constraint)
+        M.CapacityCredit_rptv = Set(dimen=4)
+        M.CapacityCredit = Param(M.CapacityCredit_rptv, validate=validate_CapacityCredit)
         M.PlanningReserveMargin = Param(M.regions, default=0.2)
         # Storage duration is expressed in hours
         M.StorageDuration = Param(M.regions, M.tech_storage, default=4)
@@ -453,9 +453,17 @@ def fixed_or_variable_cost(
     return res
 
 
-def PeriodCost_rule(M: 'TemoaModel', p):
+def PeriodCost_rule(M: 'TemoaModel', p, P_e=None):
+    """
+    The discounted costs of a period
+    :param M: the model
+    :param p: the period
+    :param P_e: the end point of the horizon of the loan costs, the last period of time_future if
+    not provided (a myopic window of a model of the whole horizon ends before it)
+    """
     P_0 = min(M.time_optimize)
-    P_e = M.time_future.last()  # End point of modeled horizon
+    if P_e is None:
+        P_e = M.time_future.last()  # End point of modeled horizon
     GDR = value(M.GlobalDiscountRate)
     MPL = M.ModelProcessLife
 
@@ -1782,7 +1790,7 @@ we write this equation for all the time-slices defined in the database in each r
         return Constraint.Skip
 
     cap_avail = sum(
-        value(M.CapacityCredit[r, p, t, v])
+        (value(M.CapacityCredit[r, p, t, v]) if (r, p, t, v) in M.CapacityCredit else 0)
         * M.ProcessLifeFrac[r, p, t, v]
         * M.V_Capacity[r, p, t, v]
         * value(M.CapacityToActivity[r, t])
@@ -1814,7 +1822,7 @@ we write this equation for all the time-slices defined in the database in each r
 
         # add the available capacity of the exchange tech.
         cap_avail += sum(
-            value(M.CapacityCredit[r1r2, p, t, v])
+            (value(M.CapacityCredit[r1r2, p, t, v]) if (r1r2, p, t, v) in M.CapacityCredit else 0)
             * M.ProcessLifeFrac[r1r2, p, t, v]
             * M.V_Capacity[r1r2, p, t, v]
             * value(M.CapacityToActivity[r1r2, t])
@@ -70,6 +70,7 @@ class TemoaSequencer:
         output_path: str | Path,
         mode_override: TemoaMode | None = None,
         silent: bool = False,
+        resume: bool = False,
         **kwargs,
     ):
         """
@@ -79,6 +80,7 @@ class TemoaSequencer:
         :param mode_override: Optional override to execution mode.  If not provided,
         it will be read from config file
         :param silent:  boolean to indicate whether to silence run-time feedback
+        :param resume: resume a myopic run from its checkpoint
         """
         self.config: TemoaConfig | None = None
         self.temoa_mode: TemoaMode
@@ -102,6 +104,7 @@ class TemoaSequencer:
 
         # for feedback to user
         self.silent = silent
+        self.resume = resume
 
         # for results catching for perfect_foresight, other modes / testing
         self.pf_results: pyomo.opt.SolverResults | None = None
@@ -155,6 +158,9 @@ class TemoaSequencer:
                 print('\n\nUser requested quit.  Exiting Temoa ...\n')
                 sys.exit()
 
+        if self.resume and self.temoa_mode != TemoaMode.MYOPIC:
+            logger.warning('Resume is only supported for myopic runs.  Ignored')
+
         # ---- Select execution path based on mode ----
         match self.temoa_mode:
             case TemoaMode.BUILD_ONLY:
@@ -169,20 +175,29 @@ class TemoaSequencer:
                     logger.info('Price check disabled for BUILD_ONLY')
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
-                instance = build_instance(data_portal, silent=self.config.silent)
+                data_portal = hybrid_loader.load_data(myopic_index=None)
+                instance = build_instance(
+                    data_portal,
+                    silent=self.config.silent,
+                    matrix=self.config.matrix_build,
+                    profile=self.config.profile_build,
+                    profile_path=self.config.output_path / 'build_profile.csv',
+                )
                 con.close()
                 return instance
 
             case TemoaMode.CHECK:
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
+                data_portal = hybrid_loader.load_data(myopic_index=None)
                 instance = build_instance(
                     data_portal,
                     silent=self.config.silent,
+                    matrix=self.config.matrix_build,
                     keep_lp_file=self.config.save_lp_file,
                     lp_path=self.config.output_path,
+                    profile=self.config.profile_build,
+                    profile_path=self.config.output_path / 'build_profile.csv',
                 )
                 # disregard what the config says about price_check and source_trace and just do it...
                 if self.config.price_check is False:
@@ -193,17 +208,23 @@ class TemoaSequencer:
             case TemoaMode.PERFECT_FORESIGHT:
                 con = sqlite3.connect(self.config.input_database)
                 hybrid_loader = HybridLoader(db_connection=con, config=self.config)
-                data_portal = hybrid_loader.load_data_portal(myopic_index=None)
+                data_portal = hybrid_loader.load_data(myopic_index=None)
                 instance = build_instance(
                     data_portal,
                     silent=self.config.silent,
+                    matrix=self.config.matrix_build,
                     keep_lp_file=self.config.save_lp_file,
                     lp_path=self.config.output_path,
+                    profile=self.config.profile_build,
+                    profile_path=self.config.output_path / 'build_profile.csv',
                 )
                 if self.config.price_check:
                     price_checker(instance)
                 self.pf_solved_instance, self.pf_results = solve_instance(
-                    instance, self.config.solver_name, silent=self.config.silent
+                    instance,
+                    self.config.solver_name,
+                    silent=self.config.silent,
+                    options=self.config.solver_options,
                 )
                 good_solve, msg = check_solve_status(self.pf_results)
                 if not good_solve:
@@ -220,7 +241,7 @@ class TemoaSequencer:
 
             case TemoaMode.MYOPIC:
                 # create a myopic sequencer and shift control to it
-                myopic_sequencer = MyopicSequencer(config=self.config)
+                myopic_sequencer = MyopicSequencer(config=self.config, resume=self.resume)
                 myopic_sequencer.start()
 
             case TemoaMode.MGA:
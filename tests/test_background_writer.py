@@ -0,0 +1,105 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from temoa.temoa_model.background_writer import BackgroundWriteError, BackgroundWriter
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = tmp_path / 'output.sqlite'
+    con = sqlite3.connect(database)
+    con.execute('CREATE TABLE OutputCost (period INTEGER, cost REAL)')
+    con.commit()
+    con.close()
+    return database
+
+
+def _insert(period: int, cost: float):
+    def task(con: sqlite3.Connection) -> None:
+        con.execute('INSERT INTO OutputCost VALUES (?, ?)', (period, cost))
+
+    return task
+
+
+def _rows(database) -> list[tuple]:
+    con = sqlite3.connect(database)
+    rows = con.execute('SELECT * FROM OutputCost').fetchall()
+    con.close()
+    return rows
+
+
+def test_tasks_in_order(database):
+    """
+    test that the tasks are run in submission order and are all committed at the flush
+    """
+    with BackgroundWriter(database, max_pending=1) as writer:
+        for period in (2020, 2025, 2030):
+            writer.submit(_insert(period, period / 10))
+        # a delete queued behind the inserts sees them
+        writer.submit(lambda con: con.execute('DELETE FROM OutputCost WHERE period > 2025'))
+        writer.flush()
+        assert _rows(database) == [(2020, 202.0), (2025, 202.5)]
+    assert writer.tasks_done == 4
+
+
+def test_error_propagation(database):
+    """
+    test that a failed task is rolled back, its error is raised in the submitting thread and the
+    tasks after it are discarded
+    """
+    main_thread = threading.current_thread()
+    ran_in = []
+
+    def bad_task(con: sqlite3.Connection) -> None:
+        ran_in.append(threading.current_thread())
+        con.execute('INSERT INTO OutputCost VALUES (1990, 1.0)')
+        con.execute('INSERT INTO NoSuchTable VALUES (1)')
+
+    writer = BackgroundWriter(database)
+    writer.submit(_insert(2020, 1.0))
+    writer.submit(bad_task)
+    writer.submit(_insert(2025, 1.0))
+    with pytest.raises(BackgroundWriteError) as exc_info:
+        writer.flush()
+    assert isinstance(exc_info.value.__cause__, sqlite3.OperationalError)
+    assert ran_in and ran_in[0] is not main_thread
+    with pytest.raises(BackgroundWriteError):
+        writer.submit(_insert(2030, 1.0))
+    writer.close(raise_errors=False)
+    assert _rows(database) == [(2020, 1.0)]
+
+
+def test_close(database):
+    """
+    test that close finishes the queued tasks and that a closed writer refuses new ones
+    """
+    writer = BackgroundWriter(database)
+    writer.submit(_insert(2020, 1.0))
+    writer.close()
+    assert _rows(database) == [(2020, 1.0)]
+    with pytest.raises(BackgroundWriteError):
+        writer.submit(_insert(2025, 1.0))
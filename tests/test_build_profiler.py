@@ -0,0 +1,68 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import csv
+
+import pytest
+from pyomo.environ import AbstractModel, BuildAction, Constraint, Param, Set, Var
+
+from temoa.temoa_model.build_profiler import BuildProfiler
+
+
+def _model() -> AbstractModel:
+    m = AbstractModel()
+    m.things = Set()
+    m.size = Param(m.things)
+    m.action = BuildAction(rule=lambda M: None)
+    m.x = Var(m.things)
+    m.limit = Constraint(m.things, rule=lambda M, t: M.x[t] <= M.size[t])
+    return m
+
+
+@pytest.mark.parametrize('trace_memory', [True, False], ids=['memory', 'no memory'])
+def test_build_profiler(trace_memory, tmp_path):
+    """
+    test that each component built within the profiler is recorded with its member count
+    """
+    data = {'things': {None: ['a', 'b', 'c']}, 'size': {'a': 1, 'b': 2, 'c': 3}}
+    with BuildProfiler(trace_memory=trace_memory) as profiler:
+        _model().create_instance(data={None: data})
+    records = {rec.component: rec for rec in profiler.records}
+    for name in ('things', 'size', 'action', 'x', 'limit'):
+        assert name in records, f'{name} should have a build record'
+    assert records['limit'].members == 3
+    assert records['limit'].ctype == 'Constraint'
+    assert records['action'].ctype == 'BuildAction'
+    assert (records['limit'].memory is not None) == trace_memory
+
+    # nothing recorded after the profiler exits
+    count = len(profiler.records)
+    _model().create_instance(data={None: data})
+    assert len(profiler.records) == count
+
+    profile = tmp_path / 'build_profile.csv'
+    profiler.write(profile)
+    with open(profile) as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == count
+    seconds = [float(row['seconds']) for row in rows]
+    assert seconds == sorted(seconds, reverse=True), 'report should be slowest first'
@@ -0,0 +1,85 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from temoa.temoa_model.bulk_writer import BulkWriter
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = sqlite3.connect(tmp_path / 'output.sqlite')
+    con.execute('CREATE TABLE OutputFlowOut (scenario TEXT, tech TEXT, flow REAL)')
+    con.execute('CREATE INDEX flow_by_tech ON OutputFlowOut (tech)')
+    con.commit()
+    yield con
+    con.close()
+
+
+def _indexes(con) -> list[str]:
+    return [row[0] for row in con.execute("SELECT name FROM sqlite_master WHERE type = 'index'")]
+
+
+def test_bulk_insert(con):
+    """
+    test that chunked rows all land, the index is deferred and rebuilt and the pragmas restored
+    """
+    journal_mode = con.execute('PRAGMA journal_mode').fetchone()[0]
+    rows = (('s1', f'tech_{k % 3}', float(k)) for k in range(10))
+    with BulkWriter(con, ['OutputFlowOut'], chunk_size=3) as writer:
+        assert _indexes(con) == []
+        assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+        assert writer.insert('OutputFlowOut', rows) == 10
+        assert writer.insert('OutputFlowOut', []) == 0
+    assert _indexes(con) == ['flow_by_tech']
+    assert con.execute('PRAGMA journal_mode').fetchone()[0] == journal_mode
+    assert not con.in_transaction
+    assert con.execute('SELECT count(*), sum(flow) FROM OutputFlowOut').fetchone() == (10, 45.0)
+    assert writer.stats['OutputFlowOut'].rows == 10
+
+
+def test_rollback(con):
+    """
+    test that an error within the session discards the writes and restores the index
+    """
+    con.execute("INSERT INTO OutputFlowOut VALUES ('s1', 'coal', 1.0)")
+    con.commit()
+    with pytest.raises(ValueError), BulkWriter(con, ['OutputFlowOut']) as writer:
+        writer.execute('DELETE FROM OutputFlowOut WHERE scenario = ?', ('s1',))
+        writer.insert('OutputFlowOut', [('s1', 'wind', 2.0)])
+        raise ValueError('solve went bad')
+    assert con.execute('SELECT * FROM OutputFlowOut').fetchall() == [('s1', 'coal', 1.0)]
+    assert _indexes(con) == ['flow_by_tech']
+
+
+def test_open_transaction(con):
+    """
+    test that a session will not start on top of writes the caller has not committed
+    """
+    con.execute("INSERT INTO OutputFlowOut VALUES ('s1', 'coal', 1.0)")
+    with pytest.raises(RuntimeError), BulkWriter(con, ['OutputFlowOut']):
+        pass
+    assert con.in_transaction
+    con.rollback()
+    assert con.execute('SELECT count(*) FROM OutputFlowOut').fetchone() == (0,)
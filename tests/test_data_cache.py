@@ -0,0 +1,101 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import sqlite3
+import time
+
+import pytest
+
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.data_cache import DataCache
+from temoa.temoa_model.temoa_mode import TemoaMode
+from tests.utilities.namespace_mock import Namespace
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = sqlite3.connect(tmp_path / 'test.sqlite')
+    con.execute('CREATE TABLE Efficiency (region TEXT, tech TEXT, efficiency REAL)')
+    con.execute('CREATE TABLE OutputFlowOut (region TEXT, flow REAL)')
+    con.executemany('INSERT INTO Efficiency VALUES (?, ?, ?)', [('R1', 'a', 0.5), ('R1', 'b', 1)])
+    con.commit()
+    yield con
+    con.close()
+
+
+def config(**kwargs):
+    settings = {
+        'scenario': 'base',
+        'scenario_mode': TemoaMode.PERFECT_FORESIGHT,
+        'source_trace': True,
+    }
+    settings.update(kwargs)
+    return Namespace(**settings)
+
+
+def test_fingerprint(con):
+    key = DataCache.fingerprint(con, config())
+    assert key == DataCache.fingerprint(con, config()), 'fingerprint should be repeatable'
+
+    # output tables do not change the fingerprint
+    con.execute("INSERT INTO OutputFlowOut VALUES ('R1', 2.0)")
+    assert key == DataCache.fingerprint(con, config())
+
+    # config options and the myopic index do
+    assert key != DataCache.fingerprint(con, config(source_trace=False))
+    assert key != DataCache.fingerprint(con, config(scenario='other'))
+    idx = MyopicIndex(base_year=2000, step_year=2010, last_demand_year=2010, last_year=2020)
+    assert key != DataCache.fingerprint(con, config(scenario_mode=TemoaMode.MYOPIC), idx)
+
+    # and so do changes to input data
+    con.execute("UPDATE Efficiency SET efficiency = 0.6 WHERE tech = 'a'")
+    assert key != DataCache.fingerprint(con, config())
+
+
+def test_store_and_fetch(tmp_path):
+    cache = DataCache(cache_dir=tmp_path / 'cache')
+    data = {'tech_all': ['a', 'b'], 'Efficiency': {('R1', 'a'): 0.5}}
+    assert cache.fetch('abc') is None
+    cache.store('abc', data)
+    assert cache.fetch('abc') == data
+
+
+def test_eviction(tmp_path):
+    cache = DataCache(cache_dir=tmp_path / 'cache', max_size_mb=1.0, max_age_days=1.0)
+    payload = {'big': bytes(400_000)}
+    for key in ('k1', 'k2'):
+        cache.store(key, payload)
+    # age the first entry past the max age
+    old = time.time() - 2 * 24 * 3600
+    os.utime(cache.cache_dir / 'k1.pkl', (old, old))
+    cache.evict()
+    assert cache.fetch('k1') is None, 'expired entry should be removed'
+    assert cache.fetch('k2') == payload
+
+    # exceed the size limit, the least recently used entry goes first
+    for key in ('k3', 'k4', 'k5'):
+        cache.store(key, payload)
+    remaining = sorted(p.stem for p in cache.cache_dir.glob('*.pkl'))
+    assert len(remaining) < 4
+    assert 'k5' in remaining
+    assert 'k2' not in remaining
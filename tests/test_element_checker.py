@@ -163,3 +163,23 @@ def test_dimension_measurement():
 
     elements = []
     assert ViableSet(elements).dim == 0
+
+
+@pytest.mark.parametrize('data', params, ids=(param['name'] for param in params))
+def test_mask(data):
+    """the column-oriented mask should agree with the expected filter results"""
+    locs = data.get('locs', (0,))
+    columns = [[row[loc] for row in data['testers']] for loc in locs]
+    mask = data['filt'].mask(columns)
+    assert [row for row, keep in zip(data['testers'], mask) if keep] == data['expected']
+
+
+def test_exception_cache():
+    vs = ViableSet([('a', 1)], exception_loc=0, exception_vals=ViableSet.REGION_REGEXES)
+    assert vs.is_excepted('R1+R2')
+    assert vs.is_excepted('global')
+    assert not vs.is_excepted('globalx')
+    # re-setting the exceptions should clear the cached results
+    vs.set_val_exceptions(exception_loc=0, exception_vals=[r'^globalx\Z'])
+    assert vs.is_excepted('globalx')
+    assert not vs.is_excepted('global')
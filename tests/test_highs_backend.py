@@ -0,0 +1,153 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import highspy
+import pyomo.environ as pyo
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.highs_backend import (
+    SOLVER_NAME,
+    CostUpdateHighs,
+    make_results,
+    solve_matrix,
+)
+from temoa.temoa_model.matrix_model import MatrixModel
+from temoa.temoa_model.result_snapshot import VarSnapshot
+from temoa.temoa_model.run_actions import check_solve_status
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
+
+
+def _model(demand: float) -> pyo.ConcreteModel:
+    m = pyo.ConcreteModel()
+    m.techs = pyo.Set(initialize=['coal', 'wind'])
+    m.cost = pyo.Param(m.techs, initialize={'coal': 3, 'wind': 5})
+    m.limit = pyo.Param(m.techs, initialize={'coal': 6, 'wind': 10})
+    m.V_Flow = pyo.Var(m.techs, domain=pyo.NonNegativeReals)
+    m.Demand = pyo.Constraint(expr=sum(m.V_Flow[t] for t in m.techs) >= demand)
+    m.Limit = pyo.Constraint(m.techs, rule=lambda M, t: M.V_Flow[t] <= M.limit[t])
+    m.TotalCost = pyo.Objective(expr=sum(m.cost[t] * m.V_Flow[t] for t in m.techs))
+    return m
+
+
+def test_solve_matrix():
+    """
+    test the solution arrays, the keyed values and the results, which leave the model unloaded
+    """
+    m = _model(demand=8)
+    solution = solve_matrix(MatrixModel.from_instance(m), silent=True)
+    assert solution.optimal
+    assert solution.objective == pytest.approx(6 * 3 + 2 * 5)
+    assert solution.values('V_Flow') == pytest.approx({'coal': 6, 'wind': 2})
+    # the marginal unit of demand is met by wind, and coal is worth 2 per unit of its limit
+    assert solution.dual_values('Demand') == pytest.approx({None: 5})
+    assert solution.dual_values('Limit') == pytest.approx({'coal': -2, 'wind': 0})
+
+    results = make_results(m, solution)
+    assert check_solve_status(results) == (True, '')
+    assert results.matrix_solution is solution
+    assert results.problem.upper_bound == pytest.approx(solution.objective)
+    assert m.V_Flow['coal'].value is None
+
+    # the result tables read the values from the arrays
+    flows = VarSnapshot.from_columns(m.V_Flow, *solution.columns('V_Flow'))
+    assert flows.as_dict() == pytest.approx({'coal': 6, 'wind': 2})
+
+
+def test_infeasible():
+    """
+    test that an infeasible model is reported as such and leaves the variables unset
+    """
+    m = _model(demand=20)
+    solution = solve_matrix(MatrixModel.from_instance(m), silent=True)
+    assert not solution.optimal
+    assert solution.status == highspy.HighsModelStatus.kInfeasible
+    results = make_results(m, solution)
+    good, _ = check_solve_status(results)
+    assert not good
+    assert m.V_Flow['coal'].value is None
+
+
+def test_cost_update():
+    """
+    test that a change of costs is solved from the last basis
+    """
+    m = _model(demand=8)
+    matrix = MatrixModel.from_instance(m)
+    cols = [
+        j for j, v in enumerate(matrix.variables) if v.parent_component().local_name == 'V_Flow'
+    ]
+    solver = CostUpdateHighs(matrix)
+    # the cheaper of the two is used to its limit, then the other
+    solution = solver.solve(cols, [5, 3])
+    assert solution.values('V_Flow') == pytest.approx({'coal': 0, 'wind': 8})
+    solution = solver.solve(cols, [3, 5])
+    assert solution.values('V_Flow') == pytest.approx({'coal': 6, 'wind': 2})
+    # no change is no work
+    solver.solve(cols, [3, 5])
+    assert solver.highs.getInfo().simplex_iteration_count == 0
+    assert solver.solves == 3
+
+
+def test_matrix_build_run(tmp_path):
+    """
+    test a perfect foresight run of a model built in matrix form against a run of the pyomo model.
+    The results of the matrix run are written from the solution arrays, with the solver options
+    of the config
+    """
+    objectives, capacities = {}, {}
+    for solver_name, matrix_build in (('appsi_highs', 'false'), (SOLVER_NAME, 'true')):
+        db = tmp_path / f'{solver_name}.sqlite'
+        shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite'), db)
+        config_file = tmp_path / f'{solver_name}.toml'
+        config_file.write_text(
+            'scenario = "matrix"\n'
+            'scenario_mode = "perfect_foresight"\n'
+            f'input_database = "{db}"\n'
+            f'output_database = "{db}"\n'
+            f'solver_name = "{solver_name}"\n'
+            'save_excel = false\n'
+            'save_duals = true\n'
+            f'matrix_build = {matrix_build}\n'
+            '[solver_options]\n'
+            'time_limit = 600.0\n'
+        )
+        TemoaSequencer(config_file=config_file, output_path=tmp_path, silent=True).start()
+        with sqlite3.connect(db) as con:
+            objectives[solver_name] = con.execute(
+                'SELECT objective_name, total_system_cost FROM OutputObjective'
+            ).fetchall()
+            capacities[solver_name] = con.execute(
+                'SELECT sum(capacity) FROM OutputNetCapacity'
+            ).fetchone()[0]
+            duals = dict(con.execute('SELECT constraint_name, dual FROM OutputDualVariable'))
+    # the duals of the directly assembled rows are written with the rest
+    assert any(name.startswith('DemandConstraint[') for name in duals)
+    (name, expected), *_ = objectives['appsi_highs']
+    [(matrix_name, cost)] = objectives[SOLVER_NAME]
+    assert matrix_name == name == 'TotalCost'
+    assert cost == pytest.approx(expected, rel=1e-6)
+    assert capacities[SOLVER_NAME] == pytest.approx(capacities['appsi_highs'], rel=1e-6)
@@ -25,6 +25,8 @@ https://westernspark.us
 Created on:  4/18/24
 
 """
+from time import perf_counter
+
 import numpy as np
 import pytest
 
@@ -110,3 +112,60 @@ def test_get_vectors():
     hull.update()
     assert hull.norms_available == 2, '2 new ones were created after 3 were drawn'
     assert len(hull.get_all_norms()) == 2
+
+
+def test_new_facets():
+    """test that only the facets made by new points are screened after a rebuild"""
+    hull = Hull(pts)
+    checked = hull.norms_checked
+    hull.add_points(np.array([[4, 4], [1, 3]]))
+    hull.update()
+    # the hypotenuse is replaced by 2 sides through (4, 4), and the left side by 2 through (1, 3)
+    assert hull.new_facets == 4
+    assert hull.norms_checked - checked == 4
+    assert hull.norms_available == 7
+
+
+def _screen_one_at_a_time(norms: np.ndarray, tolerance: float) -> np.ndarray:
+    """the screening of Hull before batching, with a stack of seen norms grown for each vector"""
+    seen = None
+    res = []
+    for vec in norms:
+        if seen is None:
+            seen = np.atleast_2d(vec)
+            res.append(True)
+        elif 1 - np.max(seen.dot(vec)) < tolerance:
+            res.append(False)
+        else:
+            seen = np.vstack((seen, vec))
+            res.append(True)
+    return np.array(res)
+
+
+@pytest.mark.parametrize('dim', [20, 40, 60])
+def test_screen_directions_benchmark(dim):
+    """
+    benchmark the batched screening of facet normals against the one-at-a-time screening, with
+    thousands of normals in 20 - 60 dimensions.  About a quarter of them are near duplicates
+    """
+    rng = np.random.default_rng(42)
+    # a hull of random points, to start the screening from the normals of its facets
+    hull = Hull(rng.random((dim + 2, dim)))
+    seen = hull.seen_norms.copy()
+    norms = rng.normal(size=(3000, dim))
+    copies = rng.integers(0, len(norms), 1000)
+    norms = np.vstack((norms, norms[copies] + rng.normal(scale=1e-3, size=(len(copies), dim))))
+    norms /= np.linalg.norm(norms, axis=1, keepdims=True)
+
+    tic = perf_counter()
+    expected = _screen_one_at_a_time(np.vstack((seen, norms)), hull.tolerance)[len(seen) :]
+    one_at_a_time = perf_counter() - tic
+    tic = perf_counter()
+    novel = hull.screen_directions(norms)
+    batched = perf_counter() - tic
+    print(
+        f'\n  dim {dim}: {len(norms)} normals, {np.count_nonzero(~novel)} rejected.  '
+        f'one at a time: {one_at_a_time:0.3f} s, batched: {batched:0.3f} s'
+    )
+    assert np.array_equal(novel, expected)
+    assert np.count_nonzero(~novel) >= len(copies) * 0.9
@@ -0,0 +1,200 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import logging
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.hybrid_loader import HybridLoader, LoaderSnapshot
+from temoa.temoa_model.loader_manifest import ManifestItem
+from temoa.temoa_model.model_checking.element_checker import ViableSet
+from temoa.temoa_model.run_actions import build_instance
+from temoa.temoa_model.temoa_config import TemoaConfig
+from temoa.temoa_model.temoa_sequencer import TemoaSequencer
+
+item = ManifestItem('LifetimeTech', 'LifetimeTech', ('region', 'tech', 'lifetime'), 'viable_rt')
+
+filter_params = [
+    {'name': 'no filters', 'a': None, 'b': None, 'same': True},
+    {'name': 'one filter', 'a': None, 'b': ViableSet({('A', 't1')}), 'same': False},
+    {
+        'name': 'equal members',
+        'a': ViableSet({('A', 't1'), ('B', 't1')}),
+        'b': ViableSet([('B', 't1'), ('A', 't1')]),
+        'same': True,
+    },
+    {
+        'name': 'different members',
+        'a': ViableSet({('A', 't1'), ('B', 't1')}),
+        'b': ViableSet({('A', 't1')}),
+        'same': False,
+    },
+    {
+        'name': 'different exceptions',
+        'a': ViableSet({('A', 't1')}, exception_loc=0, exception_vals=ViableSet.REGION_REGEXES),
+        'b': ViableSet({('A', 't1')}),
+        'same': False,
+    },
+]
+
+
+@pytest.mark.parametrize('data', filter_params, ids=(param['name'] for param in filter_params))
+def test_same_filter(data):
+    assert LoaderSnapshot.same_filter(data['a'], data['b']) == data['same']
+
+
+def test_snapshot_fetch():
+    snapshot = LoaderSnapshot()
+    validation = ViableSet({('A', 't1')})
+    value = {('A', 't1'): 40}
+    snapshot.loaded[item] = (validation, value)
+    fetched = snapshot.fetch(item, ViableSet({('A', 't1')}))
+    assert fetched == value
+    assert fetched is not value, 'the snapshot should return a copy'
+    assert snapshot.fetch(item, ViableSet({('A', 't1'), ('A', 't2')})) is None
+    snapshot.loaded[item] = (validation, None)
+    assert snapshot.fetch(item, validation) is None, 'empty loads should not be re-used'
+
+
+@pytest.mark.parametrize(
+    'options',
+    [{}, {'bulk_write': 'true'}, {'pipelined_writes': 'true'}],
+    ids=['plain', 'bulk write', 'pipelined writes'],
+)
+def test_snapshot_across_windows(tmp_path, caplog, options):
+    """
+    test that the window-invariant tables of a myopic run come from the snapshot after the first
+    window, while the results of each window are written on other connections
+    """
+    db = tmp_path / 'myo_utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'myo_utopia.sqlite'), db)
+    top_options = ''.join(f'{k} = {v}\n' for k, v in options.items() if k == 'bulk_write')
+    myopic_options = ''.join(f'{k} = {v}\n' for k, v in options.items() if k != 'bulk_write')
+    config_file = tmp_path / 'config.toml'
+    config_file.write_text(
+        'scenario = "snapshot"\n'
+        'scenario_mode = "myopic"\n'
+        f'input_database = "{db}"\n'
+        f'output_database = "{db}"\n'
+        'solver_name = "appsi_highs"\n'
+        'save_excel = false\n'
+        f'{top_options}'
+        '[myopic]\n'
+        'view_depth = 2\n'
+        'step_size = 1\n'
+        f'{myopic_options}'
+    )
+    caplog.set_level(logging.INFO, logger='temoa.temoa_model.hybrid_loader')
+    TemoaSequencer(config_file=config_file, output_path=tmp_path, silent=True).start()
+
+    # (tables loaded, tables from the snapshot) for each window
+    loads = [
+        r.args[:2]
+        for r in caplog.records
+        if r.name == 'temoa.temoa_model.hybrid_loader' and 'manifest tables' in r.msg
+    ]
+    assert len(loads) >= 2, 'should be several windows'
+    assert loads[0][1] == 0, 'the first window reads everything'
+    for tables, from_snapshot in loads[1:]:
+        assert 0 < from_snapshot < tables
+
+
+@pytest.mark.parametrize('source_trace', [False, True], ids=['raw', 'source trace'])
+def test_parallel_load(tmp_path, source_trace):
+    """test that the data from a parallel load is the same (and in the same order) as a serial load"""
+    db = Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'test_system.sqlite')
+    loads = []
+    for parallel_load in (0, 4):
+        config = TemoaConfig(
+            scenario='parallel',
+            scenario_mode='perfect_foresight',
+            input_database=db,
+            output_database=db,
+            output_path=tmp_path,
+            solver_name='appsi_highs',
+            source_trace=source_trace,
+            parallel_load=parallel_load,
+            silent=True,
+        )
+        with sqlite3.connect(db) as con:
+            loads.append(HybridLoader(db_connection=con, config=config).create_data_dict())
+    serial, parallel = loads
+    assert list(parallel) == list(serial)
+    for name, value in serial.items():
+        assert parallel[name] == value, f'{name} differs'
+
+
+def test_direct_load_build_twice(tmp_path):
+    """
+    test that building from a direct-load dictionary leaves the dictionary intact, so the same
+    data can be built again
+    """
+    db = Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'utopia.sqlite')
+    config = TemoaConfig(
+        scenario='direct',
+        scenario_mode='perfect_foresight',
+        input_database=db,
+        output_database=db,
+        output_path=tmp_path,
+        solver_name='appsi_highs',
+        direct_load=True,
+        silent=True,
+    )
+    with sqlite3.connect(db) as con:
+        data = HybridLoader(db_connection=con, config=config).load_data()
+    assert isinstance(data, dict)
+    keys = set(data)
+    first = build_instance(data, silent=True)
+    assert set(data) == keys, 'the data should not be consumed by the build'
+    second = build_instance(data, silent=True)
+    assert len(second.V_FlowOut) == len(first.V_FlowOut) > 0
+    assert len(second.DemandConstraint) == len(first.DemandConstraint)
+
+
+def test_cache_hit_filters(tmp_path):
+    """test that a load from the data cache still sets up the network manager and the filters"""
+    db = Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'test_system.sqlite')
+    config = TemoaConfig(
+        scenario='cached',
+        scenario_mode='perfect_foresight',
+        input_database=db,
+        output_database=db,
+        output_path=tmp_path,
+        solver_name='appsi_highs',
+        source_trace=True,
+        data_cache={'path': str(tmp_path / 'cache')},
+        silent=True,
+    )
+    loaders = []
+    with sqlite3.connect(db) as con:
+        for _ in range(2):
+            loader = HybridLoader(db_connection=con, config=config)
+            loaders.append((loader, loader.create_data_dict()))
+    (miss, miss_data), (hit, hit_data) = loaders
+    assert hit_data == miss_data
+    assert hit.manager is not None
+    assert hit.viable_rt.members == miss.viable_rt.members
+    assert hit.efficiency_values == miss.efficiency_values
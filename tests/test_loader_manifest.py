@@ -0,0 +1,143 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.temoa_model.loader_manifest import (
+    ManifestItem,
+    MyopicFilter,
+    SchemaSnapshot,
+    manifest,
+    param_index_sets,
+)
+from temoa.temoa_model.temoa_model import TemoaModel
+
+mi = MyopicIndex(base_year=2000, step_year=2010, last_demand_year=2010, last_year=2020)
+
+params = [
+    {
+        'name': 'plain',
+        'item': ManifestItem('regions', 'Region', ('region',)),
+        'myopic_index': None,
+        'expected': ('SELECT region FROM main.Region', ()),
+    },
+    {
+        'name': 'where and order',
+        'item': ManifestItem(
+            'commodity_physical',
+            'Commodity',
+            ('name',),
+            where="flag = 'p' OR flag = 's'",
+            order_by='name',
+        ),
+        'myopic_index': mi,
+        'expected': (
+            "SELECT name FROM main.Commodity WHERE (flag = 'p' OR flag = 's') ORDER BY name",
+            (),
+        ),
+    },
+    {
+        'name': 'period filter, not myopic',
+        'item': ManifestItem(
+            'Demand', 'Demand', ('region', 'demand'), myopic_filter=MyopicFilter.PERIOD
+        ),
+        'myopic_index': None,
+        'expected': ('SELECT region, demand FROM main.Demand', ()),
+    },
+    {
+        'name': 'period filter',
+        'item': ManifestItem(
+            'Demand', 'Demand', ('region', 'demand'), myopic_filter=MyopicFilter.PERIOD
+        ),
+        'myopic_index': mi,
+        'expected': (
+            'SELECT region, demand FROM main.Demand WHERE (period >= ? AND period <= ?)',
+            (2000, 2010),
+        ),
+    },
+    {
+        'name': 'vintage filter with where',
+        'item': ManifestItem(
+            'LoanRate',
+            'LoanRate',
+            ('region', 'rate'),
+            where='rate > 0',
+            myopic_filter=MyopicFilter.VINTAGE,
+        ),
+        'myopic_index': mi,
+        'expected': (
+            'SELECT region, rate FROM main.LoanRate WHERE (rate > 0) AND (vintage >= ?)',
+            (2000,),
+        ),
+    },
+]
+
+
+@pytest.mark.parametrize('test_case', params, ids=[t['name'] for t in params])
+def test_query(test_case):
+    assert test_case['item'].query(test_case['myopic_index']) == test_case['expected']
+
+
+def test_manifest_components():
+    """Every item in the manifest should target a component in the model"""
+    model = TemoaModel()
+    for item in manifest:
+        assert model.component(item.component) is not None, f'{item.component} not in model'
+
+
+def test_param_index_sets():
+    """Every param and indexing set named in the param index sets should be in the model"""
+    model = TemoaModel()
+    for param, index_set in param_index_sets.items():
+        assert model.component(param) is not None, f'{param} not in model'
+        assert model.component(index_set) is not None, f'{index_set} not in model'
+
+
+def test_schema_snapshot():
+    con = sqlite3.connect(':memory:')
+    con.execute('CREATE TABLE Technology (tech TEXT, flag TEXT)')
+    con.execute('CREATE TABLE RampUp (region TEXT, tech TEXT, rate REAL)')
+    schema = SchemaSnapshot(con)
+    con.execute('CREATE TABLE RampDown (region TEXT, tech TEXT, rate REAL)')
+    assert schema.has_table('Technology')
+    assert schema.has_table('RampUp')
+    assert not schema.has_table('RampDown'), 'the snapshot should not be updated'
+    assert schema.has_column('Technology', 'flag')
+    assert not schema.has_column('Technology', 'unlim_cap')
+    assert not schema.has_column('Region', 'region')
+    con.close()
+
+
+def test_window_invariant():
+    assert ManifestItem(
+        'LifetimeTech', 'LifetimeTech', ('region', 'tech', 'lifetime')
+    ).window_invariant
+    assert not ManifestItem(
+        'Demand',
+        'Demand',
+        ('region', 'period', 'commodity', 'demand'),
+        myopic_filter=MyopicFilter.PERIOD,
+    ).window_invariant
+    assert not ManifestItem('X', 'OutputNetCapacity', ('region', 'capacity')).window_invariant
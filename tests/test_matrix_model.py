@@ -0,0 +1,150 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import pathlib
+import sqlite3
+
+import highspy
+import numpy as np
+import pyomo.environ as pyo
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.highs_backend import solve_matrix
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.matrix_model import MatrixModel
+from temoa.temoa_model.run_actions import build_instance
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+
+def _solve_file(path: pathlib.Path) -> float:
+    h = highspy.Highs()
+    h.silent()
+    assert h.readModel(str(path)) == highspy.HighsStatus.kOk, f'unable to read {path}'
+    h.run()
+    assert h.getModelStatus() == highspy.HighsModelStatus.kOptimal
+    return h.getInfo().objective_function_value
+
+
+def _small_model() -> pyo.ConcreteModel:
+    m = pyo.ConcreteModel()
+    m.x = pyo.Var(['a', 'b'], domain=pyo.NonNegativeReals)
+    m.y = pyo.Var(bounds=(None, 4))
+    m.z = pyo.Var(bounds=(1, 3))
+    m.fixed = pyo.Var(initialize=2)
+    m.fixed.fix()
+    m.eq = pyo.Constraint(expr=m.x['a'] + m.x['b'] + m.fixed == 10)
+    m.rng = pyo.Constraint(expr=(-5, m.y - m.x['a'], 5))
+    m.ge = pyo.Constraint(['p', 'q'], rule=lambda M, i: M.z + M.x['b'] >= (2 if i == 'p' else 3))
+    m.obj = pyo.Objective(expr=3 * m.x['a'] + m.x['b'] - m.y + 2 * m.z + 7)
+    return m
+
+
+def test_small_model(tmp_path):
+    """
+    test the compiled rows, bounds and blocks of a small model with a mix of constraint types
+    """
+    m = _small_model()
+    mm = MatrixModel.from_instance(m)
+    assert mm.num_rows == 4, 'the equality and range should be merged into one row each'
+    assert list(mm.blocks) == ['eq', 'rng', 'ge']
+    assert mm.blocks['ge'] == slice(2, 4)
+    assert mm.block('eq').shape == (1, mm.num_cols)
+    assert mm.row_lb[0] == mm.row_ub[0] == 8, 'fixed variable should be moved to the rhs'
+    assert (mm.row_lb[1], mm.row_ub[1]) == (-5, 5)
+    assert list(mm.row_lb[2:]) == [2, 3]
+    assert mm.offset == 7
+    cols = {var.name: j for j, var in enumerate(mm.variables)}
+    assert 'fixed' not in cols
+    assert (mm.col_lb[cols['y']], mm.col_ub[cols['y']]) == (-np.inf, 4)
+
+    pyo.SolverFactory('appsi_highs').solve(m)
+    x = np.array([var.value for var in mm.variables])
+    assert mm.objective_value(x) == pytest.approx(pyo.value(m.obj))
+    assert solve_matrix(mm, silent=True).objective == pytest.approx(pyo.value(m.obj))
+    for writer, filename in ((mm.write_mps, 'small.mps'), (mm.write_lp, 'small.lp')):
+        for symbolic in (True, False):
+            writer(tmp_path / filename, symbolic=symbolic)
+            assert _solve_file(tmp_path / filename) == pytest.approx(pyo.value(m.obj))
+
+
+def _terms(mm: MatrixModel, family: str) -> tuple[dict, dict]:
+    """the coefficients and the bounds of the rows of a family, keyed by the row index"""
+    coefs, bounds = {}, {}
+    block = mm.block(family)
+    for k, i in enumerate(range(mm.blocks[family].start, mm.blocks[family].stop)):
+        index = mm.row_keys[i][1]
+        for j, coef in zip(
+            block.indices[block.indptr[k] : block.indptr[k + 1]],
+            block.data[block.indptr[k] : block.indptr[k + 1]],
+        ):
+            coefs[index, mm.variables[j].name] = coef
+        bounds[index, 'lb'] = mm.row_lb[i]
+        bounds[index, 'ub'] = mm.row_ub[i]
+    return coefs, bounds
+
+
+params = [
+    ('utopia', 'config_utopia.toml'),
+    ('test_system', 'config_test_system.toml'),
+    ('mediumville', 'config_mediumville.toml'),
+]
+
+
+@pytest.mark.parametrize(
+    argnames=['data_name', 'config_file'], argvalues=params, ids=[t[0] for t in params]
+)
+def test_matrix_objective(data_name, config_file, tmp_path):
+    """
+    test that the directly assembled rows and costs are those of the pyomo expressions, and that
+    the matrix form (in memory and as MPS and LP files) solves to the same objective as the pyomo
+    model
+    """
+    config_file = pathlib.Path(PROJECT_ROOT, 'tests', 'testing_configs', config_file)
+    config = TemoaConfig.build_config(config_file=config_file, output_path=tmp_path, silent=True)
+    with sqlite3.connect(config.input_database) as con:
+        data = HybridLoader(db_connection=con, config=config).create_data_dict()
+    instance = build_instance(data, silent=True)
+    direct_instance = build_instance(data, silent=True, matrix=True)
+    assert direct_instance.component('CommodityBalanceConstraint') is None
+    compiled = MatrixModel.from_instance(instance)
+    direct = MatrixModel.from_instance(direct_instance)
+
+    for family in ('CapacityConstraint', 'DemandConstraint', 'CommodityBalanceConstraint'):
+        coefs, bounds = _terms(direct, family)
+        expected_coefs, expected_bounds = _terms(compiled, family)
+        assert coefs == pytest.approx(expected_coefs), f'{family} coefficients differ'
+        assert bounds == pytest.approx(expected_bounds), f'{family} bounds differ'
+    costs = {var.name: c for var, c in zip(direct.variables, direct.c) if c}
+    expected_costs = {var.name: c for var, c in zip(compiled.variables, compiled.c) if c}
+    assert costs == pytest.approx(expected_costs)
+
+    res = pyo.SolverFactory('appsi_highs').solve(instance)
+    assert pyo.check_optimal_termination(res)
+    objective = pyo.value(instance.TotalCost)
+    solution = solve_matrix(direct, silent=True)
+    assert solution.optimal
+    assert solution.objective == pytest.approx(objective, rel=1e-6)
+    direct.write_mps(tmp_path / 'model.mps')
+    direct.write_lp(tmp_path / 'model.lp', symbolic=True)
+    assert _solve_file(tmp_path / 'model.mps') == pytest.approx(objective, rel=1e-6)
+    assert _solve_file(tmp_path / 'model.lp') == pytest.approx(objective, rel=1e-6)
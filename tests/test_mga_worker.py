@@ -0,0 +1,129 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+from multiprocessing import Queue
+
+import numpy as np
+import pyomo.environ as pyo
+import pytest
+from scipy.sparse import identity
+
+from temoa.extensions.modeling_to_generate_alternatives import mga_sequencer
+from temoa.extensions.modeling_to_generate_alternatives.mga_sequencer import MgaSequencer
+from temoa.extensions.modeling_to_generate_alternatives.worker import MgaJob, Worker
+from temoa.temoa_model.result_snapshot import CapacitySnapshot
+
+
+def _model() -> pyo.ConcreteModel:
+    """a cost-capped model without an objective.  Coal is cheaper, but limited"""
+    m = pyo.ConcreteModel()
+    m.techs = pyo.Set(initialize=['coal', 'wind'])
+    m.V_FlowOut = pyo.Var(m.techs, domain=pyo.NonNegativeReals)
+    m.V_NewCapacity = pyo.Var(m.techs, domain=pyo.NonNegativeReals)
+    m.V_Capacity = pyo.Var(m.techs, domain=pyo.NonNegativeReals)
+    m.V_RetiredCapacity = pyo.Var(m.techs, domain=pyo.NonNegativeReals, bounds=(0, 0))
+    m.Demand = pyo.Constraint(expr=sum(m.V_FlowOut[t] for t in m.techs) >= 8)
+    m.Limit = pyo.Constraint(expr=m.V_FlowOut['coal'] <= 6)
+    m.Capacity = pyo.Constraint(m.techs, rule=lambda M, t: M.V_Capacity[t] == M.V_FlowOut[t])
+    m.NewCapacity = pyo.Constraint(m.techs, rule=lambda M, t: M.V_NewCapacity[t] == M.V_Capacity[t])
+    m.cost_cap = pyo.Constraint(expr=3 * m.V_FlowOut['coal'] + 5 * m.V_FlowOut['wind'] <= 40)
+    return m
+
+
+def _worker(
+    model, job_queue=None, results_queue=None, persistent=False, variable_keys=None
+) -> Worker:
+    return Worker(
+        model=model,
+        variable_keys=variable_keys or [('V_FlowOut', 'coal'), ('V_FlowOut', 'wind')],
+        aggregation=identity(2, format='csr'),
+        job_queue=job_queue,
+        results_queue=results_queue,
+        solver_name='appsi_highs',
+        persistent=persistent,
+    )
+
+
+@pytest.mark.parametrize('persistent', [False, True], ids=['rebuild', 'persistent'])
+def test_solve(persistent):
+    """
+    test that the jobs swap the objective of the resident model and report the axis totals
+    """
+    model = _model()
+    worker = _worker(model, persistent=persistent)
+    # least coal is all wind, least wind is coal at its limit
+    result = worker.solve(MgaJob(job_id=1, coefficients=np.array([1.0, 0.0])))
+    assert result.optimal
+    assert result.hull_point == pytest.approx([0, 8])
+    result = worker.solve(MgaJob(job_id=2, coefficients=np.array([0.0, 1.0])))
+    assert result.hull_point == pytest.approx([6, 2])
+    snapshot = CapacitySnapshot.take(model).with_values(result.capacity)
+    assert snapshot.capacity.as_dict() == pytest.approx({'coal': 6, 'wind': 2})
+
+    # most of both is bounded by the coal limit and the cost cap
+    result = worker.solve(MgaJob(job_id=3, coefficients=np.array([-1.0, -1.0])))
+    assert result.optimal
+    assert result.hull_point == pytest.approx([6, 4.4])
+
+
+def test_worker_process():
+    """
+    test the round trip of jobs and results through a worker process
+    """
+    job_queue, results_queue = Queue(), Queue()
+    worker = _worker(_model(), job_queue, results_queue)
+    worker.start()
+    try:
+        for job_id in range(3):
+            job_queue.put(MgaJob(job_id=job_id, coefficients=np.array([1.0, 0.0])))
+        results = [results_queue.get(timeout=60) for _ in range(3)]
+    finally:
+        job_queue.put(None)
+        worker.join(timeout=60)
+    assert [r.job_id for r in results] == [0, 1, 2]
+    assert all(r.hull_point == pytest.approx([0, 8]) for r in results)
+    assert not worker.is_alive()
+
+
+def test_failed_setup():
+    """
+    test that a failure to set up the solve is reported as a failed result, not raised
+    """
+    worker = _worker(_model(), variable_keys=[('V_Missing', 'coal'), ('V_FlowOut', 'wind')])
+    result = worker.solve(MgaJob(job_id=1, coefficients=np.array([1.0, 0.0])))
+    assert result.job_id == 1
+    assert not result.optimal
+    assert result.capacity is None
+
+
+def test_dead_worker(monkeypatch):
+    """
+    test that waiting on a result stops if a worker has died
+    """
+    monkeypatch.setattr(mga_sequencer, 'RESULT_WAIT_SECONDS', 0.1)
+    job_queue, results_queue = Queue(), Queue()
+    worker = _worker(_model(), job_queue, results_queue)
+    worker.start()
+    job_queue.put(None)
+    worker.join(timeout=60)
+    with pytest.raises(RuntimeError, match='stopped while jobs were outstanding'):
+        MgaSequencer._next_result(results_queue, [worker])
@@ -0,0 +1,77 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import pytest
+
+from temoa.extensions.modeling_to_generate_alternatives.worker import MgaResult
+from temoa.extensions.modeling_to_generate_alternatives.worker_pool import (
+    PoolMonitor,
+    PoolSizingPolicy,
+)
+
+GB = 1024**3
+
+# (options, solver, instance GB, cpus, memory GB, expected workers, expected limit)
+sizing_cases = [
+    ({}, 'appsi_highs', 1, 64, 512, 64, 'cpu'),
+    ({}, 'gurobi', 1, 64, 512, 16, 'cpu'),
+    ({}, 'appsi_highs', 4, 8, 16, 1, 'memory'),
+    ({}, 'appsi_highs', 1, 64, 40, 16, 'memory'),
+    ({'memory_per_worker_gb': 2.0}, 'appsi_highs', 10, 64, 40, 16, 'memory'),
+    ({'solver_threads': 8}, 'appsi_highs', 1, 64, 512, 8, 'cpu'),
+    ({'max_workers': 4}, 'appsi_highs', 1, 64, 512, 4, 'config'),
+    ({'num_workers': 12}, 'appsi_highs', 4, 8, 16, 12, 'config'),
+]
+
+
+@pytest.mark.parametrize(
+    'options, solver, instance_gb, cpus, memory_gb, workers, limited_by', sizing_cases
+)
+def test_pool_size(options, solver, instance_gb, cpus, memory_gb, workers, limited_by):
+    policy = PoolSizingPolicy.from_options(options)
+    size = policy.size(solver, instance_bytes=instance_gb * GB, cpus=cpus, memory=memory_gb * GB)
+    assert size.workers == workers
+    assert size.limited_by == limited_by
+    assert size.queue_size == workers
+
+
+def test_bad_options():
+    with pytest.raises(ValueError):
+        PoolSizingPolicy.from_options({'num_workers': 0})
+    with pytest.raises(ValueError):
+        PoolSizingPolicy.from_options({'memory_fraction': 1.5})
+
+
+def test_monitor(tmp_path):
+    monitor = PoolMonitor()
+    monitor.depth_samples = [(0.0, 0), (1.0, 2), (3.0, 1)]
+    # 2 jobs for 2 seconds and 1 for 1 second
+    assert monitor.mean_depth(until=4.0) == pytest.approx(5 / 4)
+    monitor.record_result(MgaResult(job_id=0, worker_number=1, solve_seconds=1, busy_seconds=2))
+    monitor.record_result(MgaResult(job_id=1, worker_number=1, solve_seconds=1, busy_seconds=3))
+    monitor.record_result(MgaResult(job_id=2, worker_number=2, solve_seconds=1))
+    assert monitor.busy_seconds == {1: 5, 2: 0}
+    assert monitor.jobs == {1: 2, 2: 1}
+    assert monitor.failed_jobs == 3
+    monitor.report([1, 2])
+    monitor.write_depth(tmp_path / 'depth.csv')
+    assert len((tmp_path / 'depth.csv').read_text().splitlines()) == 4
@@ -0,0 +1,91 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from temoa.extensions.myopic.myopic_checkpoint import (
+    MyopicCheckpoint,
+    MyopicRunState,
+    ResumeError,
+    run_fingerprint,
+)
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+
+tables_script = (
+    Path(__file__).parents[1] / 'temoa' / 'extensions' / 'myopic' / 'make_myopic_tables.sql'
+)
+
+efficiency = [
+    (2000, 'R1', 'coal', 'E01', 2000, 'elc', 0.32, 40),
+    (-1, 'R1', 'ethos', 'IMPCOAL', 1990, 'coal', 1.0, 1000),
+]
+
+
+@pytest.fixture
+def con():
+    con = sqlite3.connect(':memory:')
+    con.executescript(tables_script.read_text())
+    yield con
+    con.close()
+
+
+@pytest.fixture
+def state():
+    return MyopicRunState(
+        last_index=MyopicIndex(
+            base_year=2000, step_year=2010, last_demand_year=2010, last_year=2020
+        ),
+        remaining=[
+            MyopicIndex(base_year=2010, step_year=2020, last_demand_year=2010, last_year=2020)
+        ],
+        windows=2,
+    )
+
+
+def test_round_trip(con, state):
+    checkpoint = MyopicCheckpoint('test', run_fingerprint('test', 2, 1, [2000, 2010, 2020]))
+    checkpoint.save(con, state, efficiency)
+    # a later save replaces the earlier one
+    checkpoint.save(con, state, efficiency)
+    assert checkpoint.load(con) == state
+    con.execute('INSERT INTO MyopicEfficiency VALUES (2010, "R1", "a", "b", 2010, "c", 1.0, 5)')
+    assert checkpoint.restore_efficiency(con) == len(efficiency)
+    rows = con.execute('SELECT * FROM MyopicEfficiency ORDER BY base_year').fetchall()
+    assert rows == sorted(efficiency)
+
+
+def test_missing_checkpoint(con):
+    checkpoint = MyopicCheckpoint('test', run_fingerprint('test', 2, 1, [2000, 2010]))
+    with pytest.raises(ResumeError):
+        checkpoint.load(con)
+
+
+def test_changed_settings(con, state):
+    MyopicCheckpoint('test', run_fingerprint('test', 2, 1, [2000, 2010, 2020])).save(
+        con, state, efficiency
+    )
+    checkpoint = MyopicCheckpoint('test', run_fingerprint('test', 3, 1, [2000, 2010, 2020]))
+    with pytest.raises(ResumeError):
+        checkpoint.load(con)
@@ -0,0 +1,98 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from temoa.extensions.myopic.myopic_compaction import CompactionMode, CompactionPolicy, PageStats
+
+
+@pytest.fixture
+def con(tmp_path):
+    con = sqlite3.connect(tmp_path / 'output.sqlite')
+    con.execute('CREATE TABLE OutputFlowOut (period INTEGER, tech TEXT, flow REAL)')
+    con.executemany(
+        'INSERT INTO OutputFlowOut VALUES (?, ?, ?)',
+        ((2020 + 5 * (k % 4), f'tech_{k}', float(k)) for k in range(20_000)),
+    )
+    con.commit()
+    yield con
+    con.close()
+
+
+def _clear_periods(con, period: int) -> None:
+    con.execute('DELETE FROM OutputFlowOut WHERE period >= ?', (period,))
+    con.commit()
+
+
+@pytest.mark.parametrize('mode', [CompactionMode.FULL, CompactionMode.INCREMENTAL])
+def test_compact(con, mode):
+    """
+    test that both modes return the free pages and leave the data intact
+    """
+    policy = CompactionPolicy(mode=mode)
+    policy.prepare(con)
+    _clear_periods(con, 2025)
+    before = PageStats.read(con)
+    assert before.free_pages > 0
+    assert policy.compact(con)
+    after = PageStats.read(con)
+    assert after.free_pages == 0
+    assert policy.bytes_reclaimed == before.size - after.size > 0
+    assert con.execute('SELECT count(*) FROM OutputFlowOut').fetchone()[0] == 5_000
+
+
+def test_interval_and_threshold(con):
+    """
+    test that compaction waits for the interval and for enough free pages
+    """
+    policy = CompactionPolicy(interval=2, free_fraction=0.5)
+    _clear_periods(con, 2035)  # about a quarter of the pages
+    assert not policy.window_done(con)  # not due
+    assert not policy.window_done(con)  # due, but too little free
+    _clear_periods(con, 2025)
+    assert not policy.window_done(con)
+    assert policy.window_done(con)
+    assert policy.compactions == 1
+    # nothing left to reclaim at the finish
+    assert not policy.finish(con)
+
+
+def test_options():
+    """
+    test the policy made from the myopic config section
+    """
+    policy = CompactionPolicy.from_options({'view_depth': 2, 'step_size': 1})
+    assert (policy.mode, policy.interval, policy.free_fraction) == (CompactionMode.FULL, 1, 0.0)
+    policy = CompactionPolicy.from_options(
+        {'compaction': 'incremental', 'compaction_interval': 0, 'compaction_free_fraction': 0.2}
+    )
+    assert (policy.mode, policy.interval, policy.free_fraction) == (
+        CompactionMode.INCREMENTAL,
+        0,
+        0.2,
+    )
+    with pytest.raises(ValueError):
+        CompactionPolicy.from_options({'compaction': 'nightly'})
+    with pytest.raises(ValueError):
+        CompactionPolicy.from_options({'compaction_interval': -1})
@@ -0,0 +1,124 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from definitions import PROJECT_ROOT
+from temoa.extensions.myopic.myopic_index import MyopicIndex
+from temoa.extensions.myopic.myopic_sequencer import MyopicSequencer, table_script_file
+from temoa.extensions.myopic.persistent_engine import PeriodState
+from temoa.temoa_model.loader_manifest import SchemaSnapshot
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+
+def _config(tmp_path: Path, persistent: bool, solver_name: str = 'appsi_highs') -> TemoaConfig:
+    """a myopic config of utopia on a copy of the database"""
+    db = tmp_path / 'myo_utopia.sqlite'
+    shutil.copy(Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'myo_utopia.sqlite'), db)
+    return TemoaConfig(
+        scenario='persistent',
+        scenario_mode='myopic',
+        input_database=db,
+        output_database=db,
+        output_path=tmp_path,
+        solver_name=solver_name,
+        myopic={'view_depth': 2, 'step_size': 1, 'persistent_instance': persistent},
+        silent=True,
+    )
+
+
+def test_persistent_matches_rebuild(tmp_path):
+    """
+    test that the windows solved on the persistent instance give the capacities and the costs of
+    each period of the windows rebuilt from the database
+    """
+    results = {}
+    for persistent in (False, True):
+        output_path = tmp_path / str(persistent)
+        output_path.mkdir()
+        config = _config(output_path, persistent)
+        MyopicSequencer(config=config).start()
+        with sqlite3.connect(config.output_database) as con:
+            capacity = con.execute(
+                'SELECT region, period, tech, vintage, capacity FROM OutputNetCapacity'
+            ).fetchall()
+            costs = con.execute(
+                'SELECT period, sum(d_invest), sum(d_fixed), sum(d_var), sum(d_emiss) '
+                'FROM OutputCost GROUP BY period'
+            ).fetchall()
+        results[persistent] = {row[:-1]: row[-1] for row in capacity}, costs
+
+    (rebuild_capacity, rebuild_costs), (capacity, costs) = results[False], results[True]
+    assert capacity.keys() == rebuild_capacity.keys()
+    for key, val in capacity.items():
+        assert val == pytest.approx(rebuild_capacity[key]), f'capacity mismatch at {key}'
+    assert len(costs) == len(rebuild_costs)
+    for row, rebuild_row in zip(costs, rebuild_costs):
+        assert row == pytest.approx(rebuild_row), f'cost mismatch in period {row[0]}'
+
+
+def test_window_states(tmp_path):
+    """
+    test that the periods are fixed and freed as the windows move forward and roll back
+    """
+    sequencer = MyopicSequencer(config=_config(tmp_path, persistent=True))
+    sequencer.characterize_run()
+    sequencer.execute_script(table_script_file)
+    sequencer.clear_old_results()
+    sequencer.initialize_myopic_efficiency_table()
+    engine = sequencer.build_persistent_engine(SchemaSnapshot(sequencer.output_con))
+    M = engine.model
+    assert all(v.fixed for p in engine.periods for v in engine.variables[p]), (
+        'all periods should start out of view'
+    )
+
+    engine.set_window(MyopicIndex(1990, 2000, 2000, 2010))
+    assert engine.solve()[0]
+    assert not M.V_NewCapacity['utopia', 'E01', 2000].fixed
+    assert M.V_NewCapacity['utopia', 'E01', 2010].fixed
+    built = M.V_NewCapacity['utopia', 'E01', 1990].value
+
+    engine.set_window(MyopicIndex(2000, 2010, 2010, 2020))
+    assert engine.state == {
+        1990: PeriodState.PAST,
+        2000: PeriodState.WINDOW,
+        2010: PeriodState.WINDOW,
+    }
+    assert M.V_NewCapacity['utopia', 'E01', 1990].fixed
+    assert M.V_NewCapacity['utopia', 'E01', 1990].value == built
+    assert not any(c.active for c in engine.constraints[1990])
+    assert engine.solve()[0]
+
+    # roll back, which brings the first period into view again
+    engine.set_window(MyopicIndex(1990, 2010, 2010, 2020))
+    assert not M.V_NewCapacity['utopia', 'E01', 1990].fixed
+    assert all(c.active for c in engine.constraints[1990])
+    assert engine.solve()[0]
+
+
+def test_persistent_requires_highs(tmp_path):
+    with pytest.raises(ValueError, match='appsi_highs'):
+        MyopicSequencer(config=_config(tmp_path, persistent=True, solver_name='cbc'))
@@ -0,0 +1,81 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import pytest
+
+from temoa.temoa_model.result_sinks import ResultFrame
+
+pa = pytest.importorskip('pyarrow')
+pd = pytest.importorskip('pandas')
+# the sink module imports pyarrow, so it is only imported once pyarrow is known to be available
+ParquetSink = pytest.importorskip('temoa.temoa_model.parquet_sink').ParquetSink
+
+net_capacity = [
+    ('base', 'R1', 'electric', 2020, 'E_NGCC', 2020, 4.0),
+    ('base', 'R1', 'electric', 2025, 'E_NGCC', 2020, 4.0),
+    ('base', 'R2', 'electric', 2025, 'E_SOLPV', 2025, 2.5),
+    ('base-1', 'R1', 'electric', 2020, 'E_NGCC', 2020, 3.0),
+]
+
+
+def _read(sink: ParquetSink, table: str) -> list[tuple]:
+    path = sink.root / table
+    if not any(path.rglob('*.parquet')):
+        return []
+    df = pd.read_parquet(path).astype({'scenario': str, 'region': str, 'period': int})
+    return sorted(df[list(ResultFrame(table, []).columns)].itertuples(index=False, name=None))
+
+
+def test_write(tmp_path):
+    """
+    test that the rows come back whole from the partitioned dataset, with dictionary encoding
+    """
+    sink = ParquetSink(tmp_path)
+    frame = ResultFrame('OutputNetCapacity', iter(net_capacity))
+    table = sink.to_arrow(ResultFrame('OutputNetCapacity', net_capacity))
+    assert pa.types.is_dictionary(table.schema.field('tech').type)
+    assert table.schema.field('capacity').type == pa.float64()
+    sink.write(frame)
+    assert (tmp_path / 'OutputNetCapacity' / 'scenario=base' / 'region=R2' / 'period=2025').is_dir()
+    assert _read(sink, 'OutputNetCapacity') == sorted(net_capacity)
+    # a second write appends
+    sink.write(ResultFrame('OutputNetCapacity', net_capacity[:1]))
+    assert len(_read(sink, 'OutputNetCapacity')) == len(net_capacity) + 1
+
+
+@pytest.mark.parametrize(
+    'clear, expected',
+    [
+        (lambda sink: sink.clear_scenario('base'), []),
+        (lambda sink: sink.clear_periods_after('base', 2025), [net_capacity[0], net_capacity[3]]),
+        (lambda sink: sink.clear_table('OutputNetCapacity'), []),
+    ],
+    ids=['scenario', 'periods', 'table'],
+)
+def test_clear(tmp_path, clear, expected):
+    """
+    test the removal of results
+    """
+    sink = ParquetSink(tmp_path)
+    sink.write(ResultFrame('OutputNetCapacity', net_capacity))
+    clear(sink)
+    assert _read(sink, 'OutputNetCapacity') == sorted(expected)
@@ -0,0 +1,85 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import numpy as np
+import pyomo.environ as pyo
+import pytest
+
+from temoa.temoa_model.result_snapshot import VarSnapshot, param_array
+
+
+def _model() -> pyo.ConcreteModel:
+    m = pyo.ConcreteModel()
+    m.idx = pyo.Set(
+        initialize=[
+            ('A', 2020, 'coal'),
+            ('A', 2020, 'wind'),
+            ('A', 2025, 'coal'),
+            ('B', 2020, 'coal'),
+        ]
+    )
+    m.V_Flow = pyo.Var(m.idx)
+    m.V_Flow['A', 2020, 'coal'] = 4.0
+    m.V_Flow['A', 2020, 'wind'] = 1e-7
+    m.V_Flow['A', 2025, 'coal'] = 2.5
+    # B, 2020, coal is left without a value
+    m.eff = pyo.Param(['coal', 'wind'], initialize={'coal': 0.4, 'wind': 1.0})
+    return m
+
+
+def test_var_snapshot():
+    """
+    test the values, the epsilon screen and the grouped totals of a snapshot
+    """
+    snapshot = VarSnapshot.take(_model().V_Flow)
+    assert len(snapshot) == 4
+    assert snapshot.values.tolist() == [4.0, 1e-7, 2.5, 0.0]
+
+    keys, values = snapshot.select(snapshot.significant(1e-5))
+    assert keys == [('A', 2020, 'coal'), ('A', 2025, 'coal')]
+    assert values.tolist() == [4.0, 2.5]
+    assert snapshot.key_mask(lambda k: k[1] == 2020).tolist() == [True, True, False, True]
+    masked = snapshot.masked(snapshot.key_mask(lambda k: k[1] == 2020))
+    assert masked.keys == snapshot.keys
+    assert masked.values.tolist() == [4.0, 1e-7, 0.0, 0.0]
+
+    assert snapshot.totals((0, 2)) == pytest.approx(
+        {('A', 'coal'): 6.5, ('A', 'wind'): 1e-7, ('B', 'coal'): 0.0}
+    )
+    assert snapshot.as_dict()[('A', 2025, 'coal')] == 2.5
+
+
+@pytest.mark.parametrize(
+    'indices, expected',
+    [
+        (['coal', 'wind', 'coal', 'coal'], [0.4, 1.0, 0.4, 0.4]),
+        ([], []),
+    ],
+    ids=['repeated', 'empty'],
+)
+def test_param_array(indices, expected):
+    """
+    test the lookup of param values for a sequence of indices
+    """
+    res = param_array(_model().eff, indices)
+    assert isinstance(res, np.ndarray)
+    assert res.tolist() == expected
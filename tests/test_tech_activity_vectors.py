@@ -25,6 +25,10 @@ https://westernspark.us
 Created on:  4/16/24
 
 """
+import sqlite3
+from types import SimpleNamespace
+
+import numpy as np
 import pytest
 
 from temoa.extensions.modeling_to_generate_alternatives.tech_activity_vectors import (
@@ -68,3 +72,45 @@ def test__vector_engine():
         rows.append(matrix.get_nowait())
     for idx, row in enumerate(rows):
         assert row == pytest.approx(res_values[idx], abs=1e-2)
+
+
+def test_aggregation_matrix():
+    """
+    test that the aggregation matrix sums the flow variables into their category axes and spreads
+    a hull direction back over the variables
+    """
+    con = sqlite3.connect(':memory:')
+    con.execute('CREATE TABLE Technology (tech TEXT, category TEXT)')
+    con.executemany(
+        'INSERT INTO Technology VALUES (?, ?)',
+        [('coal', 'fossil'), ('gas', 'fossil'), ('wind', 'renewable'), ('unused', 'fossil')],
+    )
+    # flow indices are (r, p, s, d, i, t, v, o) and annual flow indices are (r, p, i, t, v, o)
+    model = SimpleNamespace(
+        tech_all={'coal', 'gas', 'wind'},
+        activeFlow_rpsditvo=[
+            ('R', 2020, 's', 'd', 'ethos', 'coal', 2020, 'elc'),
+            ('R', 2020, 's', 'd', 'ethos', 'wind', 2020, 'elc'),
+            ('R', 2025, 's', 'd', 'ethos', 'wind', 2020, 'elc'),
+        ],
+        activeFlow_rpitvo=[('R', 2020, 'ethos', 'gas', 2020, 'elc')],
+        V_FlowOut=SimpleNamespace(name='V_FlowOut'),
+        V_FlowOutAnnual=SimpleNamespace(name='V_FlowOutAnnual'),
+    )
+    tav = TechActivityVectors(con, model, optimal_cost=1.0, cost_relaxation=0.1)
+    agg = tav.aggregation_matrix()
+    assert agg.shape == (2, 4)
+    keys = tav.variable_keys()
+    assert [(name, idx[-3]) for name, idx in keys] == [
+        ('V_FlowOut', 'coal'),
+        ('V_FlowOutAnnual', 'gas'),
+        ('V_FlowOut', 'wind'),
+        ('V_FlowOut', 'wind'),
+    ]
+    assert agg @ np.array([1.0, 2.0, 3.0, 4.0]) == pytest.approx([3, 7])
+
+    tav.hull_monitor = False
+    tav.process_point(agg @ np.ones(4))
+    tav.coefficient_vector_queue.put(np.array([1.0, 3.0]))
+    tav.regenerate_hull = lambda: None
+    assert tav._next_coefficients() == pytest.approx([0.125, 0.125, 0.375, 0.375])
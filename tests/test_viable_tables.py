@@ -0,0 +1,60 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from temoa.temoa_model.model_checking.element_checker import ViableSet
+from temoa.temoa_model.model_checking.viable_tables import ViableTables
+from tests.test_element_checker import params
+
+
+@pytest.mark.parametrize('data', params, ids=(param['name'] for param in params))
+def test_sql_filter(data):
+    """the SQL screen should produce the same results (in the same order) as filter_elements"""
+    con = sqlite3.connect(':memory:')
+    dim = len(data['testers'][0])
+    columns = [f'col_{i}' for i in range(dim)]
+    con.execute(f'CREATE TABLE data ({", ".join(columns)})')
+    con.executemany(f'INSERT INTO data VALUES ({", ".join("?" * dim)})', data['testers'])
+
+    tables = ViableTables(con)
+    val_columns = [columns[i] for i in data.get('locs', (0,))]
+    tables.write('filt', data['filt'])
+    tables.screen_exceptions('filt', 'data', val_columns)
+    clause = tables.clause('filt', val_columns)
+    res = con.execute(f'SELECT {", ".join(columns)} FROM main.data WHERE {clause}').fetchall()
+    tables.close()
+    con.close()
+    assert res == data['expected']
+
+
+def test_empty_set():
+    con = sqlite3.connect(':memory:')
+    con.execute('CREATE TABLE data (region, tech)')
+    con.executemany('INSERT INTO data VALUES (?, ?)', [('A', 't1'), ('A+B', 't2')])
+    tables = ViableTables(con)
+    tables.write('empty', ViableSet([]))
+    clause = tables.clause('empty', ['tech'])
+    assert con.execute(f'SELECT * FROM data WHERE {clause}').fetchall() == []
+    tables.close()
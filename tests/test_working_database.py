@@ -0,0 +1,100 @@
+"""
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import sqlite3
+
+import pytest
+
+from temoa.extensions.myopic.working_database import WorkingDatabase
+
+
+@pytest.fixture
+def database(tmp_path):
+    database = tmp_path / 'myopic.sqlite'
+    con = sqlite3.connect(database)
+    con.execute('PRAGMA journal_mode = WAL')
+    con.execute('CREATE TABLE OutputNetCapacity (period INTEGER, capacity REAL)')
+    con.execute('INSERT INTO OutputNetCapacity VALUES (2020, 1.0)')
+    con.commit()
+    con.close()
+    return database
+
+
+def _rows(database) -> list[tuple]:
+    con = sqlite3.connect(database)
+    rows = con.execute('SELECT * FROM OutputNetCapacity ORDER BY period').fetchall()
+    con.close()
+    return rows
+
+
+def _write_window(con: sqlite3.Connection, period: int) -> None:
+    con.execute('INSERT INTO OutputNetCapacity VALUES (?, ?)', (period, float(period)))
+    con.commit()
+
+
+def test_checkpoints(database):
+    """
+    test that the file only changes at the checkpoints and holds everything on completion
+    """
+    working_db = WorkingDatabase(database, checkpoint_interval=2)
+    con = working_db.open()
+    _write_window(con, 2025)
+    assert not working_db.window_done()
+    assert _rows(database) == [(2020, 1.0)]
+    _write_window(con, 2030)
+    assert working_db.window_done()
+    assert _rows(database) == [(2020, 1.0), (2025, 2025.0), (2030, 2030.0)]
+    _write_window(con, 2035)
+    working_db.window_done()
+    working_db.close()
+    assert len(_rows(database)) == 4
+    assert working_db.checkpoints == 2
+    assert not working_db.checkpoint_path.exists()
+    # the checkpoint does not depend on a write-ahead log
+    con = sqlite3.connect(database)
+    assert con.execute('PRAGMA journal_mode').fetchone()[0] == 'delete'
+    con.close()
+
+
+def test_failed_run(database):
+    """
+    test that a run closed without a checkpoint leaves the file at the last checkpoint and that a
+    partial checkpoint is discarded on the next open
+    """
+    working_db = WorkingDatabase(database, checkpoint_interval=1)
+    con = working_db.open()
+    _write_window(con, 2025)
+    working_db.window_done()
+    _write_window(con, 2030)
+    working_db.close(checkpoint=False)
+    assert _rows(database) == [(2020, 1.0), (2025, 2025.0)]
+
+    working_db.checkpoint_path.write_bytes(b'half a database')
+    con = working_db.open()
+    assert not working_db.checkpoint_path.exists()
+    assert con.execute('SELECT count(*) FROM OutputNetCapacity').fetchone()[0] == 2
+    working_db.close()
+
+
+def test_bad_interval(database):
+    with pytest.raises(ValueError):
+        WorkingDatabase(database, checkpoint_interval=-1)
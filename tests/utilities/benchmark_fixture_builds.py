@@ -0,0 +1,94 @@
+"""
+Benchmark of the model build on the testing fixtures.  For each of the testing databases, the
+data is loaded once and the instance is built several times.  The best build time, the peak
+memory traced during one build and the size of the index of Efficiency are reported, along with
+the members held by the sparse index sets of the large params (see benchmark_sparse_params.py),
+where the model has them.
+
+The script only uses the config, the loader and the model, so it can be copied into an older
+checkout of the project to compare the builds before and after a change to the model.
+
+Run from the project root:  python -m tests.utilities.benchmark_fixture_builds
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from definitions import PROJECT_ROOT
+from temoa.temoa_model.hybrid_loader import HybridLoader
+from temoa.temoa_model.temoa_config import TemoaConfig
+from temoa.temoa_model.temoa_model import TemoaModel
+
+fixtures = ('utopia', 'test_system', 'mediumville', 'storageville')
+sparse_sets = (
+    'Efficiency_ritvo',
+    'CapacityFactorProcess_rsdtv',
+    'CapacityCredit_rptv',
+    'TechInputSplit_rpit',
+    'TechInputSplitAverage_rpit',
+    'TechOutputSplit_rpto',
+    'TechOutputSplitAverage_rpto',
+)
+num_builds = 5
+
+
+def load(name: str, output_path: Path) -> dict:
+    """load the data of a fixture from its testing config"""
+    config_file = Path(PROJECT_ROOT, 'tests', 'testing_configs', f'config_{name}.toml')
+    config = TemoaConfig.build_config(config_file=config_file, output_path=output_path, silent=True)
+    with sqlite3.connect(config.input_database) as con:
+        return HybridLoader(db_connection=con, config=config).create_data_dict()
+
+
+def benchmark(name: str, output_path: Path) -> None:
+    data = load(name, output_path)
+
+    build_time = float('inf')
+    for _ in range(num_builds):
+        tic = time.perf_counter()
+        TemoaModel().create_instance(data={None: data})
+        build_time = min(build_time, time.perf_counter() - tic)
+
+    tracemalloc.start()
+    instance = TemoaModel().create_instance(data={None: data})
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    index_size = len(instance.Efficiency.index_set())
+    members = sum(len(s) for s in map(instance.component, sparse_sets) if s is not None)
+    print(
+        f'{name:>12}:  build: {build_time:6.3f} s  peak memory: {peak / 1024**2:6.2f} MB  '
+        f'Efficiency index size: {index_size:>13,d}  sparse set members: {members:>6,d}'
+    )
+
+
+if __name__ == '__main__':
+    # the testing configs locate the databases relative to the tests folder
+    os.chdir(Path(PROJECT_ROOT, 'tests'))
+    with tempfile.TemporaryDirectory() as tmp:
+        for fixture in fixtures:
+            benchmark(fixture, Path(tmp))
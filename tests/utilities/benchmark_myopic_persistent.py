@@ -0,0 +1,86 @@
+"""
+Benchmark of the myopic run of config_utopia_myopic.toml with the instance rebuilt for each window
+vs. solved on one persistent instance of the whole horizon (the persistent_instance myopic option,
+see persistent_engine.py).  Both run with the appsi_highs solver on copies of the myopic testing
+database.  The best total runtime of the horizon is reported along with the totals of the net
+capacity and the discounted costs written, which should agree between the two.
+
+Run from the project root, after the testing databases are built by the tests:
+python -m tests.utilities.benchmark_myopic_persistent
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import shutil
+import sqlite3
+import tempfile
+import time
+import tomllib
+from pathlib import Path
+
+from definitions import PROJECT_ROOT
+from temoa.extensions.myopic.myopic_sequencer import MyopicSequencer
+from temoa.temoa_model.temoa_config import TemoaConfig
+
+config_file = Path(PROJECT_ROOT, 'tests', 'testing_configs', 'config_utopia_myopic.toml')
+database = Path(PROJECT_ROOT, 'tests', 'testing_outputs', 'myo_utopia.sqlite')
+num_runs = 3
+
+
+def run(persistent: bool, output_path: Path) -> tuple[float, float, float]:
+    """
+    Run the myopic sequence on a fresh copy of the database
+    :return: tuple of (runtime, total net capacity, total discounted cost)
+    """
+    db = output_path / database.name
+    shutil.copy(database, db)
+    with open(config_file, 'rb') as f:
+        data = tomllib.load(f)
+    data.update(input_database=db, output_database=db, solver_name='appsi_highs')
+    data['myopic']['persistent_instance'] = persistent
+    config = TemoaConfig(output_path=output_path, config_file=config_file, silent=True, **data)
+
+    tic = time.perf_counter()
+    MyopicSequencer(config=config).start()
+    runtime = time.perf_counter() - tic
+
+    with sqlite3.connect(db) as con:
+        capacity = con.execute('SELECT sum(capacity) FROM OutputNetCapacity').fetchone()[0]
+        cost = con.execute(
+            'SELECT sum(d_invest + d_fixed + d_var + d_emiss) FROM OutputCost'
+        ).fetchone()[0]
+    return runtime, capacity, cost
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        for persistent in (False, True):
+            runtimes = []
+            for k in range(num_runs):
+                output_path = Path(tmp, f'{persistent}_{k}')
+                output_path.mkdir()
+                runtime, capacity, cost = run(persistent, output_path)
+                runtimes.append(runtime)
+            label = 'persistent' if persistent else 'rebuild'
+            print(
+                f'{label:>10}:  horizon: {min(runtimes):6.3f} s  net capacity: {capacity:12.4f}  '
+                f'discounted cost: {cost:14.2f}'
+            )
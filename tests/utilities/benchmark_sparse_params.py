@@ -0,0 +1,126 @@
+"""
+Benchmark of declaring the large model Params over the product of their domain sets vs. over a
+sparse set of the loaded keys (as done for Efficiency, CapacityFactorProcess, etc. in the model).
+The domain set sizes and the number of keys are taken from the cached set sizes of the US_9R_8D
+model, and synthetic members are used, so the benchmark does not need the (large) database.
+
+The sparse set declared "within" the product of the domains is included to show why the model
+declares the sparse sets by dimension only:  checking each key against the product set is slow.
+
+The sparse variants trace more memory than the dense param:  the set holds its own hash table of
+the keys, next to the one of the param.  The key tuples themselves are shared, so the cost is ~56
+bytes per loaded row (~2.5 MB for Efficiency here), which is small next to the variables of the
+same model (~19 million flow variables).  benchmark_fixture_builds.py compares full builds.
+
+Run from the project root:  python -m tests.utilities.benchmark_sparse_params
+
+Tools for Energy Model Optimization and Analysis (Temoa):
+An open source framework for energy systems optimization modeling
+
+Copyright (C) 2015,  NC State University
+
+This program is free software; you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation; either version 2 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+A complete copy of the GNU General Public License v2 (GPLv2) is available
+in LICENSE.txt.  Users uncompressing this from an archive may not have
+received this license file.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import json
+import random
+import time
+import tracemalloc
+from functools import reduce
+from operator import mul
+from pathlib import Path
+
+import pyomo.environ as pyo
+
+from definitions import PROJECT_ROOT
+
+set_size_file = Path(PROJECT_ROOT, 'tests', 'testing_data', 'US_9R_8D_set_sizes.json')
+with open(set_size_file) as f:
+    sizes = json.load(f)
+
+# the Efficiency param has one entry per process, approximated by the size of LifetimeProcess_rtv
+domains = (
+    'RegionalIndices',
+    'commodity_physical',
+    'tech_all',
+    'vintage_all',
+    'commodity_carrier',
+)
+num_keys = sizes['LifetimeProcess_rtv']
+num_lookups = 200_000
+
+rng = random.Random(42)
+members = {name: [f'{name}_{i}' for i in range(sizes[name])] for name in domains}
+keys = sorted({tuple(rng.choice(members[name]) for name in domains) for _ in range(num_keys)})
+values = {key: rng.random() for key in keys}
+# half hits, half misses
+lookups = rng.choices(keys, k=num_lookups // 2)
+lookups += [tuple(rng.choice(members[name]) for name in domains) for _ in range(num_lookups // 2)]
+
+
+variants = ('dense', 'sparse within product', 'sparse')
+
+
+def make_model(variant: str) -> pyo.AbstractModel:
+    """a model with only the Efficiency param and its domains, declared per the variant"""
+    m = pyo.AbstractModel()
+    for name in domains:
+        m.add_component(name, pyo.Set())
+    sets = [m.component(name) for name in domains]
+    match variant:
+        case 'dense':
+            m.Efficiency = pyo.Param(*sets, within=pyo.NonNegativeReals)
+        case 'sparse within product':
+            m.Efficiency_ritvo = pyo.Set(within=reduce(mul, sets))
+            m.Efficiency = pyo.Param(m.Efficiency_ritvo, within=pyo.NonNegativeReals)
+        case 'sparse':
+            m.Efficiency_ritvo = pyo.Set(dimen=len(sets))
+            m.Efficiency = pyo.Param(m.Efficiency_ritvo, within=pyo.NonNegativeReals)
+    return m
+
+
+def benchmark(variant: str) -> None:
+    data = {name: members[name] for name in domains}
+    if variant != 'dense':
+        data['Efficiency_ritvo'] = keys
+    data['Efficiency'] = values
+    model = make_model(variant)
+
+    tracemalloc.start()
+    tic = time.perf_counter()
+    instance = model.create_instance(data={None: data})
+    build_time = time.perf_counter() - tic
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    tic = time.perf_counter()
+    found = sum(key in instance.Efficiency for key in lookups)
+    lookup_time = time.perf_counter() - tic
+
+    index_size = len(instance.Efficiency.index_set())
+    print(
+        f'{variant:>22}:  index size: {index_size:>17,d}  build: {build_time:6.2f} s  '
+        f'peak memory: {peak / 1024**2:6.1f} MB  lookups: {lookup_time:5.2f} s ({found:,d} found)'
+    )
+
+
+if __name__ == '__main__':
+    print(
+        f'Efficiency with {len(keys):,d} keys and {num_lookups:,d} lookups, domain sizes from '
+        f'{set_size_file.name}'
+    )
+    for variant in variants:
+        benchmark(variant)